@@ -1,16 +1,36 @@
-from flask import Flask, render_template
+from flask import render_template
 
-from config.constants import PORT
+from config.constants import PORT, ROAMING_ENABLED
+from controllers.assets_controller import assets_bp
+from controllers.async_views import AsyncViewsFlask
+from controllers.camera_controller import camera_bp
+from controllers.config_controller import config_bp
+from controllers.debug_controller import debug_bp, TracingJSONProvider
 from controllers.device_mode_controller import mode_bp
 from controllers.ethernet_controller import ethernet_bp
+from controllers.events_controller import events_bp
+from controllers.fleet_controller import fleet_bp
+from controllers.jobs_controller import jobs_bp
+from controllers.metrics_controller import metrics_bp
 from controllers.wifi_controller import wifi_bp
+from models.roaming import roaming_manager
+from models.signal_history import signal_history
 
 
 port = int(PORT)
-app = Flask(__name__)
+app = AsyncViewsFlask(__name__)
+app.json = TracingJSONProvider(app)
 app.register_blueprint(mode_bp)
 app.register_blueprint(ethernet_bp)
 app.register_blueprint(wifi_bp)
+app.register_blueprint(config_bp)
+app.register_blueprint(events_bp)
+app.register_blueprint(jobs_bp)
+app.register_blueprint(metrics_bp)
+app.register_blueprint(assets_bp)
+app.register_blueprint(camera_bp)
+app.register_blueprint(fleet_bp)
+app.register_blueprint(debug_bp)
 
 @app.route('/')
 def index():
@@ -21,4 +41,7 @@ def no_camera():
     return render_template('no_camera.html')
 
 if __name__ == '__main__':
+    signal_history.start()
+    if ROAMING_ENABLED:
+        roaming_manager.start()
     app.run(port=port)
@@ -0,0 +1,217 @@
+"""
+Async entry point: serves the app as an ASGI application on an asyncio event loop.
+
+    gunicorn --worker-class asgi asgi:application
+
+serve.py does this when SERVER_MODE is 'async'. A request for one of the app's `async def` views
+is handled as a coroutine on the server's event loop (see controllers/async_views.py), so any
+number of them can wait on nmcli without holding a thread. Every other request runs through the
+unchanged Flask app on a pool of ASGI_SYNC_THREADS threads. asgiref's WsgiToAsgi is not used
+because it runs every request on one thread and buffers whole responses, which the /events
+stream cannot live with.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app import app
+from config.constants import ASGI_SYNC_THREADS, ASGI_MAX_BODY_BYTES
+from controllers.async_views import AsyncViewsFlask
+
+# Marks the end of a streamed body read on the thread pool
+_END = object()
+
+
+class AsgiApp:
+    """
+    ASGI front for a Flask app, awaiting its async views on the event loop and running every
+    other request on a pool thread.
+    """
+
+    def __init__(self, flask_app: AsyncViewsFlask, threads: int = ASGI_SYNC_THREADS, max_body: int = ASGI_MAX_BODY_BYTES):
+        self.flask_app = flask_app
+        self.max_body = max_body
+        self._executor = ThreadPoolExecutor(threads, thread_name_prefix='asgi-sync')
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope type '{scope['type']}'")
+
+        try:
+            body = await self._read_body(receive)
+        except ValueError:
+            await _send_plain(send, 413, b'Request body too large')
+            return
+        if body is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        environ = wsgi_environ(scope, body)
+        if self.flask_app.async_view(environ) is not None:
+            status, headers, chunks, stream = await self._call_async(environ)
+        else:
+            status, headers, chunks, stream = await loop.run_in_executor(self._executor, self._call_wsgi, environ)
+
+        await send({'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]})
+        if stream is None:
+            await send({'type': 'http.response.body', 'body': b''.join(chunks), 'more_body': False})
+        else:
+            await self._send_stream(stream, receive, send)
+
+    async def _call_async(self, environ: dict) -> tuple:
+        """
+        Serves a request for an async view on the event loop. Its response is always read in full.
+        """
+        started: Dict[str, Any] = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+
+        app_iter = await self.flask_app.async_wsgi_app(environ, start_response)
+        try:
+            return started['status'], started['headers'], list(app_iter), None
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    def _call_wsgi(self, environ: dict) -> tuple:
+        """
+        Runs the Flask app on a pool thread. Bodies of known length are read there in full; streams
+        are returned unread, to be pulled chunk by chunk.
+        """
+        started: Dict[str, Any] = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+
+        app_iter = self.flask_app(environ, start_response)
+        headers = started['headers']
+        if not any(name.lower() == 'content-length' for name, _ in headers):
+            return started['status'], headers, None, app_iter
+        try:
+            return started['status'], headers, list(app_iter), None
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    async def _send_stream(self, app_iter, receive: Callable, send: Callable):
+        """
+        Sends a streamed body as the pool thread produces it, until it ends or the client disconnects.
+        """
+        loop = asyncio.get_running_loop()
+        iterator = iter(app_iter)
+        disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+        pending = None
+        try:
+            while True:
+                pending = loop.run_in_executor(self._executor, next, iterator, _END)
+                await asyncio.wait([pending, disconnected], return_when=asyncio.FIRST_COMPLETED)
+                if not pending.done():
+                    break
+                chunk, pending = pending.result(), None
+                if chunk is _END:
+                    await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+                    break
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        finally:
+            disconnected.cancel()
+            if pending is not None:
+                # A generator cannot be closed while it runs; wait for the chunk it is producing
+                await asyncio.wait([pending])
+            if hasattr(app_iter, 'close'):
+                await loop.run_in_executor(self._executor, app_iter.close)
+
+    async def _read_body(self, receive: Callable) -> Optional[bytes]:
+        """
+        Returns the request body, or None if the client disconnected first.
+
+        Raises:
+            ValueError: If the body is larger than max_body.
+        """
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body:
+                raise ValueError("Request body too large")
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    async def _lifespan(self, receive: Callable, send: Callable):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def wsgi_environ(scope: dict, body: bytes) -> dict:
+    """
+    Builds the WSGI environ of an ASGI HTTP request whose body has been read.
+    """
+    server = scope.get('server') or ('localhost', 80)
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] if server[1] is not None else 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    client = scope.get('client')
+    if client:
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = client[0], str(client[1])
+
+    for name, value in scope.get('headers', []):
+        name, value = name.decode('latin-1').lower(), value.decode('latin-1')
+        if name == 'content-type':
+            key = 'CONTENT_TYPE'
+        elif name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The body has been read in full, chunked or not
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+async def _wait_for_disconnect(receive: Callable):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _send_plain(send: Callable, status: int, body: bytes):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'text/plain'), (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body, 'more_body': False})
+
+
+application = AsgiApp(app)
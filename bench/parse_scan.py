@@ -0,0 +1,77 @@
+"""
+Microbenchmark: parsing a large `nmcli -t -f SSID,SIGNAL,ACTIVE,BSSID device wifi` dump.
+
+Compares models/nmcli_parser.py with the split-and-rebuild loop NmcliBackend used before it.
+
+    python -m bench.parse_scan
+    python -m bench.parse_scan --rows 5000 --repeat 20
+"""
+import argparse
+import random
+import timeit
+
+from config.constants import NMCLI_SCAN_WIFI_NETWORKS
+from models.nmcli_parser import parse_terse, terse_fields
+
+SCAN_FIELDS = terse_fields(NMCLI_SCAN_WIFI_NETWORKS)
+
+
+def scan_dump(rows: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    lines = []
+    for index in range(rows):
+        ssid = f"Neighbour-{index}" if index % 10 else f"Cafe\\:Guest-{index}"
+        bssid = '\\:'.join(f"{rng.randrange(256):02X}" for _ in range(6))
+        lines.append(f"{ssid}:{rng.randrange(100)}:{'yes' if index == 0 else 'no'}:{bssid}")
+    return '\n'.join(lines) + '\n'
+
+
+def legacy_parse(output: str):
+    access_points = []
+    for line in output.splitlines():
+        parts = line.split(':')
+        if len(parts) >= 4:
+            ssid = parts[0].strip()
+            signal = parts[1].strip()
+            active = parts[2].strip()
+            bssid_1 = parts[3].strip()
+            bssid_2 = parts[4].strip()
+            bssid_3 = parts[5].strip()
+            bssid_4 = parts[6].strip()
+            bssid_5 = parts[7].strip()
+            bssid_6 = parts[8].strip()
+
+            bssid = f"{bssid_1}:{bssid_2}:{bssid_3}:{bssid_4}:{bssid_5}:{bssid_6}".replace("\\", "")
+
+            access_points.append({'SSID': ssid, 'SIGNAL': signal, 'ACTIVE': active, 'BSSID': bssid})
+    return access_points
+
+
+def current_parse(output: str):
+    return [{'SSID': ssid, 'SIGNAL': signal, 'ACTIVE': active, 'BSSID': bssid}
+            for ssid, signal, active, bssid in parse_terse(output, SCAN_FIELDS)]
+
+
+def records_only(output: str):
+    return parse_terse(output, SCAN_FIELDS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    output = scan_dump(args.rows)
+    print(f"{args.rows} rows, {len(output)} bytes, best of {args.repeat}")
+    timings = {}
+    for name, function in (('legacy split', legacy_parse), ('parse_terse + dicts', current_parse),
+                           ('parse_terse records', records_only)):
+        best = min(timeit.repeat(lambda: function(output), number=1, repeat=args.repeat))
+        timings[name] = best
+        print(f"{name:<22} {best * 1000:8.3f} ms  {args.rows / best:12.0f} rows/s")
+    print(f"speed-up (dicts): {timings['legacy split'] / timings['parse_terse + dicts']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Latency profiles for the fake nmcli. Each profile becomes FAKE_NMCLI_* environment variables
+for the benchmarked server, so a run is reproducible from its profile name alone.
+
+The delays come on top of the fake's own interpreter start-up (~20 ms), which stands in for
+the cost of spawning the real nmcli.
+"""
+from typing import Dict
+
+PROFILES: Dict[str, Dict[str, int]] = {
+    # App overhead only: nmcli answers immediately
+    'instant': {'access_points': 5, 'latency_ms': 0, 'scan_latency_ms': 0, 'rescan_latency_ms': 0,
+                'mutate_latency_ms': 0},
+    # Quiet site, Raspberry Pi 3-class timings
+    'small': {'access_points': 5, 'latency_ms': 40, 'scan_latency_ms': 80, 'rescan_latency_ms': 2500,
+              'mutate_latency_ms': 300},
+    'typical': {'access_points': 50, 'latency_ms': 60, 'scan_latency_ms': 150, 'rescan_latency_ms': 3000,
+                'mutate_latency_ms': 500},
+    # Busy venue with hundreds of visible networks
+    'crowded': {'access_points': 500, 'latency_ms': 60, 'scan_latency_ms': 400, 'rescan_latency_ms': 4000,
+                'mutate_latency_ms': 500},
+}
+
+
+def profile_environment(name: str, seed: int = 1) -> Dict[str, str]:
+    """
+    Returns the FAKE_NMCLI_* environment variables for a profile.
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile '{name}'. Choose one of: {', '.join(PROFILES)}.")
+    environment = {f"FAKE_NMCLI_{key.upper()}": str(value) for key, value in PROFILES[name].items()}
+    environment['FAKE_NMCLI_SEED'] = str(seed)
+    return environment
@@ -0,0 +1,312 @@
+"""
+Endpoint benchmarks against a fake nmcli.
+
+Starts the production server (bench/server.py) with bench/fake_nmcli first on PATH, then
+drives every endpoint at fixed concurrency levels over keep-alive HTTP connections and
+reports latency percentiles and throughput per endpoint and level.
+
+    python -m bench.run --profile typical
+    python -m bench.run --profile typical --save                 # store bench/baselines/typical.json
+    python -m bench.run --profile typical --compare              # compare against the stored baseline
+    python -m bench.run --profile crowded --concurrency 1 8 --requests 400 --output /tmp/crowded.json
+    python -m bench.run --profile typical --mode sync async --concurrency 16 64 256
+
+--mode picks the server mode ('sync' threads or 'async' asyncio, see serve.py); baselines are
+kept per mode. Given both modes, each is run in turn and the second is compared against the first.
+
+With --compare the exit status is 1 when any endpoint's p95 latency grew, or its throughput
+dropped, by more than --tolerance relative to the baseline.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from bench.profiles import PROFILES, profile_environment
+from serve import SERVER_MODES
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+FAKE_NMCLI_DIR = os.path.join(BENCH_DIR, 'fake_nmcli')
+BASELINE_DIR = os.path.join(BENCH_DIR, 'baselines')
+
+# (name, method, path, JSON body). '{job_id}' in a path is filled with the id of a job queued
+# just before that endpoint runs. POST /device_mode, /reboot and /shutdown are left out: they
+# reboot or power off the machine running the benchmark.
+ENDPOINTS: List[Tuple[str, str, str, Optional[dict]]] = [
+    ('wifi_state', 'GET', '/wifi_state', None),
+    ('scan_wifi_networks', 'GET', '/scan_wifi_networks', None),
+    ('remembered_wifi_connections', 'GET', '/remembered_wifi_connections', None),
+    ('active_wifi_network', 'GET', '/active_wifi_network', None),
+    ('wifi_ip_and_mask', 'GET', '/wifi_ip_and_mask', None),
+    ('ethernet_ip_and_mask', 'GET', '/ethernet_ip_and_mask', None),
+    ('device_mode', 'GET', '/device_mode', None),
+    ('set_autoconnect_on', 'POST', '/set_autoconnect_on_to_wifi_connection', {'connection_name': 'Box-000'}),
+    ('set_autoconnect_off', 'POST', '/set_autoconnect_off_to_wifi_connection', {'connection_name': 'Box-000'}),
+    ('set_ethernet_ip_and_mask', 'POST', '/set_ethernet_ip_and_mask', {'ip': '192.168.1.20', 'mask': '24'}),
+    ('disconnect_from_wifi_connection', 'POST', '/disconnect_from_wifi_connection', {'connection_name': 'Box-000'}),
+    ('delete_known_wifi_connection', 'POST', '/delete_known_wifi_connection', {'connection_name': 'Box-005'}),
+    # Coalesced into the job already queued for the same connection, so most requests only enqueue
+    ('connect_to_known_wifi_connection', 'POST', '/connect_to_known_wifi_connection', {'connection_name': 'Box-000'}),
+    ('connect_to_new_ap', 'POST', '/connect_to_new_ap', {'ssid': 'Box-010', 'password': 'benchmark'}),
+    ('job_status', 'GET', '/jobs/{job_id}', None),
+    # The fake never changes state, so every request plans these steps again
+    ('config_apply', 'POST', '/config/apply', {'ethernet': {'ip': '192.168.1.20', 'mask': '24'},
+                                               'autoconnect': {'Box-000': False}}),
+]
+JOB_ENDPOINT = ('POST', '/connect_to_known_wifi_connection', {'connection_name': 'Box-000'})
+
+DEFAULT_CONCURRENCY = [1, 4, 16]
+DEFAULT_REQUESTS = 200
+WARMUP_REQUESTS = 3
+SERVER_START_TIMEOUT_SECONDS = 20.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(profile: str, seed: int, port: int, mode: str = 'sync') -> subprocess.Popen:
+    """
+    Starts the server with the fake nmcli on PATH and waits until it answers.
+    """
+    environment = dict(os.environ, **profile_environment(profile, seed))
+    environment['PATH'] = FAKE_NMCLI_DIR + os.pathsep + environment.get('PATH', '')
+    process = subprocess.Popen([sys.executable, '-m', 'bench.server', f"127.0.0.1:{port}", mode], cwd=REPO_DIR,
+                               env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Benchmark server exited with code {process.returncode}.")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/metrics')
+            connection.getresponse().read()
+            connection.close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError("Benchmark server did not start in time.")
+
+
+def send(connection: http.client.HTTPConnection, method: str, path: str, body: Optional[dict]) -> int:
+    headers, payload = {}, None
+    if body is not None:
+        headers['Content-Type'] = 'application/json'
+        payload = json.dumps(body)
+    connection.request(method, path, body=payload, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def queue_job(port: int) -> str:
+    """
+    Queues a job through JOB_ENDPOINT and returns its id.
+    """
+    method, path, body = JOB_ENDPOINT
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request(method, path, body=json.dumps(body), headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status != 202:
+        raise RuntimeError(f"Queueing a job returned HTTP {response.status}.")
+    return payload['job_id']
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(port: int, method: str, path: str, body: Optional[dict], concurrency: int, requests: int) -> Dict[str, float]:
+    """
+    Sends `requests` requests split evenly over `concurrency` clients that start together.
+
+    Returns:
+        Dict[str, float]: p50/p95/p99/mean latency in milliseconds, requests per second and error count.
+    """
+    per_client = max(1, requests // concurrency)
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def client():
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        own_latencies, own_errors = [], 0
+        barrier.wait()
+        for _ in range(per_client):
+            started = time.perf_counter()
+            try:
+                status = send(connection, method, path, body)
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                status = 0
+            own_latencies.append(time.perf_counter() - started)
+            if status >= 400 or status == 0:
+                own_errors += 1
+        connection.close()
+        with lock:
+            latencies.extend(own_latencies)
+            errors[0] += own_errors
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+        'rps': round(len(latencies) / wall, 1),
+        'errors': errors[0],
+    }
+
+
+def run(profile: str, seed: int, concurrency: List[int], requests: int, endpoints: List[str],
+        mode: str = 'sync') -> dict:
+    port = free_port()
+    server = start_server(profile, seed, port, mode)
+    results: Dict[str, Dict[str, dict]] = {}
+    try:
+        for name, method, path, body in ENDPOINTS:
+            if endpoints and name not in endpoints:
+                continue
+            if '{job_id}' in path:
+                path = path.format(job_id=queue_job(port))
+            warmup = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+            for _ in range(WARMUP_REQUESTS):
+                send(warmup, method, path, body)
+            warmup.close()
+
+            results[name] = {}
+            for level in concurrency:
+                results[name][str(level)] = measure(port, method, path, body, level, requests)
+                print_row(name, level, results[name][str(level)])
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        'meta': {
+            'profile': profile,
+            'mode': mode,
+            'seed': seed,
+            'requests': requests,
+            'concurrency': concurrency,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+
+
+def print_row(name: str, level: int, result: dict):
+    print(f"{name:<32} c={level:<3} p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms "
+          f"p99={result['p99_ms']:>8.2f}ms rps={result['rps']:>8.1f} errors={result['errors']}")
+
+
+def baseline_path(profile: str, mode: str) -> str:
+    name = profile if mode == 'sync' else f"{profile}-{mode}"
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Lists the endpoints and levels that regressed beyond the tolerance.
+    """
+    regressions = []
+    for name, levels in current['results'].items():
+        for level, result in levels.items():
+            previous = baseline['results'].get(name, {}).get(level)
+            if previous is None:
+                continue
+            p95_change = result['p95_ms'] / previous['p95_ms'] - 1 if previous['p95_ms'] else 0.0
+            rps_change = result['rps'] / previous['rps'] - 1 if previous['rps'] else 0.0
+            print(f"{name:<32} c={level:<3} p95 {previous['p95_ms']:>8.2f} -> {result['p95_ms']:>8.2f}ms "
+                  f"({p95_change:+.0%})  rps {previous['rps']:>8.1f} -> {result['rps']:>8.1f} ({rps_change:+.0%})")
+            if p95_change > tolerance or rps_change < -tolerance:
+                regressions.append(f"{name} c={level}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profile', default='typical', choices=sorted(PROFILES))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help='requests per endpoint and level')
+    parser.add_argument('--endpoint', action='append', default=[], help='only run this endpoint (repeatable)')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--save', action='store_true', help='store the results as the baseline for the profile')
+    parser.add_argument('--compare', action='store_true', help='compare against the baseline for the profile')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative regression (default 0.25)')
+    parser.add_argument('--mode', nargs='+', default=['sync'], choices=SERVER_MODES,
+                        help='server modes to run (default sync); with two, the second is compared against the first')
+    args = parser.parse_args(argv)
+
+    runs = {}
+    for mode in args.mode:
+        print(f"== {mode} server")
+        runs[mode] = run(args.profile, args.seed, args.concurrency, args.requests, args.endpoint, mode)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(runs[args.mode[0]] if len(runs) == 1 else {'modes': runs}, file, indent=2)
+
+    failed = False
+    for mode, current in runs.items():
+        path = baseline_path(args.profile, mode)
+        if args.save:
+            os.makedirs(BASELINE_DIR, exist_ok=True)
+            with open(path, 'w') as file:
+                json.dump(current, file, indent=2)
+            print(f"Baseline saved to {path}")
+
+        if args.compare:
+            if not os.path.exists(path):
+                print(f"No baseline at {path}; run with --save first.")
+                failed = True
+                continue
+            with open(path, 'r') as file:
+                baseline = json.load(file)
+            print(f"== {mode} against its baseline")
+            regressions = compare(current, baseline, args.tolerance)
+            if regressions:
+                print(f"Regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+                failed = True
+
+    if len(args.mode) == 2:
+        first, second = args.mode
+        print(f"== {second} against {first}")
+        compare(runs[second], runs[first], args.tolerance)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
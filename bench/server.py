@@ -0,0 +1,31 @@
+"""
+Runs the production server against whatever nmcli is first on PATH, forcing the nmcli backend
+so the fake is used even on a machine where NetworkManager is reachable over D-Bus. The device
+mode is read from a temporary file holding 'STA' instead of DEVICE_MODE_FILE_PATH.
+
+    python -m bench.server 127.0.0.1:8100
+    python -m bench.server 127.0.0.1:8100 async
+"""
+import os
+import sys
+import tempfile
+
+from models.backends import use_backend
+from models.backends.nmcli_backend import NmcliBackend
+from models.device_mode_store import device_mode_store
+from serve import DaughterboxServer, server_options
+
+
+def main(bind: str, mode: str = 'sync'):
+    use_backend(NmcliBackend())
+    with tempfile.TemporaryDirectory(prefix='daughterbox-bench-') as directory:
+        device_mode_store.path = os.path.join(directory, 'mode')
+        with open(device_mode_store.path, 'w') as file:
+            file.write('STA\n')
+        options = server_options(mode)
+        options.update({'bind': bind, 'pidfile': None, 'accesslog': None})
+        DaughterboxServer(options, mode).run()
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,24 @@
+"""
+Builds the fingerprinted static bundles served under ASSET_URL_PREFIX.
+
+    python build_assets.py
+
+The JS and CSS bundles defined in ASSET_BUNDLES (config/constants.py) are concatenated, minified
+and written to static/dist with a content hash in their names, along with gzip and brotli
+variants. Brotli needs the optional `brotli` package; without it only gzip variants are written.
+The page picks the new files up on its next render. Until a build exists it loads the source
+files directly, so development needs no build step.
+"""
+from models.static_assets import STATIC_FOLDER, build_assets, brotli
+
+
+def main():
+    manifest = build_assets(STATIC_FOLDER)
+    for name, file_name in sorted(manifest.items()):
+        print(f"{name} -> {file_name}")
+    if brotli is None:
+        print("brotli is not installed; only gzip variants were written")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,20 +3,202 @@ PORT = '8000'
 ETHERNET_CONNECTION = 'ETH'
 
 DEVICE_MODE_FILE_PATH = '/home/capstone/mode'
+# Reads are served from memory; the mode file's mtime is re-checked at most this often
+DEVICE_MODE_CHECK_INTERVAL_SECONDS = 1.0
 
-REBOOT_SYSTEM = "sudo reboot"
-SHUTDOWN_SYSTEM = "sudo shutdown -h now"
-
-NMCLI_GET_IP4_ADDRESS = "nmcli -t -f IP4.ADDRESS connection show '{}'"
-NMCLI_SET_IP4_ADDRESS = "nmcli connection modify '{}' ipv4.addresses '{}' ipv4.method manual"
-NMCLI_GET_WIFI_CONNECTIONS = "nmcli -t -f NAME,AUTOCONNECT,TYPE connection show | grep '802-11-wireless'"
-NMCLI_SCAN_WIFI_NETWORKS = "nmcli -t -f SSID,SIGNAL,ACTIVE,BSSID device wifi"
-NMCLI_GET_ACTIVE_WIFI_CONNECTION = "nmcli -t -f SSID,SIGNAL,ACTIVE device wifi | grep 'yes'"
-NMCLI_CONNECT_TO_NEW_AP = "nmcli dev wifi connect '{}' password '{}'"
-NMCLI_DISCONNECT_FROM_WIFI_CONNECTION = "nmcli connection down '{}'"
-NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION = "nmcli connection up '{}'"
-NMCLI_DELETE_KNOWN_WIFI_CONNECTION = "nmcli connection delete '{}'"
-NMCLI_SET_AUTOCONNECT_ON_TO_WIFI_CONNECTION = "nmcli connection modify '{}' connection.autoconnect yes"
-NMCLI_SET_AUTOCONNECT_OFF_TO_WIFI_CONNECTION = "nmcli connection modify '{}' connection.autoconnect no"
-
-MAC_PREFIX_FOR_RASPBERRY = "B8:27:EB"
\ No newline at end of file
+# System commands are argv tuples run without a shell by models/command_runner.py;
+# each '{}' element is replaced by one argument, so values are never re-quoted or split
+REBOOT_SYSTEM = ('sudo', 'reboot')
+SHUTDOWN_SYSTEM = ('sudo', 'shutdown', '-h', 'now')
+I2C_DISPLAY_OFF = ('i2cset', '-y', '{}', '{}', '0x00', '0xAE')
+
+NMCLI_GET_IP4_ADDRESS = ('nmcli', '-t', '-f', 'IP4.ADDRESS', 'connection', 'show', '{}')
+NMCLI_SET_IP4_ADDRESS = ('nmcli', 'connection', 'modify', '{}', 'ipv4.addresses', '{}', 'ipv4.method', 'manual')
+NMCLI_GET_IP4_SETTINGS = ('nmcli', '-t', '-f', 'ipv4.method,ipv4.addresses', 'connection', 'show', '{}')
+NMCLI_SET_IP4_SETTINGS = ('nmcli', 'connection', 'modify', '{}', 'ipv4.method', '{}', 'ipv4.addresses', '{}')
+NMCLI_GET_WIFI_CONNECTIONS = ('nmcli', '-t', '-f', 'NAME,AUTOCONNECT,TYPE', 'connection', 'show')
+NMCLI_SCAN_WIFI_NETWORKS = ('nmcli', '-t', '-f', 'SSID,SIGNAL,ACTIVE,BSSID', 'device', 'wifi')
+NMCLI_GET_ACTIVE_WIFI_CONNECTION = ('nmcli', '-t', '-f', 'SSID,SIGNAL,ACTIVE', 'device', 'wifi')
+NMCLI_CONNECT_TO_NEW_AP = ('nmcli', 'dev', 'wifi', 'connect', '{}', 'password', '{}')
+NMCLI_DISCONNECT_FROM_WIFI_CONNECTION = ('nmcli', 'connection', 'down', '{}')
+NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION = ('nmcli', 'connection', 'up', '{}')
+NMCLI_DELETE_KNOWN_WIFI_CONNECTION = ('nmcli', 'connection', 'delete', '{}')
+NMCLI_SET_AUTOCONNECT_ON_TO_WIFI_CONNECTION = ('nmcli', 'connection', 'modify', '{}', 'connection.autoconnect', 'yes')
+NMCLI_SET_AUTOCONNECT_OFF_TO_WIFI_CONNECTION = ('nmcli', 'connection', 'modify', '{}', 'connection.autoconnect', 'no')
+NMCLI_GET_CONNECTION_DEVICE = ('nmcli', '-t', '-f', 'GENERAL.DEVICES', 'connection', 'show', '{}')
+NMCLI_REAPPLY_DEVICE = ('nmcli', 'device', 'reapply', '{}')
+
+MAC_PREFIX_FOR_RASPBERRY = "B8:27:EB"
+
+# Seconds a read-only nmcli snapshot (known connections, active network, IP/mask) is served from memory
+STATE_CACHE_TTL_SECONDS = 2.0
+
+# Ethernet re-addressing: how long to wait for the device to report the new address, and how often to check
+ETHERNET_REACHABLE_TIMEOUT_SECONDS = 10.0
+ETHERNET_REACHABLE_POLL_SECONDS = 0.1
+
+NMCLI_RESCAN_WIFI_NETWORKS = ('nmcli', '-t', '-f', 'SSID,SIGNAL,ACTIVE,BSSID', 'device', 'wifi', 'list', '--rescan', 'yes')
+
+# Background Wi-Fi scanner: refresh interval, and the slower interval used once nobody has asked for results for a while
+WIFI_SCAN_INTERVAL_SECONDS = 15.0
+WIFI_SCAN_IDLE_AFTER_SECONDS = 120.0
+WIFI_SCAN_IDLE_INTERVAL_SECONDS = 300.0
+
+# Network backend: 'dbus' talks to NetworkManager over D-Bus, 'nmcli' spawns nmcli, 'auto' prefers D-Bus. Pick 'nmcli'
+# with SERVER_MODE 'async' to serve slow reads without a thread each (see SERVER_MODE below)
+NETWORK_BACKEND = 'auto'
+DBUS_CALL_TIMEOUT_SECONDS = 10.0
+DBUS_ACTIVATION_TIMEOUT_SECONDS = 45.0
+
+NMCLI_MONITOR = ('nmcli', 'monitor')
+
+# Server-Sent Events: wait for NetworkManager to go quiet before re-reading state, per-client queue size, keep-alive period
+NETWORK_MONITOR_DEBOUNCE_SECONDS = 0.5
+NETWORK_MONITOR_RESTART_SECONDS = 5.0
+EVENT_QUEUE_SIZE = 32
+EVENT_KEEPALIVE_SECONDS = 15.0
+
+# Long-running network mutations run on a bounded worker pool; finished jobs are kept for polling
+JOB_WORKERS = 2
+JOB_HISTORY_SIZE = 50
+
+# Production server (serve.py). Sized for a Raspberry Pi 3/4-class device with 1 GB of RAM:
+# - one worker, because the snapshot cache, scanner, event stream and job queue live in process memory;
+# - threads cover concurrent page requests plus one held open per /events subscriber (~1 MB RSS each);
+# - timeout is the worker heartbeat, not a request limit, so slow nmcli calls do not get the worker killed.
+SERVER_BIND = f"0.0.0.0:{PORT}"
+SERVER_WORKERS = 1
+SERVER_THREADS = 16
+SERVER_TIMEOUT_SECONDS = 60
+SERVER_GRACEFUL_TIMEOUT_SECONDS = 20
+SERVER_KEEPALIVE_SECONDS = 5
+SERVER_BACKLOG = 64
+SERVER_PID_FILE = '/tmp/daughterbox-server.pid'
+
+# Each /events subscriber holds a server thread for as long as it is connected; past this many, /events answers 503
+# so the rest of the threads stay free for page and API requests
+EVENT_MAX_SUBSCRIBERS = SERVER_THREADS // 2
+
+# Server mode: 'sync' runs the Flask app on gunicorn threads; 'async' runs asgi.py on gunicorn's asyncio worker (gunicorn
+# 24+), where the async views are coroutines on the worker's event loop and every other request runs on a pool of
+# ASGI_SYNC_THREADS threads (which also holds the /events subscribers). Only the nmcli backend reads without a thread;
+# the D-Bus backend's reads still take one from the loop's default executor. SERVER_ASYNC_CONNECTIONS caps open client
+# connections in async mode.
+SERVER_MODE = 'sync'
+SERVER_ASYNC_CONNECTIONS = 1000
+ASGI_SYNC_THREADS = SERVER_THREADS
+ASGI_MAX_BODY_BYTES = 1024 * 1024
+
+# Histogram buckets (seconds) for the /metrics route and command latency histograms
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Command runner: default timeout, per-command overrides (activation waits for DHCP), captured output cap, trace history
+COMMAND_TIMEOUT_SECONDS = 15.0
+COMMAND_TIMEOUTS = {
+    'NMCLI_RESCAN_WIFI_NETWORKS': 30.0,
+    'NMCLI_CONNECT_TO_NEW_AP': 60.0,
+    'NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION': 60.0,
+    'I2C_DISPLAY_OFF': 5.0,
+}
+COMMAND_OUTPUT_LIMIT_BYTES = 1024 * 1024
+COMMAND_TRACE_HISTORY = 100
+
+# Admission control for nmcli: the class of each command template, and per class how many commands run at once,
+# how many more may queue for a slot, and how long one waits before the request is turned away with a 503.
+# Mutations of the same connection also run one at a time, waiting at most CONNECTION_LOCK_TIMEOUT_SECONDS.
+COMMAND_CLASSES = {
+    'NMCLI_RESCAN_WIFI_NETWORKS': 'scan',
+    'NMCLI_SCAN_WIFI_NETWORKS': 'scan',
+    'NMCLI_GET_IP4_ADDRESS': 'read',
+    'NMCLI_GET_WIFI_CONNECTIONS': 'read',
+    'NMCLI_GET_ACTIVE_WIFI_CONNECTION': 'read',
+    'NMCLI_GET_CONNECTION_DEVICE': 'read',
+    'NMCLI_GET_IP4_SETTINGS': 'read',
+    'NMCLI_SET_IP4_ADDRESS': 'mutate',
+    'NMCLI_SET_IP4_SETTINGS': 'mutate',
+    'NMCLI_CONNECT_TO_NEW_AP': 'mutate',
+    'NMCLI_DISCONNECT_FROM_WIFI_CONNECTION': 'mutate',
+    'NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION': 'mutate',
+    'NMCLI_DELETE_KNOWN_WIFI_CONNECTION': 'mutate',
+    'NMCLI_SET_AUTOCONNECT_ON_TO_WIFI_CONNECTION': 'mutate',
+    'NMCLI_SET_AUTOCONNECT_OFF_TO_WIFI_CONNECTION': 'mutate',
+    'NMCLI_REAPPLY_DEVICE': 'mutate',
+}
+COMMAND_ADMISSION = {
+    'scan': {'concurrency': 1, 'queue': 4, 'wait_seconds': 20.0},
+    'read': {'concurrency': 3, 'queue': 8, 'wait_seconds': 5.0},
+    'mutate': {'concurrency': 2, 'queue': 8, 'wait_seconds': 60.0},
+}
+CONNECTION_LOCK_TIMEOUT_SECONDS = 90.0
+
+# Static asset bundles built by build_assets.py: bundle name -> source files under static/, in load order.
+# CSS @import rules are inlined. Hashed bundles and their manifest are written to static/<ASSET_OUTPUT_DIR>
+# and served under ASSET_URL_PREFIX with a year-long immutable Cache-Control.
+ASSET_BUNDLES = {
+    'app.css': ('css/styles.css',),
+    'app.js': ('js/endpoints.js', 'js/main.js', 'js/domEvents.js', 'js/modals.js', 'js/wifi.js', 'js/camera.js',
+               'js/events.js'),
+}
+ASSET_OUTPUT_DIR = 'dist'
+ASSET_URL_PREFIX = '/assets'
+ASSET_CACHE_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
+
+# Camera discovery: ports probed on each host, per-connection timeout, concurrent connection attempts,
+# how long results are fresh (known cameras and ARP neighbours are re-probed after this), how often the whole
+# subnet is swept, and the widest subnet swept (larger ones sweep only the /24 around the box's address)
+CAMERA_PORTS = {80: 'http', 8080: 'http', 554: 'rtsp', 8554: 'rtsp'}
+CAMERA_PROBE_TIMEOUT_SECONDS = 0.25
+CAMERA_PROBE_CONCURRENCY = 256
+CAMERA_CACHE_TTL_SECONDS = 30.0
+CAMERA_FULL_SWEEP_SECONDS = 300.0
+CAMERA_SWEEP_MIN_PREFIX = 24
+ARP_TABLE_PATH = '/proc/net/arp'
+
+# Camera stream proxy: upstream MJPEG path, time allowed for the first frame, upstream read timeout, how long an
+# upstream connection is kept after its last viewer leaves, reconnect delay, and the largest frame accepted
+CAMERA_STREAM_PATH = '/stream'
+CAMERA_STREAM_CONNECT_TIMEOUT_SECONDS = 5.0
+CAMERA_STREAM_READ_TIMEOUT_SECONDS = 10.0
+CAMERA_STREAM_LINGER_SECONDS = 10.0
+CAMERA_STREAM_RETRY_SECONDS = 2.0
+CAMERA_STREAM_MAX_FRAME_BYTES = 4 * 1024 * 1024
+
+# Fleet mode: peer daughterboxes queried by /fleet/state ('host', 'host:port' or 'http://host:port'; the port
+# defaults to PORT). Fleet mode is off while the list is empty. Each peer gets FLEET_PEER_TIMEOUT_SECONDS to answer
+# all of FLEET_ENDPOINTS, and up to FLEET_POOL_SIZE_PER_PEER idle keep-alive connections are kept to it.
+FLEET_PEERS = ()
+FLEET_ENDPOINTS = {
+    'device_mode': '/device_mode',
+    'active_wifi_network': '/active_wifi_network',
+    'ethernet_ip_and_mask': '/ethernet_ip_and_mask',
+}
+FLEET_PEER_TIMEOUT_SECONDS = 2.0
+FLEET_POOL_SIZE_PER_PEER = 4
+
+# Signal history: sampling interval of the active connection and visible access points, samples kept per series
+# (24 hours at the default interval), how many access points are tracked (the least recently seen is dropped for a
+# new one), and the most buckets /wifi/signal_history returns
+SIGNAL_SAMPLE_INTERVAL_SECONDS = 30.0
+SIGNAL_HISTORY_SAMPLES = 2880
+SIGNAL_HISTORY_MAX_ACCESS_POINTS = 16
+SIGNAL_HISTORY_MAX_POINTS = 500
+
+# Wi-Fi state deltas (/wifi_state?since=<version>): an access point's signal must move by at least this many points
+# to be sent as changed, and this many removals are remembered per list (older versions get the full state)
+WIFI_DELTA_SIGNAL_THRESHOLD = 5
+WIFI_DELTA_REMOVED_HISTORY = 256
+
+# Request tracing: requests taking at least SLOW_REQUEST_THRESHOLD_SECONDS have their spans logged and kept for
+# /debug/slow_requests (the last SLOW_REQUEST_HISTORY of them); a trace keeps at most TRACE_MAX_SPANS spans
+SLOW_REQUEST_THRESHOLD_SECONDS = 1.0
+SLOW_REQUEST_HISTORY = 50
+TRACE_MAX_SPANS = 200
+
+# Roaming (off unless ROAMING_ENABLED): in STA mode, switch to a known network once its best access point beats the
+# current one by ROAMING_HYSTERESIS signal points in every scan for ROAMING_SUSTAIN_SECONDS. After a switch attempt no
+# other is made for ROAMING_COOLDOWN_SECONDS. A scan is forced when none came in for ROAMING_SCAN_INTERVAL_SECONDS.
+ROAMING_ENABLED = False
+ROAMING_HYSTERESIS = 15
+ROAMING_SUSTAIN_SECONDS = 30.0
+ROAMING_COOLDOWN_SECONDS = 300.0
+ROAMING_SCAN_INTERVAL_SECONDS = 10.0
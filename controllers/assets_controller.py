@@ -0,0 +1,43 @@
+import mimetypes
+import os
+
+from flask import Blueprint, abort, request, send_from_directory, url_for
+
+from config.constants import ASSET_URL_PREFIX, ASSET_CACHE_MAX_AGE_SECONDS
+from models.static_assets import asset_manifest, COMPRESSED_VARIANTS, MANIFEST_NAME
+
+assets_bp = Blueprint('assets', __name__)
+
+
+@assets_bp.app_template_global()
+def asset_urls(name: str):
+    """
+    Returns the URLs to load for a bundle: its fingerprinted build, or its source files if it has not been built.
+    """
+    file_name = asset_manifest.built_file(name)
+    if file_name is not None:
+        return [url_for('assets.asset_route', filename=file_name)]
+    return [url_for('static', filename=source) for source in asset_manifest.bundles[name]]
+
+
+@assets_bp.route(f'{ASSET_URL_PREFIX}/<filename>', methods=['GET'])
+def asset_route(filename):
+    output_dir = asset_manifest.output_dir
+    if filename == MANIFEST_NAME or not os.path.isfile(os.path.join(output_dir, filename)):
+        abort(404)
+
+    # Serve the smallest precompressed variant the client accepts
+    served, encoding = filename, None
+    for candidate_encoding, suffix in COMPRESSED_VARIANTS:
+        if request.accept_encodings[candidate_encoding] and os.path.isfile(os.path.join(output_dir, filename + suffix)):
+            served, encoding = filename + suffix, candidate_encoding
+            break
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_from_directory(output_dir, served, mimetype=mimetype, max_age=ASSET_CACHE_MAX_AGE_SECONDS)
+    # The content hash is in the name, so a cached copy never needs revalidating
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_CACHE_MAX_AGE_SECONDS}, immutable'
+    response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    return response
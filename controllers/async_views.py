@@ -0,0 +1,63 @@
+import inspect
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from flask import Flask, request
+from werkzeug.exceptions import HTTPException
+
+from models.async_loop import background_loop
+
+
+class AsyncViewsFlask(Flask):
+    """
+    Flask app that serves its `async def` views on a shared event loop.
+
+    Through the WSGI interface, the async_to_sync() hook Flask provides for this runs them on the
+    process's background loop instead of a new event loop per request, and the request thread
+    waits for the result. asgi.py instead awaits them on the server's loop through
+    async_wsgi_app(), so a request that is waiting on NetworkManager holds no thread at all.
+    """
+
+    def async_to_sync(self, func: Callable[..., Awaitable]) -> Callable[..., Any]:
+        def run(*args, **kwargs):
+            # Scheduled from this thread, the task runs in a copy of its context, request context included
+            return background_loop.run(func(*args, **kwargs))
+
+        return run
+
+    def async_view(self, environ: dict) -> Optional[Callable[..., Awaitable]]:
+        """
+        Returns the `async def` view a request routes to, or None if it routes to a plain view or nowhere.
+        """
+        try:
+            rule, _ = self.url_map.bind_to_environ(environ).match(return_rule=True)
+        except HTTPException:
+            return None
+        view = self.view_functions.get(rule.endpoint)
+        return view if inspect.iscoroutinefunction(view) else None
+
+    async def async_wsgi_app(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        """
+        Same as wsgi_app() for a request routed to an `async def` view, awaiting the view on the
+        running loop. The request hooks, error handlers and teardown run as in Flask's own
+        request handling; the hooks are plain functions and must not block.
+        """
+        ctx = self.request_context(environ)
+        error: Optional[BaseException] = None
+        try:
+            try:
+                ctx.push()
+                try:
+                    response = self.preprocess_request()
+                    if response is None:
+                        if request.routing_exception is not None:
+                            self.raise_routing_exception(request)
+                        response = await self.view_functions[request.url_rule.endpoint](**request.view_args)
+                except Exception as e:
+                    response = self.handle_user_exception(e)
+                response = self.finalize_request(response)
+            except Exception as e:
+                error = e
+                response = self.handle_exception(e)
+            return response(environ, start_response)
+        finally:
+            ctx.pop(error)
@@ -0,0 +1,44 @@
+from flask import Blueprint, Response, jsonify, request
+
+from config.constants import CAMERA_STREAM_PATH, CAMERA_STREAM_CONNECT_TIMEOUT_SECONDS
+from models.camera_discovery import camera_discovery
+from models.camera_stream import camera_streams, STREAM_CONTENT_TYPE
+
+camera_bp = Blueprint('camera', __name__)
+
+
+@camera_bp.route('/cameras', methods=['GET'])
+def get_cameras_route():
+    try:
+        refresh = request.args.get('refresh') == '1'
+        cameras, discovered_at = camera_discovery.get_cameras(refresh=refresh)
+        return jsonify({'cameras': cameras, 'discovered_at': discovered_at})
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@camera_bp.route('/camera/<camera_id>/stream', methods=['GET'])
+def camera_stream_route(camera_id):
+    camera = camera_discovery.get_camera(camera_id)
+    if camera is None:
+        return jsonify({'error': f"Camera '{camera_id}' not found"}), 404
+    http_ports = [port for port in camera['ports'] if camera_discovery.ports.get(port) == 'http']
+    if not http_ports:
+        return jsonify({'error': f"Camera '{camera_id}' has no HTTP stream"}), 404
+
+    path = request.args.get('path', CAMERA_STREAM_PATH)
+    if not path.startswith('/'):
+        return jsonify({'error': 'Stream path must start with /'}), 400
+
+    viewer = camera_streams.subscribe(camera['ip'], http_ports[0], path)
+    try:
+        first = viewer.next_chunk(CAMERA_STREAM_CONNECT_TIMEOUT_SECONDS)
+    except RuntimeError as e:
+        viewer.close()
+        return jsonify({'error': str(e)}), 502
+    if first is None:
+        viewer.close()
+        return jsonify({'error': f"Camera '{camera_id}' sent no frame in time"}), 504
+
+    headers = {'Cache-Control': 'no-store', 'X-Accel-Buffering': 'no'}
+    return Response(viewer.chunks(first), mimetype=STREAM_CONTENT_TYPE, headers=headers, direct_passthrough=True)
@@ -0,0 +1,27 @@
+from typing import Any, Callable
+
+from flask import Response, jsonify, request
+
+
+def conditional_json_response(tag: str, build_body: Callable[[], Any]) -> Response:
+    """
+    Builds a JSON response validated by an entity tag.
+
+    If the request's If-None-Match already names the tag, a 304 Not Modified is returned and
+    the body is never built or serialized. Responses are marked no-cache, so clients may keep
+    them but must revalidate before reuse.
+
+    Args:
+        tag (str): Entity tag identifying the state the body is built from.
+        build_body (Callable[[], Any]): Returns the JSON-serializable body.
+
+    Returns:
+        Response: A 200 response carrying the body and ETag, or an empty 304.
+    """
+    if request.if_none_match.contains(tag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build_body())
+    response.set_etag(tag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
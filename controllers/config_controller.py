@@ -0,0 +1,31 @@
+import json
+
+from flask import Blueprint, jsonify, request
+
+from controllers.jobs_controller import job_accepted_response
+from controllers.overloaded import overloaded_response
+from models.admission import AdmissionRejected
+from models.config_model import plan_config, apply_config
+from models.job_queue import job_queue
+
+config_bp = Blueprint('config', __name__)
+
+
+@config_bp.route('/config/apply', methods=['POST'])
+def apply_config_route():
+    try:
+        document = request.get_json(silent=True)
+        steps = plan_config(document)
+        if not steps:
+            return jsonify({'message': 'Configuration already applied', 'steps': []}), 200
+
+        # Identical documents share a job; the job re-plans against the state it finds when it runs
+        key = ('config', json.dumps(document, sort_keys=True))
+        job, _ = job_queue.submit('apply_config', key, apply_config, document)
+        return job_accepted_response(job)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 500
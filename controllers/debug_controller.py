@@ -0,0 +1,62 @@
+import re
+import uuid
+
+from flask import Blueprint, g, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+from models.tracing import start_trace, current_trace, end_trace, span, slow_requests
+
+debug_bp = Blueprint('debug', __name__)
+
+# Client-supplied request ids are kept only if they look like an id, so they are safe to log and echo back
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+
+class TracingJSONProvider(DefaultJSONProvider):
+    """
+    Flask's JSON provider, timing every encoding as a 'json' span of the current request.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        with span('json.dumps', 'json'):
+            return super().dumps(obj, **kwargs)
+
+
+@debug_bp.before_app_request
+def start_request_trace():
+    request_id = request.headers.get('X-Request-ID', '')
+    if not REQUEST_ID_PATTERN.match(request_id):
+        request_id = uuid.uuid4().hex
+    g.trace_token = start_trace(request_id, request.method, request.path)
+
+
+@debug_bp.after_app_request
+def finish_request_trace(response):
+    trace = current_trace()
+    if trace is not None and 'trace_token' in g:
+        trace.finish(response.status_code)
+        slow_requests.record(trace)
+        response.headers['X-Request-ID'] = trace.request_id
+    return response
+
+
+@debug_bp.teardown_app_request
+def end_request_trace(error):
+    token = g.pop('trace_token', None)
+    if token is not None:
+        try:
+            end_trace(token)
+        except ValueError:
+            # Torn down in another context than the one it started in; that context is gone anyway
+            pass
+
+
+@debug_bp.route('/debug/slow_requests', methods=['GET'])
+def slow_requests_route():
+    try:
+        limit = int(request.args.get('limit', slow_requests.capacity))
+        if limit < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': "'limit' must be a positive integer"}), 400
+    return jsonify({'threshold_seconds': slow_requests.threshold, 'requests': slow_requests.recent(limit)}), 200
@@ -1,4 +1,6 @@
 from flask import Blueprint, jsonify, request
+
+from controllers.conditional import conditional_json_response
 from models.device_mode_model import get_device_mode, set_device_mode, delayed_reboot, delayed_shutdown
 
 mode_bp = Blueprint('mode', __name__)
@@ -8,7 +10,7 @@ mode_bp = Blueprint('mode', __name__)
 def get_device_mode_route():
     try:
         mode = get_device_mode()
-        return jsonify({'mode': mode}), 200
+        return conditional_json_response(f"mode-{mode}", lambda: {'mode': mode})
     except (EnvironmentError, FileNotFoundError, ValueError) as e:
         return jsonify({'error': str(e)}), 400
 
@@ -1,18 +1,25 @@
 from flask import Blueprint, jsonify, request
 
-from models.network_model import get_ip_and_mask
+from controllers.conditional import conditional_json_response
+from controllers.jobs_controller import job_accepted_response
+from controllers.overloaded import overloaded_response
+from models.admission import AdmissionRejected
+from models.job_queue import job_queue
+from models.network_model import get_ip_and_mask_with_tag_async
 from config.constants import ETHERNET_CONNECTION
-from models.ethernet_model import set_ethernet_ip_and_mask
+from models.backends import get_backend
+from models.ethernet_model import set_ethernet_ip_and_mask, parse_ethernet_address, current_ethernet_address
 
 ethernet_bp = Blueprint('ethernet', __name__)
 
 
 @ethernet_bp.route('/ethernet_ip_and_mask', methods=['GET'])
-def get_ethernet_ip_and_mask_route():
+async def get_ethernet_ip_and_mask_route():
     try:
-        eth_connection_name = ETHERNET_CONNECTION
-        data = get_ip_and_mask(eth_connection_name)
-        return jsonify(data), 200
+        data, tag = await get_ip_and_mask_with_tag_async(ETHERNET_CONNECTION)
+        return conditional_json_response(tag, lambda: data)
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -23,11 +30,18 @@ def set_ethernet_ip_and_mask_route():
         ip = request.json.get('ip')
         mask = request.json.get('mask')
 
-        if not ip or not mask:
-            return jsonify({'error': 'IP address and mask are required'}), 400
+        target = parse_ethernet_address(ip, mask)
+        if current_ethernet_address(get_backend()) == target:
+            return jsonify({'ip': str(target.ip), 'mask': str(target.network.prefixlen), 'changed': False,
+                            'method': None, 'reachable_after_ms': 0.0}), 200
 
-        result = set_ethernet_ip_and_mask(ip, mask)
-        return jsonify(result), 200
+        job, _ = job_queue.submit('set_ethernet_ip_and_mask', ('ethernet', ETHERNET_CONNECTION),
+                                  set_ethernet_ip_and_mask, str(target.ip), str(target.network.prefixlen))
+        return job_accepted_response(job)
 
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except RuntimeError as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
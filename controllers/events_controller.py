@@ -0,0 +1,35 @@
+import json
+import queue
+
+from flask import Blueprint, Response
+
+from config.constants import EVENT_KEEPALIVE_SECONDS
+from controllers.overloaded import overloaded_response
+from models.admission import AdmissionRejected
+from models.network_events import network_events
+
+events_bp = Blueprint('events', __name__)
+
+
+@events_bp.route('/events', methods=['GET'])
+def events_route():
+    try:
+        subscription = network_events.subscribe()
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+
+    def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = subscription.get(timeout=EVENT_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            network_events.unsubscribe(subscription)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream(), mimetype='text/event-stream', headers=headers)
@@ -0,0 +1,15 @@
+from flask import Blueprint, jsonify
+
+from models.fleet import fleet_client
+
+fleet_bp = Blueprint('fleet', __name__)
+
+
+@fleet_bp.route('/fleet/state', methods=['GET'])
+def get_fleet_state_route():
+    if not fleet_client.enabled:
+        return jsonify({'error': 'Fleet mode is disabled: no peers are configured'}), 404
+    try:
+        return jsonify(fleet_client.get_state())
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,23 @@
+from flask import Blueprint, jsonify, url_for
+
+from models.job_queue import job_queue, Job
+
+jobs_bp = Blueprint('jobs', __name__)
+
+
+def job_accepted_response(job: Job):
+    """
+    Builds the 202 Accepted response for a queued job.
+    """
+    status_url = url_for('jobs.get_job_route', job_id=job.id)
+    response = jsonify({'job_id': job.id, 'status': job.status, 'status_url': status_url})
+    response.headers['Location'] = status_url
+    return response, 202
+
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job_route(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': f"Job '{job_id}' not found"}), 404
+    return jsonify(job.to_dict()), 200
@@ -0,0 +1,31 @@
+import time
+
+from flask import Blueprint, Response, g, request
+
+from models.metrics import http_requests_total, http_request_duration_seconds, render_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# Blueprints whose routes get request counts and latency histograms
+INSTRUMENTED_BLUEPRINTS = ('mode', 'ethernet', 'wifi', 'config', 'camera', 'fleet')
+
+
+@metrics_bp.before_app_request
+def start_request_timer():
+    if request.blueprint in INSTRUMENTED_BLUEPRINTS:
+        g.request_started = time.perf_counter()
+
+
+@metrics_bp.after_app_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule
+        http_request_duration_seconds.labels(route).observe(time.perf_counter() - started)
+        http_requests_total.labels(route, request.method, str(response.status_code)).inc()
+    return response
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics_route():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,13 @@
+from flask import Response, jsonify
+
+from models.admission import AdmissionRejected
+
+
+def overloaded_response(error: AdmissionRejected) -> Response:
+    """
+    Builds the 503 sent when admission control turned a request away, telling the client when to retry.
+    """
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
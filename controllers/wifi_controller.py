@@ -1,28 +1,44 @@
+import hashlib
+
 from flask import Blueprint, jsonify, request
 
-from models.network_model import get_ip_and_mask
-from models.wifi_model import remembered_wifi_connections, scan_wifi_networks, get_active_wifi_connection, \
-    connect_to_new_ap, disconnect_from_wifi_connection, connect_to_known_wifi_connection, delete_known_wifi_connection, \
-    set_autoconnect_on_to_wifi_connection, set_autoconnect_off_to_wifi_connection
+from controllers.conditional import conditional_json_response
+from controllers.jobs_controller import job_accepted_response
+from controllers.overloaded import overloaded_response
+from models.admission import AdmissionRejected
+from models.job_queue import job_queue
+from models.network_model import get_ip_and_mask_with_tag_async
+from models.wifi_model import connect_to_new_ap, disconnect_from_wifi_connection, \
+    connect_to_known_wifi_connection, delete_known_wifi_connection, set_autoconnect_on_to_wifi_connection, \
+    set_autoconnect_off_to_wifi_connection, filter_raspberry_networks, get_wifi_state, \
+    remembered_wifi_connections_with_tag_async, get_active_wifi_connection_with_tag_async
+from models.roaming import roaming_manager
+from models.signal_history import signal_history
+from models.versioned_state import wifi_state_versions
+from models.wifi_scanner import wifi_scanner
 
 wifi_bp = Blueprint('wifi', __name__)
 
 
 @wifi_bp.route('/wifi_ip_and_mask', methods=['GET'])
-def get_wifi_ip_and_mask_route():
+async def get_wifi_ip_and_mask_route():
     try:
-        connection = get_active_wifi_connection()['SSID']
-        data = get_ip_and_mask(connection)
-        return jsonify(data), 200
+        connection = (await get_active_wifi_connection_with_tag_async())[0]['SSID']
+        data, tag = await get_ip_and_mask_with_tag_async(connection)
+        return conditional_json_response(tag, lambda: data)
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @wifi_bp.route('/remembered_wifi_connections', methods=['GET'])
-def get_remembered_wifi_connections_route():
+async def get_remembered_wifi_connections_route():
     try:
-        connections = remembered_wifi_connections()
-        return jsonify({'connections': connections})
+        connections, tag = await remembered_wifi_connections_with_tag_async()
+        return conditional_json_response(tag, lambda: {'connections': connections})
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 500
 
@@ -30,17 +46,62 @@ def get_remembered_wifi_connections_route():
 @wifi_bp.route('/scan_wifi_networks', methods=['GET'])
 def scan_wifi_networks_route():
     try:
-        networks = scan_wifi_networks()
-        return jsonify({'networks': networks})
+        rescan = request.args.get('rescan') == '1'
+        access_points, scanned_at = wifi_scanner.get_results(rescan=rescan)
+        # Each scan has its own timestamp, and the body is derived from that scan alone
+        return conditional_json_response(f"scan-{scanned_at!r}", lambda: {
+            'networks': filter_raspberry_networks(access_points), 'scanned_at': scanned_at})
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@wifi_bp.route('/wifi_state', methods=['GET'])
+def get_wifi_state_route():
+    try:
+        rescan = request.args.get('rescan') == '1'
+        access_points, scanned_at = wifi_scanner.get_results(rescan=rescan)
+        state = get_wifi_state(access_points)
+        state['scanned_at'] = scanned_at
+        state['version'] = wifi_state_versions.update(networks=state['networks'], connections=state['connections'])
+
+        since = request.args.get('since')
+        delta = wifi_state_versions.delta(int(since)) if since and since.isdigit() else None
+        if delta is None:
+            state['full'] = True
+            return jsonify(state)
+        # Only what changed after the client's version; the active network and IP/mask are small enough to resend
+        return jsonify({'full': False, 'version': state['version'], 'scanned_at': scanned_at,
+                        'network': state['network'], 'ip_and_mask': state['ip_and_mask'], **delta})
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 500
 
 
+@wifi_bp.route('/wifi/signal_history', methods=['GET'])
+def get_signal_history_route():
+    try:
+        window = float(request.args.get('window', 3600))
+        points = int(request.args.get('points', 60))
+        return jsonify(signal_history.history(window, points))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@wifi_bp.route('/wifi/roaming', methods=['GET'])
+def get_roaming_stats_route():
+    return jsonify(roaming_manager.stats()), 200
+
+
 @wifi_bp.route('/active_wifi_network', methods=['GET'])
-def get_active_wifi_connection_route():
+async def get_active_wifi_connection_route():
     try:
-        network = get_active_wifi_connection()
-        return jsonify({'network': network})
+        network, tag = await get_active_wifi_connection_with_tag_async()
+        return conditional_json_response(tag, lambda: {'network': network})
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 500
 
@@ -54,8 +115,10 @@ def connect_to_new_ap_route():
         if not ssid or not password:
             return jsonify({'error': 'SSID and password are required'}), 400
 
-        result = connect_to_new_ap(ssid, password)
-        return jsonify(result), 200
+        # A retry with a corrected password is a new job, not the pending attempt with the old one
+        key = ('wifi', ssid, hashlib.sha256(password.encode('utf-8')).hexdigest())
+        job, _ = job_queue.submit('connect_to_new_ap', key, connect_to_new_ap, ssid, password)
+        return job_accepted_response(job)
 
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 500
@@ -69,6 +132,8 @@ def disconnect_from_wifi_connection_route():
             return jsonify({'error': 'Connection name is required'}), 400
         disconnect_from_wifi_connection(connection_name)
         return jsonify({'message': f"Disconnected from network '{connection_name}' successfully."}), 200
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 500
 
@@ -79,8 +144,9 @@ def connect_to_known_wifi_connection_route():
         connection_name = request.json.get('connection_name')
         if not connection_name:
             return jsonify({'error': 'Connection name is required'}), 400
-        connect_to_known_wifi_connection(connection_name)
-        return jsonify({'message': f"Connected to network '{connection_name}' successfully."}), 200
+        job, _ = job_queue.submit('connect_to_known_wifi_connection', ('wifi', connection_name),
+                                  connect_to_known_wifi_connection, connection_name)
+        return job_accepted_response(job)
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 500
 
@@ -93,6 +159,8 @@ def delete_known_wifi_connection_route():
             return jsonify({'error': 'Connection name is required'}), 400
         delete_known_wifi_connection(connection_name)
         return jsonify({'message': f"Connection '{connection_name}' deleted successfully."}), 200
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 500
 
@@ -105,6 +173,8 @@ def set_autoconnect_on_to_wifi_connection_route():
             return jsonify({'error': 'Connection name is required'}), 400
         set_autoconnect_on_to_wifi_connection(connection_name)
         return jsonify({'message': f"Autoconnect set to 'yes' for connection '{connection_name}' successfully."}), 200
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 500
 
@@ -117,10 +187,7 @@ def set_autoconnect_off_to_wifi_connection_route():
             return jsonify({'error': 'Connection name is required'}), 400
         set_autoconnect_off_to_wifi_connection(connection_name)
         return jsonify({'message': f"Autoconnect set to 'no' for connection '{connection_name}' successfully."}), 200
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except RuntimeError as e:
         return jsonify({'error': str(e)}), 500
-
-
-
-
-
@@ -0,0 +1,250 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from config.constants import COMMAND_CLASSES, COMMAND_ADMISSION, CONNECTION_LOCK_TIMEOUT_SECONDS
+from models.metrics import admission_rejected_total, admission_waiting
+
+# Weight of the latest hold time in the running average used for Retry-After
+HOLD_TIME_SMOOTHING = 0.2
+
+
+class AdmissionRejected(RuntimeError):
+    """
+    Raised when a command or mutation was turned away because too many are already in progress.
+    Clients should retry after `retry_after` seconds.
+    """
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.stderr = None
+
+
+class AdmissionLimiter:
+    """
+    Bounds how many operations of one class run at once.
+
+    Up to `concurrency` callers hold a slot; up to `queue_size` more wait for one, each for at
+    most `wait_seconds`. Callers beyond that, or whose wait runs out, are rejected at once
+    instead of piling up, with a Retry-After estimated from how long slots have recently been held.
+
+    Threads wait with slot() and coroutines with async_slot(); both share the same slots and queue.
+    A freed slot goes to a waiting coroutine first, handed over directly so no thread can take it
+    before the coroutine's loop gets to run it.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, wait_seconds: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.wait_seconds = wait_seconds
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self._hold_seconds: Optional[float] = None
+        # (loop, future) of each waiting coroutine, in arrival order
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.rejected = 0
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Holds a slot for the duration of the block.
+
+        Raises:
+            AdmissionRejected: If the queue is full or no slot freed up in time.
+        """
+        self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[None]:
+        """
+        Like slot(), but waits for a free slot without blocking the event loop.
+
+        Raises:
+            AdmissionRejected: If the queue is full or no slot freed up in time.
+        """
+        await self._acquire_async()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def retry_after(self) -> int:
+        with self._cond:
+            return self._retry_after()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {'running': self._running, 'waiting': self._waiting, 'rejected': self.rejected,
+                    'concurrency': self.concurrency, 'queue_size': self.queue_size}
+
+    def _acquire(self):
+        with self._cond:
+            if self._running < self.concurrency:
+                self._running += 1
+                return
+            if self._waiting >= self.queue_size:
+                raise self._reject(f"Too many '{self.name}' network commands are queued")
+
+            self._waiting += 1
+            admission_waiting.labels(self.name).inc()
+            try:
+                if not self._cond.wait_for(lambda: self._running < self.concurrency, self.wait_seconds):
+                    raise self._reject(f"No '{self.name}' network command slot freed up within "
+                                       f"{self.wait_seconds:g} seconds")
+                self._running += 1
+            finally:
+                self._waiting -= 1
+                admission_waiting.labels(self.name).dec()
+
+    async def _acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._running < self.concurrency:
+                self._running += 1
+                return
+            if self._waiting >= self.queue_size:
+                raise self._reject(f"Too many '{self.name}' network commands are queued")
+
+            waiter = (loop, loop.create_future())
+            self._async_waiters.append(waiter)
+            self._waiting += 1
+            admission_waiting.labels(self.name).inc()
+
+        try:
+            await asyncio.wait([waiter[1]], timeout=self.wait_seconds)
+        except asyncio.CancelledError:
+            if not self._withdraw(waiter):
+                # A slot was handed to us just before the cancellation: pass it on
+                self._release(None)
+            raise
+
+        if self._withdraw(waiter):
+            with self._cond:
+                raise self._reject(f"No '{self.name}' network command slot freed up within "
+                                   f"{self.wait_seconds:g} seconds")
+
+    def _withdraw(self, waiter: Tuple[asyncio.AbstractEventLoop, asyncio.Future]) -> bool:
+        """
+        Takes a coroutine off the queue. Returns False if it was already handed a slot.
+        """
+        with self._cond:
+            if waiter not in self._async_waiters:
+                return False
+            self._async_waiters.remove(waiter)
+            self._waiting -= 1
+            admission_waiting.labels(self.name).dec()
+            return True
+
+    def _release(self, held: Optional[float]):
+        with self._cond:
+            if held is not None:
+                if self._hold_seconds is None:
+                    self._hold_seconds = held
+                else:
+                    self._hold_seconds += HOLD_TIME_SMOOTHING * (held - self._hold_seconds)
+
+            if self._async_waiters:
+                # The slot passes straight to the waiting coroutine, so _running stays as it is
+                loop, future = self._async_waiters.pop(0)
+                self._waiting -= 1
+                admission_waiting.labels(self.name).dec()
+                try:
+                    loop.call_soon_threadsafe(_wake, future)
+                    return
+                except RuntimeError:
+                    # Its loop is closed; nobody is left to use the slot
+                    pass
+
+            self._running -= 1
+            self._cond.notify()
+
+    def _reject(self, message: str) -> AdmissionRejected:
+        # Called with the condition held
+        self.rejected += 1
+        admission_rejected_total.labels(self.name).inc()
+        return AdmissionRejected(message, self._retry_after())
+
+    def _retry_after(self) -> int:
+        # Time for the queue ahead to drain through the slots, at the recent hold time
+        hold = self._hold_seconds if self._hold_seconds is not None else 1.0
+        return max(1, math.ceil(hold * (self._waiting + 1) / self.concurrency))
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ConnectionLocks:
+    """
+    One lock per connection name, so mutations of the same connection run one at a time and do not
+    race inside NetworkManager. Locks are reentrant and are dropped once nobody holds or waits for them.
+    """
+
+    def __init__(self, timeout: float = CONNECTION_LOCK_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # name -> [lock, holders and waiters]
+        self._locks: Dict[str, list] = {}
+
+    @contextmanager
+    def hold(self, *names: str) -> Iterator[None]:
+        """
+        Holds the locks of every named connection for the duration of the block. They are taken in
+        sorted order, so two callers locking overlapping sets cannot deadlock.
+
+        Raises:
+            AdmissionRejected: If a lock was not free within the timeout.
+        """
+        acquired = []
+        try:
+            for name in sorted(set(names)):
+                lock = self._reference(name)
+                if not lock.acquire(timeout=self.timeout):
+                    self._unreference(name)
+                    raise AdmissionRejected(f"Another change to connection '{name}' is still in progress",
+                                            math.ceil(self.timeout / 2))
+                acquired.append((name, lock))
+            yield
+        finally:
+            for name, lock in reversed(acquired):
+                lock.release()
+                self._unreference(name)
+
+    def _reference(self, name: str) -> threading.RLock:
+        with self._lock:
+            entry = self._locks.setdefault(name, [threading.RLock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _unreference(self, name: str):
+        with self._lock:
+            entry = self._locks[name]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[name]
+
+
+command_limiters = {name: AdmissionLimiter(name, options['concurrency'], options['queue'], options['wait_seconds'])
+                    for name, options in COMMAND_ADMISSION.items()}
+connection_locks = ConnectionLocks()
+
+
+def limiter_for(command: str) -> Optional[AdmissionLimiter]:
+    """
+    Returns the limiter of a command template's class, or None if the command is not limited.
+    """
+    command_class = COMMAND_CLASSES.get(command)
+    return command_limiters.get(command_class) if command_class else None
@@ -0,0 +1,148 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.constants import FLEET_POOL_SIZE_PER_PEER
+
+MAX_RESPONSE_BYTES = 1024 * 1024
+
+
+class HttpResponse:
+    """
+    A response read by AsyncHttpPool.
+    """
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode('utf-8'))
+
+
+class AsyncHttpPool:
+    """
+    Minimal HTTP/1.1 client for asyncio that keeps idle connections open per host and reuses them.
+
+    Only what the fleet client needs is supported: GET requests to plain-HTTP peers whose bodies
+    have a Content-Length or are chunked. Must be used from a single event loop.
+    """
+
+    def __init__(self, pool_size: int = FLEET_POOL_SIZE_PER_PEER):
+        self.pool_size = pool_size
+        self._idle: Dict[Tuple[str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self.connections_opened = 0
+
+    async def get(self, host: str, port: int, path: str, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        """
+        Sends a GET request, reusing an idle connection to the host when there is one.
+
+        Raises:
+            OSError: If the connection fails.
+            ValueError: If the response is malformed or too large.
+        """
+        request = self._encode_request(host, port, path, headers or {})
+        connection = self._take_idle(host, port)
+        if connection is not None:
+            try:
+                return await self._exchange(host, port, connection, request)
+            except (OSError, asyncio.IncompleteReadError):
+                # The peer closed the idle connection; retry once on a new one
+                pass
+
+        reader, writer = await asyncio.open_connection(host, port)
+        self.connections_opened += 1
+        try:
+            return await self._exchange(host, port, (reader, writer), request)
+        except asyncio.IncompleteReadError as e:
+            raise ValueError(f"Connection closed mid-response ({len(e.partial)} bytes read)")
+
+    def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+    def _take_idle(self, host: str, port: int):
+        connections = self._idle.get((host, port), [])
+        while connections:
+            reader, writer = connections.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        return None
+
+    def _release(self, host: str, port: int, connection):
+        connections = self._idle.setdefault((host, port), [])
+        if len(connections) < self.pool_size:
+            connections.append(connection)
+        else:
+            connection[1].close()
+
+    async def _exchange(self, host: str, port: int, connection, request: bytes) -> HttpResponse:
+        reader, writer = connection
+        try:
+            writer.write(request)
+            await writer.drain()
+            response, keep_alive = await self._read_response(reader)
+        except BaseException:
+            # Cancelled by a timeout, or failed: the connection is in an unknown state
+            writer.close()
+            raise
+        if keep_alive:
+            self._release(host, port, connection)
+        else:
+            writer.close()
+        return response
+
+    @staticmethod
+    def _encode_request(host: str, port: int, path: str, headers: Dict[str, str]) -> bytes:
+        lines = [f"GET {path} HTTP/1.1", f"Host: {host}:{port}", "Accept: application/json",
+                 "Connection: keep-alive"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[HttpResponse, bool]:
+        status_line = await reader.readuntil(b'\r\n')
+        parts = status_line.decode('latin-1').split(' ', 2)
+        if len(parts) < 2 or not parts[0].startswith('HTTP/1.'):
+            raise ValueError(f"Malformed status line: {status_line!r}")
+        status = int(parts[1])
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks, size = [], 0
+            while True:
+                length = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                if length == 0:
+                    await reader.readuntil(b'\r\n')
+                    break
+                size += length
+                if size > MAX_RESPONSE_BYTES:
+                    raise ValueError("Response body too large")
+                chunks.append(await reader.readexactly(length))
+                await reader.readexactly(2)
+            body = b''.join(chunks)
+        elif 'content-length' in headers:
+            length = int(headers['content-length'])
+            if length > MAX_RESPONSE_BYTES:
+                raise ValueError("Response body too large")
+            body = await reader.readexactly(length)
+        else:
+            # Body runs to the end of the connection
+            body = await reader.read(MAX_RESPONSE_BYTES)
+            return HttpResponse(status, headers, body), False
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and parts[0] == 'HTTP/1.1'
+        return HttpResponse(status, headers, body), keep_alive
@@ -0,0 +1,52 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class BackgroundLoop:
+    """
+    An asyncio event loop running in a daemon thread.
+
+    Request threads hand coroutines to it and block on, or poll, the returned future, so the
+    async network clients share one loop instead of each request starting its own.
+    """
+
+    def __init__(self, name: str = 'async-loop'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        The running loop, started on first use.
+        """
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+            return self._loop
+
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        """
+        Schedules a coroutine on the loop and returns a thread-safe future for its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        Runs a coroutine on the loop and waits for its result.
+
+        Raises:
+            concurrent.futures.TimeoutError: If it does not finish within the timeout; it is then cancelled.
+        """
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+
+background_loop = BackgroundLoop()
@@ -0,0 +1,61 @@
+import threading
+from typing import Optional
+
+from config.constants import NETWORK_BACKEND
+from models.backends.base import NetworkBackend
+from models.backends.nmcli_backend import NmcliBackend
+
+_backend: Optional[NetworkBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> NetworkBackend:
+    """
+    Returns the process-wide network backend, creating it on first use.
+
+    With NETWORK_BACKEND set to 'auto' the D-Bus backend is used when jeepney is installed
+    and NetworkManager answers on the system bus; otherwise nmcli is used.
+
+    Returns:
+        NetworkBackend: The active backend.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(NETWORK_BACKEND)
+    return _backend
+
+
+def use_backend(backend: NetworkBackend):
+    """
+    Replaces the process-wide network backend.
+
+    Args:
+        backend (NetworkBackend): The backend every model function should use from now on.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def create_backend(name: str) -> NetworkBackend:
+    """
+    Creates a backend by name ('dbus', 'nmcli' or 'auto').
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name not in ('dbus', 'nmcli', 'auto'):
+        raise ValueError(f"Unknown network backend '{name}'")
+
+    if name in ('dbus', 'auto'):
+        try:
+            from models.backends.dbus_backend import DBusBackend
+            return DBusBackend()
+        except Exception as e:
+            if name == 'dbus':
+                raise
+            print(f"NetworkManager D-Bus backend unavailable, falling back to nmcli: {e}")
+
+    return NmcliBackend()
@@ -0,0 +1,122 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+
+class NetworkError(RuntimeError):
+    """
+    Raised when NetworkManager rejects an operation. Carries the raw error output (nmcli stderr
+    or the D-Bus error) separately from the readable message.
+    """
+
+    def __init__(self, message: str, stderr: str = ''):
+        super().__init__(f"{message} Error: {stderr}" if stderr else message)
+        self.stderr = stderr
+
+
+class NetworkBackend(ABC):
+    """
+    Interface between the models and NetworkManager.
+
+    Implementations return plain dictionaries in the shapes the controllers already serve
+    and raise NetworkError with a readable message when NetworkManager rejects an operation.
+
+    The *_async reads serve the async server mode. By default they run the blocking method on the
+    event loop's default executor; backends that can wait without a thread override them. The
+    nmcli backend does; the D-Bus backend does not, so with it the async mode saves no threads.
+    """
+
+    @abstractmethod
+    def remembered_wifi_connections(self) -> List[Dict[str, str]]:
+        """
+        Returns the saved Wi-Fi connections as [{'name': ..., 'autoconnect': 'yes'|'no'}].
+        """
+
+    @abstractmethod
+    def wifi_access_points(self, rescan: bool = False) -> List[Dict[str, str]]:
+        """
+        Returns every visible access point as [{'SSID': ..., 'SIGNAL': ..., 'ACTIVE': 'yes'|'no', 'BSSID': ...}].
+        """
+
+    @abstractmethod
+    def active_wifi_connection(self) -> Dict[str, str]:
+        """
+        Returns {'SSID': ..., 'SIGNAL': ..., 'ACTIVE': 'yes'} for the current access point, or {} if none.
+        """
+
+    @abstractmethod
+    def ip_and_mask(self, connection: str) -> Dict[str, str]:
+        """
+        Returns {'ip': ..., 'mask': ...} for an active connection.
+
+        Raises:
+            RuntimeError: If the connection cannot be queried.
+            ValueError: If the connection has no IPv4 address.
+        """
+
+    async def remembered_wifi_connections_async(self) -> List[Dict[str, str]]:
+        return await asyncio.to_thread(self.remembered_wifi_connections)
+
+    async def active_wifi_connection_async(self) -> Dict[str, str]:
+        return await asyncio.to_thread(self.active_wifi_connection)
+
+    async def ip_and_mask_async(self, connection: str) -> Dict[str, str]:
+        return await asyncio.to_thread(self.ip_and_mask, connection)
+
+    @abstractmethod
+    def connect_to_new_ap(self, ssid: str, password: str):
+        """
+        Creates a connection for the access point and activates it.
+        """
+
+    @abstractmethod
+    def activate_connection(self, connection_name: str):
+        """
+        Activates a saved connection.
+        """
+
+    @abstractmethod
+    def deactivate_connection(self, connection_name: str):
+        """
+        Deactivates an active connection.
+        """
+
+    @abstractmethod
+    def delete_connection(self, connection_name: str):
+        """
+        Deletes a saved connection.
+        """
+
+    @abstractmethod
+    def set_autoconnect(self, connection_name: str, enabled: bool):
+        """
+        Sets connection.autoconnect on a saved connection.
+        """
+
+    @abstractmethod
+    def set_ip4_address(self, connection_name: str, ip_with_mask: str):
+        """
+        Sets a manual IPv4 address ('ip/prefix') on a saved connection without reactivating it.
+        """
+
+    @abstractmethod
+    def ip4_settings(self, connection_name: str) -> Dict[str, Any]:
+        """
+        Returns the saved IPv4 settings of a connection as {'method': 'auto'|'manual'|..., 'addresses': ['ip/prefix', ...]}.
+        """
+
+    @abstractmethod
+    def restore_ip4_settings(self, connection_name: str, settings: Dict[str, Any]):
+        """
+        Saves IPv4 settings returned by ip4_settings() back on a connection without reactivating it.
+        """
+
+    @abstractmethod
+    def reapply_connection(self, connection_name: str):
+        """
+        Applies a saved connection's current settings to the device it is active on without
+        taking the link down.
+
+        Raises:
+            NetworkError: If the connection is not active or the device rejects the new settings.
+        """
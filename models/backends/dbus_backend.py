@@ -0,0 +1,368 @@
+import concurrent.futures
+import ipaddress
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from jeepney import DBusAddress, Properties, new_method_call
+from jeepney.io.threading import DBusRouter, RouterClosed, open_dbus_connection
+from jeepney.wrappers import unwrap_msg, DBusErrorResponse
+
+from config.constants import DBUS_CALL_TIMEOUT_SECONDS, DBUS_ACTIVATION_TIMEOUT_SECONDS
+from models.backends.base import NetworkBackend, NetworkError
+
+NM_BUS_NAME = 'org.freedesktop.NetworkManager'
+NM_PATH = '/org/freedesktop/NetworkManager'
+NM_INTERFACE = 'org.freedesktop.NetworkManager'
+NM_SETTINGS_PATH = '/org/freedesktop/NetworkManager/Settings'
+NM_SETTINGS_INTERFACE = 'org.freedesktop.NetworkManager.Settings'
+NM_CONNECTION_INTERFACE = 'org.freedesktop.NetworkManager.Settings.Connection'
+NM_ACTIVE_CONNECTION_INTERFACE = 'org.freedesktop.NetworkManager.Connection.Active'
+NM_DEVICE_INTERFACE = 'org.freedesktop.NetworkManager.Device'
+NM_WIRELESS_INTERFACE = 'org.freedesktop.NetworkManager.Device.Wireless'
+NM_ACCESS_POINT_INTERFACE = 'org.freedesktop.NetworkManager.AccessPoint'
+NM_IP4_CONFIG_INTERFACE = 'org.freedesktop.NetworkManager.IP4Config'
+
+NM_DEVICE_TYPE_WIFI = 2
+NM_ACTIVE_CONNECTION_STATE_ACTIVATED = 2
+NM_ACTIVE_CONNECTION_STATE_DEACTIVATED = 4
+
+WIRELESS_CONNECTION_TYPE = '802-11-wireless'
+
+
+class _Router(DBusRouter):
+    """
+    jeepney's threading router, recording when its receiver stops.
+
+    The receiver runs until the connection is lost or the router is closed, and jeepney has no
+    public way to ask whether it still is.
+    """
+
+    def __init__(self, conn):
+        self.running = True
+        super().__init__(conn)
+
+    def _receiver(self):
+        try:
+            super()._receiver()
+        except (EOFError, OSError):
+            # The connection was lost; the next call replaces this router
+            pass
+        finally:
+            self.running = False
+
+
+class DBusBackend(NetworkBackend):
+    """
+    Backend that talks to NetworkManager over one long-lived D-Bus connection.
+
+    Calls are multiplexed over the connection by jeepney's router thread, so request
+    threads can share it. Activations wait for NetworkManager to report the connection as
+    activated, matching nmcli's blocking behaviour.
+    """
+
+    def __init__(self, bus: str = 'SYSTEM'):
+        self.bus = bus
+        self._lock = threading.Lock()
+        self._router = _Router(open_dbus_connection(bus=bus))
+        try:
+            # Fail fast if NetworkManager is not on this bus
+            self._get(NM_PATH, NM_INTERFACE, 'Version')
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        self._router.close()
+        self._router.conn.close()
+
+    # D-Bus plumbing
+
+    def _send(self, message) -> tuple:
+        """
+        Sends a method call and returns the reply's body.
+
+        A call is sent again on a new connection only when it never went out: the router had
+        stopped or the socket refused the write. A call that may have reached NetworkManager is
+        never repeated, since activating or deleting twice is not harmless.
+
+        Raises:
+            NetworkError: If the call timed out or the connection was lost with the call in flight.
+        """
+        router = self._router
+        if not router.running:
+            router = self._reconnect(router)
+        try:
+            try:
+                reply = router.send_and_get_reply(message, timeout=DBUS_CALL_TIMEOUT_SECONDS)
+            except ConnectionError:
+                # The socket refused the write, so the call never went out
+                router = self._reconnect(router)
+                reply = router.send_and_get_reply(message, timeout=DBUS_CALL_TIMEOUT_SECONDS)
+        except (TimeoutError, concurrent.futures.TimeoutError) as e:
+            raise NetworkError("NetworkManager did not answer over D-Bus.",
+                               f"no reply after {DBUS_CALL_TIMEOUT_SECONDS:g} s") from e
+        except (RouterClosed, ConnectionError) as e:
+            # RouterClosed: the router stopped before a reply came, and the call may have been handled
+            raise NetworkError("Lost the D-Bus connection to NetworkManager.", str(e)) from e
+        return unwrap_msg(reply)
+
+    def _call(self, path: str, interface: str, method: str, signature: Optional[str] = None, body: tuple = ()):
+        address = DBusAddress(path, bus_name=NM_BUS_NAME, interface=interface)
+        return self._send(new_method_call(address, method, signature, body))
+
+    def _reconnect(self, stale: _Router) -> _Router:
+        """
+        Replaces a stopped or broken router, unless another thread already has.
+        """
+        with self._lock:
+            if self._router is stale:
+                try:
+                    self.close()
+                except Exception:
+                    pass
+                self._router = _Router(open_dbus_connection(bus=self.bus))
+            return self._router
+
+    def _get(self, path: str, interface: str, name: str) -> Any:
+        message = Properties(DBusAddress(path, bus_name=NM_BUS_NAME, interface=interface)).get(name)
+        return self._send(message)[0][1]
+
+    def _get_all(self, path: str, interface: str) -> Dict[str, Any]:
+        message = Properties(DBusAddress(path, bus_name=NM_BUS_NAME, interface=interface)).get_all()
+        properties = self._send(message)[0]
+        return {name: value for name, (_, value) in properties.items()}
+
+    # NetworkManager object lookups
+
+    def _wifi_device(self) -> str:
+        for path in self._call(NM_PATH, NM_INTERFACE, 'GetDevices')[0]:
+            if self._get(path, NM_DEVICE_INTERFACE, 'DeviceType') == NM_DEVICE_TYPE_WIFI:
+                return path
+        raise NetworkError("No Wi-Fi device found.")
+
+    def _connection_settings(self) -> Dict[str, dict]:
+        connections = {}
+        for path in self._call(NM_SETTINGS_PATH, NM_SETTINGS_INTERFACE, 'ListConnections')[0]:
+            connections[path] = self._call(path, NM_CONNECTION_INTERFACE, 'GetSettings')[0]
+        return connections
+
+    def _find_connection(self, connection_name: str) -> tuple:
+        for path, settings in self._connection_settings().items():
+            if settings['connection']['id'][1] == connection_name:
+                return path, settings
+        raise NetworkError(f"Unknown connection '{connection_name}'.")
+
+    def _find_active_connection(self, connection_name: str) -> Optional[str]:
+        for path in self._get(NM_PATH, NM_INTERFACE, 'ActiveConnections'):
+            if self._get(path, NM_ACTIVE_CONNECTION_INTERFACE, 'Id') == connection_name:
+                return path
+        return None
+
+    def _access_points(self, device: str) -> List[Dict[str, Any]]:
+        active_path = self._get(device, NM_WIRELESS_INTERFACE, 'ActiveAccessPoint')
+        access_points = []
+        for path in self._call(device, NM_WIRELESS_INTERFACE, 'GetAllAccessPoints')[0]:
+            properties = self._get_all(path, NM_ACCESS_POINT_INTERFACE)
+            access_points.append({
+                'SSID': bytes(properties['Ssid']).decode('utf-8', errors='replace'),
+                'SIGNAL': str(properties['Strength']),
+                'ACTIVE': 'yes' if path == active_path else 'no',
+                'BSSID': properties['HwAddress'],
+                'path': path,
+            })
+        return access_points
+
+    def _wait_for_activation(self, active_path: str, description: str):
+        deadline = time.monotonic() + DBUS_ACTIVATION_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            try:
+                state = self._get(active_path, NM_ACTIVE_CONNECTION_INTERFACE, 'State')
+            except DBusErrorResponse:
+                # The active connection object disappears when activation fails
+                state = NM_ACTIVE_CONNECTION_STATE_DEACTIVATED
+            if state == NM_ACTIVE_CONNECTION_STATE_ACTIVATED:
+                return
+            if state == NM_ACTIVE_CONNECTION_STATE_DEACTIVATED:
+                raise NetworkError(f"Failed to connect to {description}.", "activation failed")
+            time.sleep(0.25)
+        raise NetworkError(f"Failed to connect to {description}.", "timed out waiting for activation")
+
+    def _update_settings(self, path: str, settings: dict):
+        # GetSettings omits secrets; merge them back so Update does not drop the saved password
+        for setting_name in ('802-11-wireless-security',):
+            if setting_name in settings:
+                try:
+                    secrets = self._call(path, NM_CONNECTION_INTERFACE, 'GetSecrets', 's', (setting_name,))[0]
+                except DBusErrorResponse:
+                    continue
+                settings[setting_name].update(secrets.get(setting_name, {}))
+        self._call(path, NM_CONNECTION_INTERFACE, 'Update', 'a{sa{sv}}', (settings,))
+
+    # NetworkBackend
+
+    def remembered_wifi_connections(self) -> List[Dict[str, str]]:
+        wifi_connections = []
+        try:
+            for settings in self._connection_settings().values():
+                connection = settings['connection']
+                if connection['type'][1] != WIRELESS_CONNECTION_TYPE:
+                    continue
+                autoconnect = connection.get('autoconnect', ('b', True))[1]
+                wifi_connections.append({'name': connection['id'][1], 'autoconnect': 'yes' if autoconnect else 'no'})
+        except DBusErrorResponse as e:
+            raise NetworkError("Failed to list connections.", str(e))
+        return wifi_connections
+
+    def wifi_access_points(self, rescan: bool = False) -> List[Dict[str, str]]:
+        try:
+            device = self._wifi_device()
+            if rescan:
+                last_scan = self._get(device, NM_WIRELESS_INTERFACE, 'LastScan')
+                self._call(device, NM_WIRELESS_INTERFACE, 'RequestScan', 'a{sv}', ({},))
+                deadline = time.monotonic() + DBUS_CALL_TIMEOUT_SECONDS
+                while self._get(device, NM_WIRELESS_INTERFACE, 'LastScan') == last_scan and time.monotonic() < deadline:
+                    time.sleep(0.25)
+            access_points = self._access_points(device)
+        except DBusErrorResponse as e:
+            raise NetworkError("Failed to scan Wi-Fi networks.", str(e))
+
+        for access_point in access_points:
+            del access_point['path']
+        return access_points
+
+    def active_wifi_connection(self) -> Dict[str, str]:
+        try:
+            device = self._wifi_device()
+            path = self._get(device, NM_WIRELESS_INTERFACE, 'ActiveAccessPoint')
+            if path == '/':
+                return {}
+            properties = self._get_all(path, NM_ACCESS_POINT_INTERFACE)
+        except DBusErrorResponse as e:
+            raise NetworkError("Failed to get the active Wi-Fi network.", str(e))
+
+        ssid = bytes(properties['Ssid']).decode('utf-8', errors='replace')
+        return {'SSID': ssid, 'SIGNAL': str(properties['Strength']), 'ACTIVE': 'yes'}
+
+    def ip_and_mask(self, connection: str) -> Dict[str, str]:
+        try:
+            self._find_connection(connection)
+            active_path = self._find_active_connection(connection)
+            address_data = []
+            if active_path is not None:
+                ip4_config = self._get(active_path, NM_ACTIVE_CONNECTION_INTERFACE, 'Ip4Config')
+                if ip4_config != '/':
+                    address_data = self._get(ip4_config, NM_IP4_CONFIG_INTERFACE, 'AddressData')
+        except DBusErrorResponse as e:
+            raise NetworkError(f"Failed to get the IP address of connection '{connection}'.", str(e))
+
+        if not address_data:
+            raise ValueError(f"Could not find the IP address and mask for the connection '{connection}'.")
+
+        address = address_data[0]
+        return {'ip': address['address'][1], 'mask': str(address['prefix'][1])}
+
+    def connect_to_new_ap(self, ssid: str, password: str):
+        try:
+            device = self._wifi_device()
+            matches = [ap for ap in self._access_points(device) if ap['SSID'] == ssid]
+            if not matches:
+                raise NetworkError(f"Failed to connect to Wi-Fi network '{ssid}'.", f"No network with SSID '{ssid}' found.")
+            access_point = max(matches, key=lambda ap: int(ap['SIGNAL']))['path']
+
+            settings = {'802-11-wireless': {'ssid': ('ay', ssid.encode('utf-8'))}}
+            if password:
+                settings['802-11-wireless-security'] = {'key-mgmt': ('s', 'wpa-psk'), 'psk': ('s', password)}
+            _, active_path = self._call(NM_PATH, NM_INTERFACE, 'AddAndActivateConnection', 'a{sa{sv}}oo',
+                                        (settings, device, access_point))
+        except DBusErrorResponse as e:
+            raise NetworkError(f"Failed to connect to Wi-Fi network '{ssid}'.", str(e))
+
+        self._wait_for_activation(active_path, f"Wi-Fi network '{ssid}'")
+
+    def activate_connection(self, connection_name: str):
+        try:
+            path, _ = self._find_connection(connection_name)
+            active_path = self._call(NM_PATH, NM_INTERFACE, 'ActivateConnection', 'ooo', (path, '/', '/'))[0]
+        except DBusErrorResponse as e:
+            raise NetworkError(f"Failed to connect to network '{connection_name}'.", str(e))
+
+        self._wait_for_activation(active_path, f"network '{connection_name}'")
+
+    def deactivate_connection(self, connection_name: str):
+        try:
+            active_path = self._find_active_connection(connection_name)
+            if active_path is None:
+                raise NetworkError(f"Failed to disconnect from network '{connection_name}'.", "connection is not active")
+            self._call(NM_PATH, NM_INTERFACE, 'DeactivateConnection', 'o', (active_path,))
+        except DBusErrorResponse as e:
+            raise NetworkError(f"Failed to disconnect from network '{connection_name}'.", str(e))
+
+    def delete_connection(self, connection_name: str):
+        try:
+            path, _ = self._find_connection(connection_name)
+            self._call(path, NM_CONNECTION_INTERFACE, 'Delete')
+        except DBusErrorResponse as e:
+            raise NetworkError(f"Failed to delete connection '{connection_name}'.", str(e))
+
+    def set_autoconnect(self, connection_name: str, enabled: bool):
+        try:
+            path, settings = self._find_connection(connection_name)
+            settings['connection']['autoconnect'] = ('b', enabled)
+            self._update_settings(path, settings)
+        except DBusErrorResponse as e:
+            value = 'yes' if enabled else 'no'
+            raise NetworkError(f"Failed to set autoconnect to '{value}' for connection '{connection_name}'.", str(e))
+
+    def set_ip4_address(self, connection_name: str, ip_with_mask: str):
+        try:
+            interface = ipaddress.IPv4Interface(ip_with_mask)
+        except ValueError as e:
+            raise NetworkError(f"Failed to set IP address '{ip_with_mask}' for connection '{connection_name}'.", str(e))
+
+        try:
+            path, settings = self._find_connection(connection_name)
+            ipv4 = settings.setdefault('ipv4', {})
+            # 'addresses' is the deprecated form of 'address-data'; NetworkManager rejects both together
+            ipv4.pop('addresses', None)
+            ipv4['method'] = ('s', 'manual')
+            ipv4['address-data'] = ('aa{sv}', [{'address': ('s', str(interface.ip)),
+                                                'prefix': ('u', interface.network.prefixlen)}])
+            self._update_settings(path, settings)
+        except DBusErrorResponse as e:
+            raise NetworkError(f"Failed to set IP address '{ip_with_mask}' for connection '{connection_name}'.", str(e))
+
+    def ip4_settings(self, connection_name: str) -> Dict[str, Any]:
+        try:
+            _, settings = self._find_connection(connection_name)
+        except DBusErrorResponse as e:
+            raise NetworkError(f"Failed to read the IPv4 settings of connection '{connection_name}'.", str(e))
+
+        ipv4 = settings.get('ipv4', {})
+        addresses = [f"{address['address'][1]}/{address['prefix'][1]}"
+                     for address in ipv4.get('address-data', ('aa{sv}', []))[1]]
+        return {'method': ipv4.get('method', ('s', 'auto'))[1], 'addresses': addresses}
+
+    def restore_ip4_settings(self, connection_name: str, settings: Dict[str, Any]):
+        try:
+            path, saved = self._find_connection(connection_name)
+            ipv4 = saved.setdefault('ipv4', {})
+            ipv4.pop('addresses', None)
+            ipv4['method'] = ('s', settings['method'])
+            interfaces = [ipaddress.IPv4Interface(address) for address in settings['addresses']]
+            ipv4['address-data'] = ('aa{sv}', [{'address': ('s', str(interface.ip)),
+                                                'prefix': ('u', interface.network.prefixlen)} for interface in interfaces])
+            self._update_settings(path, saved)
+        except DBusErrorResponse as e:
+            raise NetworkError(f"Failed to restore the IPv4 settings of connection '{connection_name}'.", str(e))
+
+    def reapply_connection(self, connection_name: str):
+        try:
+            active_path = self._find_active_connection(connection_name)
+            if active_path is None:
+                raise NetworkError(f"Failed to reapply connection '{connection_name}'.", "connection is not active")
+            for device in self._get(active_path, NM_ACTIVE_CONNECTION_INTERFACE, 'Devices'):
+                # Empty settings and version 0 reapply the saved connection as it is now
+                self._call(device, NM_DEVICE_INTERFACE, 'Reapply', 'a{sa{sv}}tu', ({}, 0, 0))
+        except DBusErrorResponse as e:
+            raise NetworkError(f"Failed to reapply connection '{connection_name}'.", str(e))
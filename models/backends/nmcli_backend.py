@@ -0,0 +1,167 @@
+from typing import Any, List, Dict
+
+from config.constants import NMCLI_GET_WIFI_CONNECTIONS, NMCLI_SCAN_WIFI_NETWORKS, NMCLI_GET_ACTIVE_WIFI_CONNECTION
+from models.backends.base import NetworkBackend, NetworkError
+from models.command_runner import run_command, run_command_async, CommandResult
+from models.nmcli_parser import parse_terse, terse_fields
+
+WIFI_CONNECTION_TYPE = '802-11-wireless'
+
+CONNECTION_FIELDS = terse_fields(NMCLI_GET_WIFI_CONNECTIONS)
+SCAN_FIELDS = terse_fields(NMCLI_SCAN_WIFI_NETWORKS)
+ACTIVE_FIELDS = terse_fields(NMCLI_GET_ACTIVE_WIFI_CONNECTION)
+# `connection show <name>` prints one 'FIELD[n]:value' row per value (or 'FIELD:value' for scalars)
+PROPERTY_FIELDS = ('FIELD', 'VALUE')
+
+
+class NmcliBackend(NetworkBackend):
+    """
+    Backend that runs one nmcli process per operation.
+    """
+
+    def _run(self, name: str, *args: str) -> CommandResult:
+        return run_command(name, *args)
+
+    def remembered_wifi_connections(self) -> List[Dict[str, str]]:
+        return _parse_wifi_connections(self._run('NMCLI_GET_WIFI_CONNECTIONS'))
+
+    async def remembered_wifi_connections_async(self) -> List[Dict[str, str]]:
+        return _parse_wifi_connections(await run_command_async('NMCLI_GET_WIFI_CONNECTIONS'))
+
+    def wifi_access_points(self, rescan: bool = False) -> List[Dict[str, str]]:
+        result = self._run('NMCLI_RESCAN_WIFI_NETWORKS' if rescan else 'NMCLI_SCAN_WIFI_NETWORKS')
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to execute command '{result.command}'.", result.stderr)
+
+        rows = parse_terse(result.stdout, SCAN_FIELDS, ('SSID', 'SIGNAL', 'ACTIVE', 'BSSID'))
+        return [{'SSID': ssid, 'SIGNAL': signal, 'ACTIVE': active, 'BSSID': bssid} for ssid, signal, active, bssid in rows]
+
+    def active_wifi_connection(self) -> Dict[str, str]:
+        return _parse_active_wifi_connection(self._run('NMCLI_GET_ACTIVE_WIFI_CONNECTION'))
+
+    async def active_wifi_connection_async(self) -> Dict[str, str]:
+        return _parse_active_wifi_connection(await run_command_async('NMCLI_GET_ACTIVE_WIFI_CONNECTION'))
+
+    def ip_and_mask(self, connection: str) -> Dict[str, str]:
+        return _parse_ip_and_mask(self._run('NMCLI_GET_IP4_ADDRESS', connection), connection)
+
+    async def ip_and_mask_async(self, connection: str) -> Dict[str, str]:
+        return _parse_ip_and_mask(await run_command_async('NMCLI_GET_IP4_ADDRESS', connection), connection)
+
+    def connect_to_new_ap(self, ssid: str, password: str):
+        result = self._run('NMCLI_CONNECT_TO_NEW_AP', ssid, password)
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to connect to Wi-Fi network '{ssid}'.", result.stderr)
+
+    def activate_connection(self, connection_name: str):
+        result = self._run('NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION', connection_name)
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to connect to network '{connection_name}'.", result.stderr)
+
+    def deactivate_connection(self, connection_name: str):
+        result = self._run('NMCLI_DISCONNECT_FROM_WIFI_CONNECTION', connection_name)
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to disconnect from network '{connection_name}'.", result.stderr)
+
+    def delete_connection(self, connection_name: str):
+        result = self._run('NMCLI_DELETE_KNOWN_WIFI_CONNECTION', connection_name)
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to delete connection '{connection_name}'.", result.stderr)
+
+    def set_autoconnect(self, connection_name: str, enabled: bool):
+        if enabled:
+            result = self._run('NMCLI_SET_AUTOCONNECT_ON_TO_WIFI_CONNECTION', connection_name)
+        else:
+            result = self._run('NMCLI_SET_AUTOCONNECT_OFF_TO_WIFI_CONNECTION', connection_name)
+
+        if result.returncode != 0:
+            value = 'yes' if enabled else 'no'
+            raise NetworkError(f"Failed to set autoconnect to '{value}' for connection '{connection_name}'.", result.stderr)
+
+    def set_ip4_address(self, connection_name: str, ip_with_mask: str):
+        result = self._run('NMCLI_SET_IP4_ADDRESS', connection_name, ip_with_mask)
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to set IP address '{ip_with_mask}' for connection '{connection_name}'.", result.stderr)
+
+    def ip4_settings(self, connection_name: str) -> Dict[str, Any]:
+        result = self._run('NMCLI_GET_IP4_SETTINGS', connection_name)
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to read the IPv4 settings of connection '{connection_name}'.", result.stderr)
+
+        settings = {'method': 'auto', 'addresses': []}
+        for field, value in parse_terse(result.stdout, PROPERTY_FIELDS):
+            if field == 'ipv4.method':
+                settings['method'] = value
+            elif field == 'ipv4.addresses':
+                settings['addresses'] = [address.strip() for address in value.split(',') if address.strip()]
+        return settings
+
+    def restore_ip4_settings(self, connection_name: str, settings: Dict[str, Any]):
+        result = self._run('NMCLI_SET_IP4_SETTINGS', connection_name, settings['method'], ','.join(settings['addresses']))
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to restore the IPv4 settings of connection '{connection_name}'.", result.stderr)
+
+    def reapply_connection(self, connection_name: str):
+        result = self._run('NMCLI_GET_CONNECTION_DEVICE', connection_name)
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to reapply connection '{connection_name}'.", result.stderr)
+
+        devices = [value for field, value in parse_terse(result.stdout, PROPERTY_FIELDS)
+                   if field.startswith('GENERAL.DEVICES') and value]
+        if not devices:
+            raise NetworkError(f"Failed to reapply connection '{connection_name}'.", "connection is not active")
+
+        result = self._run('NMCLI_REAPPLY_DEVICE', devices[0])
+
+        if result.returncode != 0:
+            raise NetworkError(f"Failed to reapply connection '{connection_name}'.", result.stderr)
+
+
+def _parse_wifi_connections(result: CommandResult) -> List[Dict[str, str]]:
+    if result.returncode != 0:
+        raise NetworkError(f"Failed to execute command '{result.command}'.", result.stderr)
+
+    wifi_connections: List[Dict[str, str]] = []
+    for name, autoconnect, connection_type in parse_terse(result.stdout, CONNECTION_FIELDS,
+                                                          ('NAME', 'AUTOCONNECT', 'TYPE')):
+        if connection_type == WIFI_CONNECTION_TYPE:
+            wifi_connections.append({'name': name, 'autoconnect': autoconnect})
+
+    return wifi_connections
+
+
+def _parse_active_wifi_connection(result: CommandResult) -> Dict[str, str]:
+    if result.returncode != 0:
+        raise NetworkError(f"Failed to execute command '{result.command}'.", result.stderr)
+
+    for ssid, signal, active in parse_terse(result.stdout, ACTIVE_FIELDS, ('SSID', 'SIGNAL', 'ACTIVE')):
+        if active == 'yes':
+            return {'SSID': ssid, 'SIGNAL': signal, 'ACTIVE': active}
+
+    return {}
+
+
+def _parse_ip_and_mask(result: CommandResult, connection: str) -> Dict[str, str]:
+    if result.returncode != 0:
+        raise NetworkError(f"Failed to execute command '{result.command}'.", result.stderr)
+
+    ip, mask = None, None
+
+    for field, value in parse_terse(result.stdout, PROPERTY_FIELDS):
+        if field.startswith('IP4.ADDRESS') and '/' in value:
+            ip, mask = value.strip().split('/', 1)
+            break
+
+    if ip is None or mask is None:
+        raise ValueError(f"Could not find the IP address and mask for the connection '{connection}'.")
+
+    return {'ip': ip, 'mask': mask}
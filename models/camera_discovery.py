@@ -0,0 +1,220 @@
+import asyncio
+import concurrent.futures
+import ipaddress
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from config.constants import CAMERA_PORTS, CAMERA_PROBE_TIMEOUT_SECONDS, CAMERA_PROBE_CONCURRENCY, \
+    CAMERA_CACHE_TTL_SECONDS, CAMERA_FULL_SWEEP_SECONDS, CAMERA_SWEEP_MIN_PREFIX, ARP_TABLE_PATH, ETHERNET_CONNECTION
+from models.async_loop import BackgroundLoop, background_loop
+from models.network_model import get_ip_and_mask
+from models.wifi_model import get_active_wifi_connection
+
+# /proc/net/arp flag for a resolved entry; incomplete entries have 0x0
+ARP_FLAG_COMPLETE = 0x2
+
+
+def read_neighbors(path: str = ARP_TABLE_PATH) -> Dict[str, Optional[str]]:
+    """
+    Reads the kernel's ARP table.
+
+    Returns:
+        Dict[str, Optional[str]]: IP address -> MAC address of every resolved neighbour. Returns {}
+        if the table cannot be read.
+    """
+    neighbors = {}
+    try:
+        with open(path, 'r') as file:
+            lines = file.read().splitlines()[1:]
+    except OSError:
+        return neighbors
+
+    # IP address, HW type, Flags, HW address, Mask, Device
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 4:
+            continue
+        try:
+            flags = int(fields[2], 16)
+        except ValueError:
+            continue
+        if flags & ARP_FLAG_COMPLETE:
+            neighbors[fields[0]] = fields[3].upper()
+    return neighbors
+
+
+def local_interfaces() -> List[ipaddress.IPv4Interface]:
+    """
+    Returns the addresses of the active Wi-Fi connection and the Ethernet connection, skipping
+    any that are down.
+    """
+    interfaces = []
+    try:
+        connections = [get_active_wifi_connection().get('SSID'), ETHERNET_CONNECTION]
+    except RuntimeError:
+        connections = [ETHERNET_CONNECTION]
+
+    for connection in connections:
+        if not connection:
+            continue
+        try:
+            address = get_ip_and_mask(connection)
+            interfaces.append(ipaddress.IPv4Interface(f"{address['ip']}/{address['mask']}"))
+        except (RuntimeError, ValueError):
+            continue
+    return interfaces
+
+
+def sweep_hosts(interface: ipaddress.IPv4Interface) -> List[str]:
+    """
+    Returns the host addresses to sweep for an interface: its whole subnet, or the /24 around its
+    address if the subnet is wider than that.
+    """
+    network = interface.network
+    if network.prefixlen < CAMERA_SWEEP_MIN_PREFIX:
+        network = ipaddress.IPv4Network(f"{interface.ip}/{CAMERA_SWEEP_MIN_PREFIX}", strict=False)
+    return [str(host) for host in network.hosts()]
+
+
+class CameraDiscovery:
+    """
+    Finds cameras on the box's subnets by probing their HTTP and RTSP ports.
+
+    Probes run on the shared asyncio loop with a bounded number of connection attempts in
+    flight, so sweeping a /24 takes about as long as a few probe timeouts. Hosts in the kernel
+    ARP table are always probed, including ones outside the swept /24.
+
+    Results are cached. Once they are older than the TTL the next read returns them and starts
+    an incremental refresh in the background; it re-probes only the known cameras and the ARP
+    neighbours. A full sweep of the subnet runs at most every full_sweep_interval, or when a
+    refresh is forced. Only one refresh runs at a time, and concurrent callers share it.
+    """
+
+    def __init__(self, interfaces: Callable[[], List[ipaddress.IPv4Interface]] = local_interfaces,
+                 ports: Optional[Dict[int, str]] = None, timeout: float = CAMERA_PROBE_TIMEOUT_SECONDS,
+                 concurrency: int = CAMERA_PROBE_CONCURRENCY, ttl: float = CAMERA_CACHE_TTL_SECONDS,
+                 full_sweep_interval: float = CAMERA_FULL_SWEEP_SECONDS, arp_path: str = ARP_TABLE_PATH,
+                 loop: BackgroundLoop = background_loop):
+        self._interfaces = interfaces
+        self.ports = CAMERA_PORTS if ports is None else ports
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.ttl = ttl
+        self.full_sweep_interval = full_sweep_interval
+        self.arp_path = arp_path
+        self._loop = loop
+
+        self._lock = threading.Lock()
+        self._cameras: Dict[str, dict] = {}
+        self._discovered_at: Optional[float] = None
+        self._refreshed_at = 0.0
+        self._swept_at: Optional[float] = None
+        self._running: Optional[concurrent.futures.Future] = None
+
+    def get_cameras(self, refresh: bool = False) -> Tuple[List[dict], Optional[float]]:
+        """
+        Returns the discovered cameras and the Unix time of the discovery they come from.
+
+        Args:
+            refresh (bool): Sweeps the whole subnet now and waits for the result.
+
+        Returns:
+            Tuple[List[dict], Optional[float]]: Cameras sorted by address, each
+            {'id', 'ip', 'mac', 'ports', 'services', 'last_seen'}, and the discovery time.
+
+        Raises:
+            RuntimeError: If a discovery that had to be waited for failed.
+        """
+        with self._lock:
+            stale = time.monotonic() - self._refreshed_at >= self.ttl
+            must_wait = refresh or self._discovered_at is None
+            future = self._start_refresh(full=refresh) if (stale or must_wait) else None
+
+        if future is not None and must_wait:
+            try:
+                future.result()
+            except (OSError, RuntimeError, ValueError) as e:
+                raise RuntimeError(f"Camera discovery failed. Error: {e}")
+
+        with self._lock:
+            cameras = sorted(self._cameras.values(), key=lambda camera: ipaddress.IPv4Address(camera['ip']))
+            return [dict(camera) for camera in cameras], self._discovered_at
+
+    def get_camera(self, camera_id: str) -> Optional[dict]:
+        """
+        Returns a discovered camera by id, or None if it is not known.
+        """
+        with self._lock:
+            camera = self._cameras.get(camera_id)
+            return dict(camera) if camera is not None else None
+
+    def _start_refresh(self, full: bool) -> concurrent.futures.Future:
+        # Called with the lock held
+        if self._running is not None and not self._running.done():
+            return self._running
+        sweep_due = self._swept_at is None or time.monotonic() - self._swept_at >= self.full_sweep_interval
+        self._running = self._loop.submit(self._refresh(full or sweep_due))
+        self._running.add_done_callback(_log_failure)
+        return self._running
+
+    async def _refresh(self, full: bool):
+        interfaces = await asyncio.get_running_loop().run_in_executor(None, self._interfaces)
+        networks = [interface.network for interface in interfaces]
+        own_addresses = {str(interface.ip) for interface in interfaces}
+
+        def on_subnet(ip: str) -> bool:
+            return any(ipaddress.IPv4Address(ip) in network for network in networks)
+
+        with self._lock:
+            candidates: Set[str] = {ip for ip in self._cameras if on_subnet(ip)}
+        candidates.update(ip for ip in read_neighbors(self.arp_path) if on_subnet(ip))
+        if full:
+            for interface in interfaces:
+                candidates.update(sweep_hosts(interface))
+        candidates -= own_addresses
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        hosts = sorted(candidates)
+        results = await asyncio.gather(*(self._probe_host(ip, semaphore) for ip in hosts))
+        # Probing filled the ARP table for every host that answered
+        neighbors = read_neighbors(self.arp_path)
+        now = time.time()
+
+        with self._lock:
+            # Known cameras were all candidates, so anything not found again has gone (or left the subnet)
+            cameras = {}
+            for ip, open_ports in zip(hosts, results):
+                if open_ports:
+                    cameras[ip] = {'id': ip, 'ip': ip, 'mac': neighbors.get(ip), 'ports': open_ports,
+                                   'services': sorted({self.ports[port] for port in open_ports}), 'last_seen': now}
+            self._cameras = cameras
+            self._discovered_at = now
+            self._refreshed_at = time.monotonic()
+            if full:
+                self._swept_at = self._refreshed_at
+
+    async def _probe_host(self, ip: str, semaphore: asyncio.Semaphore) -> List[int]:
+        results = await asyncio.gather(*(self._probe_port(ip, port, semaphore) for port in self.ports))
+        return [port for port, is_open in zip(self.ports, results) if is_open]
+
+    async def _probe_port(self, ip: str, port: int, semaphore: asyncio.Semaphore) -> bool:
+        async with semaphore:
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), self.timeout)
+            except (OSError, asyncio.TimeoutError):
+                return False
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+            return True
+
+
+def _log_failure(future: concurrent.futures.Future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Error discovering cameras: {future.exception()}")
+
+
+camera_discovery = CameraDiscovery()
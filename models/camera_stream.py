@@ -0,0 +1,339 @@
+import http.client
+import threading
+import time
+from email.message import Message
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Set, Tuple
+
+from config.constants import CAMERA_STREAM_READ_TIMEOUT_SECONDS, CAMERA_STREAM_LINGER_SECONDS, \
+    CAMERA_STREAM_RETRY_SECONDS, CAMERA_STREAM_MAX_FRAME_BYTES
+
+# Boundary of the multipart/x-mixed-replace responses sent to viewers
+STREAM_BOUNDARY = 'daughterboxframe'
+STREAM_CONTENT_TYPE = f'multipart/x-mixed-replace; boundary={STREAM_BOUNDARY}'
+
+MAX_HEADER_LINE = 1024
+
+
+def mjpeg_boundary(content_type: str) -> bytes:
+    """
+    Returns the part boundary of a multipart/x-mixed-replace Content-Type.
+
+    Raises:
+        ValueError: If the content type is not a multipart stream with a boundary.
+    """
+    message = Message()
+    message['Content-Type'] = content_type
+    boundary = message.get_param('boundary')
+    if message.get_content_type() != 'multipart/x-mixed-replace' or not boundary:
+        raise ValueError(f"Not an MJPEG stream (Content-Type: {content_type})")
+    return str(boundary).encode('latin-1')
+
+
+def read_mjpeg_frames(stream: BinaryIO, boundary: bytes,
+                      max_frame_bytes: int = CAMERA_STREAM_MAX_FRAME_BYTES) -> Iterator[Tuple[bytes, bytes]]:
+    """
+    Reads the parts of a multipart/x-mixed-replace stream.
+
+    Parts with a Content-Length are read in one call. Parts without one are read up to the next
+    boundary line.
+
+    Yields:
+        Tuple[bytes, bytes]: The part's Content-Type and body.
+
+    Raises:
+        ValueError: If a part is larger than max_frame_bytes.
+    """
+    # Some cameras put the leading dashes in the boundary parameter itself
+    delimiters = {b'--' + boundary.lstrip(b'-'), b'--' + boundary, boundary}
+    line = stream.readline(MAX_HEADER_LINE)
+
+    while line:
+        if line.rstrip(b'\r\n').rstrip(b'-') not in delimiters:
+            line = stream.readline(MAX_HEADER_LINE)
+            continue
+
+        headers: Dict[bytes, bytes] = {}
+        while True:
+            line = stream.readline(MAX_HEADER_LINE)
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.partition(b':')
+            headers[name.strip().lower()] = value.strip()
+        if not line:
+            return
+        content_type = headers.get(b'content-type', b'image/jpeg')
+
+        if b'content-length' in headers:
+            length = int(headers[b'content-length'])
+            if length > max_frame_bytes:
+                raise ValueError(f"Frame of {length} bytes exceeds the {max_frame_bytes} byte limit")
+            frame = stream.read(length)
+            if len(frame) < length:
+                return
+            yield content_type, frame
+            line = stream.readline(MAX_HEADER_LINE)
+            continue
+
+        parts, size = [], 0
+        line = stream.readline(max_frame_bytes)
+        while line and line.rstrip(b'\r\n').rstrip(b'-') not in delimiters:
+            parts.append(line)
+            size += len(line)
+            if size > max_frame_bytes:
+                raise ValueError(f"Frame exceeds the {max_frame_bytes} byte limit")
+            line = stream.readline(max_frame_bytes)
+        if not line:
+            return
+        # The CRLF before the boundary belongs to the delimiter, not the frame
+        frame = b''.join(parts)
+        yield content_type, frame[:-2] if frame.endswith(b'\r\n') else frame.rstrip(b'\n')
+
+
+def encode_part(content_type: bytes, frame: bytes) -> bytes:
+    """
+    Builds one viewer-facing multipart chunk. It is built once per frame and shared by every viewer.
+    """
+    header = b'--%s\r\nContent-Type: %s\r\nContent-Length: %d\r\n\r\n' % (
+        STREAM_BOUNDARY.encode('ascii'), content_type, len(frame))
+    return b''.join((header, frame, b'\r\n'))
+
+
+class StreamViewer:
+    """
+    One client of a camera stream.
+
+    It holds at most one unsent frame. A frame that arrives before the previous one was sent
+    replaces it and is counted as dropped, so a slow viewer sees a lower frame rate and never
+    holds up the upstream reader or the other viewers.
+    """
+
+    def __init__(self, hub: 'MjpegHub'):
+        self._hub = hub
+        self._cond = threading.Condition()
+        self._pending: Optional[bytes] = None
+        self._started = False
+        self._error: Optional[str] = None
+        self._closed = False
+        self.sent = 0
+        self.dropped = 0
+
+    def offer(self, chunk: bytes):
+        with self._cond:
+            if self._closed:
+                return
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = chunk
+            self._cond.notify()
+
+    def fail(self, message: str):
+        """
+        Reports an upstream failure. It only ends a viewer that has not received a frame yet;
+        viewers already streaming keep waiting while the upstream reconnects.
+        """
+        with self._cond:
+            if not self._started:
+                self._error = message
+                self._cond.notify()
+
+    def next_chunk(self, timeout: float) -> Optional[bytes]:
+        """
+        Waits for the next frame chunk.
+
+        Returns:
+            Optional[bytes]: The chunk, or None if the viewer was closed or no frame arrived in time.
+
+        Raises:
+            RuntimeError: If the upstream failed before this viewer received its first frame.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending is None and self._error is None and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if self._error is not None:
+                raise RuntimeError(self._error)
+            chunk, self._pending = self._pending, None
+            if chunk is not None:
+                self._started = True
+                self.sent += 1
+            return chunk
+
+    def chunks(self, first: bytes, timeout: float = CAMERA_STREAM_READ_TIMEOUT_SECONDS) -> Iterator[bytes]:
+        """
+        Yields the first chunk and then every chunk after it until the stream stalls for longer than
+        timeout. Closing the generator, as the server does when the client disconnects, unsubscribes the viewer.
+        """
+        try:
+            chunk = first
+            while chunk is not None:
+                yield chunk
+                chunk = self.next_chunk(timeout)
+        finally:
+            self.close()
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending = None
+            self._cond.notify()
+        self._hub.unsubscribe(self)
+
+
+class MjpegHub:
+    """
+    Relays one upstream MJPEG stream to any number of viewers.
+
+    A single reader thread holds the upstream connection and hands each frame, encoded once,
+    to every viewer. The connection is kept for `linger` seconds after the last viewer leaves,
+    so a page reload or a new viewer reuses it instead of reconnecting. While viewers remain,
+    a failed or ended upstream is reconnected after `retry` seconds. Once the reader stops,
+    `on_idle` is called with the hub.
+    """
+
+    def __init__(self, host: str, port: int, path: str, read_timeout: float = CAMERA_STREAM_READ_TIMEOUT_SECONDS,
+                 linger: float = CAMERA_STREAM_LINGER_SECONDS, retry: float = CAMERA_STREAM_RETRY_SECONDS,
+                 on_idle: Optional[Callable[['MjpegHub'], None]] = None):
+        self.host = host
+        self.port = port
+        self.path = path
+        self.read_timeout = read_timeout
+        self.linger = linger
+        self.retry = retry
+        self._on_idle = on_idle
+        self._lock = threading.Condition()
+        self._viewers: Set[StreamViewer] = set()
+        self._idle_since: Optional[float] = None
+        self._running = False
+        self.connections = 0
+        self.frames = 0
+
+    def subscribe(self) -> StreamViewer:
+        """
+        Adds a viewer, starting the upstream reader if it is not running.
+        """
+        viewer = StreamViewer(self)
+        with self._lock:
+            self._viewers.add(viewer)
+            self._idle_since = None
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._run, name=f'camera-stream-{self.host}', daemon=True).start()
+        return viewer
+
+    def unsubscribe(self, viewer: StreamViewer):
+        with self._lock:
+            self._viewers.discard(viewer)
+            if not self._viewers:
+                self._idle_since = time.monotonic()
+            self._lock.notify_all()
+
+    def running(self) -> bool:
+        with self._lock:
+            return self._running
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            viewers = list(self._viewers)
+            return {'viewers': len(viewers), 'connections': self.connections, 'frames': self.frames,
+                    'dropped': sum(viewer.dropped for viewer in viewers)}
+
+    def _expired(self) -> bool:
+        # Called with the lock held
+        return not self._viewers and self._idle_since is not None and \
+            time.monotonic() - self._idle_since >= self.linger
+
+    def _run(self):
+        connection: Optional[http.client.HTTPConnection] = None
+        while True:
+            with self._lock:
+                if self._expired():
+                    self._running = False
+                    break
+            try:
+                if connection is None:
+                    connection = http.client.HTTPConnection(self.host, self.port, timeout=self.read_timeout)
+                idle = self._relay(connection)
+                message = "Camera stream ended"
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                idle, message = False, f"Camera stream failed. Error: {e}"
+
+            connection.close()
+            connection = None
+            if idle:
+                continue
+            with self._lock:
+                viewers = list(self._viewers)
+            for viewer in viewers:
+                viewer.fail(message)
+            with self._lock:
+                self._lock.wait_for(self._expired, self.retry)
+        if self._on_idle is not None:
+            self._on_idle(self)
+
+    def _relay(self, connection: http.client.HTTPConnection) -> bool:
+        # Returns True once the hub has been idle for the linger period, False if the upstream ended
+        connection.request('GET', self.path)
+        response = connection.getresponse()
+        with self._lock:
+            self.connections += 1
+        if response.status != 200:
+            response.read()
+            raise ValueError(f"upstream returned HTTP {response.status}")
+        boundary = mjpeg_boundary(response.getheader('Content-Type', ''))
+
+        for content_type, frame in read_mjpeg_frames(response, boundary):
+            chunk = encode_part(content_type, frame)
+            with self._lock:
+                if self._expired():
+                    return True
+                self.frames += 1
+                viewers = list(self._viewers)
+            for viewer in viewers:
+                viewer.offer(chunk)
+        return False
+
+
+class CameraStreamPool:
+    """
+    Keeps one MjpegHub per upstream stream, so all viewers of a camera share its connection.
+
+    A hub is dropped once its reader has stopped for lack of viewers, so streams asked for
+    with arbitrary paths do not accumulate.
+    """
+
+    def __init__(self, **hub_options):
+        self._hub_options = hub_options
+        self._lock = threading.Lock()
+        self._hubs: Dict[Tuple[str, int, str], MjpegHub] = {}
+
+    def subscribe(self, host: str, port: int, path: str) -> StreamViewer:
+        with self._lock:
+            hub = self._hubs.get((host, port, path))
+            if hub is None:
+                hub = MjpegHub(host, port, path, on_idle=self._discard, **self._hub_options)
+                self._hubs[(host, port, path)] = hub
+            # Under the pool lock, so an idle hub is either revived here or dropped before the lookup
+            return hub.subscribe()
+
+    def hub(self, host: str, port: int, path: str) -> Optional[MjpegHub]:
+        with self._lock:
+            return self._hubs.get((host, port, path))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._hubs)
+
+    def _discard(self, hub: MjpegHub):
+        key = (hub.host, hub.port, hub.path)
+        with self._lock:
+            # A viewer may have subscribed again since the reader stopped
+            if self._hubs.get(key) is hub and not hub.running():
+                del self._hubs[key]
+
+
+camera_streams = CameraStreamPool()
@@ -0,0 +1,324 @@
+import asyncio
+import os
+import shlex
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+import config.constants as constants
+from config.constants import COMMAND_TIMEOUT_SECONDS, COMMAND_TIMEOUTS, COMMAND_OUTPUT_LIMIT_BYTES, \
+    COMMAND_TRACE_HISTORY
+from models.admission import limiter_for
+from models.metrics import command_started, command_finished
+from models.tracing import span
+
+
+class CommandTimeoutError(RuntimeError):
+    """
+    Raised when a command runs past its timeout. Its whole process group has been killed.
+    """
+
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"Command '{name}' timed out after {timeout:g} seconds.")
+        self.name = name
+        self.timeout = timeout
+        self.stderr = None
+
+
+class CommandResult:
+    """
+    Exit code and captured output of a finished command.
+    """
+
+    def __init__(self, name: str, argv: List[str], returncode: int, stdout: str, stderr: str, truncated: bool):
+        self.name = name
+        self.argv = argv
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.truncated = truncated
+
+    @property
+    def command(self) -> str:
+        return shlex.join(self.argv)
+
+
+class CommandTrace:
+    """
+    Structured record of one command execution, handed to every trace hook.
+    """
+
+    __slots__ = ('name', 'argv', 'started_at', 'duration', 'returncode', 'stdout_bytes', 'stderr_bytes',
+                 'truncated', 'timed_out')
+
+    def __init__(self, name: str, argv: List[str], started_at: float):
+        self.name = name
+        self.argv = argv
+        self.started_at = started_at
+        self.duration = 0.0
+        self.returncode: Optional[int] = None
+        self.stdout_bytes = 0
+        self.stderr_bytes = 0
+        self.truncated = False
+        self.timed_out = False
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration': round(self.duration, 6),
+            'returncode': self.returncode,
+            'stdout_bytes': self.stdout_bytes,
+            'stderr_bytes': self.stderr_bytes,
+            'truncated': self.truncated,
+            'timed_out': self.timed_out,
+        }
+
+
+_trace_lock = threading.Lock()
+_trace_hooks: List[Callable[[CommandTrace], None]] = []
+recent_traces: Deque[CommandTrace] = deque(maxlen=COMMAND_TRACE_HISTORY)
+
+
+def add_trace_hook(hook: Callable[[CommandTrace], None]):
+    """
+    Registers a callable run with the CommandTrace of every finished command.
+    """
+    with _trace_lock:
+        _trace_hooks.append(hook)
+
+
+def remove_trace_hook(hook: Callable[[CommandTrace], None]):
+    with _trace_lock:
+        if hook in _trace_hooks:
+            _trace_hooks.remove(hook)
+
+
+def build_argv(template: Sequence[str], args: Sequence[object]) -> List[str]:
+    """
+    Fills each '{}' element of an argv template with the next argument.
+
+    Raises:
+        ValueError: If the number of arguments does not match the placeholders.
+    """
+    placeholders = sum(1 for part in template if part == '{}')
+    if placeholders != len(args):
+        raise ValueError(f"Command template {template} expects {placeholders} arguments, got {len(args)}.")
+    values = iter(args)
+    return [str(next(values)) if part == '{}' else part for part in template]
+
+
+def run_command(name: str, *args: object, timeout: Optional[float] = None) -> CommandResult:
+    """
+    Runs the argv template `name` from config/constants.py without a shell.
+
+    The command runs in its own session so a timeout kills it and anything it spawned.
+    Output is spooled to temporary files rather than pipes, and only the first
+    COMMAND_OUTPUT_LIMIT_BYTES of each stream are read back. Commands listed in COMMAND_CLASSES
+    first wait for a slot of their class's admission limiter. Inside a traced request the wait
+    and the run are recorded as one 'command' span.
+
+    Args:
+        name (str): Name of the template, e.g. 'NMCLI_GET_IP4_ADDRESS'.
+        *args: Values for the template's '{}' elements, passed to the program verbatim.
+        timeout (Optional[float]): Seconds before the command is killed; defaults to COMMAND_TIMEOUTS or
+            COMMAND_TIMEOUT_SECONDS.
+
+    Returns:
+        CommandResult: The exit code and decoded output.
+
+    Raises:
+        CommandTimeoutError: If the command did not finish in time.
+        AdmissionRejected: If too many commands of its class are already running or queued.
+        OSError: If the program could not be started.
+    """
+    argv = build_argv(getattr(constants, name), args)
+    if timeout is None:
+        timeout = COMMAND_TIMEOUTS.get(name, COMMAND_TIMEOUT_SECONDS)
+
+    limiter = limiter_for(name)
+    with span(name, 'command'):
+        if limiter is None:
+            return _run(name, argv, timeout)
+        with limiter.slot():
+            return _run(name, argv, timeout)
+
+
+async def run_command_async(name: str, *args: object, timeout: Optional[float] = None) -> CommandResult:
+    """
+    Same as run_command(), for coroutines: the admission wait, the process and the reads of its
+    output are awaited, so a slow command holds no thread while it runs.
+
+    Output is read from pipes as it arrives; past COMMAND_OUTPUT_LIMIT_BYTES the rest is counted
+    and discarded so the command never blocks on a full pipe.
+
+    Raises:
+        CommandTimeoutError: If the command did not finish in time.
+        AdmissionRejected: If too many commands of its class are already running or queued.
+        OSError: If the program could not be started.
+    """
+    argv = build_argv(getattr(constants, name), args)
+    if timeout is None:
+        timeout = COMMAND_TIMEOUTS.get(name, COMMAND_TIMEOUT_SECONDS)
+
+    limiter = limiter_for(name)
+    with span(name, 'command'):
+        if limiter is None:
+            return await _run_async(name, argv, timeout)
+        async with limiter.async_slot():
+            return await _run_async(name, argv, timeout)
+
+
+@contextmanager
+def stream_command(name: str, *args: object) -> Iterator[Iterator[str]]:
+    """
+    Runs a long-lived argv template, such as 'NMCLI_MONITOR', and yields its stdout line by line.
+
+    Unlike run_command() there is no timeout and no admission slot: the command runs until the
+    block exits, and would hold the slot for as long. It runs in its own session, and its whole
+    process group is killed when the block exits. The run is counted in the command
+    metrics and trace hooks once it ends.
+
+    Args:
+        name (str): Name of the template in config/constants.py.
+        *args: Values for the template's '{}' elements, passed to the program verbatim.
+
+    Yields:
+        Iterator[str]: The lines of the command's output, ending when it exits.
+
+    Raises:
+        OSError: If the program could not be started.
+    """
+    argv = build_argv(getattr(constants, name), args)
+    trace = CommandTrace(name, argv, time.time())
+    started = command_started(name)
+    process = None
+    try:
+        process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True, start_new_session=True)
+        yield _counted_lines(process.stdout, trace)
+    finally:
+        if process is not None:
+            if process.poll() is None:
+                _kill_process_group(process)
+            process.stdout.close()
+            trace.returncode = process.returncode
+        trace.duration = time.perf_counter() - started
+        command_finished(name, started, trace.returncode if trace.returncode is not None else -1)
+        _emit(trace)
+
+
+def _counted_lines(stream, trace: CommandTrace) -> Iterator[str]:
+    for line in stream:
+        trace.stdout_bytes += len(line)
+        yield line
+
+
+def _run(name: str, argv: List[str], timeout: float) -> CommandResult:
+    trace = CommandTrace(name, argv, time.time())
+    started = command_started(name)
+    try:
+        with tempfile.TemporaryFile() as stdout_file, tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=stdout_file, stderr=stderr_file,
+                                       start_new_session=True)
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                _kill_process_group(process)
+                trace.timed_out = True
+                raise CommandTimeoutError(name, timeout)
+
+            trace.returncode = process.returncode
+            stdout, trace.stdout_bytes, stdout_truncated = _read_bounded(stdout_file)
+            stderr, trace.stderr_bytes, stderr_truncated = _read_bounded(stderr_file)
+            trace.truncated = stdout_truncated or stderr_truncated
+            return CommandResult(name, argv, process.returncode, stdout, stderr, stdout_truncated)
+    finally:
+        trace.duration = time.perf_counter() - started
+        command_finished(name, started, trace.returncode if trace.returncode is not None else -1)
+        _emit(trace)
+
+
+async def _run_async(name: str, argv: List[str], timeout: float) -> CommandResult:
+    trace = CommandTrace(name, argv, time.time())
+    started = command_started(name)
+    process = None
+    try:
+        process = await asyncio.create_subprocess_exec(*argv, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                                       stderr=subprocess.PIPE, start_new_session=True)
+        try:
+            (stdout, trace.stdout_bytes), (stderr, trace.stderr_bytes), _ = await asyncio.wait_for(
+                asyncio.gather(_read_stream_bounded(process.stdout), _read_stream_bounded(process.stderr),
+                               process.wait()), timeout)
+        except asyncio.TimeoutError:
+            trace.timed_out = True
+            raise CommandTimeoutError(name, timeout)
+
+        trace.returncode = process.returncode
+        stdout, stdout_truncated = _bounded_text(stdout, trace.stdout_bytes)
+        stderr, stderr_truncated = _bounded_text(stderr, trace.stderr_bytes)
+        trace.truncated = stdout_truncated or stderr_truncated
+        return CommandResult(name, argv, process.returncode, stdout, stderr, stdout_truncated)
+    finally:
+        if process is not None and process.returncode is None:
+            # Timed out or cancelled: take the whole group down with it
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await asyncio.shield(process.wait())
+        trace.duration = time.perf_counter() - started
+        command_finished(name, started, trace.returncode if trace.returncode is not None else -1)
+        _emit(trace)
+
+
+async def _read_stream_bounded(stream: asyncio.StreamReader) -> tuple:
+    chunks, kept, size = [], 0, 0
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            return b''.join(chunks), size
+        size += len(chunk)
+        if kept < COMMAND_OUTPUT_LIMIT_BYTES:
+            chunk = chunk[:COMMAND_OUTPUT_LIMIT_BYTES - kept]
+            chunks.append(chunk)
+            kept += len(chunk)
+
+
+def _kill_process_group(process: subprocess.Popen):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+def _read_bounded(file) -> tuple:
+    size = file.tell()
+    file.seek(0)
+    text, truncated = _bounded_text(file.read(COMMAND_OUTPUT_LIMIT_BYTES), size)
+    return text, size, truncated
+
+
+def _bounded_text(data: bytes, size: int) -> tuple:
+    truncated = size > COMMAND_OUTPUT_LIMIT_BYTES
+    if truncated:
+        # Drop the partial last line so parsers never see half a record
+        data = data[:data.rfind(b'\n') + 1]
+    return data.decode('utf-8', errors='replace'), truncated
+
+
+def _emit(trace: CommandTrace):
+    recent_traces.append(trace)
+    with _trace_lock:
+        hooks = list(_trace_hooks)
+    for hook in hooks:
+        try:
+            hook(trace)
+        except Exception as e:
+            print(f"Error in command trace hook: {e}")
@@ -0,0 +1,239 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config.constants import ETHERNET_CONNECTION
+from models.admission import connection_locks
+from models.backends import get_backend
+from models.device_mode_model import delayed_reboot
+from models.device_mode_store import device_mode_store, DEVICE_MODES
+from models.ethernet_model import parse_ethernet_address, current_ethernet_address, apply_ethernet_settings
+from models.state_cache import state_cache
+from models.tracing import traced
+
+CONFIG_KEYS = ('ethernet', 'autoconnect', 'delete', 'mode')
+
+_apply_lock = threading.Lock()
+
+
+class ConfigApplyError(RuntimeError):
+    """
+    Raised when a step of a configuration plan fails. The report of every step run, including
+    the rollback, is kept in `result`.
+    """
+
+    def __init__(self, message: str, result: Dict[str, Any]):
+        super().__init__(message)
+        self.result = result
+        self.stderr = None
+
+
+class Step:
+    """
+    One backend operation of a configuration plan and, when it can be undone, its inverse.
+    """
+
+    def __init__(self, action: str, target: str, run: Callable[[], None], undo: Optional[Callable[[], None]] = None,
+                 detail: Any = None, reversible: bool = True):
+        self.action = action
+        self.target = target
+        self.run = run
+        self.undo = undo
+        self.detail = detail
+        self.reversible = reversible
+
+    def describe(self) -> Dict[str, Any]:
+        return {'action': self.action, 'target': self.target, 'detail': self.detail}
+
+
+@traced
+def plan_config(document: Dict[str, Any]) -> List[Step]:
+    """
+    Compares a configuration document with the current state and returns the steps needed to apply it.
+
+    The document may contain any of:
+        'ethernet': {'ip': '192.168.1.20', 'mask': '24' or '255.255.255.0'}
+        'autoconnect': {connection name: true/false}
+        'delete': [connection name, ...]
+        'mode': 'AP' or 'STA'
+
+    Values that already match produce no step. Every address change is written before the
+    Ethernet settings are reapplied once. Autoconnect changes for connections that are also
+    being deleted are skipped. Deletions, which cannot be undone, run after everything that can
+    be rolled back. The mode change runs last; when the mode changes, the reboot applies the
+    Ethernet settings, so no reactivation is planned.
+
+    Args:
+        document (Dict[str, Any]): The desired configuration.
+
+    Returns:
+        List[Step]: The steps in execution order; empty when nothing differs.
+
+    Raises:
+        ValueError: If the document is malformed or names an unknown connection.
+        RuntimeError: If the current state cannot be read.
+    """
+    if not isinstance(document, dict) or not document:
+        raise ValueError("Configuration document must be a non-empty JSON object")
+    unknown = set(document) - set(CONFIG_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown configuration keys: {', '.join(sorted(unknown))}")
+
+    backend = get_backend()
+    steps: List[Step] = []
+    reactivate = None
+
+    to_delete = document.get('delete') or []
+    autoconnect = document.get('autoconnect') or {}
+    if not isinstance(to_delete, list) or not isinstance(autoconnect, dict):
+        raise ValueError("'delete' must be a list and 'autoconnect' an object")
+    if not all(isinstance(name, str) for name in list(autoconnect) + to_delete):
+        raise ValueError("Connection names must be strings")
+
+    if 'ethernet' in document:
+        ethernet = document['ethernet'] or {}
+        if not isinstance(ethernet, dict):
+            raise ValueError("'ethernet' must be an object")
+        target = parse_ethernet_address(ethernet.get('ip'), ethernet.get('mask'))
+        if target != current_ethernet_address(backend):
+            new_address = target.with_prefixlen
+            # The saved method and addresses, not the running address: a DHCP connection goes back to DHCP
+            previous = backend.ip4_settings(ETHERNET_CONNECTION)
+            steps.append(Step('set_ip4_address', ETHERNET_CONNECTION,
+                              lambda: backend.set_ip4_address(ETHERNET_CONNECTION, new_address),
+                              _bind(backend.restore_ip4_settings, ETHERNET_CONNECTION, previous), new_address))
+            # Rolled back by running it again once the old address is restored
+            reactivate = Step('reapply_connection', ETHERNET_CONNECTION,
+                              lambda: apply_ethernet_settings(backend))
+
+    if autoconnect or to_delete:
+        known = {connection['name']: connection['autoconnect'] == 'yes'
+                 for connection in backend.remembered_wifi_connections()}
+        missing = [name for name in list(autoconnect) + to_delete if name not in known]
+        if missing:
+            raise ValueError(f"Unknown connections: {', '.join(missing)}")
+
+        for name, enabled in autoconnect.items():
+            if not isinstance(enabled, bool):
+                raise ValueError(f"Autoconnect for '{name}' must be true or false")
+            if name in to_delete or known[name] == enabled:
+                continue
+            steps.append(Step('set_autoconnect', name, _bind(backend.set_autoconnect, name, enabled),
+                              _bind(backend.set_autoconnect, name, known[name]), enabled))
+
+    mode_step = None
+    if document.get('mode') is not None:
+        mode = document['mode']
+        if mode not in DEVICE_MODES:
+            raise ValueError("Mode must be either 'AP' or 'STA'")
+        current_mode = device_mode_store.get()
+        if mode != current_mode:
+            mode_step = Step('set_device_mode', 'device', _bind(device_mode_store.set, mode),
+                             _bind(device_mode_store.set, current_mode), mode)
+
+    if reactivate is not None and mode_step is None:
+        steps.append(reactivate)
+    for name in dict.fromkeys(to_delete):
+        steps.append(Step('delete_connection', name, _bind(backend.delete_connection, name), reversible=False))
+    if mode_step is not None:
+        steps.append(mode_step)
+
+    return steps
+
+
+@traced
+def apply_config(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Plans and applies a configuration document. Only one document is applied at a time, and
+    the plan is recomputed under that lock so it is based on the state left by the previous one.
+
+    Raises:
+        ValueError: If the document is invalid.
+        ConfigApplyError: If a step failed; completed steps have been undone where possible.
+    """
+    with _apply_lock:
+        steps = plan_config(document)
+        # The device mode is not a NetworkManager connection
+        connections = [step.target for step in steps if step.action != 'set_device_mode']
+        with connection_locks.hold(*connections):
+            return apply_plan(steps)
+
+
+def apply_plan(steps: List[Step]) -> Dict[str, Any]:
+    """
+    Runs the steps of a plan in order, undoing the completed ones in reverse if one fails.
+
+    Args:
+        steps (List[Step]): The plan returned by plan_config().
+
+    Returns:
+        Dict[str, Any]: {'steps': per-step report with timings, 'rollback': [], 'reboot': bool, 'total_ms'}.
+
+    Raises:
+        ConfigApplyError: If a step failed; completed steps have been undone where possible.
+    """
+    started = time.perf_counter()
+    report: Dict[str, Any] = {'steps': [], 'rollback': [], 'reboot': False}
+    completed: List[Step] = []
+
+    try:
+        for step in steps:
+            entry, error = _timed(step, step.run)
+            report['steps'].append(entry)
+            if error is None:
+                completed.append(step)
+                continue
+
+            report['rollback'] = _roll_back(completed, step)
+            report['total_ms'] = _elapsed_ms(started)
+            raise ConfigApplyError(f"Step '{step.action}' for '{step.target}' failed: {error}", report)
+    finally:
+        state_cache.invalidate()
+
+    if any(step.action == 'set_device_mode' for step in completed):
+        delayed_reboot()
+        report['reboot'] = True
+    report['total_ms'] = _elapsed_ms(started)
+    return report
+
+
+def _roll_back(completed: List[Step], failed: Step) -> List[Dict[str, Any]]:
+    # Undo in reverse order, then re-run any reactivation that was attempted so the restored settings take effect
+    entries = []
+    for step in reversed(completed):
+        if step.undo is not None:
+            entry, _ = _timed(step, step.undo)
+            entries.append(entry)
+        elif not step.reversible:
+            entries.append(dict(step.describe(), status='not_reversible', duration_ms=0.0))
+
+    attempted = completed + [failed]
+    reactivations = [step for step in attempted if step.action == 'reapply_connection']
+    if reactivations and any(step.undo is not None for step in completed):
+        entry, _ = _timed(reactivations[-1], reactivations[-1].run)
+        entries.append(entry)
+    return entries
+
+
+def _timed(step: Step, function: Callable[[], None]):
+    step_started = time.perf_counter()
+    entry = step.describe()
+    error = None
+    try:
+        function()
+        entry['status'] = 'ok'
+    except (RuntimeError, OSError, ValueError) as e:
+        error = e
+        entry['status'] = 'failed'
+        entry['error'] = str(e)
+    entry['duration_ms'] = _elapsed_ms(step_started)
+    return entry, error
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _bind(function: Callable, *args) -> Callable[[], None]:
+    return lambda: function(*args)
+
@@ -1,12 +1,14 @@
-import os
 import threading
 
-from config.constants import DEVICE_MODE_FILE_PATH, REBOOT_SYSTEM, SHUTDOWN_SYSTEM
+from models.command_runner import run_command
+from models.device_mode_store import device_mode_store
+from models.tracing import traced
 
 
+@traced
 def get_device_mode() -> str:
     """
-    Retrieves the mode from the file specified by the MODE_FILE_PATH environment variable.
+    Retrieves the mode kept in memory by the device mode store, which mirrors DEVICE_MODE_FILE_PATH.
     The mode can only be 'AP' or 'STA'.
 
     Returns:
@@ -16,25 +18,13 @@ def get_device_mode() -> str:
         ValueError: If the mode is not 'AP' or 'STA'.
         FileNotFoundError: If the mode file does not exist.
     """
-    mode_file_path = DEVICE_MODE_FILE_PATH
-    if not mode_file_path:
-        raise EnvironmentError(f"{DEVICE_MODE_FILE_PATH} environment variable is not set")
-
-    if not os.path.exists(mode_file_path):
-        raise FileNotFoundError(f"Mode file not found at path: {mode_file_path}")
-
-    with open(mode_file_path, 'r') as file:
-        mode = file.read().strip()
-
-    if mode not in ['AP', 'STA']:
-        raise ValueError("Mode must be either 'AP' or 'STA'")
-
-    return mode
+    return device_mode_store.get()
 
 
+@traced
 def set_device_mode(new_mode: str):
     """
-    Sets the mode in the file specified by the MODE_FILE_PATH environment variable.
+    Atomically writes the mode to DEVICE_MODE_FILE_PATH and reboots into it.
     The mode can only be 'AP' or 'STA'.
 
     Args:
@@ -42,21 +32,10 @@ def set_device_mode(new_mode: str):
 
     Raises:
         ValueError: If the new mode is not 'AP' or 'STA'.
-        EnvironmentError: If the MODE_FILE_PATH environment variable is not set.
+        EnvironmentError: If DEVICE_MODE_FILE_PATH is not set.
         FileNotFoundError: If the mode file does not exist.
     """
-    if new_mode not in ['AP', 'STA']:
-        raise ValueError("Mode must be either 'AP' or 'STA'")
-
-    mode_file_path = DEVICE_MODE_FILE_PATH
-    if not mode_file_path:
-        raise EnvironmentError(f"{DEVICE_MODE_FILE_PATH} environment variable is not set")
-
-    if not os.path.exists(mode_file_path):
-        raise FileNotFoundError(f"Mode file not found at path: {mode_file_path}")
-
-    with open(mode_file_path, 'w') as file:
-        file.write(new_mode)
+    device_mode_store.set(new_mode)
 
     reboot_system()
 
@@ -66,7 +45,7 @@ def reboot_system():
     Reboots the system.
     """
     turn_off_i2c_display()
-    os.system(REBOOT_SYSTEM)
+    run_command('REBOOT_SYSTEM')
 
 
 def shutdown_system():
@@ -74,7 +53,7 @@ def shutdown_system():
     Shuts down the system.
     """
     turn_off_i2c_display()
-    os.system(SHUTDOWN_SYSTEM)
+    run_command('SHUTDOWN_SYSTEM')
 
 
 def delayed_reboot():
@@ -93,6 +72,6 @@ def turn_off_i2c_display(bus: int = 1, address: str = "0x3C"):
         address (str): I2C address of the display in hexadecimal format (e.g., "0x3C").
     """
     try:
-        os.system(f"i2cset -y {bus} {address} 0x00 0xAE")
+        run_command('I2C_DISPLAY_OFF', bus, address)
     except Exception as e:
         print(f"Error turning off the I2C display: {e}")
\ No newline at end of file
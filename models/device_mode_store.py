@@ -0,0 +1,140 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from config.constants import DEVICE_MODE_FILE_PATH, DEVICE_MODE_CHECK_INTERVAL_SECONDS
+
+DEVICE_MODES = ('AP', 'STA')
+
+
+class DeviceModeStore:
+    """
+    Holds the device mode in memory, backed by the mode file.
+
+    Reads return the cached mode without touching the filesystem. At most once per
+    check_interval a read stats the file and reloads it only if its mtime, size or inode
+    changed, so edits made outside the app are still picked up.
+
+    Writes go to a temporary file in the same directory, which is fsynced and renamed over
+    the mode file, and then the directory is fsynced too. After a power loss the file holds
+    either the old mode or the new one, never a torn or empty write.
+    """
+
+    def __init__(self, path: str, check_interval: float = DEVICE_MODE_CHECK_INTERVAL_SECONDS):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mode: Optional[str] = None
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._checked_at = 0.0
+        self._listeners: List[Callable[[str], None]] = []
+
+    def subscribe(self, listener: Callable[[str], None]):
+        """
+        Registers a callback invoked with the new mode whenever it changes, by set() or on disk.
+        """
+        self._listeners.append(listener)
+
+    def get(self) -> str:
+        """
+        Returns the current mode.
+
+        Raises:
+            EnvironmentError: If no mode file path is configured.
+            FileNotFoundError: If the mode file does not exist.
+            ValueError: If the file does not hold 'AP' or 'STA'.
+        """
+        changed = None
+        with self._lock:
+            if self._mode is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._mode
+
+            self._check_path()
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._mode = None
+                raise FileNotFoundError(f"Mode file not found at path: {self.path}")
+
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            if signature != self._signature or self._mode is None:
+                with open(self.path, 'r') as file:
+                    mode = file.read().strip()
+                if mode not in DEVICE_MODES:
+                    self._mode = None
+                    raise ValueError("Mode must be either 'AP' or 'STA'")
+                if self._mode is not None and mode != self._mode:
+                    changed = mode
+                self._mode = mode
+                self._signature = signature
+            self._checked_at = time.monotonic()
+            mode = self._mode
+
+        if changed is not None:
+            self._notify(changed)
+        return mode
+
+    def set(self, new_mode: str):
+        """
+        Atomically and durably replaces the mode file's contents.
+
+        Raises:
+            ValueError: If the new mode is not 'AP' or 'STA'.
+            EnvironmentError: If no mode file path is configured.
+            FileNotFoundError: If the mode file does not exist.
+        """
+        if new_mode not in DEVICE_MODES:
+            raise ValueError("Mode must be either 'AP' or 'STA'")
+
+        with self._lock:
+            self._check_path()
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Mode file not found at path: {self.path}")
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix='.mode.')
+            try:
+                with os.fdopen(descriptor, 'w') as file:
+                    file.write(new_mode)
+                    file.flush()
+                    os.fchmod(file.fileno(), stat.st_mode & 0o7777)
+                    os.fsync(file.fileno())
+                os.replace(temporary_path, self.path)
+            except BaseException:
+                if os.path.exists(temporary_path):
+                    os.unlink(temporary_path)
+                raise
+            _fsync_directory(directory)
+
+            stat = os.stat(self.path)
+            self._mode = new_mode
+            self._signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            self._checked_at = time.monotonic()
+
+        self._notify(new_mode)
+
+    def _check_path(self):
+        if not self.path:
+            raise EnvironmentError("DEVICE_MODE_FILE_PATH is not set")
+
+    def _notify(self, mode: str):
+        for listener in list(self._listeners):
+            try:
+                listener(mode)
+            except Exception as e:
+                print(f"Error in device mode listener: {e}")
+
+
+def _fsync_directory(directory: str):
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+device_mode_store = DeviceModeStore(DEVICE_MODE_FILE_PATH)
@@ -1,41 +1,143 @@
-import subprocess
-from typing import Dict
+import ipaddress
+import time
+from typing import Any, Dict, Optional
 
-from config.constants import ETHERNET_CONNECTION, NMCLI_SET_IP4_ADDRESS
+from config.constants import ETHERNET_CONNECTION, ETHERNET_REACHABLE_TIMEOUT_SECONDS, ETHERNET_REACHABLE_POLL_SECONDS
+from models.admission import connection_locks
+from models.backends import get_backend
+from models.backends.base import NetworkBackend, NetworkError
+from models.state_cache import state_cache
+from models.tracing import traced
 
 
-def set_ethernet_ip_and_mask(ip: str, mask: str) -> Dict[str, str]:
+def parse_ethernet_address(ip: Optional[str], mask: Optional[str]) -> ipaddress.IPv4Interface:
     """
-    Sets the IP address and subnet mask for the Ethernet connection.
+    Validates an IPv4 address and mask and returns them as one interface address.
 
     Args:
-        ip (str): The new IP address to set.
-        mask (str): The new subnet mask to set.
+        ip (str): The IP address, e.g. '192.168.1.20'.
+        mask (str): A prefix length ('24') or a dotted netmask ('255.255.255.0').
 
     Returns:
-        Dict[str, str]: A dictionary confirming the updated IP and mask.
+        ipaddress.IPv4Interface: The normalized address.
 
     Raises:
-        RuntimeError: If the command to change the IP address fails.
+        ValueError: If either value is missing or invalid, or the address cannot be assigned to a host.
     """
-    connection_name = ETHERNET_CONNECTION
-
-    ip_with_mask = f"{ip}/{mask}"
-
-    command = NMCLI_SET_IP4_ADDRESS.format(connection_name, ip_with_mask)
+    if not ip or not mask:
+        raise ValueError("IP address and mask are required")
+    try:
+        interface = ipaddress.IPv4Interface(f"{str(ip).strip()}/{str(mask).strip()}")
+    except ValueError as e:
+        raise ValueError(f"Invalid address '{ip}/{mask}': {e}")
+
+    address, network = interface.ip, interface.network
+    if address.is_unspecified or address.is_loopback or address.is_multicast or address.is_reserved:
+        raise ValueError(f"Address '{address}' cannot be assigned to the Ethernet connection")
+    if network.prefixlen < 31 and address in (network.network_address, network.broadcast_address):
+        raise ValueError(f"Address '{address}' is the network or broadcast address of {network}")
+    return interface
+
+
+@traced
+def current_ethernet_address(backend: NetworkBackend) -> Optional[ipaddress.IPv4Interface]:
+    """
+    Returns the address the Ethernet connection currently has, or None if it has none.
+    """
+    try:
+        current = backend.ip_and_mask(ETHERNET_CONNECTION)
+    except ValueError:
+        return None
+    return ipaddress.IPv4Interface(f"{current['ip']}/{current['mask']}")
 
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
 
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to set IP address '{ip_with_mask}' for connection '{connection_name}'. Error: {result.stderr}")
+@traced
+def apply_ethernet_settings(backend: NetworkBackend, target: Optional[ipaddress.IPv4Interface] = None) -> Dict[str, Any]:
+    """
+    Makes the saved Ethernet settings take effect, keeping the link up when NetworkManager allows it.
 
-    # Activate the updated connection
-    subprocess.run(f"nmcli connection up {connection_name}", shell=True, check=True)
+    The settings are first reapplied to the running device. If that is rejected, or the device does
+    not report the target address in time, the connection is fully reactivated instead.
 
-    return {'ip': ip, 'mask': mask}
+    Args:
+        backend (NetworkBackend): The backend to use.
+        target (ipaddress.IPv4Interface): The address to wait for; None to skip waiting.
 
+    Returns:
+        Dict[str, Any]: {'method': 'reapply' or 'activate', 'reachable_after_ms': time until the
+        device reported the target address, or None if it was not waited for}.
 
+    Raises:
+        RuntimeError: If the connection cannot be activated or never reports the target address.
+    """
+    started = time.perf_counter()
+    try:
+        backend.reapply_connection(ETHERNET_CONNECTION)
+        if target is None or _wait_for_address(backend, target):
+            return {'method': 'reapply', 'reachable_after_ms': _reachable_ms(started, target)}
+        print(f"Reapplied {ETHERNET_CONNECTION} but {target} did not come up; reactivating")
+    except NetworkError as e:
+        print(f"Could not reapply {ETHERNET_CONNECTION}, reactivating instead: {e}")
+
+    backend.activate_connection(ETHERNET_CONNECTION)
+    if target is not None and not _wait_for_address(backend, target):
+        raise NetworkError(f"Connection '{ETHERNET_CONNECTION}' did not come up with address {target}.")
+    return {'method': 'activate', 'reachable_after_ms': _reachable_ms(started, target)}
+
+
+@traced
+def set_ethernet_ip_and_mask(ip: str, mask: str) -> Dict[str, Any]:
+    """
+    Sets the IP address and subnet mask for the Ethernet connection.
 
+    The request is validated before anything is changed and skipped when the connection already
+    has that address. Otherwise the address is saved and reapplied to the running link, falling
+    back to a full reactivation.
 
+    Args:
+        ip (str): The new IP address to set.
+        mask (str): The new subnet mask, as a prefix length or a dotted netmask.
 
+    Returns:
+        Dict[str, Any]: {'ip', 'mask' (prefix length), 'changed', 'method', 'reachable_after_ms'}.
 
+    Raises:
+        ValueError: If the IP address or mask is invalid.
+        RuntimeError: If the address cannot be saved or the connection does not come up with it.
+    """
+    target = parse_ethernet_address(ip, mask)
+    result: Dict[str, Any] = {'ip': str(target.ip), 'mask': str(target.network.prefixlen)}
+
+    backend = get_backend()
+    with connection_locks.hold(ETHERNET_CONNECTION):
+        if current_ethernet_address(backend) == target:
+            return dict(result, changed=False, method=None, reachable_after_ms=0.0)
+
+        try:
+            backend.set_ip4_address(ETHERNET_CONNECTION, target.with_prefixlen)
+            result.update(apply_ethernet_settings(backend, target))
+        finally:
+            state_cache.invalidate()
+
+    result['changed'] = True
+    return result
+
+
+def _wait_for_address(backend: NetworkBackend, target: ipaddress.IPv4Interface) -> bool:
+    deadline = time.monotonic() + ETHERNET_REACHABLE_TIMEOUT_SECONDS
+    while True:
+        try:
+            if current_ethernet_address(backend) == target:
+                return True
+        except RuntimeError:
+            # The connection is briefly unqueryable while NetworkManager swaps its configuration
+            pass
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(ETHERNET_REACHABLE_POLL_SECONDS)
+
+
+def _reachable_ms(started: float, target: Optional[ipaddress.IPv4Interface]) -> Optional[float]:
+    if target is None:
+        return None
+    return round((time.perf_counter() - started) * 1000, 1)
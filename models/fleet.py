@@ -0,0 +1,149 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from config.constants import PORT, FLEET_PEERS, FLEET_ENDPOINTS, FLEET_PEER_TIMEOUT_SECONDS
+from models.async_http import AsyncHttpPool
+from models.async_loop import BackgroundLoop, background_loop
+
+
+def parse_peer(peer: str) -> Tuple[str, int]:
+    """
+    Parses a peer address: 'host', 'host:port' or 'http://host:port'. The port defaults to PORT.
+
+    Raises:
+        ValueError: If the address is not a plain HTTP host.
+    """
+    url = urlsplit(peer if '://' in peer else f'http://{peer}')
+    if url.scheme != 'http' or not url.hostname or url.path not in ('', '/') or url.query:
+        raise ValueError(f"Invalid fleet peer: {peer}")
+    return url.hostname, url.port or int(PORT)
+
+
+class PeerError(Exception):
+    """
+    A peer endpoint that did not answer with its state.
+    """
+
+
+class FleetClient:
+    """
+    Queries the state of peer daughterboxes.
+
+    Every endpoint of every peer is requested at once on the shared asyncio loop, over pooled
+    keep-alive connections. Each peer has its own deadline, so a slow or unreachable peer only
+    delays the result by that long and does not hold up the others.
+
+    The last value read from each endpoint is kept along with its ETag. Requests send the ETag,
+    so a peer whose state has not changed answers 304 and the kept value is reused. When an
+    endpoint fails, the kept value is reported as stale, together with when it was read.
+    """
+
+    def __init__(self, peers: Sequence[str] = FLEET_PEERS, endpoints: Optional[Dict[str, str]] = None,
+                 timeout: float = FLEET_PEER_TIMEOUT_SECONDS, loop: BackgroundLoop = background_loop):
+        self.peers = {peer: parse_peer(peer) for peer in peers}
+        self.endpoints = FLEET_ENDPOINTS if endpoints is None else endpoints
+        self.timeout = timeout
+        self._loop = loop
+        self._pool = AsyncHttpPool()
+
+        self._lock = threading.Lock()
+        # (peer, endpoint) -> (value, etag, fetched_at)
+        self._last_known: Dict[Tuple[str, str], Tuple[dict, Optional[str], float]] = {}
+        self.requests = 0
+        self.not_modified = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.peers)
+
+    def get_state(self) -> dict:
+        """
+        Queries every peer and merges their state.
+
+        Returns:
+            dict: {'peers': [...], 'summary': {'ok', 'partial', 'unreachable'}, 'queried_at'}. Each peer entry is
+            {'peer', 'status', 'state', 'errors', 'stale', 'fetched_at', 'latency_ms'}; 'state' maps each endpoint
+            to its value (or None if it was never read), 'errors' maps failed endpoints to the reason, 'stale'
+            lists the endpoints whose value is a last-known one, and 'fetched_at' gives the Unix time each value
+            was read.
+
+        Raises:
+            RuntimeError: If the query did not complete.
+        """
+        try:
+            peers = self._loop.run(self._query_all(), timeout=self.timeout + 5)
+        except (concurrent.futures.TimeoutError, OSError) as e:
+            raise RuntimeError(f"Fleet query failed. Error: {e!r}")
+
+        summary = {'ok': 0, 'partial': 0, 'unreachable': 0}
+        for peer in peers:
+            summary[peer['status']] += 1
+        return {'peers': peers, 'summary': summary, 'queried_at': time.time()}
+
+    async def _query_all(self):
+        return await asyncio.gather(*(self._query_peer(peer) for peer in self.peers))
+
+    async def _query_peer(self, peer: str) -> dict:
+        started = time.monotonic()
+        tasks = {name: asyncio.ensure_future(self._fetch(peer, name, path)) for name, path in self.endpoints.items()}
+        await asyncio.wait(tasks.values(), timeout=self.timeout)
+
+        state, errors, stale, fetched_at = {}, {}, [], {}
+        for name, task in tasks.items():
+            if not task.done():
+                task.cancel()
+                errors[name] = f"No answer within {self.timeout:g} seconds"
+            elif task.exception() is not None:
+                errors[name] = str(task.exception())
+
+            with self._lock:
+                last_known = self._last_known.get((peer, name))
+            state[name] = last_known[0] if last_known else None
+            fetched_at[name] = last_known[2] if last_known else None
+            if name in errors and last_known:
+                stale.append(name)
+
+        if not errors:
+            status = 'ok'
+        elif len(errors) < len(tasks):
+            status = 'partial'
+        else:
+            status = 'unreachable'
+        return {'peer': peer, 'status': status, 'state': state, 'errors': errors, 'stale': stale,
+                'fetched_at': fetched_at, 'latency_ms': round((time.monotonic() - started) * 1000, 1)}
+
+    async def _fetch(self, peer: str, name: str, path: str):
+        host, port = self.peers[peer]
+        with self._lock:
+            last_known = self._last_known.get((peer, name))
+            self.requests += 1
+        headers = {'If-None-Match': last_known[1]} if last_known and last_known[1] else {}
+
+        try:
+            response = await self._pool.get(host, port, path, headers)
+        except (OSError, ValueError) as e:
+            raise PeerError(f"Request failed: {str(e) or type(e).__name__}")
+
+        if response.status == 304 and last_known:
+            with self._lock:
+                self.not_modified += 1
+                self._last_known[(peer, name)] = (last_known[0], last_known[1], time.time())
+            return
+
+        try:
+            body = response.json()
+        except ValueError:
+            raise PeerError(f"HTTP {response.status} with an invalid JSON body")
+        if response.status != 200:
+            error = body.get('error') if isinstance(body, dict) else None
+            raise PeerError(f"HTTP {response.status}: {error}" if error else f"HTTP {response.status}")
+
+        with self._lock:
+            self._last_known[(peer, name)] = (body, response.headers.get('etag'), time.time())
+
+
+fleet_client = FleetClient()
@@ -0,0 +1,131 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from config.constants import JOB_WORKERS, JOB_HISTORY_SIZE
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class Job:
+    """
+    A network mutation running on the job queue.
+    """
+
+    def __init__(self, name: str, key: Hashable):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.key = key
+        self.status = QUEUED
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.stderr: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def elapsed(self) -> float:
+        """
+        Seconds since the job was submitted, or its total duration once finished.
+        """
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return round(end - self.submitted_at, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'elapsed': self.elapsed(),
+            'result': self.result,
+            'error': self.error,
+            'stderr': self.stderr,
+        }
+
+
+class JobQueue:
+    """
+    Runs slow network mutations on a bounded worker pool so request threads return immediately.
+
+    Jobs are coalesced by key: submitting a job while another with the same key is still
+    queued or running returns the existing job instead of starting a second nmcli call.
+    Only the most recent finished jobs are kept for polling.
+    """
+
+    def __init__(self, workers: int, history_size: int):
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='network-job')
+        self._lock = threading.Lock()
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._pending: Dict[Hashable, Job] = {}
+
+    def submit(self, name: str, key: Hashable, func: Callable, *args) -> Tuple[Job, bool]:
+        """
+        Queues func(*args) unless a job with the same key is already pending.
+
+        Args:
+            name (str): Short job name reported to clients, e.g. 'connect_to_known_wifi_connection'.
+            key (Hashable): Coalescing key, usually the connection name.
+            func (Callable): The blocking model function to run.
+
+        Returns:
+            Tuple[Job, bool]: The job, and whether it was newly created.
+        """
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                return pending, False
+
+            job = Job(name, key)
+            self._jobs[job.id] = job
+            self._pending[key] = job
+            self._trim()
+
+        self._executor.submit(self._run, job, func, args)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, func: Callable, args: tuple):
+        job.started_at = time.monotonic()
+        job.status = RUNNING
+        try:
+            job.result = func(*args)
+            job.status = SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            job.stderr = getattr(e, 'stderr', None)
+            # Errors may carry a partial result, e.g. the step report of a rolled back configuration
+            job.result = getattr(e, 'result', None)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.monotonic()
+            with self._lock:
+                if self._pending.get(job.key) is job:
+                    del self._pending[job.key]
+                self._trim()
+
+    def _trim(self):
+        # Drop the oldest finished jobs beyond the history size; pending jobs are always kept
+        excess = len(self._jobs) - self.history_size
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].finished:
+                del self._jobs[job_id]
+                excess -= 1
+
+
+job_queue = JobQueue(JOB_WORKERS, JOB_HISTORY_SIZE)
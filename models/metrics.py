@@ -0,0 +1,172 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+import config.constants as constants
+from config.constants import METRICS_LATENCY_BUCKETS, COMMAND_ADMISSION
+
+
+class _CounterChild:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ('_lock', 'buckets', 'counts', 'sum')
+
+    def __init__(self, buckets: Sequence[float]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Metric:
+    """
+    A labelled Prometheus metric family ('counter', 'gauge' or 'histogram').
+
+    Each label combination gets its own child with its own lock, created once on first use,
+    so concurrent requests only contend when they update the same series and recording a
+    sample allocates nothing.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str, label_names: Tuple[str, ...],
+                 buckets: Sequence[float] = METRICS_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = _HistogramChild(self.buckets) if self.kind == 'histogram' else _CounterChild()
+                    self._children[values] = child
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        # labels() may add a child while we render; iterating the dict itself would then fail
+        with self._lock:
+            children = list(self._children.items())
+        for values, child in sorted(children):
+            labels = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, values))
+            if self.kind != 'histogram':
+                lines.append(f"{self.name}{{{labels}}} {_format(child.value)}")
+                continue
+
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            separator = ',' if labels else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format(bound)
+                lines.append(f'{self.name}_bucket{{{labels}{separator}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {_format(total)}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+http_requests_total = Metric('daughterbox_http_requests_total', 'HTTP requests by route, method and status.',
+                             'counter', ('route', 'method', 'status'))
+http_request_duration_seconds = Metric('daughterbox_http_request_duration_seconds',
+                                       'HTTP request latency by route.', 'histogram', ('route',))
+command_duration_seconds = Metric('daughterbox_command_duration_seconds',
+                                  'Duration of system commands by command template.', 'histogram', ('command',))
+command_exit_total = Metric('daughterbox_command_exit_total', 'System command exits by command template and exit code.',
+                            'counter', ('command', 'code'))
+commands_in_flight = Metric('daughterbox_commands_in_flight', 'System commands currently running by command template.',
+                            'gauge', ('command',))
+admission_rejected_total = Metric('daughterbox_admission_rejected_total',
+                                  'Network commands turned away by admission control, by command class.',
+                                  'counter', ('class',))
+admission_waiting = Metric('daughterbox_admission_waiting', 'Network commands waiting for a slot, by command class.',
+                           'gauge', ('class',))
+
+roaming_switches_total = Metric('daughterbox_roaming_switches_total',
+                                'Switches made by the roaming manager, by result.', 'counter', ('result',))
+roaming_switch_duration_seconds = Metric('daughterbox_roaming_switch_duration_seconds',
+                                         'Time for a roaming switch to activate the new connection.', 'histogram', ())
+
+METRICS = (http_requests_total, http_request_duration_seconds, command_duration_seconds, command_exit_total,
+           commands_in_flight, admission_rejected_total, admission_waiting, roaming_switches_total,
+           roaming_switch_duration_seconds)
+
+# Every command template starts with an empty series so it shows up before its first call
+COMMAND_TEMPLATES = tuple(name for name in vars(constants)
+                          if name.startswith('NMCLI_') or name in ('REBOOT_SYSTEM', 'SHUTDOWN_SYSTEM', 'I2C_DISPLAY_OFF'))
+for _command in COMMAND_TEMPLATES:
+    command_duration_seconds.labels(_command)
+    commands_in_flight.labels(_command)
+for _command_class in COMMAND_ADMISSION:
+    admission_rejected_total.labels(_command_class)
+    admission_waiting.labels(_command_class)
+for _result in ('succeeded', 'failed'):
+    roaming_switches_total.labels(_result)
+roaming_switch_duration_seconds.labels()
+
+
+def command_started(command: str) -> float:
+    """
+    Records the start of a system command.
+
+    Args:
+        command (str): Name of the command template in config/constants.py, e.g. 'NMCLI_SCAN_WIFI_NETWORKS'.
+
+    Returns:
+        float: The start time to pass to command_finished().
+    """
+    commands_in_flight.labels(command).inc()
+    return time.perf_counter()
+
+
+def command_finished(command: str, started: float, returncode: int):
+    """
+    Records the end of a system command started with command_started().
+    """
+    command_duration_seconds.labels(command).observe(time.perf_counter() - started)
+    command_exit_total.labels(command, str(returncode)).inc()
+    commands_in_flight.labels(command).dec()
+
+
+def render_metrics() -> str:
+    """
+    Renders every metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,227 @@
+import itertools
+import math
+import queue
+import threading
+import time
+from typing import Callable, Dict, Optional, Set
+
+from config.constants import NETWORK_MONITOR_DEBOUNCE_SECONDS, NETWORK_MONITOR_RESTART_SECONDS, \
+    EVENT_QUEUE_SIZE, EVENT_MAX_SUBSCRIBERS, EVENT_KEEPALIVE_SECONDS, ETHERNET_CONNECTION
+from models.admission import AdmissionRejected
+from models.command_runner import stream_command
+from models.device_mode_store import device_mode_store
+from models.network_model import get_ip_and_mask
+from models.state_cache import state_cache
+from models.wifi_model import get_active_wifi_connection, filter_raspberry_networks, collapse_networks_by_ssid
+from models.wifi_scanner import WifiScanner, wifi_scanner
+
+ACTIVE_CONNECTION_CHANGED = 'active_connection_changed'
+IP_CHANGED = 'ip_changed'
+SCAN_UPDATED = 'scan_updated'
+MODE_CHANGED = 'mode_changed'
+
+
+class EventBroker:
+    """
+    Fans typed events out to any number of subscribers.
+
+    Each subscriber gets a bounded queue; a subscriber that falls behind loses its oldest
+    events rather than blocking the publisher or the other subscribers. Since every /events
+    stream holds a server thread, at most `max_subscribers` are accepted at once.
+    """
+
+    def __init__(self, queue_size: int, max_subscribers: Optional[int] = None):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers: Set[queue.Queue] = set()
+        self._ids = itertools.count(1)
+        self._on_subscribe: Optional[Callable[[], None]] = None
+
+    def subscribe(self) -> queue.Queue:
+        """
+        Registers a subscriber.
+
+        Returns:
+            queue.Queue: The queue the subscriber's events are delivered to.
+
+        Raises:
+            AdmissionRejected: If `max_subscribers` are already subscribed.
+        """
+        subscription = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                # A client that went away is only noticed, and unsubscribed, at its next keep-alive
+                raise AdmissionRejected(f"Too many event subscribers ({self.max_subscribers}), try again later.",
+                                        math.ceil(EVENT_KEEPALIVE_SECONDS))
+            self._subscribers.add(subscription)
+            on_subscribe = self._on_subscribe
+        if on_subscribe is not None:
+            on_subscribe()
+        return subscription
+
+    def unsubscribe(self, subscription: queue.Queue):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def on_subscribe(self, callback: Callable[[], None]):
+        """
+        Sets a callback run on every subscribe, used to start the watchers lazily.
+        """
+        self._on_subscribe = callback
+
+    def publish(self, event_type: str, data: dict):
+        """
+        Delivers an event to every subscriber.
+
+        Args:
+            event_type (str): One of the *_CHANGED / SCAN_UPDATED constants.
+            data (dict): JSON-serializable payload.
+        """
+        event = {'id': next(self._ids), 'type': event_type, 'data': data}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            while True:
+                try:
+                    subscription.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        subscription.get_nowait()
+                    except queue.Empty:
+                        pass
+
+
+class NetworkMonitor:
+    """
+    Watches NetworkManager with one long-lived `nmcli monitor` process.
+
+    nmcli monitor prints a burst of lines for every change. Once the burst has been quiet for
+    the debounce period the monitor drops the connection and address snapshots, re-reads the
+    network state once and publishes only what actually changed, so any number of clients cost
+    one watcher and one read per change. The access point table is refreshed by the scanner's
+    own thread rather than on the next request.
+    """
+
+    def __init__(self, broker: EventBroker, read_state: Callable[[], Dict[str, dict]],
+                 command: str = 'NMCLI_MONITOR', debounce: float = NETWORK_MONITOR_DEBOUNCE_SECONDS,
+                 scanner: WifiScanner = wifi_scanner):
+        self.broker = broker
+        self._scanner = scanner
+        self.command = command
+        self.debounce = debounce
+        self._read_state = read_state
+        self._state: Optional[Dict[str, dict]] = None
+        self._dirty = threading.Event()
+        self._lock = threading.Lock()
+        # Held across a whole refresh, so the watcher and other callers compare and publish in turn
+        self._state_lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        """
+        Starts the watcher and refresher threads once.
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._watch, name='nmcli-monitor', daemon=True).start()
+        threading.Thread(target=self._refresh_loop, name='network-refresh', daemon=True).start()
+
+    def refresh(self):
+        """
+        Re-reads the network state and publishes an event for each part that changed.
+        """
+        with self._state_lock:
+            # Only the snapshots NetworkManager's events are about. Invalidating the whole cache
+            # would make the next request for the access point table wait on a scan, once per burst
+            state_cache.discard('active_wifi_connection', 'remembered_wifi_connections', 'ip_and_mask')
+            self._scanner.refresh_soon()
+            try:
+                state = self._read_state()
+            except (RuntimeError, ValueError) as e:
+                print(f"Error reading network state: {e}")
+                return
+
+            previous = self._state
+            self._state = state
+            if previous is None:
+                return
+
+            if state['network'] != previous['network']:
+                self.broker.publish(ACTIVE_CONNECTION_CHANGED, {'network': state['network']})
+            for connection, ip_and_mask in state['ip_and_mask'].items():
+                if previous['ip_and_mask'].get(connection) != ip_and_mask:
+                    kind = 'ethernet' if connection == ETHERNET_CONNECTION else 'wifi'
+                    self.broker.publish(IP_CHANGED, {'connection': connection, 'kind': kind,
+                                                     'ip_and_mask': ip_and_mask})
+
+    def _watch(self):
+        while True:
+            try:
+                with stream_command(self.command) as lines:
+                    self.refresh()
+                    for _ in lines:
+                        self._dirty.set()
+            except OSError as e:
+                print(f"Error starting {self.command}: {e}")
+            time.sleep(NETWORK_MONITOR_RESTART_SECONDS)
+
+    def _refresh_loop(self):
+        while True:
+            self._dirty.wait()
+            self._dirty.clear()
+            # Let the rest of the burst arrive before reading the state once
+            while True:
+                time.sleep(self.debounce)
+                if not self._dirty.is_set():
+                    break
+                self._dirty.clear()
+            self.refresh()
+
+
+def read_network_state() -> Dict[str, dict]:
+    """
+    Reads the parts of the network state that events are published for.
+
+    Returns:
+        Dict[str, dict]: {'network': active Wi-Fi network, 'ip_and_mask': {connection: ip/mask or None}}.
+    """
+    network = get_active_wifi_connection()
+    connections = [ETHERNET_CONNECTION] + ([network['SSID']] if network else [])
+
+    ip_and_mask = {}
+    for connection in connections:
+        try:
+            ip_and_mask[connection] = get_ip_and_mask(connection)
+        except (RuntimeError, ValueError):
+            ip_and_mask[connection] = None
+
+    return {'network': network, 'ip_and_mask': ip_and_mask}
+
+
+def _publish_scan(access_points: list, scanned_at: float):
+    networks = collapse_networks_by_ssid(filter_raspberry_networks(access_points))
+    network_events.publish(SCAN_UPDATED, {'networks': networks, 'scanned_at': scanned_at})
+
+
+def _publish_mode(mode: str):
+    network_events.publish(MODE_CHANGED, {'mode': mode})
+
+
+def _start_watchers():
+    network_monitor.start()
+    wifi_scanner.start()
+
+
+network_events = EventBroker(EVENT_QUEUE_SIZE, EVENT_MAX_SUBSCRIBERS)
+network_monitor = NetworkMonitor(network_events, read_network_state)
+network_events.on_subscribe(_start_watchers)
+wifi_scanner.subscribe(_publish_scan)
+device_mode_store.subscribe(_publish_mode)
@@ -1,11 +1,15 @@
-import subprocess
+from typing import Tuple
 
-from config.constants import NMCLI_GET_IP4_ADDRESS
+from models.backends import get_backend
+from models.state_cache import state_cache
+from models.tracing import traced
 
 
+@traced
 def get_ip_and_mask(connection) -> dict:
     """
     Retrieves the IP address and subnet mask for the specified network interface.
+    The result is served from the shared state snapshot while it is fresh.
 
     Returns:
         dict: A dictionary containing the IP address and subnet mask with the key 'ip'.
@@ -14,25 +18,36 @@ def get_ip_and_mask(connection) -> dict:
         RuntimeError: If the command to fetch network details fails.
         ValueError: If the IP address and mask cannot be found.
     """
+    return get_ip_and_mask_with_tag(connection)[0]
 
-    command = NMCLI_GET_IP4_ADDRESS.format(connection)
 
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+@traced
+def get_ip_and_mask_with_tag(connection) -> Tuple[dict, str]:
+    """
+    Same as get_ip_and_mask(), along with the snapshot's tag for conditional requests.
+    """
+    return state_cache.get_tagged(('ip_and_mask', connection), lambda: _read_ip_and_mask(connection))
+
 
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to execute command '{command}'. Error: {result.stderr}")
+@traced
+async def get_ip_and_mask_with_tag_async(connection) -> Tuple[dict, str]:
+    """
+    Same as get_ip_and_mask_with_tag(), for the async server mode. Shares the snapshot with it.
+    """
+    return await state_cache.get_tagged_async(('ip_and_mask', connection),
+                                              lambda: get_backend().ip_and_mask_async(connection))
 
-    ip, mask = None, None
 
-    for line in result.stdout.splitlines():
-        if 'IP4.ADDRESS' in line:
-            parts = line.split(':')
-            if len(parts) > 1:
-                ip_mask = parts[1].strip()
-                ip, mask = ip_mask.split('/')
-                break
+@traced
+def _read_ip_and_mask(connection) -> dict:
+    """
+    Reads the IP address and subnet mask for the specified network interface from NetworkManager.
 
-    if ip is None or mask is None:
-        raise ValueError("Could not find the IP address and mask for the connection 'AP'.")
+    Returns:
+        dict: A dictionary containing the IP address and subnet mask with the key 'ip'.
 
-    return {'ip': ip, 'mask': mask}
\ No newline at end of file
+    Raises:
+        RuntimeError: If the command to fetch network details fails.
+        ValueError: If the IP address and mask cannot be found.
+    """
+    return get_backend().ip_and_mask(connection)
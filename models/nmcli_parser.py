@@ -0,0 +1,102 @@
+import re
+from functools import lru_cache
+from operator import itemgetter, methodcaller
+from typing import List, Sequence, Tuple
+
+# Field separator and escape placeholders used by the fast path; control characters nmcli never prints unescaped
+_SEPARATOR = '\x1f'
+_ESCAPED_BACKSLASH = '\x01'
+_ESCAPED_COLON = '\x02'
+_PLACEHOLDERS = (_SEPARATOR, _ESCAPED_BACKSLASH, _ESCAPED_COLON)
+_count_separators = methodcaller('count', _SEPARATOR)
+
+# One terse-mode value: anything but ':' / '\' / newline, with backslash escapes ('\:', '\\') allowed inside
+_VALUE = r'[^\\:\n]*(?:\\.[^\\:\n]*)*'
+_ESCAPE = re.compile(r'\\(.)')
+
+
+def terse_fields(template: Sequence[str]) -> Tuple[str, ...]:
+    """
+    Returns the field list an nmcli command template asks for with `-f`.
+
+    Args:
+        template (Sequence[str]): Argv template from config/constants.py, e.g. NMCLI_SCAN_WIFI_NETWORKS.
+
+    Raises:
+        ValueError: If the template has no `-f` option.
+    """
+    template = list(template)
+    if '-f' not in template:
+        raise ValueError(f"Command template {template} does not select fields with -f.")
+    return tuple(template[template.index('-f') + 1].split(','))
+
+
+def unescape(value: str) -> str:
+    """
+    Undoes nmcli's terse-mode escaping of ':' and '\\'.
+    """
+    if '\\' not in value:
+        return value
+    if '\\\\' not in value:
+        return value.replace('\\:', ':')
+    return _ESCAPE.sub(r'\1', value)
+
+
+def parse_terse(output: str, fields: Sequence[str], select: Sequence[str] = None) -> List[Tuple[str, ...]]:
+    """
+    Parses `nmcli -t` output into one tuple per row.
+
+    Escaped colons and backslashes inside values are handled, so SSIDs containing ':' and
+    BSSIDs (printed as 'B8\\:27\\:EB...') come out intact, and lines that do not have exactly
+    len(fields) values are skipped instead of raising.
+
+    The whole text is rewritten once with str.replace: escapes become placeholders, the
+    remaining colons become a separator, then the placeholders are restored. When every line
+    has exactly len(fields) values, counted line by line, the values are split in one call and
+    sliced into columns, so no Python code runs per row. Output that already contains a
+    placeholder character falls back to a precompiled per-row regex.
+
+    Args:
+        output (str): The command's stdout.
+        fields (Sequence[str]): Every field nmcli prints, in order (see terse_fields()).
+        select (Sequence[str]): The fields to return, in the order wanted; defaults to all of them.
+
+    Returns:
+        List[Tuple[str, ...]]: One tuple of unescaped values per row.
+    """
+    count = len(fields)
+    indexes = tuple(range(count)) if select is None else tuple(fields.index(field) for field in select)
+
+    if any(placeholder in output for placeholder in _PLACEHOLDERS):
+        return _parse_with_regex(output, count, indexes)
+
+    text = output.replace('\r\n', '\n').strip('\n')
+    if not text:
+        return []
+    if '\\' in text:
+        text = text.replace('\\\\', _ESCAPED_BACKSLASH).replace('\\:', _ESCAPED_COLON).replace(':', _SEPARATOR) \
+            .replace(_ESCAPED_COLON, ':').replace(_ESCAPED_BACKSLASH, '\\')
+    else:
+        text = text.replace(':', _SEPARATOR)
+
+    lines = text.split('\n')
+    # Per line: totals alone would let a line with an extra value cancel out one with a missing value
+    if '\n\n' not in text and set(map(_count_separators, lines)) == {count - 1}:
+        values = _SEPARATOR.join(lines).split(_SEPARATOR)
+        return list(zip(*(values[index::count] for index in indexes)))
+
+    project = itemgetter(*indexes)
+    rows = [project(row) for row in (line.split(_SEPARATOR) for line in lines) if len(row) == count]
+    return [(row,) for row in rows] if len(indexes) == 1 else rows
+
+
+@lru_cache(maxsize=None)
+def _row_pattern(count: int):
+    return re.compile('^' + ':'.join([f"({_VALUE})"] * count) + '$', re.MULTILINE)
+
+
+def _parse_with_regex(output: str, count: int, indexes: Tuple[int, ...]) -> List[Tuple[str, ...]]:
+    rows = _row_pattern(count).findall(output)
+    if count == 1:
+        rows = [(row,) for row in rows]
+    return [tuple(unescape(row[index]) for index in indexes) for row in rows]
@@ -0,0 +1,234 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.constants import ROAMING_HYSTERESIS, ROAMING_SUSTAIN_SECONDS, ROAMING_COOLDOWN_SECONDS, \
+    ROAMING_SCAN_INTERVAL_SECONDS
+from models.device_mode_store import device_mode_store
+from models.job_queue import JobQueue, job_queue
+from models.metrics import roaming_switches_total, roaming_switch_duration_seconds
+from models.wifi_model import remembered_wifi_connections, connect_to_known_wifi_connection, access_point_signal
+from models.wifi_scanner import WifiScanner, wifi_scanner
+
+
+class RoamingManager:
+    """
+    Moves the box to a stronger known network before the current one fails.
+
+    Every scan is compared against the saved connections (matched by name to the SSID, as
+    connections made from the UI are named). A known network becomes the candidate when its best
+    access point beats the active one by at least `margin` signal points, and the box switches
+    to it once it has stayed the best such network, by that margin, in every scan for
+    `sustain_seconds`. After a switch attempt, successful or not, none is made for
+    `cooldown_seconds`, so two networks of similar strength cannot make it flap.
+
+    Switches run on the job queue, under the same key as a connection made from the UI, and only
+    in STA mode. Connections with autoconnect off are never switched to.
+    """
+
+    def __init__(self, scanner: WifiScanner = wifi_scanner, margin: int = ROAMING_HYSTERESIS,
+                 sustain_seconds: float = ROAMING_SUSTAIN_SECONDS, cooldown_seconds: float = ROAMING_COOLDOWN_SECONDS,
+                 scan_interval: float = ROAMING_SCAN_INTERVAL_SECONDS, jobs: JobQueue = job_queue,
+                 known_connections: Callable[[], List[Dict[str, str]]] = remembered_wifi_connections,
+                 connect: Callable[[str], Any] = connect_to_known_wifi_connection,
+                 device_mode: Callable[[], str] = device_mode_store.get,
+                 clock: Callable[[], float] = time.monotonic):
+        self._scanner = scanner
+        self.margin = margin
+        self.sustain_seconds = sustain_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.scan_interval = scan_interval
+        self._jobs = jobs
+        self._known_connections = known_connections
+        self._connect = connect
+        self._device_mode = device_mode
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._enabled = False
+        # (ssid, signal, current signal, first scan it qualified in)
+        self._candidate: Optional[Tuple[str, int, int, float]] = None
+        self._switching = False
+        self._last_attempt_at: Optional[float] = None
+        self._last_scan_at: Optional[float] = None
+        self._last_switch: Optional[Dict[str, Any]] = None
+        self._switches = 0
+        self._failures = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        scanner.subscribe(self.evaluate)
+
+    def start(self):
+        """
+        Starts acting on scans, and the thread that keeps them coming, if not already running.
+        """
+        with self._lock:
+            self._enabled = True
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='roaming', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._enabled = False
+            self._candidate = None
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def evaluate(self, access_points: List[dict], scanned_at: float) -> Optional[str]:
+        """
+        Takes one scan into account.
+
+        Returns:
+            Optional[str]: The connection a switch was started to, if this scan triggered one.
+        """
+        now = self._clock()
+        with self._lock:
+            self._last_scan_at = now
+            if not self._enabled or self._switching:
+                return None
+
+        current, best = self._compare(access_points)
+
+        with self._lock:
+            if not self._enabled or self._switching:
+                return None
+            if current is None or best is None or best[1] < current[1] + self.margin:
+                self._candidate = None
+                return None
+            if self._candidate is None or self._candidate[0] != best[0]:
+                self._candidate = (best[0], best[1], current[1], now)
+            else:
+                self._candidate = (best[0], best[1], current[1], self._candidate[3])
+            if now - self._candidate[3] < self.sustain_seconds or self._cooling_down(now):
+                return None
+
+            self._switching = True
+            self._candidate = None
+
+        _, created = self._jobs.submit('roam_to_known_wifi_connection', ('wifi', best[0]), self._switch, current, best)
+        if not created:
+            # A connection to it was already under way, started from the UI
+            with self._lock:
+                self._switching = False
+            return None
+        return best[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the switch counts and latencies, the last switch and the pending candidate.
+        """
+        now = self._clock()
+        with self._lock:
+            attempts = self._switches + self._failures
+            candidate = None
+            if self._candidate is not None:
+                ssid, signal, current_signal, since = self._candidate
+                candidate = {'ssid': ssid, 'signal': signal, 'current_signal': current_signal,
+                             'sustained_seconds': round(now - since, 3)}
+            cooldown = 0.0
+            if self._last_attempt_at is not None:
+                cooldown = max(0.0, self.cooldown_seconds - (now - self._last_attempt_at))
+            return {
+                'enabled': self._enabled,
+                'switching': self._switching,
+                'switches': self._switches,
+                'failures': self._failures,
+                'latency_ms': {
+                    'avg': round(self._latency_total / attempts * 1000, 1) if attempts else None,
+                    'max': round(self._latency_max * 1000, 1) if attempts else None,
+                },
+                'last_switch': self._last_switch,
+                'candidate': candidate,
+                'cooldown_remaining': round(cooldown, 3),
+                'margin': self.margin,
+                'sustain_seconds': self.sustain_seconds,
+                'cooldown_seconds': self.cooldown_seconds,
+            }
+
+    def _compare(self, access_points: List[dict]) -> Tuple[Optional[Tuple[str, int]], Optional[Tuple[str, int]]]:
+        """
+        Returns (ssid, signal) of the active access point and of the strongest other known network.
+        Either is None when there is nothing to compare.
+        """
+        try:
+            if self._device_mode() != 'STA':
+                return None, None
+            known = {connection['name'] for connection in self._known_connections()
+                     if connection.get('autoconnect') != 'no'}
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"Roaming skipped a scan: {e}")
+            return None, None
+
+        current, strongest = None, {}
+        for ap in access_points:
+            signal = access_point_signal(ap)
+            if signal is None:
+                continue
+            if ap['ACTIVE'] == 'yes':
+                if current is None or signal > current[1]:
+                    current = (ap['SSID'], signal)
+            elif ap['SSID'] in known:
+                strongest[ap['SSID']] = max(signal, strongest.get(ap['SSID'], signal))
+
+        if current is None:
+            return None, None
+        # Another access point of the current network is NetworkManager's business, not a switch
+        strongest.pop(current[0], None)
+        if not strongest:
+            return current, None
+        return current, max(strongest.items(), key=lambda item: (item[1], item[0]))
+
+    def _cooling_down(self, now: float) -> bool:
+        # Called with the lock held
+        return self._last_attempt_at is not None and now - self._last_attempt_at < self.cooldown_seconds
+
+    def _switch(self, current: Tuple[str, int], target: Tuple[str, int]):
+        started = self._clock()
+        error = None
+        try:
+            return self._connect(target[0])
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            finished = self._clock()
+            latency = finished - started
+            roaming_switches_total.labels('failed' if error else 'succeeded').inc()
+            roaming_switch_duration_seconds.labels().observe(latency)
+            with self._lock:
+                if error:
+                    self._failures += 1
+                else:
+                    self._switches += 1
+                self._latency_total += latency
+                self._latency_max = max(self._latency_max, latency)
+                self._last_attempt_at = finished
+                self._last_switch = {'from': current[0], 'from_signal': current[1], 'to': target[0],
+                                     'to_signal': target[1], 'at': time.time(), 'latency_ms': round(latency * 1000, 1),
+                                     'succeeded': error is None, 'error': error}
+                self._switching = False
+            print(f"Roaming from '{current[0]}' ({current[1]}) to '{target[0]}' ({target[1]}) "
+                  f"{'failed: ' + error if error else 'succeeded'} after {latency:.1f} s")
+
+    def _scan_due(self) -> bool:
+        with self._lock:
+            return self._last_scan_at is None or self._clock() - self._last_scan_at >= self.scan_interval
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if self._scan_due():
+                try:
+                    self._scanner.scan_now()
+                except Exception as e:
+                    print(f"Roaming scan failed: {e}")
+            self._stopped.wait(self.scan_interval / 2)
+
+
+roaming_manager = RoamingManager()
@@ -0,0 +1,205 @@
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+from config.constants import SIGNAL_SAMPLE_INTERVAL_SECONDS, SIGNAL_HISTORY_SAMPLES, \
+    SIGNAL_HISTORY_MAX_ACCESS_POINTS, SIGNAL_HISTORY_MAX_POINTS
+from models.wifi_model import access_point_signal
+from models.wifi_scanner import WifiScanner, wifi_scanner
+
+# Signal recorded for the active connection while the box is not associated with any access point
+NOT_CONNECTED = -1
+
+
+class SignalRing:
+    """
+    Fixed-size ring buffer of (timestamp, signal) samples.
+
+    Signals (0-100, or NOT_CONNECTED) are stored in an array('b') and timestamps as whole seconds
+    in an array('I'), so a series takes five bytes per sample and its size never changes once allocated.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._times = array('I', bytes(4 * capacity))
+        self._signals = array('b', bytes(capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, signal: int):
+        self._times[self._next] = int(timestamp)
+        self._signals[self._next] = max(NOT_CONNECTED, min(100, signal))
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def since(self, timestamp: float) -> Iterator[Tuple[int, int]]:
+        """
+        Yields the samples taken at or after timestamp, oldest first.
+        """
+        oldest = (self._next - self._count) % self.capacity
+        for offset in range(self._count):
+            index = (oldest + offset) % self.capacity
+            if self._times[index] >= timestamp:
+                yield self._times[index], self._signals[index]
+
+
+def downsample(samples: Iterator[Tuple[int, int]], start: float, bucket_seconds: float, points: int) -> List[dict]:
+    """
+    Aggregates samples into `points` consecutive buckets of bucket_seconds from start.
+
+    Returns:
+        List[dict]: One {'start', 'min', 'avg', 'max', 'samples', 'disconnected'} per bucket. Buckets without a
+        signal have None aggregates; 'disconnected' counts NOT_CONNECTED samples.
+    """
+    counts = [0] * points
+    totals = [0] * points
+    minimums: List[Optional[int]] = [None] * points
+    maximums: List[Optional[int]] = [None] * points
+    disconnected = [0] * points
+
+    for timestamp, signal in samples:
+        index = min(int((timestamp - start) // bucket_seconds), points - 1)
+        if index < 0:
+            continue
+        if signal == NOT_CONNECTED:
+            disconnected[index] += 1
+            continue
+        counts[index] += 1
+        totals[index] += signal
+        minimums[index] = signal if minimums[index] is None else min(minimums[index], signal)
+        maximums[index] = signal if maximums[index] is None else max(maximums[index], signal)
+
+    return [{'start': round(start + index * bucket_seconds, 3), 'min': minimums[index],
+             'avg': round(totals[index] / counts[index], 1) if counts[index] else None, 'max': maximums[index],
+             'samples': counts[index], 'disconnected': disconnected[index]} for index in range(points)]
+
+
+class SignalHistory:
+    """
+    Records the signal of the active connection and of every visible access point over time.
+
+    Samples come from the Wi-Fi scanner's results. At most one sample per interval is kept,
+    and a background thread runs a scan itself whenever the scanner has not produced one for an
+    interval (the scanner slows down when nobody is using the page). Each series is a SignalRing
+    and at most max_access_points access points are tracked, so memory use is fixed by the
+    constants and does not grow with uptime.
+    """
+
+    def __init__(self, scanner: WifiScanner, interval: float = SIGNAL_SAMPLE_INTERVAL_SECONDS,
+                 capacity: int = SIGNAL_HISTORY_SAMPLES, max_access_points: int = SIGNAL_HISTORY_MAX_ACCESS_POINTS):
+        self._scanner = scanner
+        self.interval = interval
+        self.capacity = capacity
+        self.max_access_points = max_access_points
+
+        self._lock = threading.Lock()
+        self._active = SignalRing(capacity)
+        # BSSID -> (SSID, ring), least recently seen first
+        self._access_points: 'OrderedDict[str, Tuple[str, SignalRing]]' = OrderedDict()
+        self._last_sample: Optional[float] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        scanner.subscribe(self.record)
+
+    def start(self):
+        """
+        Starts the sampling thread if it is not already running.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='signal-history', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def record(self, access_points: List[dict], scanned_at: float):
+        """
+        Records one scan's signals, unless a sample was taken less than an interval ago.
+        """
+        with self._lock:
+            # Scans land a little early or late; allow some slack so a scan every interval is not skipped
+            if self._last_sample is not None and scanned_at - self._last_sample < self.interval * 0.9:
+                return
+            self._last_sample = scanned_at
+
+            active = NOT_CONNECTED
+            for ap in access_points:
+                signal = access_point_signal(ap)
+                if signal is None:
+                    continue
+                if ap['ACTIVE'] == 'yes':
+                    active = max(active, signal)
+                self._ring_for(ap['BSSID'].upper(), ap['SSID']).append(scanned_at, signal)
+            self._active.append(scanned_at, active)
+
+    def history(self, window: float, points: int) -> dict:
+        """
+        Returns the signal history of the last `window` seconds, aggregated into `points` buckets.
+
+        Returns:
+            dict: {'interval', 'window', 'bucket_seconds', 'start', 'active', 'access_points'}. 'active' is the
+            active connection's buckets; 'access_points' lists {'bssid', 'ssid', 'buckets'} for every access point
+            seen in the window.
+
+        Raises:
+            ValueError: If the window or number of points is out of range.
+        """
+        max_window = self.capacity * self.interval
+        if not 0 < window <= max_window:
+            raise ValueError(f"Window must be between 0 and {max_window:g} seconds")
+        if not 0 < points <= SIGNAL_HISTORY_MAX_POINTS:
+            raise ValueError(f"Points must be between 1 and {SIGNAL_HISTORY_MAX_POINTS}")
+
+        start = time.time() - window
+        bucket_seconds = window / points
+        with self._lock:
+            active = downsample(self._active.since(start), start, bucket_seconds, points)
+            access_points = []
+            for bssid, (ssid, ring) in self._access_points.items():
+                buckets = downsample(ring.since(start), start, bucket_seconds, points)
+                if any(bucket['samples'] for bucket in buckets):
+                    access_points.append({'bssid': bssid, 'ssid': ssid, 'buckets': buckets})
+
+        # Only the active connection can be disconnected; access points just go missing from scans
+        for access_point in access_points:
+            for bucket in access_point['buckets']:
+                del bucket['disconnected']
+        access_points.sort(key=lambda access_point: (access_point['ssid'], access_point['bssid']))
+        return {'interval': self.interval, 'window': window, 'bucket_seconds': bucket_seconds, 'start': start,
+                'active': active, 'access_points': access_points}
+
+    def _ring_for(self, bssid: str, ssid: str) -> SignalRing:
+        # Called with the lock held
+        entry = self._access_points.pop(bssid, None)
+        if entry is None:
+            if len(self._access_points) >= self.max_access_points:
+                self._access_points.popitem(last=False)
+            entry = (ssid, SignalRing(self.capacity))
+        else:
+            entry = (ssid, entry[1])
+        self._access_points[bssid] = entry
+        return entry[1]
+
+    def _sample_due(self) -> bool:
+        with self._lock:
+            return self._last_sample is None or time.time() - self._last_sample >= self.interval * 0.9
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if self._sample_due():
+                self._scanner.scan_now()
+            self._stopped.wait(self.interval / 2)
+
+
+signal_history = SignalHistory(wifi_scanner)
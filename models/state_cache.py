@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from config.constants import STATE_CACHE_TTL_SECONDS
+
+
+class _Flight:
+    """
+    A load in progress for one cache key. Callers that miss while it runs wait on it
+    instead of starting their own nmcli process. Threads block on it, coroutines await it.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.tag: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def finish(self):
+        with self._lock:
+            self.done.set()
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # That loop is closed and its coroutine gone
+                pass
+
+    async def wait_async(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self.done.is_set():
+                return
+            self._waiters.append((loop, future))
+        await future
+
+    def result(self) -> Tuple[Any, str]:
+        if self.error is not None:
+            raise self.error
+        return self.value, self.tag
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class SnapshotCache:
+    """
+    Thread-safe TTL cache for read-only network state snapshots.
+
+    Concurrent misses for the same key collapse into a single call to the loader and
+    every waiting caller receives its result (or its exception). Errors are never cached.
+    Returned values are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, tuple] = {}
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self._loads = set()
+        self._generation = 0
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for the key, calling the loader on a miss.
+
+        Args:
+            key (Hashable): The snapshot key, e.g. ('ip_and_mask', 'ETH').
+            loader (Callable[[], Any]): Function that reads the current state.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        return self.get_tagged(key, loader)[0]
+
+    def get_tagged(self, key: Hashable, loader: Callable[[], Any]) -> Tuple[Any, str]:
+        """
+        Like get(), but also returns the snapshot's tag: a hash of the value computed once when
+        it is loaded, so it only changes when the state itself does.
+
+        Returns:
+            Tuple[Any, str]: The cached or freshly loaded value and its tag.
+        """
+        entry, flight, generation = self._claim(key)
+        if entry is not None:
+            return entry
+        if generation is None:
+            flight.done.wait()
+            return flight.result()
+
+        try:
+            flight.value = loader()
+            flight.tag = snapshot_tag(flight.value)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self._settle(key, flight, generation)
+
+        return flight.value, flight.tag
+
+    async def get_tagged_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        Like get_tagged(), for coroutines: `loader` is a coroutine function, and a miss waits
+        without blocking the event loop. Loads started by threads and coroutines are shared both ways.
+
+        A load outlives the coroutine that started it, so cancelling one caller (a client that hung up)
+        does not fail the others waiting on the same key.
+        """
+        entry, flight, generation = self._claim(key)
+        if entry is not None:
+            return entry
+        if generation is not None:
+            task = asyncio.ensure_future(self._load_async(key, flight, generation, loader))
+            # The loop only keeps weak references to tasks
+            self._loads.add(task)
+            task.add_done_callback(self._loads.discard)
+        await flight.wait_async()
+        return flight.result()
+
+    async def _load_async(self, key: Hashable, flight: _Flight, generation: int,
+                          loader: Callable[[], Awaitable[Any]]):
+        try:
+            flight.value = await loader()
+            flight.tag = snapshot_tag(flight.value)
+        except BaseException as e:
+            flight.error = e
+        finally:
+            self._settle(key, flight, generation)
+
+    def _claim(self, key: Hashable) -> Tuple[Optional[Tuple[Any, str]], Optional[_Flight], Optional[int]]:
+        """
+        Returns the fresh (value, tag) of the key, or the flight loading it. The generation is only
+        returned to the caller that must run the load, and is None for those that wait on it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return (entry[1], entry[2]), None, None
+
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                return None, flight, None
+            flight = _Flight()
+            self._in_flight[key] = flight
+            return None, flight, self._generation
+
+    def _settle(self, key: Hashable, flight: _Flight, generation: int):
+        with self._lock:
+            current = self._in_flight.get(key) is flight
+            if current:
+                del self._in_flight[key]
+            # A mutation or discard() that ran while we were loading makes this result stale
+            if flight.error is None and current and generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, flight.value, flight.tag)
+        flight.finish()
+
+    @property
+    def generation(self) -> int:
+        """
+        Counter bumped by every invalidate(); lets other caches notice that state was mutated.
+        """
+        return self._generation
+
+    def invalidate(self):
+        """
+        Drops every snapshot so the next read goes to nmcli. Loads already in progress
+        are not stored once they finish.
+        """
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._in_flight.clear()
+
+    def discard(self, *kinds: str):
+        """
+        Drops the snapshots whose key starts with one of the given kinds, e.g. 'ip_and_mask', so
+        their next read goes to nmcli. Unlike invalidate() this does not bump the generation, so
+        caches that follow it keep their results.
+        """
+        with self._lock:
+            for entries in (self._entries, self._in_flight):
+                for key in [key for key in entries if isinstance(key, tuple) and key and key[0] in kinds]:
+                    del entries[key]
+
+
+def snapshot_tag(value: Any) -> str:
+    """
+    Returns a short hash of a JSON-serializable value, usable as an HTTP entity tag.
+    """
+    encoded = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str).encode('utf-8')
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+state_cache = SnapshotCache(STATE_CACHE_TTL_SECONDS)
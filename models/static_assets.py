@@ -0,0 +1,335 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from config.constants import ASSET_BUNDLES, ASSET_OUTPUT_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+
+# Precompressed variants written next to each bundle, in order of preference when serving
+COMPRESSED_VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+CSS_IMPORT = re.compile(r"""@import\s+(?:url\(\s*)?['"]?([^'")\s;]+)['"]?\s*\)?\s*;""")
+
+# A '/' after one of these (or at the start) begins a regular expression literal rather than a division
+JS_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+# ... and so does a '/' after one of these keywords
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do',
+                     'else', 'yield', 'await'}
+# Whitespace next to these characters never separates two tokens
+JS_PUNCTUATION = set('{}()[];,:=<>!?&|*%')
+CSS_PUNCTUATION = set('{};,>')
+
+
+def minify_js(source: str) -> str:
+    """
+    Removes comments and redundant whitespace from JavaScript.
+
+    String, template and regular expression literals are copied unchanged. Line breaks between
+    statements are kept so automatic semicolon insertion behaves as in the source.
+    """
+    return _minify(source, '\'"`', JS_PUNCTUATION, javascript=True)
+
+
+def minify_css(source: str) -> str:
+    """
+    Removes comments and redundant whitespace from a stylesheet. Quoted strings are copied unchanged.
+    """
+    return _minify(source, '\'"', CSS_PUNCTUATION, javascript=False).replace(';}', '}')
+
+
+def bundle_sources(static_folder: str, sources: Sequence[str]) -> str:
+    """
+    Concatenates source files, inlining the local stylesheets pulled in by CSS @import rules.
+    """
+    parts = []
+    for source in sources:
+        path = os.path.join(static_folder, source)
+        if source.endswith('.css'):
+            parts.append(_inline_imports(path, set()))
+        else:
+            with open(path, 'r', encoding='utf-8') as file:
+                parts.append(file.read())
+    # Classic scripts can omit their final semicolon; keep one file's last statement from running into the next
+    return '\n;\n'.join(parts) if sources and sources[0].endswith('.js') else '\n'.join(parts)
+
+
+def build_assets(static_folder: str, bundles: Optional[Dict[str, Sequence[str]]] = None) -> Dict[str, str]:
+    """
+    Bundles, minifies and fingerprints the static assets.
+
+    Each bundle is written to static/<ASSET_OUTPUT_DIR> as '<name>.<content hash>.<ext>' with gzip and,
+    when the brotli package is installed, brotli variants next to it. The manifest mapping bundle
+    names to file names is replaced last, so a running server switches to the new files at once.
+    Files from the previous build are kept for pages that are still loading them; older ones are removed.
+
+    Args:
+        static_folder (str): The app's static folder.
+        bundles (Dict[str, Sequence[str]]): Bundle name -> source files; defaults to ASSET_BUNDLES.
+
+    Returns:
+        Dict[str, str]: The new manifest.
+    """
+    bundles = ASSET_BUNDLES if bundles is None else bundles
+    output_dir = os.path.join(static_folder, ASSET_OUTPUT_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = {}
+    for name, sources in bundles.items():
+        stem, extension = os.path.splitext(name)
+        source = bundle_sources(static_folder, sources)
+        content = (minify_css(source) if extension == '.css' else minify_js(source)).encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+        file_name = f"{stem}.{digest}{extension}"
+        _write_variants(os.path.join(output_dir, file_name), content)
+        manifest[name] = file_name
+
+    previous = read_manifest(output_dir)
+    _write_atomically(os.path.join(output_dir, MANIFEST_NAME),
+                      json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    keep = set(manifest.values()) | set(previous.values())
+    for entry in os.listdir(output_dir):
+        if entry != MANIFEST_NAME and _variant_base(entry) not in keep:
+            os.unlink(os.path.join(output_dir, entry))
+
+    return manifest
+
+
+def read_manifest(output_dir: str) -> Dict[str, str]:
+    """
+    Returns the manifest in output_dir, or {} if no build has been run.
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+class AssetManifest:
+    """
+    The build manifest, reloaded whenever build_assets() replaces it.
+
+    Without a manifest the bundles resolve to their source files, so the app works unbuilt in development.
+    """
+
+    def __init__(self, static_folder: str, bundles: Optional[Dict[str, Sequence[str]]] = None):
+        self.static_folder = static_folder
+        self.output_dir = os.path.join(static_folder, ASSET_OUTPUT_DIR)
+        self.bundles = ASSET_BUNDLES if bundles is None else bundles
+        self._lock = threading.Lock()
+        self._signature = None
+        self._manifest: Dict[str, str] = {}
+
+    def built_file(self, name: str) -> Optional[str]:
+        """
+        Returns the fingerprinted file name of a bundle, or None if it has not been built.
+        """
+        return self._current().get(name)
+
+    def _current(self) -> Dict[str, str]:
+        try:
+            stat = os.stat(os.path.join(self.output_dir, MANIFEST_NAME))
+            signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        except FileNotFoundError:
+            signature = None
+        with self._lock:
+            if signature != self._signature:
+                self._manifest = read_manifest(self.output_dir) if signature else {}
+                self._signature = signature
+            return self._manifest
+
+
+def _literal_end(source: str, start: int, quote: str) -> int:
+    i = start + 1
+    while i < len(source):
+        if source[i] == '\\':
+            i += 2
+            continue
+        if source[i] == quote:
+            return i + 1
+        i += 1
+    return len(source)
+
+
+def _template_end(source: str, start: int) -> int:
+    # A template literal ends at its own closing backtick, not one inside a ${...} substitution
+    i, depth = start + 1, 0
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if depth == 0:
+            if char == '`':
+                return i + 1
+            if source.startswith('${', i):
+                depth, i = 1, i + 2
+                continue
+        elif char == '`':
+            i = _template_end(source, i)
+            continue
+        elif char in '\'"':
+            i = _literal_end(source, i, char)
+            continue
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        i += 1
+    return len(source)
+
+
+def _regex_end(source: str, start: int) -> int:
+    i, in_class = start + 1, False
+    while i < len(source) and source[i] != '\n':
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            while i < len(source) and (source[i].isalnum() or source[i] == '_'):
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+def _regex_may_follow(output: List[str]) -> bool:
+    """
+    Tells whether a '/' after the tokens written so far starts a regular expression literal.
+    """
+    if not output:
+        return True
+    previous = output[-1][-1]
+    if previous in JS_REGEX_PRECEDERS:
+        return True
+    if not (previous.isalnum() or previous in '_$'):
+        return False
+    # Identifiers are written one character at a time; gather the last one
+    word = []
+    for token in reversed(output):
+        if len(token) != 1 or not (token.isalnum() or token in '_$'):
+            # A property such as `x.return` is not the keyword
+            if token[-1] == '.':
+                return False
+            break
+        word.append(token)
+    return ''.join(reversed(word)) in JS_REGEX_KEYWORDS
+
+
+def _minify(source: str, quotes: str, punctuation: set, javascript: bool) -> str:
+    output: List[str] = []
+    # Whitespace (or a comment) seen since the last token: '', ' ', or '\n' if it spanned a line break
+    pending = ''
+    i, length = 0, len(source)
+
+    while i < length:
+        char = source[i]
+        if char.isspace():
+            if char == '\n' and javascript:
+                pending = '\n'
+            elif not pending:
+                pending = ' '
+            i += 1
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = length if end == -1 else end + 2
+            if '\n' in source[i:end] and javascript:
+                pending = '\n'
+            elif not pending:
+                pending = ' '
+            i = end
+            continue
+        if javascript and source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end == -1 else end
+            continue
+
+        if char == '`' and javascript:
+            end = _template_end(source, i)
+        elif char in quotes:
+            end = _literal_end(source, i, char)
+        elif javascript and char == '/' and _regex_may_follow(output):
+            end = _regex_end(source, i)
+        else:
+            end = i + 1
+
+        if pending and output:
+            previous = output[-1][-1]
+            if pending == '\n' and previous not in '{;,(':
+                output.append('\n')
+            elif previous not in punctuation and char not in punctuation and not (previous == ':' and not javascript):
+                output.append(' ')
+        pending = ''
+        output.append(source[i:end])
+        i = end
+
+    return ''.join(output)
+
+
+def _inline_imports(path: str, seen: set) -> str:
+    path = os.path.normpath(path)
+    if path in seen:
+        return ''
+    seen.add(path)
+    with open(path, 'r', encoding='utf-8') as file:
+        source = file.read()
+    directory = os.path.dirname(path)
+
+    def replace(match):
+        target = match.group(1)
+        if '//' in target:
+            return match.group(0)
+        return _inline_imports(os.path.join(directory, target), seen)
+
+    return CSS_IMPORT.sub(replace, source)
+
+
+def _write_variants(path: str, content: bytes):
+    _write_atomically(path, content)
+    _write_atomically(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_atomically(path + '.br', brotli.compress(content, quality=11))
+
+
+def _variant_base(file_name: str) -> str:
+    for _, suffix in COMPRESSED_VARIANTS:
+        if file_name.endswith(suffix):
+            return file_name[:-len(suffix)]
+    return file_name
+
+
+def _write_atomically(path: str, content: bytes):
+    descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.build.')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(content)
+        os.chmod(temporary_path, 0o644)
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        raise
+
+
+asset_manifest = AssetManifest(STATIC_FOLDER)
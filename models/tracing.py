@@ -0,0 +1,159 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from config.constants import SLOW_REQUEST_THRESHOLD_SECONDS, SLOW_REQUEST_HISTORY, TRACE_MAX_SPANS
+
+
+class RequestTrace:
+    """
+    Timings of one request: a span per traced model function, command and JSON encoding, nested by depth.
+    """
+
+    __slots__ = ('request_id', 'method', 'path', 'started_at', '_started', 'duration', 'status', 'spans',
+                 'dropped_spans', '_depth')
+
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration = 0.0
+        self.status: Optional[int] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped_spans = 0
+        self._depth = 0
+
+    def finish(self, status: int):
+        self.duration = time.perf_counter() - self._started
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'request_id': self.request_id,
+            'method': self.method,
+            'path': self.path,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3),
+            'status': self.status,
+            'spans': self.spans,
+            'dropped_spans': self.dropped_spans,
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar('current_trace', default=None)
+
+
+def start_trace(request_id: str, method: str, path: str):
+    """
+    Starts tracing the current request. Returns the token to pass to end_trace().
+    """
+    return _current_trace.set(RequestTrace(request_id, method, path))
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, kind: str = 'model') -> Iterator[None]:
+    """
+    Times the block as a span of the current request's trace. Outside a traced request, such as
+    in the background scanner or a job worker, it does nothing.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    trace._depth += 1
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        trace._depth -= 1
+        if len(trace.spans) < TRACE_MAX_SPANS:
+            entry = {'name': name, 'kind': kind, 'depth': trace._depth,
+                     'start_ms': round((started - trace._started) * 1000, 3),
+                     'duration_ms': round((time.perf_counter() - started) * 1000, 3)}
+            if error is not None:
+                entry['error'] = error
+            trace.spans.append(entry)
+        else:
+            trace.dropped_spans += 1
+
+
+def traced(function: Callable) -> Callable:
+    """
+    Decorates a model function, or coroutine function, so each call is a span of the current request's trace.
+    """
+    name = f"{function.__module__.rsplit('.', 1)[-1]}.{function.__name__}"
+
+    if inspect.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            with span(name):
+                return await function(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+class SlowRequestLog:
+    """
+    Keeps the traces of the last requests that took at least `threshold` seconds, and writes each
+    one to the log as a JSON line. Faster requests are dropped without being logged.
+    """
+
+    def __init__(self, threshold: float = SLOW_REQUEST_THRESHOLD_SECONDS, capacity: int = SLOW_REQUEST_HISTORY):
+        self.threshold = threshold
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._traces: Deque[RequestTrace] = deque(maxlen=capacity)
+
+    def record(self, trace: RequestTrace) -> bool:
+        """
+        Keeps a finished trace if it was slow.
+
+        Returns:
+            bool: True if the request was slow.
+        """
+        if trace.duration < self.threshold:
+            return False
+        with self._lock:
+            self._traces.append(trace)
+        print(json.dumps({'slow_request': trace.to_dict()}, separators=(',', ':')))
+        return True
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the kept traces, newest first.
+        """
+        with self._lock:
+            traces = list(self._traces)
+        traces.reverse()
+        return [trace.to_dict() for trace in traces[:limit]]
+
+
+slow_requests = SlowRequestLog()
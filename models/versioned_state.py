@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config.constants import WIFI_DELTA_SIGNAL_THRESHOLD, WIFI_DELTA_REMOVED_HISTORY
+
+
+class VersionedCollection:
+    """
+    A keyed list of entries that remembers the version each entry last changed at, and the version
+    each removed key was removed at.
+    """
+
+    def __init__(self, key: Callable[[dict], str], changed: Callable[[dict, dict], bool]):
+        self.key = key
+        self.changed = changed
+        # key -> (version, entry), in list order
+        self.entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        # key -> version it was removed at, oldest first
+        self.removed: 'OrderedDict[str, int]' = OrderedDict()
+
+    def update(self, entries: Iterable[dict], version: int) -> bool:
+        """
+        Replaces the entries, stamping the ones that were added or changed with version.
+
+        Returns:
+            bool: True if anything was added, changed or removed.
+        """
+        updated = OrderedDict()
+        for entry in entries:
+            key = self.key(entry)
+            if key in updated:
+                continue
+            previous = self.entries.get(key)
+            if previous is not None and not self.changed(previous[1], entry):
+                # Below the change threshold: keep the entry the clients already have
+                updated[key] = previous
+            else:
+                updated[key] = (version, entry)
+                self.removed.pop(key, None)
+
+        dirty = any(stamp == version for stamp, _ in updated.values())
+        for key in self.entries.keys() - updated.keys():
+            self.removed[key] = version
+            dirty = True
+        self.entries = updated
+        return dirty
+
+    def since(self, version: int) -> dict:
+        return {'changed': [entry for stamp, entry in self.entries.values() if stamp > version],
+                'removed': [key for key, stamp in self.removed.items() if stamp > version]}
+
+    def trim(self, limit: int) -> Optional[int]:
+        """
+        Forgets the oldest removals beyond limit.
+
+        Returns:
+            Optional[int]: The newest version forgotten, or None.
+        """
+        forgotten = None
+        while len(self.removed) > limit:
+            _, forgotten = self.removed.popitem(last=False)
+        return forgotten
+
+
+def network_changed(old: dict, new: dict) -> bool:
+    """
+    An access point counts as changed when it becomes active or inactive, or its signal moves by at
+    least WIFI_DELTA_SIGNAL_THRESHOLD points.
+    """
+    if old.get('ACTIVE') != new.get('ACTIVE'):
+        return True
+    try:
+        return abs(int(old['SIGNAL']) - int(new['SIGNAL'])) >= WIFI_DELTA_SIGNAL_THRESHOLD
+    except (KeyError, ValueError):
+        return old != new
+
+
+def connection_changed(old: dict, new: dict) -> bool:
+    return old != new
+
+
+class VersionedState:
+    """
+    Keeps versioned copies of the Wi-Fi page's lists so clients can ask for what changed since the
+    version they hold.
+
+    Every update that adds, changes or removes an entry bumps the version. A delta lists the
+    current value of each entry changed after the client's version and the keys removed after it.
+    Removals are remembered up to a limit; a client holding a version older than the oldest one
+    still accounted for gets the full state instead, as does one holding a version from before a
+    restart, since versions start at the process start time in milliseconds.
+    """
+
+    def __init__(self, collections: Dict[str, VersionedCollection],
+                 removed_history: int = WIFI_DELTA_REMOVED_HISTORY):
+        self._collections = collections
+        self.removed_history = removed_history
+        self._lock = threading.Lock()
+        self.version = int(time.time() * 1000)
+        # Deltas are exact for any version at or after this one
+        self._floor = self.version
+
+    def update(self, **lists: List[dict]) -> int:
+        """
+        Records the current lists and returns the resulting version.
+        """
+        with self._lock:
+            version = self.version + 1
+            dirty = False
+            for name, entries in lists.items():
+                dirty = self._collections[name].update(entries, version) or dirty
+            if dirty:
+                self.version = version
+            for collection in self._collections.values():
+                forgotten = collection.trim(self.removed_history)
+                if forgotten is not None:
+                    self._floor = max(self._floor, forgotten)
+            return self.version
+
+    def delta(self, since: Optional[int]) -> Optional[dict]:
+        """
+        Returns the changes after version since, or None if the client needs the full state.
+
+        Returns:
+            Optional[dict]: {'changed': {name: [entries]}, 'removed': {name: [keys]}}.
+        """
+        with self._lock:
+            if since is None or not self._floor <= since <= self.version:
+                return None
+            changes = {name: collection.since(since) for name, collection in self._collections.items()}
+        return {'changed': {name: change['changed'] for name, change in changes.items()},
+                'removed': {name: change['removed'] for name, change in changes.items()}}
+
+
+wifi_state_versions = VersionedState({
+    # Keyed by SSID: get_wifi_state() lists one access point per network
+    'networks': VersionedCollection(lambda network: network['SSID'], network_changed),
+    'connections': VersionedCollection(lambda connection: connection['name'], connection_changed),
+})
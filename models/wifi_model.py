@@ -1,15 +1,18 @@
-import subprocess
-from typing import List, Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
-from config.constants import NMCLI_GET_WIFI_CONNECTIONS, NMCLI_SCAN_WIFI_NETWORKS, NMCLI_GET_ACTIVE_WIFI_CONNECTION, \
-    NMCLI_CONNECT_TO_NEW_AP, NMCLI_DISCONNECT_FROM_WIFI_CONNECTION, NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION, \
-    NMCLI_DELETE_KNOWN_WIFI_CONNECTION, NMCLI_SET_AUTOCONNECT_ON_TO_WIFI_CONNECTION, \
-    NMCLI_SET_AUTOCONNECT_OFF_TO_WIFI_CONNECTION, MAC_PREFIX_FOR_RASPBERRY
+from config.constants import MAC_PREFIX_FOR_RASPBERRY
+from models.admission import connection_locks
+from models.backends import get_backend
+from models.network_model import get_ip_and_mask
+from models.state_cache import state_cache
+from models.tracing import traced
 
 
+@traced
 def remembered_wifi_connections() -> dict[Any, Any] | list[dict[str, str]]:
     """
     Retrieves the names and autoconnect status of Wi-Fi connections.
+    The result is served from the shared state snapshot while it is fresh.
 
     Returns:
         List[Dict[str, str]]: A list of dictionaries containing the name and autoconnect status of Wi-Fi connections.
@@ -17,67 +20,184 @@ def remembered_wifi_connections() -> dict[Any, Any] | list[dict[str, str]]:
     Raises:
         RuntimeError: If the command to fetch Wi-Fi connections fails.
     """
-    command = NMCLI_GET_WIFI_CONNECTIONS
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    return remembered_wifi_connections_with_tag()[0]
 
-    if result.returncode != 0 and not result.stdout:
-        return {}
 
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to execute command '{command}'. Error: {result.stderr}")
+@traced
+def remembered_wifi_connections_with_tag() -> Tuple[List[Dict[str, str]], str]:
+    """
+    Same as remembered_wifi_connections(), along with the snapshot's tag for conditional requests.
+    """
+    return state_cache.get_tagged(('remembered_wifi_connections',), _read_remembered_wifi_connections)
+
+
+@traced
+async def remembered_wifi_connections_with_tag_async() -> Tuple[List[Dict[str, str]], str]:
+    """
+    Same as remembered_wifi_connections_with_tag(), for the async server mode. Shares the snapshot with it.
+    """
+    return await state_cache.get_tagged_async(('remembered_wifi_connections',),
+                                              lambda: get_backend().remembered_wifi_connections_async())
 
-    wifi_connections: List[Dict[str, str]] = []
-    for line in result.stdout.splitlines():
-        parts = line.split(':')
-        if len(parts) >= 2:
-            name = parts[0].strip()
-            autoconnect = parts[1].strip()
-            wifi_connections.append({'name': name, 'autoconnect': autoconnect})
 
-    return wifi_connections
+@traced
+def _read_remembered_wifi_connections() -> dict[Any, Any] | list[dict[str, str]]:
+    """
+    Reads the names and autoconnect status of Wi-Fi connections from NetworkManager.
+
+    Returns:
+        List[Dict[str, str]]: A list of dictionaries containing the name and autoconnect status of Wi-Fi connections.
+
+    Raises:
+        RuntimeError: If the command to fetch Wi-Fi connections fails.
+    """
+    return get_backend().remembered_wifi_connections()
 
 
-def scan_wifi_networks() -> list:
+@traced
+def scan_wifi_networks(rescan: bool = False) -> list:
     """
     Retrieves the list of Wi-Fi networks with their SSID, signal strength, and active status.
 
+    Args:
+        rescan (bool): Forces NetworkManager to rescan instead of returning its cached scan list.
+
     Returns:
         list: A list of dictionaries containing SSID, signal strength, and active status.
 
     Raises:
         RuntimeError: If the command to fetch Wi-Fi networks fails.
     """
-    command = NMCLI_SCAN_WIFI_NETWORKS
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    return filter_raspberry_networks(scan_wifi_access_points(rescan))
+
+
+@traced
+def scan_wifi_access_points(rescan: bool = False) -> list:
+    """
+    Retrieves every visible access point, including the BSSID and those that are not daughterboxes.
+
+    Args:
+        rescan (bool): Forces NetworkManager to rescan instead of returning its cached scan list.
+
+    Returns:
+        list: A list of dictionaries containing SSID, signal strength, active status and BSSID.
+
+    Raises:
+        RuntimeError: If the command to fetch Wi-Fi networks fails.
+    """
+    return get_backend().wifi_access_points(rescan)
+
+
+def filter_raspberry_networks(access_points: list) -> list:
+    """
+    Keeps the access points whose BSSID belongs to a Raspberry Pi.
+
+    Args:
+        access_points (list): Access points as returned by scan_wifi_access_points().
+
+    Returns:
+        list: A list of dictionaries containing SSID, signal strength, and active status.
+    """
+    return [{'SSID': ap['SSID'], 'SIGNAL': ap['SIGNAL'], 'ACTIVE': ap['ACTIVE']}
+            for ap in access_points if ap['BSSID'].upper().startswith(MAC_PREFIX_FOR_RASPBERRY)]
+
+
+def collapse_networks_by_ssid(networks: list) -> list:
+    """
+    Keeps one entry per SSID, since the page lists networks rather than access points: the active
+    access point if there is one, otherwise the strongest. Networks stay in order of first appearance.
+
+    Args:
+        networks (list): Networks as returned by filter_raspberry_networks().
+
+    Returns:
+        list: The networks, without duplicate SSIDs.
+    """
+    collapsed = {}
+    for network in networks:
+        kept = collapsed.get(network['SSID'])
+        if kept is None or _preferred(network, kept):
+            collapsed[network['SSID']] = network
+    return list(collapsed.values())
+
+
+def _preferred(network: dict, other: dict) -> bool:
+    if (network['ACTIVE'] == 'yes') != (other['ACTIVE'] == 'yes'):
+        return network['ACTIVE'] == 'yes'
+    try:
+        return int(network['SIGNAL']) > int(other['SIGNAL'])
+    except ValueError:
+        return False
+
+
+def find_active_access_point(access_points: list) -> dict:
+    """
+    Finds the access point the Wi-Fi device is associated with.
+
+    Args:
+        access_points (list): Access points as returned by scan_wifi_access_points().
+
+    Returns:
+        dict: A dictionary containing SSID, signal strength, and active status, or an empty dictionary.
+    """
+    for ap in access_points:
+        if ap['ACTIVE'] == 'yes':
+            return {'SSID': ap['SSID'], 'SIGNAL': ap['SIGNAL'], 'ACTIVE': ap['ACTIVE']}
+    return {}
+
+
+def access_point_signal(access_point: dict) -> Optional[int]:
+    """
+    Returns an access point's signal strength as a number, or None if nmcli left it out or blank.
+    """
+    try:
+        return int(access_point['SIGNAL'])
+    except (KeyError, ValueError):
+        return None
 
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to execute command '{command}'. Error: {result.stderr}")
 
-    wifi_networks = []
-    for line in result.stdout.splitlines():
-        parts = line.split(':')
-        if len(parts) >= 4:
-            ssid = parts[0].strip()
-            signal = parts[1].strip()
-            active = parts[2].strip()
-            bssid_1 = parts[3].strip()
-            bssid_2 = parts[4].strip()
-            bssid_3 = parts[5].strip()
-            bssid_4 = parts[6].strip()
-            bssid_5 = parts[7].strip()
-            bssid_6 = parts[8].strip()
+@traced
+def get_wifi_state(access_points: list) -> dict:
+    """
+    Builds everything the Wi-Fi page needs from one access point table: the known connections,
+    the active network and its IP/mask, and the list of daughterbox networks.
+
+    The active network is taken from the table instead of a separate nmcli query, so the only
+    extra reads are the known connections and the IP/mask, both served from the state snapshot.
+
+    Args:
+        access_points (list): Access points as returned by scan_wifi_access_points().
+
+    Returns:
+        dict: A dictionary with the keys 'connections', 'network', 'ip_and_mask' and 'networks'.
+            'ip_and_mask' is None when the active network has no IPv4 address. 'networks' has one
+            entry per SSID, matching the keys of wifi_state_versions.
 
-            bssid = f"{bssid_1}:{bssid_2}:{bssid_3}:{bssid_4}:{bssid_5}:{bssid_6}".replace("\:", ":")
+    Raises:
+        RuntimeError: If the command to fetch Wi-Fi connections fails.
+    """
+    network = find_active_access_point(access_points)
 
-            if bssid.startswith(MAC_PREFIX_FOR_RASPBERRY):
-                wifi_networks.append({'SSID': ssid, 'SIGNAL': signal, 'ACTIVE': active})
+    ip_and_mask = None
+    if network:
+        try:
+            ip_and_mask = get_ip_and_mask(network['SSID'])
+        except (RuntimeError, ValueError):
+            ip_and_mask = None
 
-    return wifi_networks
+    return {
+        'connections': remembered_wifi_connections(),
+        'network': network,
+        'ip_and_mask': ip_and_mask,
+        'networks': collapse_networks_by_ssid(filter_raspberry_networks(access_points)),
+    }
 
 
+@traced
 def get_active_wifi_connection() -> dict:
     """
     Retrieves the current active Wi-Fi network with its SSID, signal strength, and active status.
+    The result is served from the shared state snapshot while it is fresh.
 
     Returns:
         dict: A dictionary containing SSID, signal strength, and active status of the current active Wi-Fi network.
@@ -85,29 +205,41 @@ def get_active_wifi_connection() -> dict:
     Raises:
         RuntimeError: If the command to fetch Wi-Fi networks fails.
     """
-    command = NMCLI_GET_ACTIVE_WIFI_CONNECTION
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    return get_active_wifi_connection_with_tag()[0]
 
-    if result.returncode != 0 and not result.stdout:
-        return {}
 
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to execute command '{command}'. Error: {result.stderr}")
+@traced
+def get_active_wifi_connection_with_tag() -> Tuple[dict, str]:
+    """
+    Same as get_active_wifi_connection(), along with the snapshot's tag for conditional requests.
+    """
+    return state_cache.get_tagged(('active_wifi_connection',), _read_active_wifi_connection)
 
-    lines = result.stdout.splitlines()
-    if not lines:
-        return {}
 
-    parts = lines[0].split(':')
-    if len(parts) >= 3:
-        ssid = parts[0]
-        signal = parts[1]
-        active = parts[2]
-        return {'SSID': ssid, 'SIGNAL': signal, 'ACTIVE': active}
+@traced
+async def get_active_wifi_connection_with_tag_async() -> Tuple[dict, str]:
+    """
+    Same as get_active_wifi_connection_with_tag(), for the async server mode. Shares the snapshot with it.
+    """
+    return await state_cache.get_tagged_async(('active_wifi_connection',),
+                                              lambda: get_backend().active_wifi_connection_async())
 
-    return {}
+
+@traced
+def _read_active_wifi_connection() -> dict:
+    """
+    Reads the current active Wi-Fi network from NetworkManager.
+
+    Returns:
+        dict: A dictionary containing SSID, signal strength, and active status of the current active Wi-Fi network.
+
+    Raises:
+        RuntimeError: If the command to fetch Wi-Fi networks fails.
+    """
+    return get_backend().active_wifi_connection()
 
 
+@traced
 def connect_to_new_ap(ssid: str, password: str) -> Dict[str, str]:
     """
     Connects to a new Wi-Fi network using the given SSID and password.
@@ -122,19 +254,19 @@ def connect_to_new_ap(ssid: str, password: str) -> Dict[str, str]:
     Raises:
         RuntimeError: If the command to connect fails.
     """
-    # Attempt to connect using nmcli
-    command = NMCLI_CONNECT_TO_NEW_AP.format(ssid, password)
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to connect to Wi-Fi network '{ssid}'. Error: {result.stderr}")
+    with connection_locks.hold(ssid):
+        try:
+            get_backend().connect_to_new_ap(ssid, password)
+        finally:
+            state_cache.invalidate()
 
     return {'message': f"Connected to Wi-Fi network '{ssid}' successfully."}
 
 
+@traced
 def disconnect_from_wifi_connection(connection_name: str):
     """
-    Disconnects from a network using nmcli.
+    Disconnects from a network through NetworkManager.
 
     Args:
         connection_name (str): The name of the network to disconnect from.
@@ -142,18 +274,19 @@ def disconnect_from_wifi_connection(connection_name: str):
     Raises:
         RuntimeError: If the command to disconnect from the network fails.
     """
-    command = NMCLI_DISCONNECT_FROM_WIFI_CONNECTION.format(connection_name)
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to disconnect from network '{connection_name}'. Error: {result.stderr}")
+    with connection_locks.hold(connection_name):
+        try:
+            get_backend().deactivate_connection(connection_name)
+        finally:
+            state_cache.invalidate()
 
     print(f"Disconnected from network '{connection_name}' successfully.")
 
 
+@traced
 def connect_to_known_wifi_connection(connection_name: str):
     """
-    Connects to a known network using nmcli.
+    Connects to a known network through NetworkManager.
 
     Args:
         connection_name (str): The name of the known network to connect to.
@@ -161,18 +294,19 @@ def connect_to_known_wifi_connection(connection_name: str):
     Raises:
         RuntimeError: If the command to connect to the network fails.
     """
-    command = NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION.format(connection_name)
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to connect to network '{connection_name}'. Error: {result.stderr}")
+    with connection_locks.hold(connection_name):
+        try:
+            get_backend().activate_connection(connection_name)
+        finally:
+            state_cache.invalidate()
 
     print(f"Connected to network '{connection_name}' successfully.")
 
 
+@traced
 def delete_known_wifi_connection(connection_name: str):
     """
-    Deletes a network connection using nmcli.
+    Deletes a network connection through NetworkManager.
 
     Args:
         connection_name (str): The name of the connection to delete.
@@ -180,15 +314,16 @@ def delete_known_wifi_connection(connection_name: str):
     Raises:
         RuntimeError: If the command to delete the connection fails.
     """
-    command = NMCLI_DELETE_KNOWN_WIFI_CONNECTION.format(connection_name)
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to delete connection '{connection_name}'. Error: {result.stderr}")
+    with connection_locks.hold(connection_name):
+        try:
+            get_backend().delete_connection(connection_name)
+        finally:
+            state_cache.invalidate()
 
     print(f"Connection '{connection_name}' deleted successfully.")
 
 
+@traced
 def set_autoconnect_on_to_wifi_connection(connection_name: str):
     """
     Sets the autoconnect property to 'yes' for a specified network connection.
@@ -199,15 +334,16 @@ def set_autoconnect_on_to_wifi_connection(connection_name: str):
     Raises:
         RuntimeError: If the command to update the connection fails.
     """
-    command = NMCLI_SET_AUTOCONNECT_ON_TO_WIFI_CONNECTION.format(connection_name)
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to set autoconnect to 'yes' for connection '{connection_name}'. Error: {result.stderr}")
+    with connection_locks.hold(connection_name):
+        try:
+            get_backend().set_autoconnect(connection_name, True)
+        finally:
+            state_cache.invalidate()
 
     print(f"Autoconnect set to 'yes' for connection '{connection_name}' successfully.")
 
 
+@traced
 def set_autoconnect_off_to_wifi_connection(connection_name: str):
     """
     Sets the autoconnect property to 'no' for a specified network connection.
@@ -218,16 +354,10 @@ def set_autoconnect_off_to_wifi_connection(connection_name: str):
     Raises:
         RuntimeError: If the command to update the connection fails.
     """
-    command = NMCLI_SET_AUTOCONNECT_OFF_TO_WIFI_CONNECTION.format(connection_name)
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        raise RuntimeError(f"Failed to set autoconnect to 'no' for connection '{connection_name}'. Error: {result.stderr}")
+    with connection_locks.hold(connection_name):
+        try:
+            get_backend().set_autoconnect(connection_name, False)
+        finally:
+            state_cache.invalidate()
 
     print(f"Autoconnect set to 'no' for connection '{connection_name}' successfully.")
-
-
-
-
-
-
@@ -0,0 +1,178 @@
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from config.constants import WIFI_SCAN_INTERVAL_SECONDS, WIFI_SCAN_IDLE_AFTER_SECONDS, WIFI_SCAN_IDLE_INTERVAL_SECONDS
+from models.admission import AdmissionRejected
+from models.state_cache import SnapshotCache, state_cache
+from models.wifi_model import scan_wifi_access_points
+
+
+class WifiScanner:
+    """
+    Keeps the latest Wi-Fi access point table in memory and refreshes them from a background thread.
+
+    Requests read the last results without waiting on nmcli. The refresh interval stretches
+    to the idle interval once nobody has asked for results for a while, and a request made
+    while idle wakes the thread so the next read is fresh again. Only one scan runs at a
+    time: callers that ask for a rescan while one is in progress share its result, unless the
+    scan in progress is a plain read of NetworkManager's list.
+
+    When invalidated_by is given, results taken before that cache was last invalidated are
+    treated as missing, so a read after a connect or disconnect sees the new active network.
+    """
+
+    def __init__(self, scan: Callable[[bool], list], interval: float, idle_after: float, idle_interval: float,
+                 invalidated_by: Optional[SnapshotCache] = None):
+        self._scan = scan
+        self._invalidated_by = invalidated_by
+        self.interval = interval
+        self.idle_after = idle_after
+        self.idle_interval = idle_interval
+
+        self._cond = threading.Condition()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self._access_points: Optional[List[dict]] = None
+        self._scanned_at: Optional[float] = None
+        self._last_error: Optional[Exception] = None
+        self._scanning = False
+        self._rescanning = False
+        self._generation = 0
+        self._state_generation = self._current_state_generation()
+        self._last_request = time.monotonic()
+        self._listeners: List[Callable[[List[dict], float], None]] = []
+
+    def start(self):
+        """
+        Starts the background thread if it is not already running.
+        """
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='wifi-scanner', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and waits for it to exit.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def refresh_soon(self):
+        """
+        Asks the background thread, if it is running, to scan now instead of at its next interval.
+        Unlike scan_now() the caller does not wait, and results are served as before until it is done.
+        """
+        self._wakeup.set()
+
+    def subscribe(self, listener: Callable[[List[dict], float], None]):
+        """
+        Registers a callback invoked with (access_points, scanned_at) after every successful scan.
+        """
+        self._listeners.append(listener)
+
+    def get_results(self, rescan: bool = False) -> Tuple[List[dict], float]:
+        """
+        Returns the latest access point table and the time it was taken.
+
+        Args:
+            rescan (bool): Runs a fresh scan first, sharing it with any rescan already in progress.
+
+        Returns:
+            Tuple[List[dict], float]: The access points and the Unix timestamp of the scan.
+
+        Raises:
+            AdmissionRejected: If no scan has ever succeeded and the latest attempt was turned away.
+            RuntimeError: If no scan has ever succeeded and the latest attempt failed.
+        """
+        self.start()
+
+        with self._cond:
+            was_idle = time.monotonic() - self._last_request > self.idle_after
+            self._last_request = time.monotonic()
+            have_results = self._access_points is not None and self._state_generation == self._current_state_generation()
+
+        if rescan or not have_results:
+            self.scan_now(rescan=rescan)
+        elif was_idle:
+            self._wakeup.set()
+
+        with self._cond:
+            if self._access_points is None:
+                if isinstance(self._last_error, AdmissionRejected):
+                    raise self._last_error
+                raise RuntimeError(f"Wi-Fi scan failed. Error: {self._last_error}")
+            return self._access_points, self._scanned_at
+
+    def scan_now(self, rescan: bool = False):
+        """
+        Runs a scan in the calling thread, or waits for the one already in progress. A rescan only
+        shares a scan in progress that is a rescan too; otherwise it waits for that one to end and
+        then runs its own.
+
+        Args:
+            rescan (bool): Forces NetworkManager to rescan.
+        """
+        with self._cond:
+            while self._scanning:
+                joining = self._rescanning or not rescan
+                generation = self._generation
+                while self._generation == generation:
+                    self._cond.wait()
+                if joining:
+                    return
+                # The scan in progress read NetworkManager's cached list; a rescan still has to run
+            self._scanning = True
+            self._rescanning = rescan
+
+        state_generation = self._current_state_generation()
+        access_points, error = None, None
+        try:
+            access_points = self._scan(rescan)
+        except Exception as e:
+            error = e
+
+        with self._cond:
+            self._scanning = False
+            self._rescanning = False
+            self._generation += 1
+            self._last_error = error
+            if error is None:
+                self._access_points = access_points
+                self._scanned_at = time.time()
+                self._state_generation = state_generation
+            scanned_at = self._scanned_at
+            self._cond.notify_all()
+
+        if error is None:
+            for listener in list(self._listeners):
+                try:
+                    listener(access_points, scanned_at)
+                except Exception as e:
+                    print(f"Error notifying Wi-Fi scan listener: {e}")
+
+    def _current_state_generation(self) -> int:
+        return self._invalidated_by.generation if self._invalidated_by is not None else 0
+
+    def _current_interval(self) -> float:
+        with self._cond:
+            idle = time.monotonic() - self._last_request > self.idle_after
+        return self.idle_interval if idle else self.interval
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.scan_now()
+            self._wakeup.wait(self._current_interval())
+            self._wakeup.clear()
+
+
+wifi_scanner = WifiScanner(scan_wifi_access_points, WIFI_SCAN_INTERVAL_SECONDS, WIFI_SCAN_IDLE_AFTER_SECONDS,
+                           WIFI_SCAN_IDLE_INTERVAL_SECONDS, invalidated_by=state_cache)
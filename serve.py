@@ -0,0 +1,79 @@
+"""
+Production entry point: runs the app under gunicorn with threaded workers, or on gunicorn's
+asyncio worker through asgi.py when SERVER_MODE is 'async'.
+
+    python serve.py
+
+Worker, thread, timeout and keep-alive settings come from config/constants.py (SERVER_*),
+where the Raspberry Pi sizing defaults are documented. Send SIGHUP to the master process
+(its pid is written to SERVER_PID_FILE) for a graceful reload: new workers are started with
+the new code and old ones finish their in-flight requests before exiting.
+
+    kill -HUP "$(cat /tmp/daughterbox-server.pid)"
+"""
+from gunicorn.app.base import BaseApplication
+
+from config.constants import SERVER_BIND, SERVER_WORKERS, SERVER_THREADS, SERVER_TIMEOUT_SECONDS, \
+    SERVER_GRACEFUL_TIMEOUT_SECONDS, SERVER_KEEPALIVE_SECONDS, SERVER_BACKLOG, SERVER_PID_FILE, SERVER_MODE, \
+    SERVER_ASYNC_CONNECTIONS
+
+SERVER_MODES = ('sync', 'async')
+
+
+class DaughterboxServer(BaseApplication):
+    """
+    Embeds gunicorn so the server can be started without a separate config file.
+    """
+
+    def __init__(self, options: dict, mode: str = SERVER_MODE):
+        self.options = options
+        self.mode = mode
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from config.constants import ROAMING_ENABLED
+        from models.roaming import roaming_manager
+        from models.signal_history import signal_history
+        # Runs in the worker, so the background threads live in the process that serves their state
+        signal_history.start()
+        if ROAMING_ENABLED:
+            roaming_manager.start()
+        if self.mode == 'async':
+            from asgi import application
+            return application
+        from app import app
+        return app
+
+
+def server_options(mode: str = SERVER_MODE) -> dict:
+    """
+    Returns the gunicorn settings built from config/constants.py for the 'sync' or 'async' mode.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Unknown server mode '{mode}'. Choose one of: {', '.join(SERVER_MODES)}.")
+    if mode == 'async':
+        workers = {'worker_class': 'asgi', 'worker_connections': SERVER_ASYNC_CONNECTIONS}
+    else:
+        workers = {'worker_class': 'gthread', 'threads': SERVER_THREADS}
+    return {
+        'bind': SERVER_BIND,
+        'workers': SERVER_WORKERS,
+        **workers,
+        'timeout': SERVER_TIMEOUT_SECONDS,
+        'graceful_timeout': SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        'keepalive': SERVER_KEEPALIVE_SECONDS,
+        'backlog': SERVER_BACKLOG,
+        'pidfile': SERVER_PID_FILE,
+        'accesslog': '-',
+    }
+
+
+if __name__ == '__main__':
+    DaughterboxServer(server_options()).run()
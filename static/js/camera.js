@@ -1,13 +1,16 @@
-async function changeContentToCameras() {
-    const data = await getWifiIpAndMask();
+async function changeContentToCameras(refresh = false) {
+    const data = await getCameras(refresh);
+    renderCameraCards(data.cameras || []);
+}
 
+function renderCameraCards(cameras) {
     const contentPanel = document.getElementById('content-panel');
     contentPanel.innerHTML = '';
 
     const deviceCardsContainer = document.createElement('div');
     deviceCardsContainer.classList.add('device-cards-container');
 
-    if(data.length === 0) {
+    if(cameras.length === 0) {
         const noDevices = document.createElement('div');
         noDevices.classList.add('no-devices');
         noDevices.textContent = 'No devices found';
@@ -16,18 +19,35 @@ async function changeContentToCameras() {
         return;
     }
 
-    const card1 = document.createElement('div');
-    card1.classList.add('card');
-    card1.innerHTML = `
-        <div class="card-header">
-            <span class="emoji">🎥</span>
-            <h3>${data.ip}</h3>
-        </div>
-        <div class="card-buttons">
-            <button onclick="window.open('http://${data.ip}', '_blank')">Camera</button>
-        </div>
-    `;
-    deviceCardsContainer.appendChild(card1);
+    cameras.forEach(camera => {
+        const card = document.createElement('div');
+        card.classList.add('card');
+        const httpPorts = camera.ports.filter(port => port !== 554 && port !== 8554);
+        const buttons = httpPorts.map(port => {
+            const url = port === 80 ? `http://${camera.ip}` : `http://${camera.ip}:${port}`;
+            return `<button onclick="window.open('${url}', '_blank')">Camera${port === 80 ? '' : ` :${port}`}</button>`;
+        }).join('');
+        // Live view goes through the box, so every viewer shares one connection to the camera
+        const live = httpPorts.length > 0
+            ? `<button onclick="window.open('/camera/${encodeURIComponent(camera.id)}/stream', '_blank')">Live</button>`
+            : '';
+        card.innerHTML = `
+            <div class="card-header">
+                <span class="emoji">🎥</span>
+                <h3>${camera.ip}</h3>
+            </div>
+            <p>${camera.services.join(', ').toUpperCase()}</p>
+            <div class="card-buttons">${live}${buttons}</div>
+        `;
+        deviceCardsContainer.appendChild(card);
+    });
 
     contentPanel.appendChild(deviceCardsContainer);
 }
+
+function onIpChanged(data) {
+    if (data.kind !== 'wifi' || document.querySelector('.device-cards-container') === null) {
+        return;
+    }
+    changeContentToCameras(true);
+}
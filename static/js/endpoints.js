@@ -1,8 +1,24 @@
+// Last body and ETag of every GET, so unchanged state is revalidated with a 304 instead of re-sent
+const responseCache = new Map();
+
 async function fetchWithErrorHandling(url, options = {}) {
+    const cacheable = !options.method || options.method === 'GET';
+    const cached = cacheable ? responseCache.get(url) : undefined;
+    if (cached) {
+        options = { ...options, headers: { ...options.headers, 'If-None-Match': cached.etag } };
+    }
     try {
         const response = await fetch(url, options);
+        if (response.status === 304 && cached) {
+            return cached.data;
+        }
         if (response.ok) {
-            return await response.json();
+            const data = await response.json();
+            const etag = response.headers.get('ETag');
+            if (cacheable && etag) {
+                responseCache.set(url, { etag, data });
+            }
+            return data;
         } else {
             throw new Error(`Request failed: ${response.statusText}`);
         }
@@ -12,6 +28,25 @@ async function fetchWithErrorHandling(url, options = {}) {
     }
 }
 
+async function waitForJob(response, intervalMs = 1000) {
+    if (response.error || !response.status_url) {
+        return response;
+    }
+    while (true) {
+        const job = await fetchWithErrorHandling(response.status_url);
+        if (job.error && !job.status) {
+            return job;
+        }
+        if (job.status === 'succeeded') {
+            return job.result || {};
+        }
+        if (job.status === 'failed') {
+            return { error: job.error };
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
 async function getEthernetIpAndMask() {
     return await fetchWithErrorHandling('/ethernet_ip_and_mask');
 }
@@ -24,7 +59,7 @@ async function setEthernetIpAndMask(ip, mask) {
         },
         body: JSON.stringify({ ip, mask })
     };
-    return await fetchWithErrorHandling('/set_ethernet_ip_and_mask', options);
+    return await waitForJob(await fetchWithErrorHandling('/set_ethernet_ip_and_mask', options));
 }
 
 async function rebootSystem() {
@@ -39,6 +74,10 @@ async function shutdownSystem() {
     });
 }
 
+async function getCameras(refresh = false) {
+    return await fetchWithErrorHandling(refresh ? '/cameras?refresh=1' : '/cameras');
+}
+
 async function getWifiIpAndMask() {
     return await fetchWithErrorHandling('/wifi_ip_and_mask');
 }
@@ -55,6 +94,10 @@ async function getActiveWifiConnection() {
     return await fetchWithErrorHandling('/active_wifi_network');
 }
 
+async function getWifiState(since = null) {
+    return await fetchWithErrorHandling(since === null ? '/wifi_state' : `/wifi_state?since=${since}`);
+}
+
 async function connectToNewAp(ssid, password) {
     const options = {
         method: 'POST',
@@ -63,7 +106,7 @@ async function connectToNewAp(ssid, password) {
         },
         body: JSON.stringify({ ssid, password })
     };
-    return await fetchWithErrorHandling('/connect_to_new_ap', options);
+    return await waitForJob(await fetchWithErrorHandling('/connect_to_new_ap', options));
 }
 
 async function disconnectFromWifiConnection(connection_name) {
@@ -85,7 +128,7 @@ async function connectToKnownWifiConnection(connection_name) {
         },
         body: JSON.stringify({ connection_name })
     };
-    return await fetchWithErrorHandling('/connect_to_known_wifi_connection', options);
+    return await waitForJob(await fetchWithErrorHandling('/connect_to_known_wifi_connection', options));
 }
 
 async function deleteKnownWifiConnection(connection_name) {
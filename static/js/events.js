@@ -0,0 +1,7 @@
+document.addEventListener('DOMContentLoaded', () => {
+    const source = new EventSource('/events');
+
+    source.addEventListener('scan_updated', event => onWifiScanUpdated(JSON.parse(event.data)));
+    source.addEventListener('active_connection_changed', event => onActiveWifiConnectionChanged(JSON.parse(event.data)));
+    source.addEventListener('ip_changed', event => onIpChanged(JSON.parse(event.data)));
+});
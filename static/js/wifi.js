@@ -1,20 +1,115 @@
-async function fetchWifiDataConcurrently() {
-    const [rememberedWifiConnections, activeWifiConnection, availableWifiNetworks] = await Promise.all([
-        getRememberedWifiConnections(),
-        getActiveWifiConnection(),
-        scanWifiNetworks()
-    ]);
+// Wi-Fi page state and the server version it corresponds to; later loads ask only for what changed since then
+let wifiState = null;
+let wifiStateVersion = null;
 
+const connectionKey = connection => connection.name;
+const networkKey = network => network.SSID;
+
+async function changeContentToWifi() {
+    const update = await getWifiState(wifiState ? wifiStateVersion : null);
+    if (update.error) {
+        if (wifiState && !isWifiPanelShown()) {
+            renderWifiPanel();
+        }
+        return;
+    }
+    wifiStateVersion = update.version;
+
+    if (update.full || !wifiState) {
+        wifiState = {
+            rememberedWifiConnections: update.connections || [],
+            activeWifiConnection: update.network || {},
+            availableWifiNetworks: update.networks || []
+        };
+        renderWifiPanel();
+        return;
+    }
+
+    const shown = isWifiPanelShown();
+    wifiState.activeWifiConnection = update.network || {};
+    applyWifiChanges(update.changed.connections, update.removed.connections,
+                     update.changed.networks, update.removed.networks, shown);
+    if (!shown) {
+        renderWifiPanel();
+    }
+}
+
+function mergeEntries(entries, changed, removed, keyOf) {
+    const merged = entries.filter(entry => !removed.includes(keyOf(entry)));
+    changed.forEach(entry => {
+        const index = merged.findIndex(existing => keyOf(existing) === keyOf(entry));
+        if (index === -1) {
+            merged.push(entry);
+        } else {
+            merged[index] = entry;
+        }
+    });
+    return merged;
+}
+
+function diffEntries(entries, next, keyOf, isChanged) {
+    const current = new Map(entries.map(entry => [keyOf(entry), entry]));
+    const nextKeys = new Set(next.map(keyOf));
     return {
-        rememberedWifiConnections: rememberedWifiConnections.connections,
-        activeWifiConnection: activeWifiConnection.network,
-        availableWifiNetworks: availableWifiNetworks.networks
+        changed: next.filter(entry => !current.has(keyOf(entry)) || isChanged(current.get(keyOf(entry)), entry)),
+        removed: entries.map(keyOf).filter(key => !nextKeys.has(key))
     };
 }
 
-async function changeContentToWifi() {
-    const { rememberedWifiConnections, activeWifiConnection, availableWifiNetworks } = await fetchWifiDataConcurrently();
+function applyWifiChanges(changedConnections, removedConnections, changedNetworks, removedNetworks, patchDom = true) {
+    wifiState.rememberedWifiConnections = mergeEntries(wifiState.rememberedWifiConnections, changedConnections,
+                                                       removedConnections, connectionKey);
+    wifiState.availableWifiNetworks = mergeEntries(wifiState.availableWifiNetworks, changedNetworks,
+                                                   removedNetworks, networkKey);
+    if (!patchDom) {
+        return;
+    }
 
+    // A network's buttons depend on whether it is known, so networks of added or removed connections are redrawn too
+    const touchedConnections = new Set([...changedConnections.map(connectionKey), ...removedConnections]);
+    const networks = changedNetworks.slice();
+    wifiState.availableWifiNetworks.forEach(network => {
+        if (touchedConnections.has(network.SSID) && !networks.some(changed => changed.SSID === network.SSID)) {
+            networks.push(network);
+        }
+    });
+
+    renderActiveWifiPanel();
+    patchKeyedList(document.querySelector('.known-wifi-panel .connection-list'), changedConnections,
+                   removedConnections, connectionKey, renderConnectionItem);
+    patchKeyedList(document.querySelector('.active-wifi-panel .network-list'), networks, removedNetworks,
+                   networkKey, renderNetworkItem);
+    updatePanelVisibility();
+}
+
+function findKeyedItem(list, key) {
+    return Array.from(list.children).find(item => item.dataset.key === key);
+}
+
+function patchKeyedList(list, changed, removed, keyOf, render) {
+    removed.forEach(key => {
+        const item = findKeyedItem(list, key);
+        if (item) {
+            item.remove();
+        }
+    });
+    changed.forEach(entry => {
+        const item = findKeyedItem(list, keyOf(entry));
+        const replacement = render(entry);
+        if (!item) {
+            list.appendChild(replacement);
+        } else if (item.dataset.variant === replacement.dataset.variant) {
+            // Same buttons: only the text can differ, and an open password field is left alone
+            item.querySelectorAll('[data-field]').forEach(field => {
+                field.textContent = replacement.querySelector(`[data-field="${field.dataset.field}"]`).textContent;
+            });
+        } else if (!isItemEnteringPassword(item)) {
+            item.replaceWith(replacement);
+        }
+    });
+}
+
+function renderWifiPanel() {
     const contentPanel = document.getElementById('content-panel');
     contentPanel.innerHTML = '';
 
@@ -26,150 +121,170 @@ async function changeContentToWifi() {
     title.textContent = 'Wi-Fi Settings';
     container.appendChild(title);
 
-    if (activeWifiConnection.ACTIVE === 'yes') {
-        const activeWifiPanel = document.createElement('div');
-        activeWifiPanel.classList.add('connected-wifi-panel');
+    const activeWifiPanel = document.createElement('div');
+    activeWifiPanel.classList.add('connected-wifi-panel');
+    container.appendChild(activeWifiPanel);
+
+    const rememberedWifiPanel = document.createElement('div');
+    rememberedWifiPanel.classList.add('known-wifi-panel');
+    const rememberedWifiTitle = document.createElement('h3');
+    rememberedWifiTitle.textContent = 'Known Wi-Fi Networks';
+    rememberedWifiPanel.appendChild(rememberedWifiTitle);
+    const connectionList = document.createElement('div');
+    connectionList.classList.add('connection-list');
+    wifiState.rememberedWifiConnections.forEach(connection => connectionList.appendChild(renderConnectionItem(connection)));
+    rememberedWifiPanel.appendChild(connectionList);
+    container.appendChild(rememberedWifiPanel);
 
-        const activeWifiTitle = document.createElement('h3');
-        activeWifiTitle.textContent = 'Connected Wi-Fi';
-        activeWifiPanel.appendChild(activeWifiTitle);
-
-        const ssidInfo = document.createElement('p');
-        ssidInfo.textContent = `SSID: ${activeWifiConnection.SSID}`;
-        activeWifiPanel.appendChild(ssidInfo);
+    const activeWifiNetworksPanel = document.createElement('div');
+    activeWifiNetworksPanel.classList.add('active-wifi-panel');
+    const activeWifiNetworksTitle = document.createElement('h3');
+    activeWifiNetworksTitle.textContent = 'Available Wi-Fi Networks';
+    activeWifiNetworksPanel.appendChild(activeWifiNetworksTitle);
+    const networkList = document.createElement('div');
+    networkList.classList.add('network-list');
+    wifiState.availableWifiNetworks.forEach(network => networkList.appendChild(renderNetworkItem(network)));
+    activeWifiNetworksPanel.appendChild(networkList);
+    container.appendChild(activeWifiNetworksPanel);
 
-        const signalInfo = document.createElement('p');
-        signalInfo.textContent = `Signal: ${activeWifiConnection.SIGNAL}%`;
-        activeWifiPanel.appendChild(signalInfo);
+    renderActiveWifiPanel();
+    updatePanelVisibility();
+}
 
-        container.appendChild(activeWifiPanel);
+function renderActiveWifiPanel() {
+    const activeWifiConnection = wifiState.activeWifiConnection;
+    const activeWifiPanel = document.querySelector('.connected-wifi-panel');
+    activeWifiPanel.innerHTML = '';
+    activeWifiPanel.style.display = activeWifiConnection.ACTIVE === 'yes' ? '' : 'none';
+    if (activeWifiConnection.ACTIVE !== 'yes') {
+        return;
     }
 
+    const activeWifiTitle = document.createElement('h3');
+    activeWifiTitle.textContent = 'Connected Wi-Fi';
+    activeWifiPanel.appendChild(activeWifiTitle);
 
-    if (rememberedWifiConnections.length > 0) {
-        const rememberedWifiPanel = document.createElement('div');
-        rememberedWifiPanel.classList.add('known-wifi-panel');
-
-        const rememberedWifiTitle = document.createElement('h3');
-        rememberedWifiTitle.textContent = 'Known Wi-Fi Networks';
-        rememberedWifiPanel.appendChild(rememberedWifiTitle);
-
-        rememberedWifiConnections.forEach(connection => {
-            const connectionItem = document.createElement('div');
-            connectionItem.classList.add('connection-item');
-
-            const connectionName = document.createElement('span');
-            connectionName.classList.add('connection-name');
-            connectionName.textContent = connection.name;
-            connectionItem.appendChild(connectionName);
-
-            const autoconnectStatus = document.createElement('span');
-            autoconnectStatus.classList.add('autoconnect-status');
-            autoconnectStatus.textContent = connection.autoconnect === 'yes' ? 'Autoconnect: On' : 'Autoconnect: Off';
-            connectionItem.appendChild(autoconnectStatus);
-
-            const toggleButton = document.createElement('button');
-            toggleButton.classList.add('toggle-button');
-            toggleButton.textContent = connection.autoconnect === 'yes' ? 'Disable' : 'Enable';
-            toggleButton.onclick = () => toggleAutoconnect(connection.name, connection.autoconnect);
-            connectionItem.appendChild(toggleButton);
-
-            const forgetButton = document.createElement('button');
-            forgetButton.classList.add('forget-button');
-            forgetButton.textContent = 'Forget';
-            forgetButton.onclick = async () => {
-                await showLoading();
-                await deleteKnownWifiConnection(connection.name);
-                await changeContentToWifi();
-            };
-            connectionItem.appendChild(forgetButton);
-
-            rememberedWifiPanel.appendChild(connectionItem);
-        });
-
-        container.appendChild(rememberedWifiPanel);
-    }
+    const ssidInfo = document.createElement('p');
+    ssidInfo.textContent = `SSID: ${activeWifiConnection.SSID}`;
+    activeWifiPanel.appendChild(ssidInfo);
 
-    const activeWifiNetworksPanel = document.createElement('div');
-    activeWifiNetworksPanel.classList.add('active-wifi-panel');
+    const signalInfo = document.createElement('p');
+    signalInfo.textContent = `Signal: ${activeWifiConnection.SIGNAL}%`;
+    activeWifiPanel.appendChild(signalInfo);
+}
 
-    const activeWifiNetworksTitle = document.createElement('h3');
-    activeWifiNetworksTitle.textContent = 'Available Wi-Fi Networks';
-    activeWifiNetworksPanel.appendChild(activeWifiNetworksTitle);
+function updatePanelVisibility() {
+    const rememberedWifiPanel = document.querySelector('.known-wifi-panel');
+    rememberedWifiPanel.style.display = wifiState.rememberedWifiConnections.length > 0 ? '' : 'none';
+}
 
-    availableWifiNetworks.forEach(network => {
-        const networkItem = document.createElement('div');
-        networkItem.classList.add('network-item');
-
-        const ssid = document.createElement('span');
-        ssid.classList.add('network-ssid');
-        ssid.textContent = network.SSID;
-        networkItem.appendChild(ssid);
-
-        const signal = document.createElement('span');
-        signal.classList.add('network-signal');
-        signal.textContent = `Signal: ${network.SIGNAL}%`;
-        networkItem.appendChild(signal);
-
-        const isKnownNetwork = Array.isArray(rememberedWifiConnections) && rememberedWifiConnections.some(connection => connection.name === network.SSID);
-
-        if (network.ACTIVE === 'yes') {
-            const disconnectButton = document.createElement('button');
-            disconnectButton.classList.add('disconnect-button');
-            disconnectButton.textContent = 'Disconnect';
-            disconnectButton.onclick = async () => {
-                await showLoading();
-                await disconnectFromWifiConnection(network.SSID);
-                await changeContentToWifi();
-            };
-            networkItem.appendChild(disconnectButton);
-        } else if (isKnownNetwork) {
-            const connectButton = document.createElement('button');
-            connectButton.classList.add('connect-button');
-            connectButton.textContent = 'Connect';
-            connectButton.onclick = async () => {
-                await showLoading();
-                await connectToKnownWifiConnection(network.SSID);
-                await changeContentToWifi();
-            };
-            networkItem.appendChild(connectButton);
-        } else {
-            const connectButton = document.createElement('button');
-            connectButton.classList.add('connect-button');
-            connectButton.textContent = 'Connect';
-            connectButton.onclick = () => showPasswordInput(network.SSID);
-            networkItem.appendChild(connectButton);
-
-            const passwordInput = document.createElement('input');
-            passwordInput.classList.add('password-input');
-            passwordInput.type = 'password';
-            passwordInput.placeholder = 'Enter password';
-            passwordInput.style.display = 'none';
-            networkItem.appendChild(passwordInput);
-
-            const confirmButton = document.createElement('button');
-            confirmButton.classList.add('confirm-button');
-            confirmButton.textContent = 'Confirm';
-            confirmButton.style.display = 'none';
-            confirmButton.onclick = async () => {
-                await showLoading();
-                await connectToNewAp(network.SSID, passwordInput.value);
-                await changeContentToWifi();
-            };
-            networkItem.appendChild(confirmButton);
-        }
+function renderConnectionItem(connection) {
+    const connectionItem = document.createElement('div');
+    connectionItem.classList.add('connection-item');
+    connectionItem.dataset.key = connection.name;
+    connectionItem.dataset.variant = connection.autoconnect;
+
+    const connectionName = document.createElement('span');
+    connectionName.classList.add('connection-name');
+    connectionName.textContent = connection.name;
+    connectionItem.appendChild(connectionName);
+
+    const autoconnectStatus = document.createElement('span');
+    autoconnectStatus.classList.add('autoconnect-status');
+    autoconnectStatus.textContent = connection.autoconnect === 'yes' ? 'Autoconnect: On' : 'Autoconnect: Off';
+    connectionItem.appendChild(autoconnectStatus);
+
+    const toggleButton = document.createElement('button');
+    toggleButton.classList.add('toggle-button');
+    toggleButton.textContent = connection.autoconnect === 'yes' ? 'Disable' : 'Enable';
+    toggleButton.onclick = () => toggleAutoconnect(connection.name, connection.autoconnect);
+    connectionItem.appendChild(toggleButton);
+
+    const forgetButton = document.createElement('button');
+    forgetButton.classList.add('forget-button');
+    forgetButton.textContent = 'Forget';
+    forgetButton.onclick = async () => {
+        await showLoading();
+        await deleteKnownWifiConnection(connection.name);
+        await changeContentToWifi();
+    };
+    connectionItem.appendChild(forgetButton);
 
-        activeWifiNetworksPanel.appendChild(networkItem);
-    });
+    return connectionItem;
+}
 
-    container.appendChild(activeWifiNetworksPanel);
+function renderNetworkItem(network) {
+    const isKnownNetwork = wifiState.rememberedWifiConnections.some(connection => connection.name === network.SSID);
+
+    const networkItem = document.createElement('div');
+    networkItem.classList.add('network-item');
+    networkItem.dataset.key = network.SSID;
+    networkItem.dataset.variant = network.ACTIVE === 'yes' ? 'active' : (isKnownNetwork ? 'known' : 'new');
+
+    const ssid = document.createElement('span');
+    ssid.classList.add('network-ssid');
+    ssid.textContent = network.SSID;
+    networkItem.appendChild(ssid);
+
+    const signal = document.createElement('span');
+    signal.classList.add('network-signal');
+    signal.dataset.field = 'signal';
+    signal.textContent = `Signal: ${network.SIGNAL}%`;
+    networkItem.appendChild(signal);
+
+    if (network.ACTIVE === 'yes') {
+        const disconnectButton = document.createElement('button');
+        disconnectButton.classList.add('disconnect-button');
+        disconnectButton.textContent = 'Disconnect';
+        disconnectButton.onclick = async () => {
+            await showLoading();
+            await disconnectFromWifiConnection(network.SSID);
+            await changeContentToWifi();
+        };
+        networkItem.appendChild(disconnectButton);
+    } else if (isKnownNetwork) {
+        const connectButton = document.createElement('button');
+        connectButton.classList.add('connect-button');
+        connectButton.textContent = 'Connect';
+        connectButton.onclick = async () => {
+            await showLoading();
+            await connectToKnownWifiConnection(network.SSID);
+            await changeContentToWifi();
+        };
+        networkItem.appendChild(connectButton);
+    } else {
+        const connectButton = document.createElement('button');
+        connectButton.classList.add('connect-button');
+        connectButton.textContent = 'Connect';
+        connectButton.onclick = () => showPasswordInput(network.SSID);
+        networkItem.appendChild(connectButton);
+
+        const passwordInput = document.createElement('input');
+        passwordInput.classList.add('password-input');
+        passwordInput.type = 'password';
+        passwordInput.placeholder = 'Enter password';
+        passwordInput.style.display = 'none';
+        networkItem.appendChild(passwordInput);
+
+        const confirmButton = document.createElement('button');
+        confirmButton.classList.add('confirm-button');
+        confirmButton.textContent = 'Confirm';
+        confirmButton.style.display = 'none';
+        confirmButton.onclick = async () => {
+            await showLoading();
+            await connectToNewAp(network.SSID, passwordInput.value);
+            await changeContentToWifi();
+        };
+        networkItem.appendChild(confirmButton);
+    }
+
+    return networkItem;
 }
 
 function showPasswordInput(ssid) {
     const networkItems = document.querySelectorAll('.network-item');
     networkItems.forEach(item => {
-        const ssidElement = item.querySelector('.network-ssid');
-        if (ssidElement.textContent === ssid) {
+        if (item.dataset.key === ssid) {
             const passwordInput = item.querySelector('.password-input');
             const confirmButton = item.querySelector('.confirm-button');
             const connectButton = item.querySelector('.connect-button');
@@ -188,4 +303,34 @@ async function toggleAutoconnect(connectionName, currentStatus) {
         await setAutoconnectOffToWifiConnection(connectionName);
     }
     await changeContentToWifi();
-}
\ No newline at end of file
+}
+
+function isWifiPanelShown() {
+    return document.querySelector('.wifi-settings-container') !== null;
+}
+
+function isItemEnteringPassword(item) {
+    const passwordInput = item.querySelector('.password-input');
+    return passwordInput !== null && passwordInput.style.display === 'block';
+}
+
+function onWifiScanUpdated(data) {
+    if (!wifiState) {
+        return;
+    }
+    const { changed, removed } = diffEntries(wifiState.availableWifiNetworks, data.networks, networkKey,
+        (current, next) => current.SIGNAL !== next.SIGNAL || current.ACTIVE !== next.ACTIVE);
+    applyWifiChanges([], [], changed, removed, isWifiPanelShown());
+}
+
+function onActiveWifiConnectionChanged(data) {
+    if (!wifiState) {
+        return;
+    }
+    const network = data.network || {};
+    wifiState.activeWifiConnection = network;
+    const changed = wifiState.availableWifiNetworks
+        .filter(availableNetwork => (availableNetwork.SSID === network.SSID) !== (availableNetwork.ACTIVE === 'yes'))
+        .map(availableNetwork => ({ ...availableNetwork, ACTIVE: availableNetwork.SSID === network.SSID ? 'yes' : 'no' }));
+    applyWifiChanges([], [], changed, [], isWifiPanelShown());
+}
@@ -0,0 +1,218 @@
+import shutil
+import subprocess
+import threading
+
+from jeepney import MessageType, message_bus, new_method_return, new_error
+from jeepney.io.blocking import open_dbus_connection
+
+NM = '/org/freedesktop/NetworkManager'
+NM_IFACE = 'org.freedesktop.NetworkManager'
+SETTINGS = NM + '/Settings'
+PROPERTIES_IFACE = 'org.freedesktop.DBus.Properties'
+
+
+def start_private_bus():
+    """
+    Starts a private dbus-daemon and returns (process, address). Returns (None, None) if
+    dbus-daemon is not installed.
+    """
+    if shutil.which('dbus-daemon') is None:
+        return None, None
+    process = subprocess.Popen(['dbus-daemon', '--session', '--nofork', '--print-address=1'],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    address = process.stdout.readline().strip()
+    return process, address
+
+
+class MockNetworkManager:
+    """
+    Minimal NetworkManager service for the D-Bus backend tests.
+
+    It owns org.freedesktop.NetworkManager on the given bus and implements the subset of
+    the API the backend uses: one Wi-Fi device with access points, one ethernet device,
+    saved connections and active connections with IPv4 configuration.
+    """
+
+    def __init__(self, bus_address: str):
+        self.objects = {}
+        self.methods = {}
+        self.calls = []
+        self._next_id = 100
+        self._stopped = threading.Event()
+
+        self.conn = open_dbus_connection(bus=bus_address)
+        self.conn.send_and_get_reply(message_bus.RequestName(NM_IFACE))
+
+        self.wifi_device = NM + '/Devices/1'
+        self.ethernet_device = NM + '/Devices/2'
+        self._add(NM, NM_IFACE, Version=('s', '1.42.0'), ActiveConnections=('ao', []))
+        self._add(self.wifi_device, NM_IFACE + '.Device', DeviceType=('u', 2), Interface=('s', 'wlan0'))
+        self._add(self.wifi_device, NM_IFACE + '.Device.Wireless', ActiveAccessPoint=('o', '/'), LastScan=('x', 1))
+        self._add(self.ethernet_device, NM_IFACE + '.Device', DeviceType=('u', 1), Interface=('s', 'eth0'))
+
+        self.access_points = []
+        self.add_access_point('Box-1', 70, 'B8:27:EB:00:00:01')
+        self.add_access_point('Box-2', 40, 'B8:27:EB:00:00:02')
+        self.add_access_point('Neighbour', 90, '00:11:22:33:44:55')
+
+        self.connections = {}
+        self.add_connection('Box-1', '802-11-wireless', autoconnect=True)
+        self.add_connection('ETH', '802-3-ethernet', autoconnect=True)
+
+        self.activate('Box-1', '10.42.0.2', 24)
+        self.activate('ETH', '192.168.1.10', 24)
+
+        self.methods.update({
+            (NM, NM_IFACE, 'GetDevices'): lambda: ('ao', ([self.wifi_device, self.ethernet_device],)),
+            (NM, NM_IFACE, 'ActivateConnection'): self._activate_connection,
+            (NM, NM_IFACE, 'AddAndActivateConnection'): self._add_and_activate_connection,
+            (NM, NM_IFACE, 'DeactivateConnection'): self._deactivate_connection,
+            (SETTINGS, NM_IFACE + '.Settings', 'ListConnections'): lambda: ('ao', (list(self.connections),)),
+            (self.wifi_device, NM_IFACE + '.Device.Wireless', 'GetAllAccessPoints'):
+                lambda: ('ao', (list(self.access_points),)),
+            (self.wifi_device, NM_IFACE + '.Device.Wireless', 'RequestScan'): self._request_scan,
+            (self.ethernet_device, NM_IFACE + '.Device', 'Reapply'):
+                lambda settings, version_id, flags: self._reapply(self.ethernet_device),
+        })
+
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.conn.close()
+
+    # State helpers
+
+    def _path(self, kind: str) -> str:
+        self._next_id += 1
+        return f"{NM}/{kind}/{self._next_id}"
+
+    def _add(self, path, interface, **properties):
+        self.objects.setdefault(path, {})[interface] = dict(properties)
+
+    def prop(self, path, interface, name):
+        return self.objects[path][interface][name][1]
+
+    def set_prop(self, path, interface, name, value):
+        signature = self.objects[path][interface][name][0]
+        self.objects[path][interface][name] = (signature, value)
+
+    def add_access_point(self, ssid: str, strength: int, bssid: str) -> str:
+        path = self._path('AccessPoint')
+        self._add(path, NM_IFACE + '.AccessPoint', Ssid=('ay', ssid.encode()), Strength=('y', strength),
+                  HwAddress=('s', bssid))
+        self.access_points.append(path)
+        return path
+
+    def add_connection(self, name: str, connection_type: str, autoconnect: bool = True, **extra) -> str:
+        path = self._path('Settings')
+        settings = {'connection': {'id': ('s', name), 'type': ('s', connection_type),
+                                   'autoconnect': ('b', autoconnect)}}
+        settings.update(extra)
+        self.connections[path] = settings
+        interface = NM_IFACE + '.Settings.Connection'
+        self.methods[(path, interface, 'GetSettings')] = lambda: ('a{sa{sv}}', (self.connections[path],))
+        self.methods[(path, interface, 'GetSecrets')] = lambda setting: ('a{sa{sv}}', ({},))
+        self.methods[(path, interface, 'Update')] = lambda settings: self._update(path, settings)
+        self.methods[(path, interface, 'Delete')] = lambda: self._delete(path)
+        return path
+
+    def connection_path(self, name: str) -> str:
+        return next(path for path, settings in self.connections.items() if settings['connection']['id'][1] == name)
+
+    def activate(self, name: str, address: str = '10.42.0.3', prefix: int = 24) -> str:
+        connection = self.connection_path(name)
+        ip4_config = self._path('IP4Config')
+        self._add(ip4_config, NM_IFACE + '.IP4Config',
+                  AddressData=('aa{sv}', [{'address': ('s', address), 'prefix': ('u', prefix)}]))
+        wireless = self.connections[connection]['connection']['type'][1] == '802-11-wireless'
+        device = self.wifi_device if wireless else self.ethernet_device
+        active = self._path('ActiveConnection')
+        self._add(active, NM_IFACE + '.Connection.Active', Id=('s', name), Connection=('o', connection),
+                  Ip4Config=('o', ip4_config), State=('u', 2), Devices=('ao', [device]))
+        self.set_prop(NM, NM_IFACE, 'ActiveConnections', self.prop(NM, NM_IFACE, 'ActiveConnections') + [active])
+
+        for ap in self.access_points:
+            if self.prop(ap, NM_IFACE + '.AccessPoint', 'Ssid') == name.encode():
+                self.set_prop(self.wifi_device, NM_IFACE + '.Device.Wireless', 'ActiveAccessPoint', ap)
+        return active
+
+    def active_ids(self):
+        return [self.prop(path, NM_IFACE + '.Connection.Active', 'Id')
+                for path in self.prop(NM, NM_IFACE, 'ActiveConnections')]
+
+    # Method handlers
+
+    def _activate_connection(self, connection, device, specific_object):
+        name = self.connections[connection]['connection']['id'][1]
+        return 'o', (self.activate(name),)
+
+    def _add_and_activate_connection(self, settings, device, specific_object):
+        ssid = settings['802-11-wireless']['ssid'][1].decode()
+        path = self.add_connection(ssid, '802-11-wireless', **{k: v for k, v in settings.items() if k != 'connection'})
+        return 'oo', (path, self.activate(ssid))
+
+    def _deactivate_connection(self, active):
+        remaining = [path for path in self.prop(NM, NM_IFACE, 'ActiveConnections') if path != active]
+        self.set_prop(NM, NM_IFACE, 'ActiveConnections', remaining)
+        return None, ()
+
+    def _request_scan(self, options):
+        self.set_prop(self.wifi_device, NM_IFACE + '.Device.Wireless', 'LastScan',
+                      self.prop(self.wifi_device, NM_IFACE + '.Device.Wireless', 'LastScan') + 1)
+        return None, ()
+
+    def _reapply(self, device):
+        for active in self.prop(NM, NM_IFACE, 'ActiveConnections'):
+            if device in self.prop(active, NM_IFACE + '.Connection.Active', 'Devices'):
+                settings = self.connections[self.prop(active, NM_IFACE + '.Connection.Active', 'Connection')]
+                address_data = settings.get('ipv4', {}).get('address-data')
+                if address_data:
+                    ip4_config = self.prop(active, NM_IFACE + '.Connection.Active', 'Ip4Config')
+                    self.set_prop(ip4_config, NM_IFACE + '.IP4Config', 'AddressData', address_data[1])
+        return None, ()
+
+    def _update(self, path, settings):
+        self.connections[path] = settings
+        return None, ()
+
+    def _delete(self, path):
+        del self.connections[path]
+        return None, ()
+
+    # Message loop
+
+    def _serve(self):
+        while not self._stopped.is_set():
+            try:
+                message = self.conn.receive(timeout=0.05)
+            except TimeoutError:
+                continue
+            except OSError:
+                return
+            if message.header.message_type == MessageType.method_call:
+                self.conn.send(self._dispatch(message))
+
+    def _dispatch(self, message):
+        fields = message.header.fields
+        path, interface, member = fields.get(1), fields.get(2), fields.get(3)
+        self.calls.append((path, member))
+
+        if interface == PROPERTIES_IFACE:
+            target_interface = message.body[0]
+            properties = self.objects.get(path, {}).get(target_interface)
+            if properties is None:
+                return new_error(message, 'org.freedesktop.DBus.Error.UnknownObject', 's', (path,))
+            if member == 'GetAll':
+                return new_method_return(message, 'a{sv}', (properties,))
+            if message.body[1] not in properties:
+                return new_error(message, 'org.freedesktop.DBus.Error.UnknownProperty', 's', (message.body[1],))
+            return new_method_return(message, 'v', (properties[message.body[1]],))
+
+        handler = self.methods.get((path, interface, member))
+        if handler is None:
+            return new_error(message, 'org.freedesktop.DBus.Error.UnknownMethod', 's', (f"{interface}.{member}",))
+        signature, body = handler(*message.body)
+        return new_method_return(message, signature, body)
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app import app
+from models.admission import AdmissionLimiter, AdmissionRejected, ConnectionLocks
+from models.backends import use_backend
+from models.command_runner import run_command
+from models.state_cache import state_cache
+
+
+class TestAdmissionLimiter(unittest.TestCase):
+
+    def hold_slots(self, limiter, count):
+        """
+        Takes `count` slots on other threads and returns the event that releases them.
+        """
+        release, held = threading.Event(), threading.Semaphore(0)
+
+        def hold():
+            with limiter.slot():
+                held.release()
+                release.wait(5)
+
+        threads = [threading.Thread(target=hold) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for _ in range(count):
+            held.acquire(timeout=5)
+        self.addCleanup(lambda: (release.set(), [thread.join() for thread in threads]))
+        return release
+
+    def test_full_queue_is_rejected_at_once(self):
+        limiter = AdmissionLimiter('read', concurrency=2, queue_size=0, wait_seconds=5)
+        self.hold_slots(limiter, 2)
+
+        started = time.monotonic()
+        with self.assertRaises(AdmissionRejected) as raised:
+            with limiter.slot():
+                pass
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertEqual(limiter.stats()['rejected'], 1)
+        self.assertEqual(limiter.stats()['running'], 2)
+
+    def test_waiter_gets_a_freed_slot(self):
+        limiter = AdmissionLimiter('scan', concurrency=1, queue_size=1, wait_seconds=5)
+        release = self.hold_slots(limiter, 1)
+        threading.Timer(0.1, release.set).start()
+        with limiter.slot():
+            self.assertEqual(limiter.stats()['running'], 1)
+        self.assertEqual(limiter.stats(), {'running': 0, 'waiting': 0, 'rejected': 0, 'concurrency': 1,
+                                           'queue_size': 1})
+
+    def test_wait_deadline(self):
+        limiter = AdmissionLimiter('mutate', concurrency=1, queue_size=4, wait_seconds=0.1)
+        self.hold_slots(limiter, 1)
+        with self.assertRaises(AdmissionRejected):
+            with limiter.slot():
+                pass
+        self.assertEqual(limiter.stats()['waiting'], 0)
+
+    def test_coroutines_share_slots_with_threads(self):
+        limiter = AdmissionLimiter('read', concurrency=2, queue_size=8, wait_seconds=5)
+        release = self.hold_slots(limiter, 1)
+        active, peak = [0], [0]
+
+        async def use_slot():
+            async with limiter.async_slot():
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                await asyncio.sleep(0.02)
+                active[0] -= 1
+
+        async def main():
+            await asyncio.gather(*[use_slot() for _ in range(6)])
+
+        asyncio.run(main())
+        self.assertEqual(peak[0], 1)
+        release.set()
+        self.assertEqual(limiter.stats()['waiting'], 0)
+
+    def test_waiting_coroutine_gets_a_slot_freed_by_a_thread(self):
+        limiter = AdmissionLimiter('mutate', concurrency=1, queue_size=1, wait_seconds=5)
+        release = self.hold_slots(limiter, 1)
+
+        async def main():
+            threading.Timer(0.1, release.set).start()
+            async with limiter.async_slot():
+                return limiter.stats()['running']
+
+        self.assertEqual(asyncio.run(main()), 1)
+        self.assertEqual(limiter.stats()['running'], 0)
+
+    def test_async_wait_deadline_and_full_queue(self):
+        limiter = AdmissionLimiter('scan', concurrency=1, queue_size=1, wait_seconds=0.1)
+        self.hold_slots(limiter, 1)
+
+        async def take():
+            async with limiter.async_slot():
+                pass
+
+        async def main():
+            return await asyncio.gather(take(), take(), return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, AdmissionRejected) for result in results))
+        self.assertEqual(limiter.stats()['rejected'], 2)
+        self.assertEqual(limiter.stats()['waiting'], 0)
+
+    @patch('config.constants.TEST_SLEEP', ('sleep', '{}'), create=True)
+    def test_run_command_is_limited_by_class(self):
+        limiter = AdmissionLimiter('read', concurrency=1, queue_size=0, wait_seconds=1)
+        with patch('models.command_runner.limiter_for', lambda name: limiter if name == 'TEST_SLEEP' else None):
+            worker = threading.Thread(target=run_command, args=('TEST_SLEEP', '0.5'))
+            worker.start()
+            time.sleep(0.1)
+            with self.assertRaises(AdmissionRejected):
+                run_command('TEST_SLEEP', '0')
+            worker.join()
+            self.assertEqual(run_command('TEST_SLEEP', '0').returncode, 0)
+
+
+class TestConnectionLocks(unittest.TestCase):
+
+    def test_mutations_of_one_connection_are_serialized(self):
+        locks = ConnectionLocks(timeout=5)
+        active, overlaps = [], []
+
+        def mutate(name):
+            with locks.hold(name):
+                active.append(name)
+                if active.count(name) > 1:
+                    overlaps.append(name)
+                time.sleep(0.02)
+                active.remove(name)
+
+        threads = [threading.Thread(target=mutate, args=(name,)) for name in ['Home', 'Home', 'Office', 'Home']]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(overlaps, [])
+        self.assertEqual(locks._locks, {})
+
+    def test_busy_connection_is_rejected_after_timeout(self):
+        locks = ConnectionLocks(timeout=0.1)
+        held, release = threading.Event(), threading.Event()
+
+        def hold():
+            with locks.hold('Home'):
+                held.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        held.wait(5)
+        try:
+            with self.assertRaises(AdmissionRejected):
+                with locks.hold('Office', 'Home'):
+                    pass
+            with locks.hold('Office'):
+                pass
+        finally:
+            release.set()
+            thread.join()
+        self.assertEqual(locks._locks, {})
+
+    def test_locks_are_reentrant(self):
+        locks = ConnectionLocks(timeout=0.1)
+        with locks.hold('ETH'):
+            with locks.hold('ETH', 'Home'):
+                pass
+
+
+class TestOverloadedRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MagicMock()
+        # The GET routes are async views; route their backend reads to the sync mocks
+        for name in ('remembered_wifi_connections', 'active_wifi_connection', 'ip_and_mask'):
+            setattr(self.backend, f'{name}_async', AsyncMock(side_effect=getattr(self.backend, name)))
+        use_backend(self.backend)
+        self.addCleanup(use_backend, None)
+        state_cache.invalidate()
+        self.addCleanup(state_cache.invalidate)
+
+    def test_rejected_read_returns_503_with_retry_after(self):
+        self.backend.remembered_wifi_connections.side_effect = AdmissionRejected("Too many 'read' commands", 3)
+        response = app.test_client().get('/remembered_wifi_connections')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '3')
+        self.assertEqual(response.get_json()['retry_after'], 3)
+
+    def test_rejected_mutation_returns_503(self):
+        self.backend.delete_connection.side_effect = AdmissionRejected("busy", 5)
+        response = app.test_client().post('/delete_known_wifi_connection', json={'connection_name': 'Home'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '5')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+from app import app
+from asgi import AsgiApp, wsgi_environ
+from config.constants import ASGI_SYNC_THREADS
+from models.backends import use_backend
+from models.backends.nmcli_backend import NmcliBackend
+from models.network_events import network_events
+from models.state_cache import state_cache
+
+
+def http_scope(method, path, query=b'', headers=()):
+    return {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'root_path': '',
+            'headers': [(name.encode(), value.encode()) for name, value in headers],
+            'server': ('127.0.0.1', 8000), 'client': ('127.0.0.1', 50000), 'http_version': '1.1', 'scheme': 'http'}
+
+
+async def call(application, method, path, body=b'', headers=(), disconnect_after=None):
+    """
+    Sends one request through the ASGI app and returns (status, headers, body).
+    """
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        if disconnect_after is not None:
+            await asyncio.sleep(disconnect_after)
+        else:
+            await asyncio.Event().wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(http_scope(method, path, headers=headers), receive, send)
+    start = sent[0]
+    response_headers = {name.decode(): value.decode() for name, value in start['headers']}
+    return start['status'], response_headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+class TestAsgiApp(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MagicMock(spec=NmcliBackend)
+        self.backend.active_wifi_connection_async.return_value = {'SSID': 'Box1', 'SIGNAL': '70', 'ACTIVE': 'yes'}
+        self.backend.ip_and_mask_async.return_value = {'ip': '10.42.0.15', 'mask': '24'}
+        use_backend(self.backend)
+        self.addCleanup(use_backend, None)
+        state_cache.invalidate()
+        self.addCleanup(state_cache.invalidate)
+        self.application = AsgiApp(app, threads=2)
+        self.addCleanup(self.application._executor.shutdown)
+
+    def test_async_view_awaits_the_backend(self):
+        status, headers, body = asyncio.run(call(self.application, 'GET', '/wifi_ip_and_mask'))
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), {'ip': '10.42.0.15', 'mask': '24'})
+        self.backend.ip_and_mask_async.assert_awaited_once_with('Box1')
+        self.backend.ip_and_mask.assert_not_called()
+        self.assertIn('x-request-id', headers)
+
+        status, _, body = asyncio.run(call(self.application, 'GET', '/wifi_ip_and_mask',
+                                           headers=[('If-None-Match', headers['etag'])]))
+        self.assertEqual((status, body), (304, b''))
+
+    def test_async_view_errors_use_the_route_handling(self):
+        self.backend.ip_and_mask_async.side_effect = ValueError("no address")
+        status, _, body = asyncio.run(call(self.application, 'GET', '/ethernet_ip_and_mask'))
+        self.assertEqual(status, 500)
+        self.assertEqual(json.loads(body), {'error': 'no address'})
+
+    def test_other_routes_run_the_flask_app_on_a_thread(self):
+        status, _, body = asyncio.run(call(self.application, 'POST', '/delete_known_wifi_connection',
+                                           body=b'{"connection_name": "Home"}',
+                                           headers=[('Content-Type', 'application/json')]))
+        self.assertEqual(status, 200)
+        self.backend.delete_connection.assert_called_once_with('Home')
+
+        status, _, _ = asyncio.run(call(self.application, 'GET', '/no/such/route'))
+        self.assertEqual(status, 404)
+
+    def test_async_views_run_on_the_server_loop(self):
+        loops = set()
+
+        async def active_wifi_connection():
+            loops.add(asyncio.get_running_loop())
+            await asyncio.sleep(0.2)
+            return {'SSID': 'Box1', 'SIGNAL': '70', 'ACTIVE': 'yes'}
+
+        self.backend.active_wifi_connection_async.side_effect = active_wifi_connection
+        application = AsgiApp(app, threads=8)
+        self.addCleanup(application._executor.shutdown)
+
+        async def many():
+            server_loop = asyncio.get_running_loop()
+            responses = await asyncio.gather(*[call(application, 'GET', '/active_wifi_network') for _ in range(8)])
+            return server_loop, responses
+
+        started = time.monotonic()
+        server_loop, responses = asyncio.run(many())
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual({status for status, _, _ in responses}, {200})
+        self.assertEqual(loops, {server_loop})
+        self.backend.active_wifi_connection.assert_not_called()
+
+    def test_slow_async_views_hold_no_pool_thread(self):
+        async def active_wifi_connection():
+            await asyncio.sleep(0.5)
+            return {'SSID': 'Box1', 'SIGNAL': '70', 'ACTIVE': 'yes'}
+
+        self.backend.active_wifi_connection_async.side_effect = active_wifi_connection
+        requests = ASGI_SYNC_THREADS * 4
+        # Requests arriving together share one read; with no TTL a request that starts later reads again
+        patcher = patch.object(state_cache, 'ttl', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        async def many():
+            return await asyncio.gather(*[call(self.application, 'GET', '/active_wifi_network')
+                                          for _ in range(requests)])
+
+        started = time.monotonic()
+        responses = asyncio.run(many())
+        # One latency for all of them, where batches of the pool's 2 threads would take 32
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertEqual([status for status, _, _ in responses], [200] * requests)
+
+    def test_sync_app_runs_the_same_async_views(self):
+        response = app.test_client().get('/ethernet_ip_and_mask')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'ip': '10.42.0.15', 'mask': '24'})
+        self.backend.ip_and_mask_async.assert_awaited_once_with('ETH')
+
+    def test_stream_ends_when_the_client_disconnects(self):
+        with patch('controllers.events_controller.EVENT_KEEPALIVE_SECONDS', 0.05):
+            status, headers, body = asyncio.run(call(self.application, 'GET', '/events', disconnect_after=0.2))
+        self.assertEqual(status, 200)
+        self.assertTrue(headers['content-type'].startswith('text/event-stream'))
+        self.assertTrue(body.startswith(b'retry: 3000\n\n'))
+        self.assertTrue(body.endswith(b': keep-alive\n\n'))
+        self.assertEqual(network_events.subscriber_count(), 0)
+
+    def test_events_past_the_subscriber_cap_get_503(self):
+        with patch.object(network_events, 'max_subscribers', 0):
+            status, headers, _ = asyncio.run(call(self.application, 'GET', '/events'))
+        self.assertEqual(status, 503)
+        self.assertIn('retry-after', headers)
+
+    def test_oversized_body_is_rejected(self):
+        application = AsgiApp(app, threads=1, max_body=10)
+        self.addCleanup(application._executor.shutdown)
+        status, _, _ = asyncio.run(call(application, 'POST', '/config/apply', body=b'x' * 11))
+        self.assertEqual(status, 413)
+
+    def test_lifespan(self):
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(AsgiApp(app, threads=1)({'type': 'lifespan'}, receive, send))
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+
+    def test_wsgi_environ(self):
+        scope = http_scope('GET', '/café', headers=[('Content-Type', 'application/json'), ('X-A', '1'),
+                                                       ('X-A', '2')])
+        scope['query_string'] = b'since=5'
+        environ = wsgi_environ(scope, b'')
+        self.assertEqual(environ['PATH_INFO'], '/café'.encode('utf-8').decode('latin-1'))
+        self.assertEqual(environ['QUERY_STRING'], 'since=5')
+        self.assertEqual(environ['CONTENT_TYPE'], 'application/json')
+        self.assertEqual(environ['HTTP_X_A'], '1,2')
+        self.assertEqual(environ['REMOTE_ADDR'], '127.0.0.1')
+
+
+if __name__ == '__main__':
+    unittest.main()
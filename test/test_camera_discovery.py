@@ -0,0 +1,131 @@
+import ipaddress
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+from app import app
+from models.camera_discovery import CameraDiscovery, read_neighbors
+
+ARP_HEADER = "IP address       HW type     Flags       HW address            Mask     Device\n"
+
+
+class TestCameraDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.listeners = {}
+        self.http_port = self.listen('127.0.0.2', 0)
+        self.rtsp_port = self.listen('127.0.0.3', 0)
+        self.listen('127.0.0.3', self.http_port)
+        self.ports = {self.http_port: 'http', self.rtsp_port: 'rtsp'}
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.arp_path = os.path.join(directory.name, 'arp')
+        self.write_arp([])
+
+        self.interfaces = MagicMock(return_value=[ipaddress.IPv4Interface('127.0.0.1/24')])
+
+    def tearDown(self):
+        for sock in self.listeners.values():
+            sock.close()
+
+    def listen(self, ip, port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((ip, port))
+        sock.listen(64)
+        port = sock.getsockname()[1]
+        self.listeners[(ip, port)] = sock
+        return port
+
+    def stop_listening(self, ip, port):
+        self.listeners.pop((ip, port)).close()
+
+    def write_arp(self, entries):
+        with open(self.arp_path, 'w') as file:
+            file.write(ARP_HEADER)
+            for ip, flags, mac in entries:
+                file.write(f"{ip:<16} 0x1         {flags:<11} {mac}     *        wlan0\n")
+
+    def discovery(self, **overrides):
+        options = dict(interfaces=self.interfaces, ports=self.ports, timeout=0.25, concurrency=256, ttl=60,
+                       full_sweep_interval=300, arp_path=self.arp_path)
+        options.update(overrides)
+        return CameraDiscovery(**options)
+
+    def addresses(self, cameras):
+        return [camera['ip'] for camera in cameras]
+
+    def test_sweep_finds_listeners_on_the_subnet(self):
+        started = time.monotonic()
+        cameras, discovered_at = self.discovery().get_cameras()
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(self.addresses(cameras), ['127.0.0.2', '127.0.0.3'])
+        self.assertEqual(cameras[0]['ports'], [self.http_port])
+        self.assertEqual(cameras[1]['services'], ['http', 'rtsp'])
+        self.assertEqual(cameras[1]['id'], '127.0.0.3')
+        self.assertIsNotNone(discovered_at)
+        self.assertLess(elapsed, 2.0)
+
+    def test_results_are_cached(self):
+        discovery = self.discovery()
+        discovery.get_cameras()
+        self.stop_listening('127.0.0.2', self.http_port)
+        self.assertEqual(self.addresses(discovery.get_cameras()[0]), ['127.0.0.2', '127.0.0.3'])
+        self.interfaces.assert_called_once()
+
+    def test_stale_results_refresh_incrementally_in_background(self):
+        discovery = self.discovery(ttl=0)
+        discovery.get_cameras()
+        self.stop_listening('127.0.0.2', self.http_port)
+        self.listen('127.0.0.4', self.http_port)
+
+        # Hold the background refresh until the stale read has returned
+        released = threading.Event()
+        interfaces = self.interfaces.return_value
+        self.interfaces.side_effect = lambda: released.wait(5) and interfaces
+
+        # The stale read is answered at once; the refresh re-probes known cameras only
+        self.assertEqual(self.addresses(discovery.get_cameras()[0]), ['127.0.0.2', '127.0.0.3'])
+        released.set()
+        discovery._running.result(timeout=5)
+        with discovery._lock:
+            self.assertEqual(sorted(discovery._cameras), ['127.0.0.3'])
+
+        self.assertEqual(self.addresses(discovery.get_cameras(refresh=True)[0]), ['127.0.0.3', '127.0.0.4'])
+
+    def test_arp_neighbors_outside_the_swept_range_are_probed(self):
+        self.listen('127.0.5.9', self.rtsp_port)
+        self.write_arp([('127.0.5.9', '0x2', 'aa:bb:cc:dd:ee:ff'), ('127.0.6.1', '0x0', '00:00:00:00:00:00')])
+        self.interfaces.return_value = [ipaddress.IPv4Interface('127.0.0.1/16')]
+
+        cameras, _ = self.discovery().get_cameras()
+        self.assertEqual(self.addresses(cameras), ['127.0.0.2', '127.0.0.3', '127.0.5.9'])
+        self.assertEqual(cameras[2]['mac'], 'AA:BB:CC:DD:EE:FF')
+
+    def test_read_neighbors_skips_incomplete_entries(self):
+        self.write_arp([('192.168.1.5', '0x2', 'b8:27:eb:00:00:01'), ('192.168.1.6', '0x0', '00:00:00:00:00:00')])
+        self.assertEqual(read_neighbors(self.arp_path), {'192.168.1.5': 'B8:27:EB:00:00:01'})
+        self.assertEqual(read_neighbors(self.arp_path + '.missing'), {})
+
+    def test_cameras_route(self):
+        discovery = self.discovery()
+        with patch('controllers.camera_controller.camera_discovery', discovery):
+            response = app.test_client().get('/cameras')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.addresses(response.get_json()['cameras']), ['127.0.0.2', '127.0.0.3'])
+
+    def test_cameras_route_reports_failure(self):
+        self.interfaces.side_effect = RuntimeError("nmcli failed")
+        with patch('controllers.camera_controller.camera_discovery', self.discovery()):
+            response = app.test_client().get('/cameras')
+        self.assertEqual(response.status_code, 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
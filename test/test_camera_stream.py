@@ -0,0 +1,171 @@
+import io
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch, MagicMock
+
+from app import app
+from models.camera_stream import CameraStreamPool, MjpegHub, mjpeg_boundary, read_mjpeg_frames
+
+
+class FakeMjpegCamera:
+    """
+    Local MJPEG server: serves numbered frames at `fps` on /stream and counts connections.
+    """
+
+    def __init__(self, fps=100, content_length=True):
+        self.fps = fps
+        self.content_length = content_length
+        self.connections = 0
+        self.stopped = threading.Event()
+        camera = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.partition('?')[0] != '/stream':
+                    self.send_error(404)
+                    return
+                camera.connections += 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=camframe')
+                self.end_headers()
+                number = 0
+                try:
+                    while not camera.stopped.is_set():
+                        frame = b'\xff\xd8frame-%d\xff\xd9' % number
+                        headers = b'--camframe\r\nContent-Type: image/jpeg\r\n'
+                        if camera.content_length:
+                            headers += b'Content-Length: %d\r\n' % len(frame)
+                        self.wfile.write(headers + b'\r\n' + frame + b'\r\n')
+                        self.wfile.flush()
+                        number += 1
+                        time.sleep(1 / camera.fps)
+                except OSError:
+                    pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestMjpegParsing(unittest.TestCase):
+
+    def test_boundary(self):
+        self.assertEqual(mjpeg_boundary('multipart/x-mixed-replace; boundary="frame"'), b'frame')
+        with self.assertRaises(ValueError):
+            mjpeg_boundary('image/jpeg')
+
+    def test_parts_with_and_without_content_length(self):
+        stream = io.BytesIO(b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: 4\r\n\r\nAB\r\n\r\n'
+                            b'--frame\r\nContent-Type: image/jpeg\r\n\r\nline1\nline2\r\n'
+                            b'--frame\r\n\r\nlast\r\n--frame--\r\n')
+        frames = [frame for _, frame in read_mjpeg_frames(stream, b'frame')]
+        self.assertEqual(frames, [b'AB\r\n', b'line1\nline2', b'last'])
+
+    def test_oversized_part(self):
+        stream = io.BytesIO(b'--frame\r\nContent-Length: 100\r\n\r\n' + b'x' * 100)
+        with self.assertRaises(ValueError):
+            list(read_mjpeg_frames(stream, b'frame', max_frame_bytes=10))
+
+
+class TestCameraStream(unittest.TestCase):
+
+    def setUp(self):
+        self.camera = FakeMjpegCamera()
+        self.addCleanup(self.camera.stop)
+
+    def test_viewers_share_one_upstream_connection(self):
+        pool = CameraStreamPool(linger=0.2)
+        viewers = [pool.subscribe('127.0.0.1', self.camera.port, '/stream') for _ in range(3)]
+        for viewer in viewers:
+            chunk = viewer.next_chunk(timeout=5)
+            self.assertIn(b'Content-Type: image/jpeg', chunk)
+            self.assertIn(b'frame-', chunk)
+            viewer.next_chunk(timeout=5)
+        self.assertEqual(self.camera.connections, 1)
+        for viewer in viewers:
+            viewer.close()
+
+    def test_slow_viewer_drops_frames_without_stalling_others(self):
+        hub = MjpegHub('127.0.0.1', self.camera.port, '/stream', linger=0.2)
+        slow, fast = hub.subscribe(), hub.subscribe()
+        self.assertIsNotNone(slow.next_chunk(timeout=5))
+
+        received = [fast.next_chunk(timeout=1) for _ in range(20)]
+        self.assertTrue(all(chunk is not None for chunk in received))
+        self.assertGreater(slow.dropped, 10)
+        self.assertEqual(hub.stats()['viewers'], 2)
+        slow.close()
+        fast.close()
+
+    def test_upstream_closed_after_linger(self):
+        hub = MjpegHub('127.0.0.1', self.camera.port, '/stream', linger=0.1)
+        viewer = hub.subscribe()
+        viewer.next_chunk(timeout=5)
+        viewer.close()
+        deadline = time.monotonic() + 5
+        while hub._running and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertFalse(hub._running)
+
+        viewer = hub.subscribe()
+        self.assertIsNotNone(viewer.next_chunk(timeout=5))
+        self.assertEqual(self.camera.connections, 2)
+        viewer.close()
+
+    def test_pool_drops_idle_hubs(self):
+        pool = CameraStreamPool(linger=0.1)
+        for path in ('/stream', '/stream?a', '/stream?b'):
+            viewer = pool.subscribe('127.0.0.1', self.camera.port, path)
+            viewer.next_chunk(timeout=5)
+            viewer.close()
+        deadline = time.monotonic() + 5
+        while len(pool) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(len(pool), 0)
+
+        viewer = pool.subscribe('127.0.0.1', self.camera.port, '/stream')
+        self.assertIsNotNone(viewer.next_chunk(timeout=5))
+        self.assertEqual(len(pool), 1)
+        viewer.close()
+
+    def test_missing_stream_fails_first_frame(self):
+        hub = MjpegHub('127.0.0.1', self.camera.port, '/missing', linger=0.1, retry=0.1)
+        viewer = hub.subscribe()
+        with self.assertRaises(RuntimeError):
+            viewer.next_chunk(timeout=5)
+        viewer.close()
+
+    def test_stream_route(self):
+        discovery = MagicMock()
+        discovery.get_camera.return_value = {'id': '127.0.0.1', 'ip': '127.0.0.1', 'ports': [self.camera.port]}
+        discovery.ports = {self.camera.port: 'http'}
+        with patch('controllers.camera_controller.camera_discovery', discovery), \
+                patch('controllers.camera_controller.camera_streams', CameraStreamPool(linger=0.1)):
+            client = app.test_client()
+            response = client.get('/camera/127.0.0.1/stream', buffered=False)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, 'multipart/x-mixed-replace')
+            chunks = response.response
+            self.assertTrue(next(chunks).startswith(b'--daughterboxframe\r\n'))
+            self.assertIn(b'frame-', next(chunks))
+            response.close()
+
+            discovery.get_camera.return_value = None
+            self.assertEqual(client.get('/camera/10.0.0.9/stream').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from models.command_runner import run_command, run_command_async, stream_command, build_argv, add_trace_hook, \
+    remove_trace_hook, CommandTimeoutError
+from models.metrics import command_duration_seconds, command_exit_total, commands_in_flight
+
+
+@patch('config.constants.TEST_SHELL_SNIPPET', ('sh', '-c', '{}'), create=True)
+@patch('config.constants.TEST_ECHO', ('echo', '{}'), create=True)
+class TestCommandRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.traces = []
+        add_trace_hook(self.traces.append)
+
+    def tearDown(self):
+        remove_trace_hook(self.traces.append)
+
+    def test_arguments_are_passed_verbatim(self):
+        result = run_command('TEST_ECHO', "Bob's $HOME; rm -rf /")
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, "Bob's $HOME; rm -rf /\n")
+        self.assertEqual(result.argv, ['echo', "Bob's $HOME; rm -rf /"])
+
+    def test_exit_code_and_stderr(self):
+        result = run_command('TEST_SHELL_SNIPPET', 'echo oops >&2; exit 3')
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stderr, "oops\n")
+
+    def test_trace_record(self):
+        run_command('TEST_ECHO', 'hello')
+        trace = self.traces[-1]
+        self.assertEqual(trace.name, 'TEST_ECHO')
+        self.assertEqual(trace.returncode, 0)
+        self.assertEqual(trace.stdout_bytes, 6)
+        self.assertFalse(trace.timed_out)
+        self.assertGreater(trace.duration, 0)
+
+    def test_timeout_kills_process_group(self):
+        started = time.monotonic()
+        with self.assertRaises(CommandTimeoutError):
+            run_command('TEST_SHELL_SNIPPET', 'sleep 30 & sleep 30', timeout=0.2)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertTrue(self.traces[-1].timed_out)
+        self.assertIsNone(self.traces[-1].returncode)
+
+    @patch('models.command_runner.COMMAND_OUTPUT_LIMIT_BYTES', 10)
+    def test_output_is_bounded_to_whole_lines(self):
+        result = run_command('TEST_SHELL_SNIPPET', 'printf "line1\\nline2\\nline3\\n"')
+        self.assertEqual(result.stdout, "line1\n")
+        self.assertTrue(result.truncated)
+        self.assertEqual(self.traces[-1].stdout_bytes, 18)
+
+    def test_metrics_are_recorded(self):
+        histogram = command_duration_seconds.labels('TEST_SHELL_SNIPPET')
+        observed = sum(histogram.counts)
+        exits = command_exit_total.labels('TEST_SHELL_SNIPPET', '4').value
+
+        run_command('TEST_SHELL_SNIPPET', 'exit 4')
+
+        self.assertEqual(sum(histogram.counts), observed + 1)
+        self.assertEqual(command_exit_total.labels('TEST_SHELL_SNIPPET', '4').value, exits + 1)
+        self.assertEqual(commands_in_flight.labels('TEST_SHELL_SNIPPET').value, 0)
+
+    def test_missing_program_is_not_left_in_flight(self):
+        with patch('config.constants.TEST_MISSING', ('no-such-program-daughterbox',), create=True):
+            with self.assertRaises(OSError):
+                run_command('TEST_MISSING')
+        self.assertEqual(commands_in_flight.labels('TEST_MISSING').value, 0)
+
+    def test_async_output_and_exit_code(self):
+        result = asyncio.run(run_command_async('TEST_SHELL_SNIPPET', 'echo "$0"; echo oops >&2; exit 3'))
+        self.assertEqual((result.returncode, result.stdout, result.stderr), (3, "sh\n", "oops\n"))
+        self.assertEqual(self.traces[-1].stdout_bytes, 3)
+
+    def test_async_commands_run_concurrently(self):
+        async def many():
+            return await asyncio.gather(*[run_command_async('TEST_SHELL_SNIPPET', 'sleep 0.3') for _ in range(20)])
+
+        started = time.monotonic()
+        results = asyncio.run(many())
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual({result.returncode for result in results}, {0})
+
+    def test_async_timeout_kills_process_group(self):
+        started = time.monotonic()
+        with self.assertRaises(CommandTimeoutError):
+            asyncio.run(run_command_async('TEST_SHELL_SNIPPET', 'sleep 30 & sleep 30', timeout=0.2))
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertTrue(self.traces[-1].timed_out)
+        self.assertEqual(commands_in_flight.labels('TEST_SHELL_SNIPPET').value, 0)
+
+    @patch('models.command_runner.COMMAND_OUTPUT_LIMIT_BYTES', 10)
+    def test_async_output_is_bounded_to_whole_lines(self):
+        result = asyncio.run(run_command_async('TEST_SHELL_SNIPPET', 'printf "line1\\nline2\\nline3\\n"'))
+        self.assertEqual(result.stdout, "line1\n")
+        self.assertTrue(result.truncated)
+        self.assertEqual(self.traces[-1].stdout_bytes, 18)
+
+    def test_stream_yields_lines_until_the_command_exits(self):
+        with stream_command('TEST_SHELL_SNIPPET', 'echo a; echo b') as lines:
+            self.assertEqual(list(lines), ["a\n", "b\n"])
+        self.assertEqual((self.traces[-1].returncode, self.traces[-1].stdout_bytes), (0, 4))
+        self.assertEqual(commands_in_flight.labels('TEST_SHELL_SNIPPET').value, 0)
+
+    def test_stream_kills_process_group_when_the_block_exits(self):
+        started = time.monotonic()
+        with stream_command('TEST_SHELL_SNIPPET', 'echo ready; sleep 30 & sleep 30') as lines:
+            self.assertEqual(next(lines), "ready\n")
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(self.traces[-1].returncode, -9)
+
+    def test_build_argv_checks_arguments(self):
+        self.assertEqual(build_argv(('nmcli', 'connection', 'up', '{}'), ["Joe's"]), ['nmcli', 'connection', 'up', "Joe's"])
+        with self.assertRaises(ValueError):
+            build_argv(('nmcli', 'connection', 'up', '{}'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
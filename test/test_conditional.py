@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app import app
+from models.backends import use_backend
+from models.state_cache import state_cache
+
+
+class TestConditionalRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MagicMock()
+        self.backend.remembered_wifi_connections.return_value = [{'name': 'Home', 'autoconnect': 'yes'}]
+        self.backend.ip_and_mask.return_value = {'ip': '192.168.1.10', 'mask': '24'}
+        # The GET routes are async views; route their backend reads to the sync mocks
+        for name in ('remembered_wifi_connections', 'active_wifi_connection', 'ip_and_mask'):
+            setattr(self.backend, f'{name}_async', AsyncMock(side_effect=getattr(self.backend, name)))
+        use_backend(self.backend)
+        self.addCleanup(use_backend, None)
+        state_cache.invalidate()
+        self.addCleanup(state_cache.invalidate)
+        self.client = app.test_client()
+
+    def test_unchanged_state_returns_304_without_reading_it_again(self):
+        response = self.client.get('/remembered_wifi_connections')
+        etag = response.headers['ETag']
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+        response = self.client.get('/remembered_wifi_connections', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        self.backend.remembered_wifi_connections.assert_called_once()
+
+    def test_tag_survives_reload_of_identical_state(self):
+        etag = self.client.get('/ethernet_ip_and_mask').headers['ETag']
+        state_cache.invalidate()
+        response = self.client.get('/ethernet_ip_and_mask', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.backend.ip_and_mask.call_count, 2)
+
+    def test_changed_state_returns_new_body(self):
+        etag = self.client.get('/ethernet_ip_and_mask').headers['ETag']
+        state_cache.invalidate()
+        self.backend.ip_and_mask.return_value = {'ip': '192.168.1.20', 'mask': '24'}
+
+        response = self.client.get('/ethernet_ip_and_mask', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.get_json(), {'ip': '192.168.1.20', 'mask': '24'})
+
+    @patch('controllers.device_mode_controller.get_device_mode', return_value='AP')
+    def test_device_mode(self, _):
+        etag = self.client.get('/device_mode').headers['ETag']
+        self.assertEqual(self.client.get('/device_mode', headers={'If-None-Match': etag}).status_code, 304)
+
+
+if __name__ == '__main__':
+    unittest.main()
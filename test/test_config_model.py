@@ -0,0 +1,132 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from app import app
+from models.admission import AdmissionRejected
+from models.backends import use_backend
+from models.backends.base import NetworkError
+from models.config_model import plan_config, apply_plan, apply_config, ConfigApplyError
+from models.device_mode_store import DeviceModeStore
+
+
+class TestConfigModel(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MagicMock()
+        self.backend.ip_and_mask.return_value = {'ip': '192.168.1.10', 'mask': '24'}
+        self.backend.ip4_settings.return_value = {'method': 'manual', 'addresses': ['192.168.1.10/24']}
+        self.backend.remembered_wifi_connections.return_value = [{'name': 'Home', 'autoconnect': 'yes'},
+                                                                 {'name': 'Office', 'autoconnect': 'no'},
+                                                                 {'name': 'Old', 'autoconnect': 'yes'}]
+        use_backend(self.backend)
+        self.addCleanup(use_backend, None)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'mode')
+        with open(path, 'w') as file:
+            file.write('AP')
+        self.store = DeviceModeStore(path)
+        for patcher in (patch('models.config_model.device_mode_store', self.store),
+                        patch('models.config_model.delayed_reboot')):
+            self.mock_reboot = patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def actions(self, steps):
+        return [(step.action, step.target) for step in steps]
+
+    def test_unchanged_document_plans_nothing(self):
+        document = {'ethernet': {'ip': '192.168.1.10', 'mask': '255.255.255.0'},
+                    'autoconnect': {'Home': True, 'Office': False}, 'mode': 'AP'}
+        self.assertEqual(plan_config(document), [])
+
+    def test_plan_orders_steps_with_one_reactivation(self):
+        document = {'ethernet': {'ip': '192.168.1.20', 'mask': '24'}, 'autoconnect': {'Home': False, 'Old': False},
+                    'delete': ['Old']}
+        expected_result = [('set_ip4_address', 'ETH'), ('set_autoconnect', 'Home'),
+                           ('reapply_connection', 'ETH'), ('delete_connection', 'Old')]
+        self.assertEqual(self.actions(plan_config(document)), expected_result)
+
+    def test_mode_change_replaces_reactivation(self):
+        document = {'ethernet': {'ip': '192.168.1.20', 'mask': '24'}, 'mode': 'STA'}
+        expected_result = [('set_ip4_address', 'ETH'), ('set_device_mode', 'device')]
+        self.assertEqual(self.actions(plan_config(document)), expected_result)
+
+    def test_invalid_documents(self):
+        for document in ({}, {'wifi': {}}, {'ethernet': {'ip': '300.1.1.1', 'mask': '24'}},
+                         {'autoconnect': {'Missing': True}}, {'autoconnect': {'Home': 'no'}}, {'mode': 'BRIDGE'},
+                         {'delete': [{}]}, {'delete': [None]}, {'ethernet': 'x'}):
+            with self.assertRaises(ValueError):
+                plan_config(document)
+
+    def test_apply_reports_timings(self):
+        report = apply_config({'ethernet': {'ip': '192.168.1.20', 'mask': '24'}, 'delete': ['Old']})
+        self.backend.set_ip4_address.assert_called_once_with('ETH', '192.168.1.20/24')
+        self.backend.reapply_connection.assert_called_once_with('ETH')
+        self.backend.activate_connection.assert_not_called()
+        self.backend.delete_connection.assert_called_once_with('Old')
+        self.assertEqual([step['status'] for step in report['steps']], ['ok', 'ok', 'ok'])
+        self.assertTrue(all('duration_ms' in step for step in report['steps']))
+        self.assertFalse(report['reboot'])
+        self.assertIn('total_ms', report)
+
+    def test_failed_reactivation_rolls_back(self):
+        self.backend.reapply_connection.side_effect = [NetworkError("Failed to reapply connection 'ETH'."), None]
+        self.backend.activate_connection.side_effect = [NetworkError("Failed to connect to network 'ETH'."), None]
+        steps = plan_config({'ethernet': {'ip': '192.168.1.20', 'mask': '24'}, 'autoconnect': {'Office': True}})
+
+        with self.assertRaises(ConfigApplyError) as context:
+            apply_plan(steps)
+
+        self.backend.restore_ip4_settings.assert_called_once_with(
+            'ETH', {'method': 'manual', 'addresses': ['192.168.1.10/24']})
+        self.assertEqual(self.backend.set_autoconnect.call_args_list[-1].args, ('Office', False))
+        self.assertEqual(self.backend.reapply_connection.call_count, 2)
+        self.assertEqual(self.backend.activate_connection.call_count, 1)
+        report = context.exception.result
+        self.assertEqual([step['status'] for step in report['steps']], ['ok', 'ok', 'failed'])
+        self.assertEqual([step['action'] for step in report['rollback']],
+                         ['set_autoconnect', 'set_ip4_address', 'reapply_connection'])
+
+    def test_rollback_returns_a_dhcp_connection_to_dhcp(self):
+        # On DHCP with no lease yet: no current address, but the saved settings are still restored
+        self.backend.ip_and_mask.side_effect = ValueError("no address")
+        self.backend.ip4_settings.return_value = {'method': 'auto', 'addresses': []}
+        self.backend.delete_connection.side_effect = NetworkError("Failed to delete connection 'Old'.")
+        steps = plan_config({'ethernet': {'ip': '192.168.1.20', 'mask': '24'}, 'delete': ['Old']})
+
+        with self.assertRaises(ConfigApplyError) as context:
+            apply_plan(steps)
+
+        self.backend.restore_ip4_settings.assert_called_once_with('ETH', {'method': 'auto', 'addresses': []})
+        self.assertEqual([(step['action'], step['status']) for step in context.exception.result['rollback']],
+                         [('set_ip4_address', 'ok'), ('reapply_connection', 'ok')])
+
+    def test_mode_change_is_written_and_reboots(self):
+        report = apply_config({'mode': 'STA'})
+        self.assertEqual(self.store.get(), 'STA')
+        self.assertTrue(report['reboot'])
+        self.mock_reboot.assert_called_once()
+
+    def test_failed_mode_write_restores_settings_without_reboot(self):
+        with patch.object(self.store, 'set', side_effect=OSError("read-only file system")):
+            steps = plan_config({'autoconnect': {'Home': False}, 'mode': 'STA'})
+            with self.assertRaises(ConfigApplyError):
+                apply_plan(steps)
+        self.assertEqual(self.backend.set_autoconnect.call_args_list[-1].args, ('Home', True))
+        self.mock_reboot.assert_not_called()
+
+    def test_apply_route_status_codes(self):
+        client = app.test_client()
+        response = client.post('/config/apply', json={'delete': [{}]})
+        self.assertEqual(response.status_code, 400)
+
+        self.backend.remembered_wifi_connections.side_effect = AdmissionRejected("Too many commands", 2)
+        response = client.post('/config/apply', json={'delete': ['Old']})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '2')
+
+
+if __name__ == '__main__':
+    unittest.main()
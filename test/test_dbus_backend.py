@@ -0,0 +1,168 @@
+import socket
+import unittest
+from unittest.mock import patch
+
+try:
+    from jeepney.io.threading import RouterClosed
+    from models.backends.dbus_backend import DBusBackend
+    from test.mock_network_manager import MockNetworkManager, start_private_bus
+except ImportError:
+    DBusBackend = None
+
+
+@unittest.skipIf(DBusBackend is None, "jeepney is not installed")
+class TestDBusBackend(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.bus_process, cls.bus_address = start_private_bus()
+        if cls.bus_process is None:
+            raise unittest.SkipTest("dbus-daemon is not installed")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bus_process.terminate()
+        cls.bus_process.wait()
+
+    def setUp(self):
+        self.nm = MockNetworkManager(self.bus_address)
+        self.backend = DBusBackend(bus=self.bus_address)
+
+    def tearDown(self):
+        self.backend.close()
+        self.nm.stop()
+
+    def test_remembered_wifi_connections(self):
+        expected_result = [{'name': 'Box-1', 'autoconnect': 'yes'}]
+        self.assertEqual(self.backend.remembered_wifi_connections(), expected_result)
+
+    def test_wifi_access_points(self):
+        expected_result = [{'SSID': 'Box-1', 'SIGNAL': '70', 'ACTIVE': 'yes', 'BSSID': 'B8:27:EB:00:00:01'},
+                           {'SSID': 'Box-2', 'SIGNAL': '40', 'ACTIVE': 'no', 'BSSID': 'B8:27:EB:00:00:02'},
+                           {'SSID': 'Neighbour', 'SIGNAL': '90', 'ACTIVE': 'no', 'BSSID': '00:11:22:33:44:55'}]
+        self.assertEqual(self.backend.wifi_access_points(), expected_result)
+
+    def test_rescan_requests_scan(self):
+        self.backend.wifi_access_points(rescan=True)
+        self.assertIn((self.nm.wifi_device, 'RequestScan'), self.nm.calls)
+
+    def test_active_wifi_connection(self):
+        expected_result = {'SSID': 'Box-1', 'SIGNAL': '70', 'ACTIVE': 'yes'}
+        self.assertEqual(self.backend.active_wifi_connection(), expected_result)
+
+    def test_ip_and_mask(self):
+        self.assertEqual(self.backend.ip_and_mask('ETH'), {'ip': '192.168.1.10', 'mask': '24'})
+
+    def test_ip_and_mask_unknown_connection(self):
+        with self.assertRaises(RuntimeError):
+            self.backend.ip_and_mask('Missing')
+
+    def test_ip_and_mask_inactive_connection(self):
+        self.nm.add_connection('Office', '802-11-wireless')
+        with self.assertRaises(ValueError):
+            self.backend.ip_and_mask('Office')
+
+    def test_connect_to_new_ap(self):
+        self.backend.connect_to_new_ap('Box-2', 'secret')
+        settings = self.nm.connections[self.nm.connection_path('Box-2')]
+        self.assertEqual(settings['802-11-wireless-security']['psk'], ('s', 'secret'))
+        self.assertIn('Box-2', self.nm.active_ids())
+
+    def test_connect_to_open_network_sends_no_security(self):
+        self.backend.connect_to_new_ap('Box-2', '')
+        settings = self.nm.connections[self.nm.connection_path('Box-2')]
+        self.assertNotIn('802-11-wireless-security', settings)
+        self.assertIn('Box-2', self.nm.active_ids())
+
+    def test_connect_to_new_ap_unknown_ssid(self):
+        with self.assertRaises(RuntimeError):
+            self.backend.connect_to_new_ap('Missing', 'secret')
+
+    def test_activate_and_deactivate_connection(self):
+        self.backend.deactivate_connection('Box-1')
+        self.assertNotIn('Box-1', self.nm.active_ids())
+        self.backend.activate_connection('Box-1')
+        self.assertIn('Box-1', self.nm.active_ids())
+
+    def test_deactivate_inactive_connection(self):
+        self.nm.add_connection('Office', '802-11-wireless')
+        with self.assertRaises(RuntimeError):
+            self.backend.deactivate_connection('Office')
+
+    def test_delete_connection(self):
+        self.backend.delete_connection('Box-1')
+        self.assertEqual(self.backend.remembered_wifi_connections(), [])
+
+    def test_set_autoconnect(self):
+        self.backend.set_autoconnect('Box-1', False)
+        self.assertEqual(self.backend.remembered_wifi_connections(), [{'name': 'Box-1', 'autoconnect': 'no'}])
+
+    def test_set_ip4_address(self):
+        self.backend.set_ip4_address('ETH', '192.168.1.20/255.255.255.0')
+        ipv4 = self.nm.connections[self.nm.connection_path('ETH')]['ipv4']
+        self.assertEqual(ipv4['method'], ('s', 'manual'))
+        self.assertEqual(ipv4['address-data'][1], [{'address': ('s', '192.168.1.20'), 'prefix': ('u', 24)}])
+
+    def test_ip4_settings_round_trip(self):
+        saved = self.backend.ip4_settings('ETH')
+        self.backend.set_ip4_address('ETH', '192.168.1.20/24')
+        self.assertEqual(self.backend.ip4_settings('ETH'), {'method': 'manual', 'addresses': ['192.168.1.20/24']})
+
+        self.backend.restore_ip4_settings('ETH', saved)
+        self.assertEqual(self.backend.ip4_settings('ETH'), saved)
+        self.backend.restore_ip4_settings('ETH', {'method': 'auto', 'addresses': []})
+        ipv4 = self.nm.connections[self.nm.connection_path('ETH')]['ipv4']
+        self.assertEqual((ipv4['method'], ipv4['address-data'][1]), (('s', 'auto'), []))
+
+    def test_reapply_connection(self):
+        self.backend.set_ip4_address('ETH', '192.168.1.20/24')
+        self.backend.reapply_connection('ETH')
+        self.assertEqual(self.backend.ip_and_mask('ETH'), {'ip': '192.168.1.20', 'mask': '24'})
+        self.assertIn((self.nm.ethernet_device, 'Reapply'), self.nm.calls)
+        self.assertEqual(self.nm.active_ids(), ['Box-1', 'ETH'])
+
+    def test_reapply_inactive_connection(self):
+        self.backend.deactivate_connection('ETH')
+        with self.assertRaises(RuntimeError):
+            self.backend.reapply_connection('ETH')
+
+    def test_stopped_router_is_replaced_before_sending(self):
+        stale = self.backend._router
+        stale.close()
+        self.assertFalse(stale.running)
+        self.assertEqual(self.backend.remembered_wifi_connections(), [{'name': 'Box-1', 'autoconnect': 'yes'}])
+        self.assertIsNot(self.backend._router, stale)
+
+    def test_lost_connection_is_replaced_before_sending(self):
+        lost = self.backend._router
+        lost.conn.sock.shutdown(socket.SHUT_RDWR)
+        lost._rcv_thread.join(timeout=5)
+        self.assertFalse(lost.running)
+        self.assertEqual(self.backend.remembered_wifi_connections(), [{'name': 'Box-1', 'autoconnect': 'yes'}])
+        self.assertIsNot(self.backend._router, lost)
+
+    def test_refused_write_is_sent_again(self):
+        router = self.backend._router
+        with patch.object(router, 'send_and_get_reply', side_effect=BrokenPipeError()):
+            self.backend.deactivate_connection('Box-1')
+        self.assertNotIn('Box-1', self.nm.active_ids())
+        self.assertIsNot(self.backend._router, router)
+
+    def test_call_in_flight_is_not_repeated(self):
+        router = self.backend._router
+        for error in (TimeoutError(), RouterClosed("D-Bus router closed before reply arrived")):
+            with patch.object(router, 'send_and_get_reply', side_effect=error) as send:
+                with self.assertRaises(RuntimeError):
+                    self.backend.delete_connection('Box-1')
+            self.assertEqual(send.call_count, 1)
+        self.assertIs(self.backend._router, router)
+
+    def test_unreachable_network_manager(self):
+        self.nm.stop()
+        with self.assertRaises(Exception):
+            DBusBackend(bus=self.bus_address)
+        self.nm = MockNetworkManager(self.bus_address)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,64 +1,71 @@
+import os
+import tempfile
 import unittest
-from unittest.mock import patch, mock_open, MagicMock
+from unittest.mock import patch
 from models.device_mode_model import get_device_mode, set_device_mode, reboot_system, shutdown_system, delayed_reboot, delayed_shutdown, turn_off_i2c_display
+from models.device_mode_store import DeviceModeStore
 
 
 class TestDeviceModeModel(unittest.TestCase):
 
-    @patch('builtins.open', new_callable=mock_open, read_data='AP')
-    @patch('os.path.exists', return_value=True)
-    @patch('config.constants.DEVICE_MODE_FILE_PATH', '/fake/path/mode.txt')
-    def test_get_device_mode_success(self, mock_exists, mock_open):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'mode')
+        self.store = DeviceModeStore(self.path)
+        patcher = patch('models.device_mode_model.device_mode_store', self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+
+    def write_mode(self, mode):
+        with open(self.path, 'w') as file:
+            file.write(mode)
+
+    def test_get_device_mode_success(self):
+        self.write_mode('AP')
         self.assertEqual(get_device_mode(), 'AP')
 
-    @patch('os.path.exists', return_value=False)
-    @patch('config.constants.DEVICE_MODE_FILE_PATH', '/fake/path/mode.txt')
-    def test_get_device_mode_file_not_found(self, mock_exists):
+    def test_get_device_mode_file_not_found(self):
         with self.assertRaises(FileNotFoundError):
             get_device_mode()
 
-    @patch('builtins.open', new_callable=mock_open, read_data='INVALID')
-    @patch('os.path.exists', return_value=True)
-    @patch('config.constants.DEVICE_MODE_FILE_PATH', '/fake/path/mode.txt')
-    def test_get_device_mode_invalid_mode(self, mock_exists, mock_open):
+    def test_get_device_mode_invalid_mode(self):
+        self.write_mode('INVALID')
         with self.assertRaises(ValueError):
             get_device_mode()
 
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('os.path.exists', return_value=True)
-    @patch('config.constants.DEVICE_MODE_FILE_PATH', '/fake/path/mode.txt')
     @patch('models.device_mode_model.reboot_system')
-    def test_set_device_mode_success(self, mock_reboot, mock_exists, mock_open):
+    def test_set_device_mode_success(self, mock_reboot):
+        self.write_mode('AP')
         set_device_mode('STA')
-        mock_open().write.assert_called_once_with('STA')
+        with open(self.path) as file:
+            self.assertEqual(file.read(), 'STA')
         mock_reboot.assert_called_once()
 
-    @patch('os.path.exists', return_value=False)
-    @patch('config.constants.DEVICE_MODE_FILE_PATH', '/fake/path/mode.txt')
-    def test_set_device_mode_file_not_found(self, mock_exists):
+    def test_set_device_mode_file_not_found(self):
         with self.assertRaises(FileNotFoundError):
             set_device_mode('STA')
 
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('os.path.exists', return_value=True)
-    @patch('config.constants.DEVICE_MODE_FILE_PATH', '/fake/path/mode.txt')
-    def test_set_device_mode_invalid_mode(self, mock_exists, mock_open):
+    @patch('models.device_mode_model.reboot_system')
+    def test_set_device_mode_invalid_mode(self, mock_reboot):
+        self.write_mode('AP')
         with self.assertRaises(ValueError):
             set_device_mode('INVALID')
+        mock_reboot.assert_not_called()
 
-    @patch('os.system')
+    @patch('models.device_mode_model.run_command')
     @patch('models.device_mode_model.turn_off_i2c_display')
-    def test_reboot_system(self, mock_turn_off, mock_system):
+    def test_reboot_system(self, mock_turn_off, mock_run_command):
         reboot_system()
         mock_turn_off.assert_called_once()
-        mock_system.assert_called_once_with('sudo reboot')
+        mock_run_command.assert_called_once_with('REBOOT_SYSTEM')
 
-    @patch('os.system')
+    @patch('models.device_mode_model.run_command')
     @patch('models.device_mode_model.turn_off_i2c_display')
-    def test_shutdown_system(self, mock_turn_off, mock_system):
+    def test_shutdown_system(self, mock_turn_off, mock_run_command):
         shutdown_system()
         mock_turn_off.assert_called_once()
-        mock_system.assert_called_once_with('sudo shutdown -h now')
+        mock_run_command.assert_called_once_with('SHUTDOWN_SYSTEM')
 
     @patch('threading.Timer')
     def test_delayed_reboot(self, mock_timer):
@@ -72,10 +79,10 @@ class TestDeviceModeModel(unittest.TestCase):
         mock_timer.assert_called_once_with(3, shutdown_system)
         mock_timer().start.assert_called_once()
 
-    @patch('os.system')
-    def test_turn_off_i2c_display(self, mock_system):
+    @patch('models.device_mode_model.run_command')
+    def test_turn_off_i2c_display(self, mock_run_command):
         turn_off_i2c_display()
-        mock_system.assert_called_once_with('i2cset -y 1 0x3C 0x00 0xAE')
+        mock_run_command.assert_called_once_with('I2C_DISPLAY_OFF', 1, '0x3C')
 
 
 if __name__ == '__main__':
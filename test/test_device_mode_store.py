@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from models.device_mode_store import DeviceModeStore
+
+
+class TestDeviceModeStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'mode')
+        with open(self.path, 'w') as file:
+            file.write('AP\n')
+        self.store = DeviceModeStore(self.path, check_interval=60)
+
+    def test_reads_are_served_from_memory(self):
+        self.assertEqual(self.store.get(), 'AP')
+        with patch('os.stat') as mock_stat, patch('builtins.open') as mock_open:
+            self.assertEqual(self.store.get(), 'AP')
+        mock_stat.assert_not_called()
+        mock_open.assert_not_called()
+
+    def test_external_change_is_picked_up_after_check_interval(self):
+        self.store.check_interval = 0
+        listener = MagicMock()
+        self.store.subscribe(listener)
+        self.store.get()
+        with open(self.path, 'w') as file:
+            file.write('STA')
+        os.utime(self.path, ns=(0, 1))
+        self.assertEqual(self.store.get(), 'STA')
+        listener.assert_called_once_with('STA')
+
+    def test_unchanged_file_is_not_reread(self):
+        self.store.check_interval = 0
+        self.store.get()
+        with patch('builtins.open') as mock_open:
+            self.store.get()
+        mock_open.assert_not_called()
+
+    def test_set_replaces_file_atomically(self):
+        os.chmod(self.path, 0o640)
+        listener = MagicMock()
+        self.store.subscribe(listener)
+        with patch('os.fsync', wraps=os.fsync) as mock_fsync:
+            self.store.set('STA')
+        self.assertEqual(mock_fsync.call_count, 2)
+        with open(self.path) as file:
+            self.assertEqual(file.read(), 'STA')
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+        self.assertEqual(os.listdir(self.directory.name), ['mode'])
+        self.assertEqual(self.store.get(), 'STA')
+        listener.assert_called_once_with('STA')
+
+    def test_failed_write_keeps_old_file(self):
+        with patch('os.replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.store.set('STA')
+        with open(self.path) as file:
+            self.assertEqual(file.read(), 'AP\n')
+        self.assertEqual(os.listdir(self.directory.name), ['mode'])
+
+    def test_listener_errors_do_not_break_set(self):
+        self.store.subscribe(MagicMock(side_effect=RuntimeError("boom")))
+        self.store.set('STA')
+        self.assertEqual(self.store.get(), 'STA')
+
+
+if __name__ == '__main__':
+    unittest.main()
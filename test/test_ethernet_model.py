@@ -1,27 +1,117 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from models.ethernet_model import set_ethernet_ip_and_mask
+from models.backends import use_backend
+from models.backends.nmcli_backend import NmcliBackend
+from models.ethernet_model import set_ethernet_ip_and_mask, parse_ethernet_address
+
+
+class FakeNmcli:
+    """
+    Answers the nmcli commands used for re-addressing, keeping the applied address in memory.
+    """
+
+    def __init__(self, address='192.168.1.10/24', reapply_code=0, reapply_takes_effect=True):
+        self.address = address
+        self.saved = address
+        self.reapply_code = reapply_code
+        self.reapply_takes_effect = reapply_takes_effect
+        self.names = []
+
+    def __call__(self, name, *args):
+        self.names.append(name)
+        if name == 'NMCLI_GET_IP4_ADDRESS':
+            return MagicMock(returncode=0, stdout=f"IP4.ADDRESS[1]:{self.address}\n")
+        if name == 'NMCLI_SET_IP4_ADDRESS':
+            self.saved = args[1]
+        elif name == 'NMCLI_GET_CONNECTION_DEVICE':
+            return MagicMock(returncode=0, stdout="GENERAL.DEVICES:eth0\n")
+        elif name == 'NMCLI_REAPPLY_DEVICE':
+            if self.reapply_code != 0:
+                return MagicMock(returncode=self.reapply_code, stderr="Error: reapply failed")
+            if self.reapply_takes_effect:
+                self.address = self.saved
+        elif name == 'NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION':
+            self.address = self.saved
+        return MagicMock(returncode=0, stdout='', stderr='')
 
 
 class TestEthernetModel(unittest.TestCase):
 
-    @patch('subprocess.run')
-    def test_set_ethernet_ip_and_mask_success(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0)
-        ip = "192.168.1.10"
-        mask = "24"
-        expected_result = {'ip': ip, 'mask': mask}
-        self.assertEqual(set_ethernet_ip_and_mask(ip, mask), expected_result)
+    def setUp(self):
+        use_backend(NmcliBackend())
+        self.addCleanup(use_backend, None)
+
+    def test_parse_ethernet_address_normalizes_masks(self):
+        for mask in ('24', '255.255.255.0', ' 24 '):
+            self.assertEqual(parse_ethernet_address('192.168.1.20', mask).with_prefixlen, '192.168.1.20/24')
+
+    def test_parse_ethernet_address_rejects_invalid_values(self):
+        for ip, mask in (('', '24'), ('192.168.1.20', None), ('300.1.1.1', '24'), ('192.168.1.20', '33'),
+                         ('192.168.1.20', '255.0.255.0'), ('192.168.1.0', '24'), ('192.168.1.255', '24'),
+                         ('127.0.0.1', '8'), ('224.0.0.1', '24'), ('0.0.0.0', '0')):
+            with self.assertRaises(ValueError):
+                parse_ethernet_address(ip, mask)
+
+    @patch('models.backends.nmcli_backend.run_command')
+    def test_ip4_settings_are_read_and_restored(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0, stdout="ipv4.method:manual\n"
+                                                                "ipv4.addresses:192.168.1.10/24,10.0.0.2/8\n")
+        backend = NmcliBackend()
+        settings = backend.ip4_settings('ETH')
+        self.assertEqual(settings, {'method': 'manual', 'addresses': ['192.168.1.10/24', '10.0.0.2/8']})
+
+        backend.restore_ip4_settings('ETH', {'method': 'auto', 'addresses': []})
+        mock_run.assert_called_with('NMCLI_SET_IP4_SETTINGS', 'ETH', 'auto', '')
+
+    def test_set_ethernet_ip_and_mask_reapplies_without_reactivating(self):
+        nmcli = FakeNmcli()
+        with patch('models.backends.nmcli_backend.run_command', side_effect=nmcli):
+            result = set_ethernet_ip_and_mask('192.168.1.20', '255.255.255.0')
 
-    @patch('subprocess.run')
+        self.assertEqual(nmcli.address, '192.168.1.20/24')
+        self.assertNotIn('NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION', nmcli.names)
+        self.assertEqual((result['ip'], result['mask'], result['changed'], result['method']),
+                         ('192.168.1.20', '24', True, 'reapply'))
+        self.assertIsInstance(result['reachable_after_ms'], float)
+
+    def test_set_ethernet_ip_and_mask_skips_unchanged_address(self):
+        nmcli = FakeNmcli()
+        with patch('models.backends.nmcli_backend.run_command', side_effect=nmcli):
+            result = set_ethernet_ip_and_mask('192.168.1.10', '255.255.255.0')
+
+        self.assertEqual(nmcli.names, ['NMCLI_GET_IP4_ADDRESS'])
+        self.assertFalse(result['changed'])
+
+    def test_set_ethernet_ip_and_mask_falls_back_to_activation(self):
+        nmcli = FakeNmcli(reapply_code=1)
+        with patch('models.backends.nmcli_backend.run_command', side_effect=nmcli):
+            result = set_ethernet_ip_and_mask('192.168.1.20', '24')
+
+        self.assertIn('NMCLI_CONNECT_TO_KNOWN_WIFI_CONNECTION', nmcli.names)
+        self.assertEqual(result['method'], 'activate')
+
+    @patch('models.ethernet_model.ETHERNET_REACHABLE_TIMEOUT_SECONDS', 0.05)
+    def test_set_ethernet_ip_and_mask_reactivates_when_reapply_has_no_effect(self):
+        nmcli = FakeNmcli(reapply_takes_effect=False)
+        with patch('models.backends.nmcli_backend.run_command', side_effect=nmcli):
+            result = set_ethernet_ip_and_mask('192.168.1.20', '24')
+
+        self.assertEqual(result['method'], 'activate')
+        self.assertEqual(nmcli.address, '192.168.1.20/24')
+
+    def test_set_ethernet_ip_and_mask_invalid_address_runs_nothing(self):
+        with patch('models.backends.nmcli_backend.run_command') as mock_run:
+            with self.assertRaises(ValueError):
+                set_ethernet_ip_and_mask('192.168.1.20', '255.0.255.0')
+        mock_run.assert_not_called()
+
+    @patch('models.backends.nmcli_backend.run_command')
     def test_set_ethernet_ip_and_mask_command_failure(self, mock_run):
-        mock_run.side_effect = [MagicMock(returncode=1, stderr="Error"), MagicMock(returncode=0)]
-        ip = "192.168.1.10"
-        mask = "24"
+        mock_run.side_effect = [MagicMock(returncode=0, stdout="IP4.ADDRESS[1]:192.168.1.10/24\n"),
+                                MagicMock(returncode=1, stderr="Error")]
         with self.assertRaises(RuntimeError):
-            set_ethernet_ip_and_mask(ip, mask)
-
+            set_ethernet_ip_and_mask('192.168.1.20', '24')
 
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
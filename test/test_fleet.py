@@ -0,0 +1,204 @@
+import json
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from werkzeug.serving import make_server
+
+from app import app
+from models.backends import use_backend
+from models.fleet import FleetClient, parse_peer
+from models.state_cache import state_cache
+
+
+class PeerApp:
+    """
+    The app served over HTTP on a local port, standing in for a peer daughterbox.
+    """
+
+    def __init__(self):
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.address = f"127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread.is_alive():
+            self.server.shutdown()
+            self.server.server_close()
+
+
+class KeepAlivePeer:
+    """
+    HTTP/1.1 peer that keeps connections open and answers every endpoint with a chunked JSON body.
+    """
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        peer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                peer.connections += 1
+
+            def do_GET(self):
+                peer.requests += 1
+                body = json.dumps({'path': self.path}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                self.wfile.write(b'%x\r\n%s\r\n0\r\n\r\n' % (len(body), body))
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.address = f"127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestFleet(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MagicMock()
+        self.backend.active_wifi_connection.return_value = {'SSID': 'Home', 'SIGNAL': '70', 'ACTIVE': 'yes'}
+        self.backend.ip_and_mask.return_value = {'ip': '192.168.1.10', 'mask': '24'}
+        # The GET routes are async views; route their backend reads to the sync mocks
+        for name in ('remembered_wifi_connections', 'active_wifi_connection', 'ip_and_mask'):
+            setattr(self.backend, f'{name}_async', AsyncMock(side_effect=getattr(self.backend, name)))
+        use_backend(self.backend)
+        self.addCleanup(use_backend, None)
+        state_cache.invalidate()
+        self.addCleanup(state_cache.invalidate)
+        mode = patch('controllers.device_mode_controller.get_device_mode', return_value='AP')
+        mode.start()
+        self.addCleanup(mode.stop)
+
+        self.peers = [PeerApp() for _ in range(3)]
+        for peer in self.peers:
+            self.addCleanup(peer.stop)
+
+    def client(self, peers=None, timeout=2.0):
+        client = FleetClient([peer.address for peer in self.peers] if peers is None else peers, timeout=timeout)
+        self.addCleanup(client._loop.submit, self._close_pool(client))
+        return client
+
+    @staticmethod
+    async def _close_pool(client):
+        client._pool.close()
+
+    def unused_address(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        return f"127.0.0.1:{port}"
+
+    def hung_peer(self):
+        # Accepts connections but never answers
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        sock.listen(16)
+        self.addCleanup(sock.close)
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+    def test_merges_the_state_of_every_peer(self):
+        state = self.client().get_state()
+
+        self.assertEqual(state['summary'], {'ok': 3, 'partial': 0, 'unreachable': 0})
+        self.assertEqual([peer['peer'] for peer in state['peers']], [peer.address for peer in self.peers])
+        for peer in state['peers']:
+            self.assertEqual(peer['state'], {'device_mode': {'mode': 'AP'},
+                                             'active_wifi_network': {'network': {'SSID': 'Home', 'SIGNAL': '70',
+                                                                                 'ACTIVE': 'yes'}},
+                                             'ethernet_ip_and_mask': {'ip': '192.168.1.10', 'mask': '24'}})
+            self.assertEqual(peer['errors'], {})
+            self.assertIsNotNone(peer['fetched_at']['device_mode'])
+
+    def test_unchanged_state_is_not_resent(self):
+        client = self.client()
+        first = client.get_state()
+        second = client.get_state()
+        self.assertEqual(client.not_modified, 9)
+        self.assertEqual([peer['state'] for peer in second['peers']], [peer['state'] for peer in first['peers']])
+
+    def test_keep_alive_connections_are_reused(self):
+        # The development server closes every connection, so use a keep-alive peer like gunicorn's
+        peer = KeepAlivePeer()
+        self.addCleanup(peer.stop)
+        client = self.client([peer.address])
+        for _ in range(3):
+            self.assertEqual(client.get_state()['summary']['ok'], 1)
+        self.assertEqual(peer.connections, client._pool.connections_opened)
+        self.assertLessEqual(peer.connections, len(client.endpoints))
+        self.assertEqual(peer.requests, 3 * len(client.endpoints))
+
+    def test_slow_and_down_peers_fail_alone(self):
+        hung, down = self.hung_peer(), self.unused_address()
+        client = self.client([self.peers[0].address, hung, down], timeout=0.5)
+
+        started = time.monotonic()
+        state = client.get_state()
+        self.assertLess(time.monotonic() - started, 1.5)
+
+        ok, slow, unreachable = state['peers']
+        self.assertEqual(ok['status'], 'ok')
+        self.assertEqual(slow['status'], 'unreachable')
+        self.assertIn('No answer within 0.5 seconds', slow['errors']['device_mode'])
+        self.assertEqual(unreachable['status'], 'unreachable')
+        self.assertIn('Request failed', unreachable['errors']['ethernet_ip_and_mask'])
+        self.assertEqual(unreachable['state']['device_mode'], None)
+        self.assertEqual(state['summary'], {'ok': 1, 'partial': 0, 'unreachable': 2})
+
+    def test_failed_endpoint_reports_partial_state(self):
+        self.backend.ip_and_mask.side_effect = RuntimeError("nmcli failed")
+        peer = self.client([self.peers[0].address]).get_state()['peers'][0]
+
+        self.assertEqual(peer['status'], 'partial')
+        self.assertEqual(peer['errors'], {'ethernet_ip_and_mask': 'HTTP 500: nmcli failed'})
+        self.assertEqual(peer['state']['device_mode'], {'mode': 'AP'})
+
+    def test_last_known_values_are_reported_stale(self):
+        client = self.client()
+        first = client.get_state()['peers'][1]
+        self.peers[1].stop()
+
+        peer = client.get_state()['peers'][1]
+        self.assertEqual(peer['status'], 'unreachable')
+        self.assertEqual(sorted(peer['stale']), sorted(client.endpoints))
+        self.assertEqual(peer['state'], first['state'])
+        self.assertEqual(peer['fetched_at'], first['fetched_at'])
+
+    def test_parse_peer(self):
+        self.assertEqual(parse_peer('10.0.0.5'), ('10.0.0.5', 8000))
+        self.assertEqual(parse_peer('box-2.local:8080'), ('box-2.local', 8080))
+        self.assertEqual(parse_peer('http://10.0.0.5:9000/'), ('10.0.0.5', 9000))
+        for peer in ('https://10.0.0.5', 'http://10.0.0.5/state', ''):
+            with self.assertRaises(ValueError):
+                parse_peer(peer)
+
+    def test_fleet_route(self):
+        client = app.test_client()
+        with patch('controllers.fleet_controller.fleet_client', FleetClient([])):
+            self.assertEqual(client.get('/fleet/state').status_code, 404)
+        with patch('controllers.fleet_controller.fleet_client', self.client([self.peers[2].address])):
+            response = client.get('/fleet/state')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['summary']['ok'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
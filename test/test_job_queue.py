@@ -0,0 +1,82 @@
+import threading
+import time
+import unittest
+from models.backends.base import NetworkError
+from models.job_queue import JobQueue, SUCCEEDED, FAILED
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = JobQueue(workers=2, history_size=3)
+
+    def wait(self, job):
+        for _ in range(200):
+            if job.finished:
+                return
+            time.sleep(0.01)
+        self.fail("job did not finish")
+
+    def test_submit_runs_job(self):
+        job, created = self.queue.submit('connect', ('wifi', 'Home'), lambda ssid: {'ssid': ssid}, 'Home')
+        self.wait(job)
+        self.assertTrue(created)
+        self.assertEqual(job.status, SUCCEEDED)
+        self.assertEqual(job.to_dict()['result'], {'ssid': 'Home'})
+        self.assertIs(self.queue.get(job.id), job)
+
+    def test_failed_job_reports_stderr(self):
+        def fail():
+            raise NetworkError("Failed to connect to network 'Home'.", "Secrets were required")
+
+        job, _ = self.queue.submit('connect', ('wifi', 'Home'), fail)
+        self.wait(job)
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.stderr, "Secrets were required")
+        self.assertIn("Secrets were required", job.error)
+
+    def test_failed_job_keeps_partial_result(self):
+        error = RuntimeError("Step failed")
+        error.result = {'steps': [{'status': 'failed'}]}
+
+        def fail():
+            raise error
+
+        job, _ = self.queue.submit('apply_config', ('config', '{}'), fail)
+        self.wait(job)
+        self.assertEqual(job.to_dict()['result'], {'steps': [{'status': 'failed'}]})
+
+    def test_duplicate_submissions_are_coalesced(self):
+        release = threading.Event()
+        first, _ = self.queue.submit('connect', ('wifi', 'Home'), release.wait)
+        second, created = self.queue.submit('connect', ('wifi', 'Home'), release.wait)
+        release.set()
+        self.wait(first)
+        self.assertFalse(created)
+        self.assertIs(first, second)
+
+    def test_finished_job_does_not_block_resubmission(self):
+        first, _ = self.queue.submit('connect', ('wifi', 'Home'), lambda: None)
+        self.wait(first)
+        second, created = self.queue.submit('connect', ('wifi', 'Home'), lambda: None)
+        self.wait(second)
+        self.assertTrue(created)
+        self.assertIsNot(first, second)
+
+    def test_history_is_bounded(self):
+        jobs = []
+        for index in range(5):
+            job, _ = self.queue.submit('connect', ('wifi', index), lambda: None)
+            self.wait(job)
+            jobs.append(job)
+        self.queue.submit('connect', ('wifi', 'last'), lambda: None)
+        self.assertIsNone(self.queue.get(jobs[0].id))
+
+    def test_elapsed_is_reported(self):
+        job, _ = self.queue.submit('connect', ('wifi', 'Home'), lambda: None)
+        self.wait(job)
+        self.assertGreaterEqual(job.to_dict()['elapsed'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch
+
+from models.metrics import Metric, render_metrics
+
+
+class TestMetric(unittest.TestCase):
+
+    def test_counter(self):
+        counter = Metric('test_total', 'Test counter.', 'counter', ('route',))
+        counter.labels('/a').inc()
+        counter.labels('/a').inc()
+        self.assertIn('test_total{route="/a"} 2', counter.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Metric('test_seconds', 'Test histogram.', 'histogram', ('route',), buckets=(0.1, 1.0))
+        histogram.labels('/a').observe(0.05)
+        histogram.labels('/a').observe(0.5)
+        histogram.labels('/a').observe(5)
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{route="/a",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{route="/a",le="1"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="/a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_count{route="/a"} 3', lines)
+        self.assertIn('test_seconds_sum{route="/a"} 5.55', lines)
+
+    def test_labels_reuse_child(self):
+        counter = Metric('test_total', 'Test counter.', 'counter', ('route',))
+        self.assertIs(counter.labels('/a'), counter.labels('/a'))
+
+    def test_label_values_are_escaped(self):
+        counter = Metric('test_total', 'Test counter.', 'counter', ('ssid',))
+        counter.labels('a"b').inc()
+        self.assertIn('test_total{ssid="a\\"b"} 1', counter.render())
+
+    def test_render_reads_children_under_the_lock(self):
+        counter = Metric('test_total', 'Test counter.', 'counter', ('route',))
+        held = []
+
+        class Children(dict):
+            def items(self):
+                held.append(counter._lock.locked())
+                return super().items()
+
+        counter._children = Children()
+        counter.labels('/a').inc()
+        self.assertIn('test_total{route="/a"} 1', counter.render())
+        self.assertEqual(held, [True])
+
+
+class TestCommandMetrics(unittest.TestCase):
+
+    def test_every_command_template_is_exported(self):
+        output = render_metrics()
+        self.assertIn('daughterbox_commands_in_flight{command="NMCLI_SCAN_WIFI_NETWORKS"} 0', output)
+        self.assertIn('daughterbox_command_duration_seconds_count{command="NMCLI_SET_IP4_ADDRESS"}', output)
+
+
+class TestMetricsRoute(unittest.TestCase):
+
+    def setUp(self):
+        from app import app
+        self.client = app.test_client()
+
+    @patch('controllers.device_mode_controller.get_device_mode', return_value='AP')
+    def test_route_metrics(self, mock_get_device_mode):
+        self.client.get('/device_mode')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_data(as_text=True)
+        self.assertIn('daughterbox_http_requests_total{route="/device_mode",method="GET",status="200"}', body)
+        self.assertIn('daughterbox_http_request_duration_seconds_count{route="/device_mode"}', body)
+        self.assertNotIn('route="/metrics"', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from models.admission import AdmissionRejected
+from models.network_events import EventBroker, NetworkMonitor, ACTIVE_CONNECTION_CHANGED, IP_CHANGED
+from models.state_cache import state_cache
+
+
+def network_state(ssid, ip):
+    return {'network': {'SSID': ssid, 'SIGNAL': '70', 'ACTIVE': 'yes'},
+            'ip_and_mask': {'ETH': {'ip': '192.168.1.10', 'mask': '24'}, ssid: {'ip': ip, 'mask': '24'}}}
+
+
+class TestNetworkEvents(unittest.TestCase):
+
+    def test_publish_reaches_every_subscriber(self):
+        broker = EventBroker(queue_size=4)
+        first, second = broker.subscribe(), broker.subscribe()
+        broker.publish('scan_updated', {'networks': []})
+        self.assertEqual(first.get_nowait()['type'], 'scan_updated')
+        self.assertEqual(second.get_nowait()['data'], {'networks': []})
+
+    def test_slow_subscriber_drops_oldest_events(self):
+        broker = EventBroker(queue_size=2)
+        subscription = broker.subscribe()
+        for index in range(5):
+            broker.publish('scan_updated', {'index': index})
+        self.assertEqual([subscription.get_nowait()['data']['index'] for _ in range(2)], [3, 4])
+
+    def test_unsubscribe_stops_delivery(self):
+        broker = EventBroker(queue_size=2)
+        subscription = broker.subscribe()
+        broker.unsubscribe(subscription)
+        broker.publish('scan_updated', {})
+        self.assertTrue(subscription.empty())
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    def test_subscribers_past_the_cap_are_rejected(self):
+        broker = EventBroker(queue_size=2, max_subscribers=2)
+        first, _ = broker.subscribe(), broker.subscribe()
+        with self.assertRaises(AdmissionRejected) as context:
+            broker.subscribe()
+        self.assertGreater(context.exception.retry_after, 0)
+
+        broker.unsubscribe(first)
+        broker.subscribe()
+        self.assertEqual(broker.subscriber_count(), 2)
+
+    def test_subscribe_runs_callback(self):
+        broker = EventBroker(queue_size=2)
+        callback = MagicMock()
+        broker.on_subscribe(callback)
+        broker.subscribe()
+        callback.assert_called_once()
+
+    def test_refresh_publishes_only_changes(self):
+        broker = EventBroker(queue_size=8)
+        subscription = broker.subscribe()
+        read_state = MagicMock(side_effect=[network_state('Box-1', '10.42.0.2'), network_state('Box-1', '10.42.0.2'),
+                                            network_state('Box-2', '10.42.1.2')])
+        monitor = NetworkMonitor(broker, read_state)
+
+        monitor.refresh()
+        monitor.refresh()
+        self.assertTrue(subscription.empty())
+
+        monitor.refresh()
+        events = [subscription.get_nowait() for _ in range(subscription.qsize())]
+        self.assertEqual([event['type'] for event in events], [ACTIVE_CONNECTION_CHANGED, IP_CHANGED])
+        self.assertEqual(events[1]['data'], {'connection': 'Box-2', 'kind': 'wifi',
+                                             'ip_and_mask': {'ip': '10.42.1.2', 'mask': '24'}})
+
+    def test_refresh_leaves_the_scan_to_the_scanner(self):
+        scanner = MagicMock()
+        monitor = NetworkMonitor(EventBroker(queue_size=8), MagicMock(return_value=network_state('Box-1', '10.42.0.2')),
+                                 scanner=scanner)
+        generation = state_cache.generation
+        monitor.refresh()
+        self.assertEqual(state_cache.generation, generation)
+        scanner.refresh_soon.assert_called_once()
+
+    def test_refresh_survives_read_errors(self):
+        broker = EventBroker(queue_size=8)
+        monitor = NetworkMonitor(broker, MagicMock(side_effect=RuntimeError("Error")))
+        monitor.refresh()
+
+    def test_monitor_output_triggers_one_debounced_refresh(self):
+        broker = EventBroker(queue_size=8)
+        read_state = MagicMock(return_value=network_state('Box-1', '10.42.0.2'))
+        monitor = NetworkMonitor(broker, read_state, debounce=0.05)
+        with patch('config.constants.NMCLI_MONITOR', ('printf', 'a\\nb\\nc\\n')):
+            monitor.start()
+            time.sleep(0.2)
+        time.sleep(0.3)
+        # One read when the watcher starts and one for the burst of three lines
+        self.assertEqual(read_state.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
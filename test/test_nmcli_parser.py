@@ -0,0 +1,58 @@
+import unittest
+from models.nmcli_parser import parse_terse, terse_fields, unescape
+
+SCAN_FIELDS = ('SSID', 'SIGNAL', 'ACTIVE', 'BSSID')
+
+
+class TestNmcliParser(unittest.TestCase):
+
+    def test_parse_scan_rows(self):
+        output = "Box-1:70:yes:B8\\:27\\:EB\\:00\\:00\\:01\nCafe:90:no:00\\:11\\:22\\:33\\:44\\:55\n"
+        expected_result = [('Box-1', '70', 'yes', 'B8:27:EB:00:00:01'), ('Cafe', '90', 'no', '00:11:22:33:44:55')]
+        self.assertEqual(parse_terse(output, SCAN_FIELDS), expected_result)
+
+    def test_ssid_with_colons_and_backslashes(self):
+        output = "Lab\\:5GHz\\\\guest:40:no:B8\\:27\\:EB\\:00\\:00\\:02"
+        expected_result = [('Lab:5GHz\\guest', '40', 'no', 'B8:27:EB:00:00:02')]
+        self.assertEqual(parse_terse(output, SCAN_FIELDS), expected_result)
+
+    def test_hidden_ssid(self):
+        output = ":40:no:B8\\:27\\:EB\\:00\\:00\\:02"
+        self.assertEqual(parse_terse(output, SCAN_FIELDS, ('SSID', 'BSSID')), [('', 'B8:27:EB:00:00:02')])
+
+    def test_short_and_blank_lines_are_skipped(self):
+        output = "Box-1:70\n\nBox-2:50:no:B8\\:27\\:EB\\:00\\:00\\:02\n"
+        self.assertEqual(parse_terse(output, SCAN_FIELDS, ('SSID',)), [('Box-2',)])
+
+    def test_extra_and_missing_values_do_not_shift_rows(self):
+        # As many separators in total as three well-formed rows
+        output = "A:1:yes:x:extra\nB:2:no\nC:3:no:z\n"
+        self.assertEqual(parse_terse(output, SCAN_FIELDS), [('C', '3', 'no', 'z')])
+
+    def test_select_projects_and_reorders(self):
+        output = "Home:yes:802-11-wireless"
+        self.assertEqual(parse_terse(output, ('NAME', 'AUTOCONNECT', 'TYPE'), ('TYPE', 'NAME')),
+                         [('802-11-wireless', 'Home')])
+
+    def test_control_characters_use_regex_fallback(self):
+        output = "Odd\x1fName:40:no:B8\\:27\\:EB\\:00\\:00\\:02\nBox\\:2:50:no:B8\\:27\\:EB\\:00\\:00\\:03"
+        expected_result = [('Odd\x1fName', 'B8:27:EB:00:00:02'), ('Box:2', 'B8:27:EB:00:00:03')]
+        self.assertEqual(parse_terse(output, SCAN_FIELDS, ('SSID', 'BSSID')), expected_result)
+
+    def test_single_field(self):
+        self.assertEqual(parse_terse("a\nb\n", ('NAME',)), [('a',), ('b',)])
+        self.assertEqual(parse_terse("", ('NAME',)), [])
+
+    def test_terse_fields(self):
+        self.assertEqual(terse_fields(('nmcli', '-t', '-f', 'SSID,SIGNAL', 'device', 'wifi')), ('SSID', 'SIGNAL'))
+        with self.assertRaises(ValueError):
+            terse_fields(('nmcli', 'connection', 'up', '{}'))
+
+    def test_unescape(self):
+        self.assertEqual(unescape('plain'), 'plain')
+        self.assertEqual(unescape('a\\:b'), 'a:b')
+        self.assertEqual(unescape('a\\\\\\:b'), 'a\\:b')
+
+
+if __name__ == '__main__':
+    unittest.main()
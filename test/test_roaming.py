@@ -0,0 +1,148 @@
+import unittest
+from unittest.mock import MagicMock
+
+from app import app
+from models.roaming import RoamingManager
+
+
+def access_point(ssid, signal, active='no'):
+    return {'SSID': ssid, 'SIGNAL': str(signal), 'ACTIVE': active, 'BSSID': 'B8:27:EB:00:00:01'}
+
+
+class ImmediateJobs:
+    """
+    Runs submitted jobs on the spot, like a job queue with no other work.
+    """
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, name, key, func, *args):
+        self.submitted.append((name, key))
+        try:
+            func(*args)
+        except RuntimeError:
+            pass
+        return None, True
+
+
+class TestRoamingManager(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.jobs = ImmediateJobs()
+        self.connections = [{'name': 'Home', 'autoconnect': 'yes'}, {'name': 'Office', 'autoconnect': 'yes'},
+                            {'name': 'Guest', 'autoconnect': 'no'}]
+        self.connect = MagicMock()
+        self.mode = 'STA'
+        self.manager = RoamingManager(MagicMock(), margin=15, sustain_seconds=30, cooldown_seconds=300,
+                                      scan_interval=10, jobs=self.jobs, known_connections=lambda: self.connections,
+                                      connect=self.connect, device_mode=lambda: self.mode, clock=lambda: self.now)
+        self.manager._enabled = True
+
+    def scan(self, *access_points, after=10):
+        """
+        Feeds one scan to the manager, `after` seconds after the previous one.
+        """
+        self.now += after
+        return self.manager.evaluate(list(access_points), self.now)
+
+    def test_switches_once_the_stronger_network_is_sustained(self):
+        self.assertIsNone(self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70)))
+        self.assertIsNone(self.scan(access_point('Home', 35, 'yes'), access_point('Office', 72)))
+        self.assertIsNone(self.scan(access_point('Home', 38, 'yes'), access_point('Office', 71)))
+        self.connect.assert_not_called()
+        self.assertEqual(self.manager.stats()['candidate']['sustained_seconds'], 20)
+
+        self.assertEqual(self.scan(access_point('Home', 30, 'yes'), access_point('Office', 75)), 'Office')
+        self.connect.assert_called_once_with('Office')
+        self.assertEqual(self.jobs.submitted, [('roam_to_known_wifi_connection', ('wifi', 'Office'))])
+
+        stats = self.manager.stats()
+        self.assertEqual((stats['switches'], stats['failures'], stats['candidate']), (1, 0, None))
+        self.assertEqual(stats['last_switch']['from'], 'Home')
+        self.assertEqual(stats['last_switch']['to_signal'], 75)
+        self.assertTrue(stats['last_switch']['succeeded'])
+
+    def test_candidate_resets_when_the_margin_is_lost(self):
+        self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        # Within the hysteresis margin for one scan: the 30 seconds start over
+        self.scan(access_point('Home', 60, 'yes'), access_point('Office', 70))
+        self.assertIsNone(self.manager.stats()['candidate'])
+        self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.connect.assert_not_called()
+        self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.connect.assert_called_once_with('Office')
+
+    def test_cooldown_prevents_flapping(self):
+        for _ in range(4):
+            self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.connect.assert_called_once_with('Office')
+
+        for _ in range(10):
+            self.scan(access_point('Office', 30, 'yes'), access_point('Home', 80))
+        self.assertEqual(self.connect.call_count, 1)
+        self.assertGreater(self.manager.stats()['cooldown_remaining'], 0)
+
+        self.scan(access_point('Office', 30, 'yes'), access_point('Home', 80), after=200)
+        self.connect.assert_called_with('Home')
+
+    def test_failed_switch_is_counted_and_cools_down(self):
+        self.connect.side_effect = RuntimeError("Secrets were required")
+        for _ in range(4):
+            self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        stats = self.manager.stats()
+        self.assertEqual((stats['switches'], stats['failures'], stats['switching']), (0, 1, False))
+        self.assertEqual(stats['last_switch']['error'], 'Secrets were required')
+
+        for _ in range(4):
+            self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.assertEqual(self.connect.call_count, 1)
+
+    def test_latency_is_measured_around_the_connect(self):
+        def connect(name):
+            self.now += 4
+
+        self.connect.side_effect = connect
+        for _ in range(4):
+            self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        stats = self.manager.stats()
+        self.assertEqual(stats['latency_ms'], {'avg': 4000.0, 'max': 4000.0})
+        self.assertEqual(stats['last_switch']['latency_ms'], 4000.0)
+
+    def test_only_known_autoconnect_networks_in_sta_mode(self):
+        for _ in range(4):
+            self.scan(access_point('Home', 40, 'yes'), access_point('Guest', 90), access_point('Cafe', 90))
+        self.connect.assert_not_called()
+
+        self.mode = 'AP'
+        for _ in range(4):
+            self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.connect.assert_not_called()
+
+    def test_ignores_scans_while_disabled_or_disconnected(self):
+        for _ in range(4):
+            self.scan(access_point('Home', 40), access_point('Office', 70))
+        self.manager._enabled = False
+        for _ in range(4):
+            self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.connect.assert_not_called()
+
+    def test_coalesced_with_a_connection_from_the_ui(self):
+        self.jobs.submit = MagicMock(return_value=(None, False))
+        for _ in range(4):
+            result = self.scan(access_point('Home', 40, 'yes'), access_point('Office', 70))
+        self.assertIsNone(result)
+        self.assertFalse(self.manager.stats()['switching'])
+
+    def test_roaming_route(self):
+        response = app.test_client().get('/wifi/roaming')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('switches', response.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
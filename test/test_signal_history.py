@@ -0,0 +1,126 @@
+import inspect
+import time
+import tracemalloc
+import unittest
+from unittest.mock import patch, MagicMock
+
+from app import app
+from models.signal_history import SignalHistory, SignalRing, downsample, NOT_CONNECTED
+from models.wifi_scanner import WifiScanner
+
+
+def access_point(bssid, signal, active='no', ssid='Box'):
+    return {'SSID': ssid, 'SIGNAL': str(signal), 'ACTIVE': active, 'BSSID': bssid}
+
+
+class TestSignalRing(unittest.TestCase):
+
+    def test_keeps_the_newest_samples_in_order(self):
+        ring = SignalRing(3)
+        for second, signal in enumerate([10, 20, 30, 40, 50]):
+            ring.append(1000 + second, signal)
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(list(ring.since(0)), [(1002, 30), (1003, 40), (1004, 50)])
+        self.assertEqual(list(ring.since(1004)), [(1004, 50)])
+
+    def test_signal_is_clamped_to_a_byte(self):
+        ring = SignalRing(2)
+        ring.append(1, 250)
+        ring.append(2, -50)
+        self.assertEqual([signal for _, signal in ring.since(0)], [100, NOT_CONNECTED])
+
+    def test_downsample(self):
+        samples = [(100, 40), (105, 60), (110, NOT_CONNECTED), (125, 80)]
+        buckets = downsample(iter(samples), 100, 10, 3)
+        self.assertEqual([(b['min'], b['avg'], b['max'], b['samples']) for b in buckets],
+                         [(40, 50.0, 60, 2), (None, None, None, 0), (80, 80.0, 80, 1)])
+        self.assertEqual(buckets[1]['disconnected'], 1)
+        self.assertEqual(buckets[2]['start'], 120)
+
+
+class TestSignalHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.scanner = WifiScanner(MagicMock(return_value=[]), 60, 60, 600)
+        self.addCleanup(self.scanner.stop)
+
+    def history(self, **options):
+        options = {'interval': 1, 'capacity': 100, 'max_access_points': 2, **options}
+        return SignalHistory(self.scanner, **options)
+
+    def test_records_active_connection_and_access_points(self):
+        history = self.history()
+        now = time.time()
+        history.record([access_point('aa:00', 70, 'yes', 'Home'), access_point('bb:00', 30)], now - 15)
+        history.record([access_point('bb:00', 50)], now - 5)
+
+        result = history.history(window=30, points=3)
+        self.assertEqual(result['bucket_seconds'], 10)
+        active = [(bucket['avg'], bucket['disconnected']) for bucket in result['active']]
+        self.assertEqual(active, [(None, 0), (70.0, 0), (None, 1)])
+        self.assertEqual([(ap['bssid'], ap['ssid']) for ap in result['access_points']],
+                         [('BB:00', 'Box'), ('AA:00', 'Home')])
+        self.assertEqual([bucket['max'] for bucket in result['access_points'][0]['buckets']], [None, 30, 50])
+
+    def test_samples_closer_than_the_interval_are_skipped(self):
+        history = self.history(interval=10)
+        now = time.time()
+        for offset in (30, 28, 20, 15):
+            history.record([access_point('aa:00', offset, 'yes')], now - offset)
+        self.assertEqual(len(history._active), 2)
+
+    def test_least_recently_seen_access_point_is_dropped(self):
+        history = self.history()
+        now = time.time()
+        history.record([access_point('aa:00', 10), access_point('bb:00', 20)], now - 3)
+        history.record([access_point('aa:00', 10), access_point('cc:00', 30)], now - 2)
+        self.assertEqual(list(history._access_points), ['AA:00', 'CC:00'])
+
+    def test_memory_stays_constant(self):
+        history = self.history(interval=0.001, capacity=50, max_access_points=4)
+        aps = [access_point(f'aa:{index:02x}', index, 'yes' if index == 0 else 'no') for index in range(8)]
+        history.record(aps, 0)
+
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        for sample in range(1, 50):
+            history.record(aps, sample)
+        before = tracemalloc.take_snapshot()
+        for sample in range(50, 5000):
+            history.record(aps, sample)
+        # Only what signal_history.py allocated: watcher threads left by other tests allocate too
+        only_history = [tracemalloc.Filter(True, inspect.getfile(SignalHistory))]
+        growth = tracemalloc.take_snapshot().filter_traces(only_history).compare_to(
+            before.filter_traces(only_history), 'filename')
+        self.assertLess(sum(stat.size_diff for stat in growth), 1024)
+
+    def test_rejects_out_of_range_windows(self):
+        history = self.history()
+        with self.assertRaises(ValueError):
+            history.history(window=1000, points=10)
+        with self.assertRaises(ValueError):
+            history.history(window=10, points=0)
+
+    def test_sampler_scans_when_the_scanner_is_idle(self):
+        scan = MagicMock(return_value=[access_point('aa:00', 55, 'yes')])
+        scanner = WifiScanner(scan, 60, 60, 600)
+        history = SignalHistory(scanner, interval=0.05, capacity=100)
+        history.start()
+        self.addCleanup(history.stop)
+        time.sleep(0.3)
+        self.assertGreaterEqual(len(history._active), 3)
+        scan.assert_called_with(False)
+
+    def test_route(self):
+        history = self.history()
+        history.record([access_point('aa:00', 42, 'yes')], time.time())
+        with patch('controllers.wifi_controller.signal_history', history):
+            client = app.test_client()
+            response = client.get('/wifi/signal_history?window=60&points=2')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['active'][-1]['avg'], 42.0)
+            self.assertEqual(client.get('/wifi/signal_history?window=abc').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from models.state_cache import SnapshotCache
+
+
+class TestStateCache(unittest.TestCase):
+
+    def test_get_serves_fresh_snapshot(self):
+        cache = SnapshotCache(ttl=60)
+        loader = MagicMock(return_value=['Home'])
+        self.assertEqual(cache.get('key', loader), ['Home'])
+        self.assertEqual(cache.get('key', loader), ['Home'])
+        loader.assert_called_once()
+
+    def test_get_reloads_expired_snapshot(self):
+        cache = SnapshotCache(ttl=0)
+        loader = MagicMock(return_value=['Home'])
+        cache.get('key', loader)
+        cache.get('key', loader)
+        self.assertEqual(loader.call_count, 2)
+
+    def test_invalidate_forces_reload(self):
+        cache = SnapshotCache(ttl=60)
+        loader = MagicMock(side_effect=[['Home'], ['Office']])
+        cache.get('key', loader)
+        cache.invalidate()
+        self.assertEqual(cache.get('key', loader), ['Office'])
+
+    def test_get_tagged_tag_follows_value(self):
+        cache = SnapshotCache(ttl=0)
+        loader = MagicMock(side_effect=[['Home'], ['Home'], ['Office']])
+        _, first = cache.get_tagged('key', loader)
+        _, second = cache.get_tagged('key', loader)
+        _, third = cache.get_tagged('key', loader)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+
+    def test_errors_are_not_cached(self):
+        cache = SnapshotCache(ttl=60)
+        loader = MagicMock(side_effect=[RuntimeError("Error"), ['Home']])
+        with self.assertRaises(RuntimeError):
+            cache.get('key', loader)
+        self.assertEqual(cache.get('key', loader), ['Home'])
+
+    def test_concurrent_misses_share_one_load(self):
+        cache = SnapshotCache(ttl=60)
+        calls = []
+
+        def slow_loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return ['Home']
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('key', slow_loader))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [['Home']] * 8)
+
+    def test_async_misses_share_one_load_with_threads(self):
+        cache = SnapshotCache(ttl=60)
+        calls = []
+
+        async def slow_loader():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return ['Home']
+
+        async def main():
+            waiting = asyncio.gather(*[cache.get_tagged_async('key', slow_loader) for _ in range(8)])
+            await asyncio.sleep(0.02)
+            thread_result = await asyncio.to_thread(cache.get, 'key', lambda: ['Other'])
+            return await waiting, thread_result
+
+        results, thread_result = asyncio.run(main())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([value for value, _ in results], [['Home']] * 8)
+        self.assertEqual(thread_result, ['Home'])
+
+    def test_cancelled_async_caller_does_not_fail_the_load(self):
+        cache = SnapshotCache(ttl=60)
+
+        async def slow_loader():
+            await asyncio.sleep(0.1)
+            return ['Home']
+
+        async def main():
+            first = asyncio.ensure_future(cache.get_tagged_async('key', slow_loader))
+            second = asyncio.ensure_future(cache.get_tagged_async('key', slow_loader))
+            await asyncio.sleep(0.02)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main())[0], ['Home'])
+        self.assertEqual(cache.get('key', lambda: ['Reloaded']), ['Home'])
+
+    def test_load_racing_invalidate_is_not_stored(self):
+        cache = SnapshotCache(ttl=60)
+
+        def loader():
+            cache.invalidate()
+            return ['Stale']
+
+        self.assertEqual(cache.get('key', loader), ['Stale'])
+        self.assertEqual(cache.get('key', lambda: ['Fresh']), ['Fresh'])
+
+    def test_discard_drops_only_matching_kinds(self):
+        cache = SnapshotCache(ttl=60)
+        cache.get(('ip_and_mask', 'ETH'), lambda: {'ip': '192.168.1.10'})
+        cache.get(('remembered_wifi_connections',), lambda: ['Home'])
+        generation = cache.generation
+
+        def loader():
+            cache.discard('ip_and_mask')
+            return {'ip': 'stale'}
+
+        self.assertEqual(cache.get(('ip_and_mask', 'wlan'), loader), {'ip': 'stale'})
+        self.assertEqual(cache.get(('ip_and_mask', 'ETH'), lambda: {'ip': '192.168.1.20'}), {'ip': '192.168.1.20'})
+        self.assertEqual(cache.get(('ip_and_mask', 'wlan'), lambda: {'ip': 'fresh'}), {'ip': 'fresh'})
+        self.assertEqual(cache.get(('remembered_wifi_connections',), lambda: ['Reloaded']), ['Home'])
+        self.assertEqual(cache.generation, generation)
+
+
+if __name__ == '__main__':
+    unittest.main()
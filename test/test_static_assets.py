@@ -0,0 +1,142 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app import app
+from models.static_assets import AssetManifest, build_assets, minify_css, minify_js, brotli, STATIC_FOLDER
+
+BUNDLES = {'app.css': ('css/styles.css',), 'app.js': ('js/a.js', 'js/b.js')}
+
+
+class TestMinify(unittest.TestCase):
+
+    def test_minify_js_keeps_literals(self):
+        source = ("// comment\n"
+                  "const url = 'http://x' ;  /* block */\n"
+                  "const html = `<p>  ${url}  </p>`;\n"
+                  "const re = /a\\/\\/b/g;\n"
+                  "if (a) {\n    b = c - -d\n}\n")
+        expected_result = "const url='http://x';const html=`<p>  ${url}  </p>`;const re=/a\\/\\/b/g;if(a){b=c - -d\n}"
+        self.assertEqual(minify_js(source), expected_result)
+
+    def test_minify_js_regex_after_keyword(self):
+        source = "function f(s) {\n  return /a  b\\/\\/c/.test(s) ? x / 2 : typeof /y/\n}\nlet n = total / count / 2\n"
+        expected_result = "function f(s){return /a  b\\/\\/c/.test(s)?x / 2:typeof /y/\n}\nlet n=total / count / 2"
+        self.assertEqual(minify_js(source), expected_result)
+        self.assertEqual(minify_js("x.return / 2 / y"), "x.return / 2 / y")
+
+    def test_minify_js_nested_template_literals(self):
+        source = "const a = `x${ f(`  y  ${ {k: '}'}.k }`) }  z`;\nlet b = 1\n"
+        self.assertEqual(minify_js(source), "const a=`x${ f(`  y  ${ {k: '}'}.k }`) }  z`;let b=1")
+
+        with open(os.path.join(STATIC_FOLDER, 'js', 'camera.js'), encoding='utf-8') as file:
+            minified = minify_js(file.read())
+        self.assertIn("Camera${port === 80 ? '' : ` :${port}`}</button>`", minified)
+
+    def test_minify_css(self):
+        source = "/* theme */\n.a :hover ,\n.b > .c {\n  color: red ;\n  content: ' x ';\n}\n@media (max-width: 600px) { .a { margin: 0 auto; } }"
+        expected_result = ".a :hover,.b>.c{color:red;content:' x '}@media (max-width:600px){.a{margin:0 auto}}"
+        self.assertEqual(minify_css(source), expected_result)
+
+
+class TestBuildAssets(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.static = directory.name
+        self.write('css/styles.css', "@import url('base.css');\n.b { color: blue; }\n")
+        self.write('css/base.css', ".a { color: red; }\n")
+        self.write('js/a.js', "function a() { return 1 }\n")
+        self.write('js/b.js', "a();\n")
+
+    def write(self, name, content):
+        path = os.path.join(self.static, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+
+    def test_build_writes_hashed_bundles_and_variants(self):
+        manifest = build_assets(self.static, BUNDLES)
+        output_dir = os.path.join(self.static, 'dist')
+
+        self.assertRegex(manifest['app.css'], r'^app\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(output_dir, manifest['app.css'])) as file:
+            self.assertEqual(file.read(), ".a{color:red}.b{color:blue}")
+        with open(os.path.join(output_dir, manifest['app.js']), 'rb') as file:
+            content = file.read()
+        self.assertEqual(content, b"function a(){return 1}\n;a();")
+        with gzip.open(os.path.join(output_dir, manifest['app.js'] + '.gz')) as file:
+            self.assertEqual(file.read(), content)
+        if brotli is not None:
+            with open(os.path.join(output_dir, manifest['app.js'] + '.br'), 'rb') as file:
+                self.assertEqual(brotli.decompress(file.read()), content)
+
+    def test_rebuild_keeps_only_previous_build(self):
+        first = build_assets(self.static, BUNDLES)
+        self.write('js/b.js', "a(2);\n")
+        second = build_assets(self.static, BUNDLES)
+        self.write('js/b.js', "a(3);\n")
+        third = build_assets(self.static, BUNDLES)
+
+        files = os.listdir(os.path.join(self.static, 'dist'))
+        self.assertIn(second['app.js'], files)
+        self.assertIn(third['app.js'], files)
+        self.assertNotIn(first['app.js'], files)
+        self.assertEqual(first['app.css'], third['app.css'])
+
+    def test_manifest_reloads_after_build(self):
+        manifest = AssetManifest(self.static, BUNDLES)
+        self.assertIsNone(manifest.built_file('app.js'))
+        built = build_assets(self.static, BUNDLES)
+        self.assertEqual(manifest.built_file('app.js'), built['app.js'])
+
+
+class TestAssetRoutes(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        os.makedirs(os.path.join(directory.name, 'js'))
+        with open(os.path.join(directory.name, 'js', 'a.js'), 'w') as file:
+            file.write("console.log('a');\n")
+        self.bundles = {'app.js': ('js/a.js',), 'app.css': ()}
+        self.manifest = AssetManifest(directory.name, self.bundles)
+        patcher = patch('controllers.assets_controller.asset_manifest', self.manifest)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = app.test_client()
+
+    def test_page_loads_sources_until_built(self):
+        page = self.client.get('/').get_data(as_text=True)
+        self.assertIn('src="/static/js/a.js"', page)
+
+        built = build_assets(self.manifest.static_folder, self.bundles)
+        page = self.client.get('/').get_data(as_text=True)
+        self.assertIn(f'src="/assets/{built["app.js"]}"', page)
+
+    def test_asset_served_precompressed_and_immutable(self):
+        file_name = build_assets(self.manifest.static_folder, self.bundles)['app.js']
+
+        response = self.client.get(f'/assets/{file_name}', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype, 'text/javascript')
+        self.assertEqual(response.headers['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.get_data()), b"console.log('a');")
+
+        response = self.client.get(f'/assets/{file_name}', headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_data(), b"console.log('a');")
+
+    def test_unknown_asset_and_manifest_are_not_served(self):
+        build_assets(self.manifest.static_folder, self.bundles)
+        self.assertEqual(self.client.get('/assets/app.000000000000.js').status_code, 404)
+        self.assertEqual(self.client.get('/assets/manifest.json').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
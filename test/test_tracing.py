@@ -0,0 +1,121 @@
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app import app
+from models.backends import use_backend
+from models.command_runner import run_command
+from models.state_cache import state_cache
+from models.tracing import RequestTrace, SlowRequestLog, start_trace, end_trace, current_trace, span, traced
+
+
+class TestSpans(unittest.TestCase):
+
+    def setUp(self):
+        token = start_trace('test', 'GET', '/test')
+        self.addCleanup(end_trace, token)
+        self.trace = current_trace()
+
+    def test_nested_spans_record_depth_and_errors(self):
+        @traced
+        def inner():
+            raise ValueError('no address')
+
+        with span('outer'):
+            with self.assertRaises(ValueError):
+                inner()
+
+        inner_span, outer_span = self.trace.spans
+        self.assertEqual((inner_span['name'], inner_span['depth']), ('test_tracing.inner', 1))
+        self.assertEqual(inner_span['error'], 'ValueError: no address')
+        self.assertEqual((outer_span['name'], outer_span['depth']), ('outer', 0))
+        self.assertNotIn('error', outer_span)
+        self.assertGreaterEqual(outer_span['duration_ms'], inner_span['duration_ms'])
+
+    def test_spans_beyond_the_limit_are_counted(self):
+        with patch('models.tracing.TRACE_MAX_SPANS', 2):
+            for _ in range(5):
+                with span('step'):
+                    pass
+        self.assertEqual(len(self.trace.spans), 2)
+        self.assertEqual(self.trace.dropped_spans, 3)
+
+    @patch('config.constants.TEST_SLEEP', ('sleep', '{}'), create=True)
+    def test_commands_are_spans(self):
+        run_command('TEST_SLEEP', '0')
+        self.assertEqual([(s['name'], s['kind']) for s in self.trace.spans], [('TEST_SLEEP', 'command')])
+
+
+class TestUntracedCode(unittest.TestCase):
+
+    def test_spans_outside_a_request_are_ignored(self):
+        self.assertIsNone(current_trace())
+        with span('background'):
+            pass
+        self.assertIsNone(current_trace())
+
+
+class TestSlowRequestLog(unittest.TestCase):
+
+    def finished(self, path, duration):
+        trace = RequestTrace(path, 'GET', path)
+        trace.finish(200)
+        trace.duration = duration
+        return trace
+
+    def test_only_slow_requests_are_kept(self):
+        log = SlowRequestLog(threshold=1.0, capacity=2)
+        with patch('builtins.print') as printed:
+            self.assertFalse(log.record(self.finished('/fast', 0.2)))
+            for path in ['/a', '/b', '/c']:
+                self.assertTrue(log.record(self.finished(path, 1.5)))
+        self.assertEqual(printed.call_count, 3)
+        self.assertEqual([trace['path'] for trace in log.recent()], ['/c', '/b'])
+        self.assertEqual([trace['path'] for trace in log.recent(1)], ['/c'])
+
+
+class TestTracedRequests(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MagicMock()
+        self.backend.active_wifi_connection.return_value = {'SSID': 'Box1', 'SIGNAL': '70', 'ACTIVE': 'yes'}
+        self.backend.ip_and_mask.return_value = {'ip': '192.168.1.10', 'mask': '24'}
+        # The GET routes are async views; route their backend reads to the sync mocks
+        for name in ('remembered_wifi_connections', 'active_wifi_connection', 'ip_and_mask'):
+            setattr(self.backend, f'{name}_async', AsyncMock(side_effect=getattr(self.backend, name)))
+        use_backend(self.backend)
+        self.addCleanup(use_backend, None)
+        state_cache.invalidate()
+        self.addCleanup(state_cache.invalidate)
+        self.log = SlowRequestLog(threshold=0.0, capacity=10)
+        patcher = patch('controllers.debug_controller.slow_requests', self.log)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        print_patcher = patch('builtins.print')
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+        self.client = app.test_client()
+
+    def test_slow_request_is_traced_by_span(self):
+        response = self.client.get('/wifi_ip_and_mask', headers={'X-Request-ID': 'req-42'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['X-Request-ID'], 'req-42')
+
+        traces = self.client.get('/debug/slow_requests?limit=1').get_json()['requests']
+        self.assertEqual(len(traces), 1)
+        trace = traces[0]
+        self.assertEqual((trace['request_id'], trace['path'], trace['status']), ('req-42', '/wifi_ip_and_mask', 200))
+        names = [s['name'] for s in trace['spans']]
+        for name in ['wifi_model.get_active_wifi_connection_with_tag_async',
+                     'network_model.get_ip_and_mask_with_tag_async', 'json.dumps']:
+            self.assertIn(name, names)
+
+    def test_invalid_request_id_is_replaced(self):
+        response = self.client.get('/device_mode', headers={'X-Request-ID': 'bad id; x=1'})
+        self.assertRegex(response.headers['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_invalid_limit(self):
+        self.assertEqual(self.client.get('/debug/slow_requests?limit=0').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
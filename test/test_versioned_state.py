@@ -0,0 +1,130 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from app import app
+from models.backends import use_backend
+from models.state_cache import state_cache
+from models.versioned_state import VersionedState, VersionedCollection, network_changed, connection_changed
+
+
+def network(ssid, signal, active='no'):
+    return {'SSID': ssid, 'SIGNAL': str(signal), 'ACTIVE': active}
+
+
+def make_state(removed_history=256):
+    return VersionedState({
+        'networks': VersionedCollection(lambda entry: entry['SSID'], network_changed),
+        'connections': VersionedCollection(lambda entry: entry['name'], connection_changed),
+    }, removed_history=removed_history)
+
+
+class TestVersionedState(unittest.TestCase):
+
+    def test_delta_lists_changed_and_removed_entries(self):
+        state = make_state()
+        version = state.update(networks=[network('A', 50), network('B', 60)],
+                               connections=[{'name': 'Home', 'autoconnect': 'yes'}])
+
+        newer = state.update(networks=[network('A', 50, 'yes'), network('C', 30)],
+                             connections=[{'name': 'Home', 'autoconnect': 'no'}])
+        self.assertGreater(newer, version)
+        self.assertEqual(state.delta(version), {
+            'changed': {'networks': [network('A', 50, 'yes'), network('C', 30)],
+                        'connections': [{'name': 'Home', 'autoconnect': 'no'}]},
+            'removed': {'networks': ['B'], 'connections': []},
+        })
+        self.assertEqual(state.delta(newer), {'changed': {'networks': [], 'connections': []},
+                                              'removed': {'networks': [], 'connections': []}})
+
+    def test_small_signal_changes_do_not_bump_the_version(self):
+        state = make_state()
+        version = state.update(networks=[network('A', 50)])
+        self.assertEqual(state.update(networks=[network('A', 53)]), version)
+
+        newer = state.update(networks=[network('A', 56)])
+        self.assertEqual(state.delta(version)['changed']['networks'], [network('A', 56)])
+        self.assertEqual(state.update(networks=[network('A', 59)]), newer)
+
+    def test_readded_entry_is_not_reported_removed(self):
+        state = make_state()
+        version = state.update(networks=[network('A', 50)])
+        state.update(networks=[])
+        state.update(networks=[network('A', 70)])
+        self.assertEqual(state.delta(version)['removed']['networks'], [])
+        self.assertEqual(state.delta(version)['changed']['networks'], [network('A', 70)])
+
+    def test_unknown_or_forgotten_versions_need_the_full_state(self):
+        state = make_state(removed_history=1)
+        version = state.update(networks=[network('A', 50), network('B', 50), network('C', 50)])
+        self.assertIsNone(state.delta(None))
+        self.assertIsNone(state.delta(version + 1))
+        self.assertIsNone(state.delta(version - 2))
+
+        state.update(networks=[network('C', 50)])
+        self.assertIsNone(state.delta(version))
+
+
+class TestWifiStateRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = MagicMock()
+        self.backend.remembered_wifi_connections.return_value = [{'name': 'Home', 'autoconnect': 'yes'}]
+        self.backend.ip_and_mask.return_value = {'ip': '192.168.1.10', 'mask': '24'}
+        use_backend(self.backend)
+        self.addCleanup(use_backend, None)
+        state_cache.invalidate()
+        self.addCleanup(state_cache.invalidate)
+        self.scanner = MagicMock()
+        self.scanner.get_results.return_value = ([
+            {'SSID': 'Box1', 'SIGNAL': '70', 'ACTIVE': 'yes', 'BSSID': 'B8:27:EB:00:00:01'},
+            {'SSID': 'Box2', 'SIGNAL': '40', 'ACTIVE': 'no', 'BSSID': 'B8:27:EB:00:00:02'},
+        ], 1000.0)
+        patches = [patch('controllers.wifi_controller.wifi_scanner', self.scanner),
+                   patch('controllers.wifi_controller.wifi_state_versions', make_state())]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = app.test_client()
+
+    def test_since_returns_only_changes(self):
+        full = self.client.get('/wifi_state').get_json()
+        self.assertTrue(full['full'])
+        self.assertEqual(len(full['networks']), 2)
+
+        self.scanner.get_results.return_value = ([
+            {'SSID': 'Box1', 'SIGNAL': '72', 'ACTIVE': 'yes', 'BSSID': 'B8:27:EB:00:00:01'},
+            {'SSID': 'Box2', 'SIGNAL': '20', 'ACTIVE': 'no', 'BSSID': 'B8:27:EB:00:00:02'},
+        ], 1015.0)
+        delta = self.client.get(f"/wifi_state?since={full['version']}").get_json()
+        self.assertFalse(delta['full'])
+        self.assertGreater(delta['version'], full['version'])
+        self.assertEqual(delta['changed']['networks'], [{'SSID': 'Box2', 'SIGNAL': '20', 'ACTIVE': 'no'}])
+        self.assertEqual(delta['changed']['connections'], [])
+        self.assertNotIn('networks', delta)
+        self.assertEqual(delta['network']['SIGNAL'], '72')
+
+    def test_access_points_of_one_network_are_one_entry(self):
+        self.scanner.get_results.return_value = ([
+            {'SSID': 'Box1', 'SIGNAL': '70', 'ACTIVE': 'no', 'BSSID': 'B8:27:EB:00:00:01'},
+            {'SSID': 'Box1', 'SIGNAL': '60', 'ACTIVE': 'no', 'BSSID': 'B8:27:EB:00:00:03'},
+        ], 1000.0)
+        full = self.client.get('/wifi_state').get_json()
+        self.assertEqual(full['networks'], [{'SSID': 'Box1', 'SIGNAL': '70', 'ACTIVE': 'no'}])
+
+        # Associated with the second access point of the network
+        self.scanner.get_results.return_value = ([
+            {'SSID': 'Box1', 'SIGNAL': '70', 'ACTIVE': 'no', 'BSSID': 'B8:27:EB:00:00:01'},
+            {'SSID': 'Box1', 'SIGNAL': '60', 'ACTIVE': 'yes', 'BSSID': 'B8:27:EB:00:00:03'},
+        ], 1015.0)
+        delta = self.client.get(f"/wifi_state?since={full['version']}").get_json()
+        self.assertEqual(delta['changed']['networks'], [{'SSID': 'Box1', 'SIGNAL': '60', 'ACTIVE': 'yes'}])
+        full = self.client.get('/wifi_state').get_json()
+        self.assertEqual(full['networks'], delta['changed']['networks'])
+
+    def test_invalid_since_returns_full_state(self):
+        self.assertTrue(self.client.get('/wifi_state?since=abc').get_json()['full'])
+        self.assertTrue(self.client.get('/wifi_state?since=1').get_json()['full'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,31 +1,81 @@
+import threading
 import unittest
 from unittest.mock import patch, MagicMock
+from app import app
+from models.backends import use_backend
+from models.backends.nmcli_backend import NmcliBackend
+from models.state_cache import state_cache
 from models.wifi_model import remembered_wifi_connections, scan_wifi_networks, get_active_wifi_connection, \
     connect_to_new_ap, disconnect_from_wifi_connection, connect_to_known_wifi_connection, \
-    delete_known_wifi_connection, set_autoconnect_on_to_wifi_connection, set_autoconnect_off_to_wifi_connection
+    delete_known_wifi_connection, set_autoconnect_on_to_wifi_connection, set_autoconnect_off_to_wifi_connection, \
+    get_wifi_state
+
+ACCESS_POINTS = [{'SSID': 'SSID1', 'SIGNAL': '70', 'ACTIVE': 'yes', 'BSSID': 'B8:27:EB:00:00:01'},
+                 {'SSID': 'Cafe', 'SIGNAL': '90', 'ACTIVE': 'no', 'BSSID': '00:11:22:33:44:55'}]
 
 
 class TestWifiModel(unittest.TestCase):
 
-    @patch('subprocess.run')
+    def setUp(self):
+        use_backend(NmcliBackend())
+        state_cache.invalidate()
+
+    @patch('models.backends.nmcli_backend.run_command')
     def test_remembered_wifi_connections(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0, stdout="Home:yes\nOffice:no")
+        mock_run.return_value = MagicMock(returncode=0, stdout="Home:yes:802-11-wireless\nETH:yes:802-3-ethernet\nOffice:no:802-11-wireless")
         expected_result = [{'name': 'Home', 'autoconnect': 'yes'}, {'name': 'Office', 'autoconnect': 'no'}]
         self.assertEqual(remembered_wifi_connections(), expected_result)
 
-    @patch('subprocess.run')
+    @patch('models.backends.nmcli_backend.run_command')
+    def test_remembered_wifi_connections_served_from_snapshot(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0, stdout="Home:yes:802-11-wireless")
+        remembered_wifi_connections()
+        remembered_wifi_connections()
+        mock_run.assert_called_once()
+
+    @patch('models.backends.nmcli_backend.run_command')
+    def test_mutation_invalidates_snapshot(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0, stdout="Home:yes:802-11-wireless")
+        remembered_wifi_connections()
+        set_autoconnect_off_to_wifi_connection("Home")
+        remembered_wifi_connections()
+        self.assertEqual(mock_run.call_count, 3)
+
+    @patch('models.backends.nmcli_backend.run_command')
     def test_scan_wifi_networks(self, mock_run):
-        mock_run.return_value = MagicMock(returncode=0, stdout="SSID1:70:yes:B8:27:EB:00:00:01\nSSID2:50:no:B8:27:EB:00:00:02")
+        mock_run.return_value = MagicMock(returncode=0, stdout="SSID1:70:yes:B8\\:27\\:EB\\:00\\:00\\:01\nSSID2:50:no:B8\\:27\\:EB\\:00\\:00\\:02")
         expected_result = [{'SSID': 'SSID1', 'SIGNAL': '70', 'ACTIVE': 'yes'}, {'SSID': 'SSID2', 'SIGNAL': '50', 'ACTIVE': 'no'}]
         self.assertEqual(scan_wifi_networks(), expected_result)
 
-    @patch('subprocess.run')
+    @patch('models.backends.nmcli_backend.run_command')
     def test_get_active_wifi_connection(self, mock_run):
         mock_run.return_value = MagicMock(returncode=0, stdout="SSID1:70:yes")
         expected_result = {'SSID': 'SSID1', 'SIGNAL': '70', 'ACTIVE': 'yes'}
         self.assertEqual(get_active_wifi_connection(), expected_result)
 
-    @patch('subprocess.run')
+    @patch('models.backends.nmcli_backend.run_command')
+    def test_get_wifi_state(self, mock_run):
+        mock_run.side_effect = [MagicMock(returncode=0, stdout="IP4.ADDRESS[1]: 10.42.0.2/24\n"),
+                                MagicMock(returncode=0, stdout="SSID1:yes:802-11-wireless")]
+        expected_result = {
+            'connections': [{'name': 'SSID1', 'autoconnect': 'yes'}],
+            'network': {'SSID': 'SSID1', 'SIGNAL': '70', 'ACTIVE': 'yes'},
+            'ip_and_mask': {'ip': '10.42.0.2', 'mask': '24'},
+            'networks': [{'SSID': 'SSID1', 'SIGNAL': '70', 'ACTIVE': 'yes'}],
+        }
+        self.assertEqual(get_wifi_state(ACCESS_POINTS), expected_result)
+        self.assertEqual(mock_run.call_count, 2)
+
+    @patch('models.backends.nmcli_backend.run_command')
+    def test_get_wifi_state_without_active_network(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0, stdout="Home:no")
+        state = get_wifi_state([dict(ACCESS_POINTS[1])])
+        self.assertEqual(state['network'], {})
+        self.assertIsNone(state['ip_and_mask'])
+        self.assertEqual(state['networks'], [])
+        mock_run.assert_called_once()
+
+    @patch('models.backends.nmcli_backend.run_command')
     def test_connect_to_new_ap(self, mock_run):
         mock_run.return_value = MagicMock(returncode=0)
         ssid = "TestSSID"
@@ -33,35 +83,52 @@ class TestWifiModel(unittest.TestCase):
         expected_result = {'message': f"Connected to Wi-Fi network '{ssid}' successfully."}
         self.assertEqual(connect_to_new_ap(ssid, password), expected_result)
 
-    @patch('subprocess.run')
+    @patch('models.backends.nmcli_backend.run_command')
+    def test_connect_to_new_ap_passes_quotes_verbatim(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0)
+        connect_to_new_ap("Bob's Wi-Fi", "it's secret")
+        mock_run.assert_called_once_with('NMCLI_CONNECT_TO_NEW_AP', "Bob's Wi-Fi", "it's secret")
+
+    def test_new_ap_retry_with_another_password_is_a_new_job(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        client = app.test_client()
+        with patch('controllers.wifi_controller.connect_to_new_ap', side_effect=lambda *args: release.wait(5)):
+            wrong = client.post('/connect_to_new_ap', json={'ssid': 'Cafe', 'password': 'wrong'}).get_json()
+            right = client.post('/connect_to_new_ap', json={'ssid': 'Cafe', 'password': 'right'}).get_json()
+            again = client.post('/connect_to_new_ap', json={'ssid': 'Cafe', 'password': 'right'}).get_json()
+        self.assertNotEqual(wrong['job_id'], right['job_id'])
+        self.assertEqual(right['job_id'], again['job_id'])
+
+    @patch('models.backends.nmcli_backend.run_command')
     def test_disconnect_from_wifi_connection(self, mock_run):
         mock_run.return_value = MagicMock(returncode=0)
         connection_name = "TestConnection"
         disconnect_from_wifi_connection(connection_name)
         mock_run.assert_called_once()
 
-    @patch('subprocess.run')
+    @patch('models.backends.nmcli_backend.run_command')
     def test_connect_to_known_wifi_connection(self, mock_run):
         mock_run.return_value = MagicMock(returncode=0)
         connection_name = "TestConnection"
         connect_to_known_wifi_connection(connection_name)
         mock_run.assert_called_once()
 
-    @patch('subprocess.run')
+    @patch('models.backends.nmcli_backend.run_command')
     def test_delete_known_wifi_connection(self, mock_run):
         mock_run.return_value = MagicMock(returncode=0)
         connection_name = "TestConnection"
         delete_known_wifi_connection(connection_name)
         mock_run.assert_called_once()
 
-    @patch('subprocess.run')
+    @patch('models.backends.nmcli_backend.run_command')
     def test_set_autoconnect_on_to_wifi_connection(self, mock_run):
         mock_run.return_value = MagicMock(returncode=0)
         connection_name = "TestConnection"
         set_autoconnect_on_to_wifi_connection(connection_name)
         mock_run.assert_called_once()
 
-    @patch('subprocess.run')
+    @patch('models.backends.nmcli_backend.run_command')
     def test_set_autoconnect_off_to_wifi_connection(self, mock_run):
         mock_run.return_value = MagicMock(returncode=0)
         connection_name = "TestConnection"
@@ -0,0 +1,118 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from models.state_cache import SnapshotCache
+from models.wifi_scanner import WifiScanner
+
+
+NETWORKS = [{'SSID': 'SSID1', 'SIGNAL': '70', 'ACTIVE': 'yes'}]
+
+
+class TestWifiScanner(unittest.TestCase):
+
+    def make_scanner(self, scan, interval=60, idle_after=60, idle_interval=600):
+        scanner = WifiScanner(scan, interval, idle_after, idle_interval)
+        self.addCleanup(scanner.stop)
+        return scanner
+
+    def test_get_results_returns_networks_and_timestamp(self):
+        scanner = self.make_scanner(MagicMock(return_value=NETWORKS))
+        networks, scanned_at = scanner.get_results()
+        self.assertEqual(networks, NETWORKS)
+        self.assertAlmostEqual(scanned_at, time.time(), delta=5)
+
+    def test_get_results_served_from_memory(self):
+        scan = MagicMock(return_value=NETWORKS)
+        scanner = self.make_scanner(scan)
+        scanner.get_results()
+        scanner.get_results()
+        self.assertEqual(scan.call_count, 1)
+
+    def test_rescan_runs_fresh_scan(self):
+        scan = MagicMock(return_value=NETWORKS)
+        scanner = self.make_scanner(scan)
+        scanner.get_results()
+        scanner.get_results(rescan=True)
+        scan.assert_called_with(True)
+
+    def test_concurrent_rescans_are_deduplicated(self):
+        calls = []
+
+        def slow_scan(rescan):
+            calls.append(rescan)
+            time.sleep(0.1)
+            return NETWORKS
+
+        scanner = WifiScanner(slow_scan, 60, 60, 600)
+        threads = [threading.Thread(target=scanner.scan_now, args=(True,)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+
+    def test_rescan_during_plain_scan_runs_its_own(self):
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def scan(rescan):
+            calls.append(rescan)
+            if not rescan:
+                started.set()
+                release.wait(5)
+            return NETWORKS
+
+        scanner = WifiScanner(scan, 60, 60, 600)
+        background = threading.Thread(target=scanner.scan_now)
+        background.start()
+        started.wait(5)
+        request = threading.Thread(target=scanner.scan_now, args=(True,))
+        request.start()
+        time.sleep(0.05)
+        self.assertEqual(calls, [False])
+        release.set()
+        background.join()
+        request.join()
+
+        self.assertEqual(calls, [False, True])
+
+    def test_failed_first_scan_raises(self):
+        scanner = self.make_scanner(MagicMock(side_effect=RuntimeError("Error")))
+        with self.assertRaises(RuntimeError):
+            scanner.get_results()
+
+    def test_failed_scan_keeps_previous_results(self):
+        scanner = WifiScanner(MagicMock(side_effect=[NETWORKS, RuntimeError("Error")]), 60, 60, 600)
+        scanner.scan_now()
+        scanner.scan_now()
+        self.assertEqual(scanner._access_points, NETWORKS)
+
+    def test_results_taken_before_invalidation_are_refreshed(self):
+        cache = SnapshotCache(ttl=60)
+        scan = MagicMock(return_value=NETWORKS)
+        scanner = WifiScanner(scan, 60, 60, 600, invalidated_by=cache)
+        with patch.object(scanner, 'start'):
+            scanner.get_results()
+            cache.invalidate()
+            scanner.get_results()
+        self.assertEqual(scan.call_count, 2)
+
+    def test_idle_scanner_backs_off(self):
+        scanner = WifiScanner(MagicMock(return_value=NETWORKS), interval=1, idle_after=0, idle_interval=30)
+        time.sleep(0.01)
+        self.assertEqual(scanner._current_interval(), 30)
+
+    def test_listener_notified_after_scan(self):
+        listener = MagicMock()
+        scanner = WifiScanner(MagicMock(return_value=NETWORKS), 60, 60, 600)
+        scanner.subscribe(listener)
+        scanner.scan_now()
+        listener.assert_called_once()
+        self.assertEqual(listener.call_args[0][0], NETWORKS)
+
+
+if __name__ == '__main__':
+    unittest.main()